@@ -9,7 +9,6 @@ from fastapi import FastAPI, Request
 from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
-from fastapi.staticfiles import StaticFiles
 
 from fastapi.responses import HTMLResponse
 from pydantic import ValidationError
@@ -20,16 +19,21 @@ from slowapi.util import get_remote_address
 from starlette import status
 from starlette.responses import JSONResponse
 
-from src.core.templates import templates
+from src.config.settings import settings
+from src.core.static_assets import static_assets, PrecompressedStaticFiles
+from src.core.page_cache import page_cache
 from src.database.postgres import create_tables, engine
 from src.database.redis_client import redis_manager
+from src.services.async_email_service import async_email_service
 from src.endpoints import webinars
 from src.endpoints.auth import auth_router
 from src.endpoints.comments import comments_router
 from src.endpoints.likes import likes_router
+from src.endpoints.media import media_router
 from src.endpoints.payments import payments_router
 from src.endpoints.projects import projects_router
 from src.endpoints.websocket import projects_web_router
+from src.services.payment_provider import stripe_provider
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -54,6 +58,18 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         print(f"❌ Ошибка подключения к Redis: {e}")
 
+    try:
+        # Пул async SMTP для писем прямо из запроса (коды подтверждения)
+        await async_email_service.start()
+    except Exception as e:
+        print(f"❌ Ошибка запуска async email: {e}")
+
+    try:
+        # Манифест статики (собирается, если сборки нет или исходники новее)
+        static_assets.load()
+    except Exception as e:
+        print(f"❌ Ошибка сборки статики: {e}")
+
     try:
         # 2. Создание таблиц (для разработки по умолчанию)
         environment = os.getenv("ENVIRONMENT", "development")  # ✅ По умолчанию development
@@ -77,6 +93,11 @@ async def lifespan(app: FastAPI):
     # Shutdown events
     print("🛑 Завершение работы приложения...")
 
+    try:
+        await async_email_service.close()
+    except Exception as e:
+        print(f"❌ Ошибка закрытия async email: {e}")
+
     try:
         # Закрытие Redis подключения
         await redis_manager.close_redis()
@@ -84,6 +105,12 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         print(f"⚠️  Ошибка при отключении Redis: {e}")
 
+    try:
+        # Закрытие пула соединений со Stripe
+        await stripe_provider.close()
+    except Exception as e:
+        print(f"⚠️  Ошибка при закрытии клиента Stripe: {e}")
+
     try:
         # Закрытие подключения к БД
         await engine.dispose()
@@ -222,52 +249,55 @@ async def not_found_handler(request: Request, exc: Exception):
             content={"detail": "Endpoint not found"}
         )
     # Если запрос к странице - возвращаем HTML
-    return templates.TemplateResponse("404.html", {"request": request}, status_code=404)
+    return page_cache.render(request, "404.html", status_code=404)
 
 # ========== STATIC FILES & TEMPLATES ==========
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 STATIC_DIR = os.path.join(BASE_DIR, "src", "static")
 
-app.mount("/static", StaticFiles(directory="src/static"), name="static")
+# Файлы с хешем в имени - immutable кэш и готовые .br/.gz версии
+app.mount(settings.STATIC_URL, PrecompressedStaticFiles(assets=static_assets), name="static")
+
+# Страницы ниже зависят только от шаблона - отдаются из кэша отрисовки
 
 @app.get("/", response_class=HTMLResponse)
 async def read_root(request: Request):
     """Главная страница - HTML"""
-    return templates.TemplateResponse("index.html", {"request": request})
+    return page_cache.render(request, "index.html")
 
 @app.get("/dashboard", response_class=HTMLResponse)
 async def dashboard(request: Request):
     """Дашборд - HTML"""
-    return templates.TemplateResponse("dashboard.html", {"request": request})
+    return page_cache.render(request, "dashboard.html")
 
 @app.get("/register", response_class=HTMLResponse)
 async def register_page(request: Request):
     """Страница регистрации - HTML"""
-    return templates.TemplateResponse("auth/register.html", {"request": request})  # ← auth/register.html
+    return page_cache.render(request, "auth/register.html")  # ← auth/register.html
 
 @app.get("/login", response_class=HTMLResponse)
 async def login_page(request: Request):
     """Страница входа - HTML"""
-    return templates.TemplateResponse("auth/login.html", {"request": request})  # ← auth/login.html
+    return page_cache.render(request, "auth/login.html")  # ← auth/login.html
 
 @app.get("/verify-2fa", response_class=HTMLResponse)
 async def verify_2fa_page(request: Request):
     """Страница подтверждения 2FA"""
-    return templates.TemplateResponse("auth/verify_2fa.html", {"request": request})
+    return page_cache.render(request, "auth/verify_2fa.html")
 
 # Дополнительные HTML страницы
 @app.get("/projects-page", response_class=HTMLResponse)
 async def projects_page(request: Request):
-    return templates.TemplateResponse("projects.html", {"request": request})
+    return page_cache.render(request, "projects.html")
 
 @app.get("/webinars-page", response_class=HTMLResponse)
 async def webinars_page(request: Request):
-    return templates.TemplateResponse("webinars.html", {"request": request})
+    return page_cache.render(request, "webinars.html")
 
 @app.get("/comments-page", response_class=HTMLResponse)
 async def comments_page(request: Request):
-    return templates.TemplateResponse("comments.html", {"request": request})
+    return page_cache.render(request, "comments.html")
 
 
 # ========== ПОТОМ API ЭНДПОИНТЫ ==========
@@ -343,6 +373,7 @@ app.include_router(projects_router)
 app.include_router(projects_web_router)
 app.include_router(comments_router)
 app.include_router(likes_router)
+app.include_router(media_router)
 app.include_router(webinars.webinar_router)
 
 print("🔍 Зарегистрированные пути:")
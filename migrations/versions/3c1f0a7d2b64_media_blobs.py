@@ -0,0 +1,47 @@
+"""media blobs
+
+Revision ID: 3c1f0a7d2b64
+Revises: 9513bbb8749b
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3c1f0a7d2b64'
+down_revision: Union[str, Sequence[str], None] = '9513bbb8749b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('media_blobs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('sha256', sa.String(length=64), nullable=False),
+    sa.Column('storage_key', sa.String(), nullable=False),
+    sa.Column('file_url', sa.String(), nullable=False),
+    sa.Column('file_type', postgresql.ENUM('IMAGE', 'VIDEO', 'DOCUMENT', 'AUDIO', 'GIF', 'OTHER', name='mediatype', create_type=False), nullable=True),
+    sa.Column('file_size', sa.Integer(), nullable=True),
+    sa.Column('mime_type', sa.String(), nullable=True),
+    sa.Column('ref_count', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('last_referenced_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_media_blobs_id'), 'media_blobs', ['id'], unique=False)
+    op.create_index(op.f('ix_media_blobs_sha256'), 'media_blobs', ['sha256'], unique=True)
+    op.create_index(op.f('ix_media_blobs_file_url'), 'media_blobs', ['file_url'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_media_blobs_file_url'), table_name='media_blobs')
+    op.drop_index(op.f('ix_media_blobs_sha256'), table_name='media_blobs')
+    op.drop_index(op.f('ix_media_blobs_id'), table_name='media_blobs')
+    op.drop_table('media_blobs')
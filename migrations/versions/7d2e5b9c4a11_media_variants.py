@@ -0,0 +1,30 @@
+"""media variants
+
+Revision ID: 7d2e5b9c4a11
+Revises: 3c1f0a7d2b64
+Create Date: 2026-10-19 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7d2e5b9c4a11'
+down_revision: Union[str, Sequence[str], None] = '3c1f0a7d2b64'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('project_media', sa.Column('variants', sa.JSON(), nullable=True))
+    op.add_column('post_media', sa.Column('variants', sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('post_media', 'variants')
+    op.drop_column('project_media', 'variants')
@@ -0,0 +1,36 @@
+"""project statistics columns
+
+Revision ID: a4d8e2b6c153
+Revises: f1c7a3e9b842
+Create Date: 2026-10-19 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a4d8e2b6c153'
+down_revision: Union[str, Sequence[str], None] = 'f1c7a3e9b842'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('projects', sa.Column('donations_count', sa.Integer(), nullable=True))
+    op.add_column('projects', sa.Column('avg_donation', sa.Float(), nullable=True))
+    op.add_column('projects', sa.Column('max_donation', sa.Float(), nullable=True))
+    op.add_column('projects', sa.Column('completion_percentage', sa.Float(), nullable=True))
+    op.create_index('ix_donations_updated_at', 'donations', ['updated_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_donations_updated_at', table_name='donations')
+    op.drop_column('projects', 'completion_percentage')
+    op.drop_column('projects', 'max_donation')
+    op.drop_column('projects', 'avg_donation')
+    op.drop_column('projects', 'donations_count')
@@ -0,0 +1,32 @@
+"""donation idempotency key
+
+Revision ID: a4f9c2e7d318
+Revises: e8c2f4b9a573
+Create Date: 2026-10-19 23:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a4f9c2e7d318'
+down_revision: Union[str, Sequence[str], None] = 'e8c2f4b9a573'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('donations', sa.Column('idempotency_key', sa.String(length=255), nullable=True))
+    op.create_unique_constraint(
+        'uq_donations_donor_idempotency_key', 'donations', ['donor_id', 'idempotency_key']
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint('uq_donations_donor_idempotency_key', 'donations', type_='unique')
+    op.drop_column('donations', 'idempotency_key')
@@ -0,0 +1,28 @@
+"""email queue claimed_at
+
+Revision ID: b7e3f5a1d924
+Revises: a4d8e2b6c153
+Create Date: 2026-10-19 19:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7e3f5a1d924'
+down_revision: Union[str, Sequence[str], None] = 'a4d8e2b6c153'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('email_queue', sa.Column('claimed_at', sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('email_queue', 'claimed_at')
@@ -0,0 +1,33 @@
+"""email queue due index
+
+Revision ID: c9f4a6b2e357
+Revises: b7e3f5a1d924
+Create Date: 2026-10-19 20:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c9f4a6b2e357'
+down_revision: Union[str, Sequence[str], None] = 'b7e3f5a1d924'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Старые письма без срока отправки становятся доступны сразу
+    op.execute("UPDATE email_queue SET scheduled_for = COALESCE(created_at, now()) WHERE scheduled_for IS NULL")
+    op.create_index(
+        'ix_email_queue_due', 'email_queue', ['status', 'scheduled_for', 'priority'], unique=False,
+        postgresql_where=sa.text("status IN ('pending', 'retrying')")
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_email_queue_due', table_name='email_queue')
@@ -0,0 +1,28 @@
+"""transactions status index
+
+Revision ID: d3a9f1b7c265
+Revises: c8d4a2f6e913
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd3a9f1b7c265'
+down_revision: Union[str, Sequence[str], None] = 'c8d4a2f6e913'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_transactions_status_created_at', 'transactions', ['status', 'created_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_transactions_status_created_at', table_name='transactions')
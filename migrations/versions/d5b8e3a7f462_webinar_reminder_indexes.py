@@ -0,0 +1,33 @@
+"""webinar reminder indexes
+
+Revision ID: d5b8e3a7f462
+Revises: c9f4a6b2e357
+Create Date: 2026-10-19 21:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd5b8e3a7f462'
+down_revision: Union[str, Sequence[str], None] = 'c9f4a6b2e357'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_webinars_status_scheduled_at', 'webinars', ['status', 'scheduled_at'], unique=False)
+    op.create_index(
+        'ix_webinar_registrations_reminder_pending', 'webinar_registrations', ['webinar_id', 'id'], unique=False,
+        postgresql_where=sa.text("reminder_sent = false")
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_webinar_registrations_reminder_pending', table_name='webinar_registrations')
+    op.drop_index('ix_webinars_status_scheduled_at', table_name='webinars')
@@ -0,0 +1,61 @@
+"""donation rollups
+
+Revision ID: e6b2c9d4f731
+Revises: d3a9f1b7c265
+Create Date: 2026-10-19 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e6b2c9d4f731'
+down_revision: Union[str, Sequence[str], None] = 'd3a9f1b7c265'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'job_watermarks',
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('watermark_at', sa.DateTime(), nullable=True),
+        sa.Column('watermark_id', sa.Integer(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('name')
+    )
+    op.create_table(
+        'project_donation_rollups',
+        sa.Column('project_id', sa.Integer(), nullable=False),
+        sa.Column('granularity', sa.String(), nullable=False),
+        sa.Column('bucket_start', sa.DateTime(), nullable=False),
+        sa.Column('donations_count', sa.Integer(), nullable=False),
+        sa.Column('total_amount', sa.Float(), nullable=False),
+        sa.Column('max_amount', sa.Float(), nullable=False),
+        sa.Column('unique_donors', sa.Integer(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['project_id'], ['projects.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('project_id', 'granularity', 'bucket_start')
+    )
+    op.create_table(
+        'project_donation_rollup_donors',
+        sa.Column('project_id', sa.Integer(), nullable=False),
+        sa.Column('granularity', sa.String(), nullable=False),
+        sa.Column('bucket_start', sa.DateTime(), nullable=False),
+        sa.Column('donor_id', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['project_id'], ['projects.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('project_id', 'granularity', 'bucket_start', 'donor_id')
+    )
+    op.create_index('ix_transactions_completed_at_id', 'transactions', ['completed_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_transactions_completed_at_id', table_name='transactions')
+    op.drop_table('project_donation_rollup_donors')
+    op.drop_table('project_donation_rollups')
+    op.drop_table('job_watermarks')
@@ -0,0 +1,39 @@
+"""webinar reminder offsets
+
+Revision ID: e8c2f4b9a573
+Revises: d5b8e3a7f462
+Create Date: 2026-10-19 22:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e8c2f4b9a573'
+down_revision: Union[str, Sequence[str], None] = 'd5b8e3a7f462'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('webinar_registrations', sa.Column('last_reminder_offset', sa.Integer(), nullable=True))
+    # Уже отправленные напоминания были часовыми
+    op.execute("UPDATE webinar_registrations SET last_reminder_offset = 60 WHERE reminder_sent = true")
+    op.drop_index('ix_webinar_registrations_reminder_pending', table_name='webinar_registrations')
+    op.create_index(
+        'ix_webinar_registrations_webinar_id_id', 'webinar_registrations', ['webinar_id', 'id'], unique=False
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_webinar_registrations_webinar_id_id', table_name='webinar_registrations')
+    op.create_index(
+        'ix_webinar_registrations_reminder_pending', 'webinar_registrations', ['webinar_id', 'id'], unique=False,
+        postgresql_where=sa.text("reminder_sent = false")
+    )
+    op.drop_column('webinar_registrations', 'last_reminder_offset')
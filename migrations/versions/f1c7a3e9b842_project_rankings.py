@@ -0,0 +1,32 @@
+"""project rankings
+
+Revision ID: f1c7a3e9b842
+Revises: e6b2c9d4f731
+Create Date: 2026-10-19 17:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f1c7a3e9b842'
+down_revision: Union[str, Sequence[str], None] = 'e6b2c9d4f731'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('projects', sa.Column('ranking_position', sa.Integer(), nullable=True))
+    op.add_column('projects', sa.Column('popularity_score', sa.Float(), nullable=True))
+    op.create_index(op.f('ix_projects_ranking_position'), 'projects', ['ranking_position'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_projects_ranking_position'), table_name='projects')
+    op.drop_column('projects', 'popularity_score')
+    op.drop_column('projects', 'ranking_position')
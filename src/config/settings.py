@@ -1,5 +1,6 @@
 # src/config/settings.py
 import os
+import tempfile
 from pathlib import Path
 
 from dotenv import load_dotenv
@@ -40,6 +41,47 @@ class Settings:
     SMTP_FROM_EMAIL: str = os.getenv("SMTP_FROM_EMAIL", "")
     SMTP_USE_SSL: bool = os.getenv("SMTP_USE_SSL", "true").lower() == "true"
     SMTP_USE_TLS: bool = os.getenv("SMTP_USE_TLS", "false").lower() == "true"
+    # Пул постоянных SMTP соединений: размер (= параллельные отправки), проверка
+    # простаивающего соединения через NOOP и переоткрытие после N писем
+    SMTP_POOL_SIZE: int = int(os.getenv("SMTP_POOL_SIZE", "4"))
+    SMTP_CONNECTION_MAX_IDLE_SECONDS: int = int(os.getenv("SMTP_CONNECTION_MAX_IDLE_SECONDS", "30"))
+    SMTP_CONNECTION_MAX_MESSAGES: int = int(os.getenv("SMTP_CONNECTION_MAX_MESSAGES", "100"))
+    # Массовые рассылки: получателей в одной Celery задаче, процессов для
+    # рендера шаблонов и сборки MIME и повторов при временных ошибках SMTP
+    EMAIL_BULK_CHUNK_SIZE: int = int(os.getenv("EMAIL_BULK_CHUNK_SIZE", "500"))
+    EMAIL_BULK_MAX_RETRIES: int = int(os.getenv("EMAIL_BULK_MAX_RETRIES", "3"))
+    EMAIL_RENDER_PROCESS_WORKERS: int = int(os.getenv("EMAIL_RENDER_PROCESS_WORKERS", str(os.cpu_count() or 2)))
+    # Напоминания о вебинарах: регистраций в одной пачке (запрос + INSERT + UPDATE + коммит)
+    WEBINAR_REMINDER_BATCH_SIZE: int = int(os.getenv("WEBINAR_REMINDER_BATCH_SIZE", "1000"))
+    # За сколько минут до начала напоминать (через планировщик в Redis), сколько
+    # напоминаний диспетчер забирает за один запуск и на сколько секунд вперед
+    # ставит отложенные задачи (меньше visibility_timeout брокера Redis - 1 час)
+    WEBINAR_REMINDER_OFFSETS_MINUTES: list = [
+        int(offset) for offset in os.getenv("WEBINAR_REMINDER_OFFSETS_MINUTES", "1440,60,10").split(",")
+    ]
+    WEBINAR_REMINDER_DISPATCH_LIMIT: int = int(os.getenv("WEBINAR_REMINDER_DISPATCH_LIMIT", "100"))
+    WEBINAR_REMINDER_LOOKAHEAD_SECONDS: int = int(os.getenv("WEBINAR_REMINDER_LOOKAHEAD_SECONDS", "600"))
+    # Шаблоны писем: каталог байткода Jinja (общий для воркеров; пусто - без кэша)
+    # и проверка изменений файлов шаблонов при каждом рендере (нужна в разработке)
+    TEMPLATE_BYTECODE_CACHE_DIR: str = os.getenv(
+        "TEMPLATE_BYTECODE_CACHE_DIR", os.path.join(tempfile.gettempdir(), "crowdplatform-jinja-cache")
+    )
+    TEMPLATE_AUTO_RELOAD: bool = os.getenv(
+        "TEMPLATE_AUTO_RELOAD", str(os.getenv("ENVIRONMENT", "development") == "development")
+    ).lower() == "true"
+    # Быстрая полоса писем из запроса (коды подтверждения): async SMTP пул в lifespan
+    SMTP_ASYNC_POOL_SIZE: int = int(os.getenv("SMTP_ASYNC_POOL_SIZE", "2"))
+    SMTP_ASYNC_TIMEOUT_SECONDS: float = float(os.getenv("SMTP_ASYNC_TIMEOUT_SECONDS", "10"))
+    # Очередь email: размер захватываемой пачки, время работы одного запуска,
+    # максимум параллельных обработчиков и таймаут зависшего захвата
+    EMAIL_QUEUE_BATCH_SIZE: int = int(os.getenv("EMAIL_QUEUE_BATCH_SIZE", "50"))
+    EMAIL_QUEUE_TIME_BUDGET_SECONDS: int = int(os.getenv("EMAIL_QUEUE_TIME_BUDGET_SECONDS", "50"))
+    EMAIL_QUEUE_MAX_PARALLEL: int = int(os.getenv("EMAIL_QUEUE_MAX_PARALLEL", "4"))
+    EMAIL_QUEUE_CLAIM_TIMEOUT_SECONDS: int = int(os.getenv("EMAIL_QUEUE_CLAIM_TIMEOUT_SECONDS", "300"))
+    # Повтор письма после временной ошибки SMTP: экспоненциальная задержка с
+    # разбросом (база * 2^попытка, не больше максимума)
+    EMAIL_RETRY_BASE_SECONDS: int = int(os.getenv("EMAIL_RETRY_BASE_SECONDS", "60"))
+    EMAIL_RETRY_MAX_SECONDS: int = int(os.getenv("EMAIL_RETRY_MAX_SECONDS", "3600"))
 
     # Celery
     CELERY_BROKER_URL = os.getenv("CELERY_BROKER_URL", f"redis://{REDIS_HOST}:{REDIS_PORT}/0")
@@ -48,10 +90,43 @@ class Settings:
     # Template settings
     TEMPLATES_DIR: Path = Path(__file__).parent.parent / "templates"
     STATIC_DIR: Path = Path(__file__).parent.parent / "static"
+    # Результат сборки статики: файлы с хешем в имени, .gz/.br и manifest.json
+    STATIC_BUILD_DIR: Path = Path(os.getenv("STATIC_BUILD_DIR", str(Path(__file__).parent.parent / "static_build")))
+    STATIC_URL: str = os.getenv("STATIC_URL", "/static")
 
     # Platform settings
     PLATFORM_URL: str = os.getenv("PLATFORM_URL", "https://localhost:8000")
 
+    # Media storage
+    MEDIA_ROOT: str = os.getenv("MEDIA_ROOT", "media")
+    MEDIA_URL: str = os.getenv("MEDIA_URL", "/media")
+    MEDIA_BLOB_GC_GRACE_MINUTES: int = int(os.getenv("MEDIA_BLOB_GC_GRACE_MINUTES", "60"))
+    # Возобновляемые загрузки
+    UPLOAD_SESSION_TTL_SECONDS: int = int(os.getenv("UPLOAD_SESSION_TTL_SECONDS", "86400"))
+    UPLOAD_MAX_CHUNK_SIZE: int = int(os.getenv("UPLOAD_MAX_CHUNK_SIZE", str(8 * 1024 * 1024)))
+    # Внутренний префикс nginx для X-Accel-Redirect (пусто - файлы отдает приложение)
+    MEDIA_ACCEL_REDIRECT_PREFIX: str = os.getenv("MEDIA_ACCEL_REDIRECT_PREFIX", "")
+    MEDIA_PROCESS_WORKERS: int = int(os.getenv("MEDIA_PROCESS_WORKERS", str(os.cpu_count() or 2)))
+
+    # Хранилище блобов: "local" (MEDIA_ROOT) или "s3" (S3-совместимое: AWS, MinIO)
+    STORAGE_BACKEND: str = os.getenv("STORAGE_BACKEND", "local")
+    STORAGE_PRESIGN_EXPIRES_SECONDS: int = int(os.getenv("STORAGE_PRESIGN_EXPIRES_SECONDS", "900"))
+    S3_ENDPOINT_URL: str = os.getenv("S3_ENDPOINT_URL", "https://s3.amazonaws.com")
+    S3_BUCKET: str = os.getenv("S3_BUCKET", "")
+    S3_REGION: str = os.getenv("S3_REGION", "us-east-1")
+    S3_ACCESS_KEY_ID: str = os.getenv("S3_ACCESS_KEY_ID", "")
+    S3_SECRET_ACCESS_KEY: str = os.getenv("S3_SECRET_ACCESS_KEY", "")
+    # "path" для MinIO и большинства S3-совместимых серверов, "virtual" для AWS
+    S3_ADDRESSING_STYLE: str = os.getenv("S3_ADDRESSING_STYLE", "path")
+    # Публичный адрес (CDN) для ссылок на объекты; пусто - адрес бакета
+    S3_PUBLIC_URL: str = os.getenv("S3_PUBLIC_URL", "")
+
+    # Обработка видео (ffmpeg)
+    FFMPEG_BIN: str = os.getenv("FFMPEG_BIN", "ffmpeg")
+    FFPROBE_BIN: str = os.getenv("FFPROBE_BIN", "ffprobe")
+    FFMPEG_MAX_PROCESSES: int = int(os.getenv("FFMPEG_MAX_PROCESSES", "2"))
+    FFMPEG_TIMEOUT_SECONDS: int = int(os.getenv("FFMPEG_TIMEOUT_SECONDS", "1800"))
+
     # LiveKit настройки (опциональные)
     LIVEKIT_HOST = os.getenv("LIVEKIT_HOST", default="http://localhost:7880")
     LIVEKIT_API_KEY = os.getenv("LIVEKIT_API_KEY", default="mock_api_key")
@@ -64,6 +139,41 @@ class Settings:
     STRIPE_SECRET_KEY = os.getenv("STRIPE_SECRET_KEY", "")
     STRIPE_PUBLISHABLE_KEY = os.getenv("STRIPE_PUBLISHABLE_KEY", "")
     STRIPE_WEBHOOK_SECRET = os.getenv("STRIPE_WEBHOOK_SECRET", "")
+    # Адрес API (пусто - api.stripe.com; для локального фейка: http://127.0.0.1:12111)
+    STRIPE_API_BASE: str = os.getenv("STRIPE_API_BASE", "")
+    STRIPE_TIMEOUT_SECONDS: float = float(os.getenv("STRIPE_TIMEOUT_SECONDS", "10"))
+    STRIPE_MAX_NETWORK_RETRIES: int = int(os.getenv("STRIPE_MAX_NETWORK_RETRIES", "2"))
+    STRIPE_MAX_CONNECTIONS: int = int(os.getenv("STRIPE_MAX_CONNECTIONS", "20"))
+    # Доля повторов от числа запросов, которую разрешено потратить при сбоях Stripe
+    STRIPE_RETRY_BUDGET_RATIO: float = float(os.getenv("STRIPE_RETRY_BUDGET_RATIO", "0.2"))
+    # Входящий ящик вебхуков: размер пачки, число пачек за запуск, попытки и таймаут захвата
+    WEBHOOK_INBOX_BATCH_SIZE: int = int(os.getenv("WEBHOOK_INBOX_BATCH_SIZE", "100"))
+    WEBHOOK_INBOX_MAX_BATCHES: int = int(os.getenv("WEBHOOK_INBOX_MAX_BATCHES", "10"))
+    WEBHOOK_INBOX_MAX_ATTEMPTS: int = int(os.getenv("WEBHOOK_INBOX_MAX_ATTEMPTS", "5"))
+    WEBHOOK_INBOX_CLAIM_TIMEOUT_SECONDS: int = int(os.getenv("WEBHOOK_INBOX_CLAIM_TIMEOUT_SECONDS", "300"))
+    # Idempotency-Key: срок хранения ответа, минимальная блокировка выполнения (для вызовов
+    # Stripe продлевается до худшей длительности запроса с повторами) и ожидание параллельного дубля
+    IDEMPOTENCY_TTL_SECONDS: int = int(os.getenv("IDEMPOTENCY_TTL_SECONDS", "86400"))
+    IDEMPOTENCY_LOCK_SECONDS: int = int(os.getenv("IDEMPOTENCY_LOCK_SECONDS", "30"))
+    IDEMPOTENCY_WAIT_SECONDS: float = float(os.getenv("IDEMPOTENCY_WAIT_SECONDS", "10"))
+    # Сверка зависших платежей: возраст pending транзакции, размер пачки и число пачек за запуск
+    RECONCILE_MIN_AGE_MINUTES: int = int(os.getenv("RECONCILE_MIN_AGE_MINUTES", "30"))
+    RECONCILE_BATCH_SIZE: int = int(os.getenv("RECONCILE_BATCH_SIZE", "100"))
+    RECONCILE_MAX_BATCHES: int = int(os.getenv("RECONCILE_MAX_BATCHES", "20"))
+    # Неоплаченный платеж старше этого срока отменяется, донат переводится в failed
+    RECONCILE_ABANDON_HOURS: int = int(os.getenv("RECONCILE_ABANDON_HOURS", "24"))
+    # Список платежей Stripe запрашивается за интервал создания пачки, если он не длиннее окна
+    RECONCILE_LIST_WINDOW_HOURS: int = int(os.getenv("RECONCILE_LIST_WINDOW_HOURS", "6"))
+    RECONCILE_LIST_SLACK_SECONDS: int = int(os.getenv("RECONCILE_LIST_SLACK_SECONDS", "600"))
+    # Агрегаты донатов по часам/дням: размер пачки, число пачек за запуск и отставание
+    # от текущего времени (транзакции проведения, еще не закоммиченные, не пропускаются)
+    DONATION_ROLLUP_BATCH_SIZE: int = int(os.getenv("DONATION_ROLLUP_BATCH_SIZE", "1000"))
+    DONATION_ROLLUP_MAX_BATCHES: int = int(os.getenv("DONATION_ROLLUP_MAX_BATCHES", "50"))
+    DONATION_ROLLUP_LAG_SECONDS: int = int(os.getenv("DONATION_ROLLUP_LAG_SECONDS", "60"))
+    # Статистика проектов: отставание отметки по donations.updated_at от текущего времени
+    PROJECT_STATS_LAG_SECONDS: int = int(os.getenv("PROJECT_STATS_LAG_SECONDS", "60"))
+    # Максимум точек в одном запросе временного ряда
+    DONATION_TIMESERIES_MAX_POINTS: int = int(os.getenv("DONATION_TIMESERIES_MAX_POINTS", "1000"))
 
     # Websocket (для оповещений)
     WEBSOCKET_PORT = os.getenv("WEBSOCKET_PORT", "8001")
@@ -0,0 +1,124 @@
+# src/core/page_cache.py
+import gzip
+import hashlib
+import logging
+import os
+import time
+from typing import Dict, NamedTuple, Optional
+
+from fastapi import Request
+from fastapi.templating import Jinja2Templates
+from starlette.responses import Response
+
+from src.core import static_assets as static_module
+from src.core.static_assets import StaticAssets, parse_accept_encoding, static_assets
+from src.core.templates import templates
+
+logger = logging.getLogger(__name__)
+
+# HTML страницы всегда перепроверяются, но по ETag получают 304 без тела
+PAGE_CACHE_CONTROL = "no-cache"
+
+
+class CachedPage(NamedTuple):
+    """Готовая страница: тело, сжатые версии и ETag"""
+    version: str
+    etag: str
+    body: bytes
+    encoded: Dict[str, bytes]
+
+
+class PageRenderCache:
+    """
+    Кэш отрисованных HTML страниц, вывод которых зависит только от шаблона.
+
+    Страница рендерится один раз на версию шаблонов и статики; в памяти
+    хранятся байты, их gzip/br версии и ETag. В режиме разработки версия
+    пересчитывается по mtime файлов шаблонов, поэтому правки видны сразу.
+    """
+
+    # Как часто в режиме разработки проверять изменения шаблонов
+    RELOAD_CHECK_INTERVAL = 1.0
+
+    def __init__(self, templates: Jinja2Templates, assets: StaticAssets, auto_reload: bool = False):
+        self.templates = templates
+        self.assets = assets
+        self.auto_reload = auto_reload
+        self._pages: Dict[str, CachedPage] = {}
+        self._templates_mtime = 0.0
+        self._last_reload_check = 0.0
+
+    def _latest_templates_mtime(self) -> float:
+        latest = 0.0
+        for search_path in self.templates.env.loader.searchpath:
+            for root, _, files in os.walk(search_path):
+                for name in files:
+                    latest = max(latest, os.path.getmtime(os.path.join(root, name)))
+        return latest
+
+    def _current_version(self) -> str:
+        if self.auto_reload:
+            now = time.monotonic()
+            if now - self._last_reload_check >= self.RELOAD_CHECK_INTERVAL:
+                self._last_reload_check = now
+                self._templates_mtime = self._latest_templates_mtime()
+        # Страницы содержат URL статики с хешем - меняется сборка, меняется и страница
+        return f"{self._templates_mtime}:{self.assets.current_version()}"
+
+    def _render(self, request: Request, template_name: str, version: str) -> CachedPage:
+        body = self.templates.get_template(template_name).render({"request": request}).encode()
+        encoded = {"gzip": gzip.compress(body, 6, mtime=0)}
+        if static_module.BROTLI_AVAILABLE:
+            encoded["br"] = static_module.brotli.compress(body, quality=5)
+
+        page = CachedPage(
+            version=version,
+            etag=f'"{hashlib.sha256(body).hexdigest()[:16]}"',
+            body=body,
+            encoded=encoded
+        )
+        self._pages[template_name] = page
+        logger.info(f"🧾 Page rendered and cached: {template_name} ({len(body)} bytes)")
+        return page
+
+    def get_page(self, request: Request, template_name: str) -> CachedPage:
+        version = self._current_version()
+        page = self._pages.get(template_name)
+        if page is None or page.version != version:
+            page = self._render(request, template_name, version)
+        return page
+
+    def render(self, request: Request, template_name: str, status_code: int = 200) -> Response:
+        """Ответ со страницей из кэша (304 по If-None-Match, сжатие по Accept-Encoding)"""
+        page = self.get_page(request, template_name)
+        headers = {"ETag": page.etag, "Cache-Control": PAGE_CACHE_CONTROL, "Vary": "Accept-Encoding"}
+
+        if_none_match = request.headers.get("if-none-match")
+        if status_code == 200 and if_none_match and page.etag in [tag.strip() for tag in if_none_match.split(",")]:
+            return Response(status_code=304, headers=headers)
+
+        body = page.body
+        encoding = self._choose_encoding(request.headers.get("accept-encoding", ""), page)
+        if encoding:
+            body = page.encoded[encoding]
+            headers["Content-Encoding"] = encoding
+
+        return Response(content=body, status_code=status_code, headers=headers, media_type="text/html")
+
+    @staticmethod
+    def _choose_encoding(accept_encoding: str, page: CachedPage) -> Optional[str]:
+        accepted = parse_accept_encoding(accept_encoding)
+        candidates = [name for name in ("br", "gzip") if name in page.encoded and accepted.get(name, 0.0) > 0]
+        if not candidates:
+            return None
+        return max(candidates, key=lambda name: accepted[name])
+
+    def clear(self) -> None:
+        self._pages.clear()
+
+
+page_cache = PageRenderCache(
+    templates,
+    static_assets,
+    auto_reload=os.getenv("ENVIRONMENT", "development") == "development"
+)
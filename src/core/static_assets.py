@@ -0,0 +1,223 @@
+# src/core/static_assets.py
+import gzip
+import hashlib
+import json
+import logging
+import mimetypes
+import os
+import time
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import StaticFiles
+from starlette.types import Scope
+
+from src.config.settings import settings
+
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = "manifest.json"
+
+# Сжимаем только текстовые форматы - картинки и шрифты уже сжаты
+COMPRESSIBLE_EXTENSIONS = {".css", ".js", ".mjs", ".map", ".svg", ".json", ".txt", ".html", ".xml"}
+
+# Файлы с хешем в имени не меняются никогда
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# Исходные пути (без хеша) - всегда с перепроверкой по ETag
+REVALIDATE_CACHE_CONTROL = "no-cache"
+
+# Предпочтение кодировок при равном q
+ENCODING_PREFERENCE = (("br", ".br"), ("gzip", ".gz"))
+
+
+def parse_accept_encoding(header: str) -> Dict[str, float]:
+    """Разбор Accept-Encoding в словарь {кодировка: q}"""
+    encodings = {}
+    for part in header.split(","):
+        name, _, params = part.strip().partition(";")
+        if not name:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        encodings[name.strip().lower()] = q
+    return encodings
+
+
+class StaticAssets:
+    """
+    Сборка статики: копии файлов с хешем содержимого в имени, сжатые .gz/.br
+    рядом с ними и manifest.json (исходный путь -> путь с хешем).
+
+    Шаблоны получают URL через static_url(), поэтому браузер может кэшировать
+    файлы навсегда: при изменении содержимого меняется и URL.
+    """
+
+    # Как часто в режиме разработки проверять изменения исходников
+    RELOAD_CHECK_INTERVAL = 1.0
+
+    def __init__(self, source_dir: Path, build_dir: Path, url_prefix: str, auto_reload: bool = False):
+        self.source_dir = Path(source_dir)
+        self.build_dir = Path(build_dir)
+        self.url_prefix = url_prefix.rstrip("/")
+        self.auto_reload = auto_reload
+        self.manifest: Optional[Dict[str, str]] = None
+        self.version = ""
+        self._fingerprinted: Dict[str, str] = {}
+        self._source_mtime = 0.0
+        self._last_reload_check = 0.0
+
+    def _latest_source_mtime(self) -> float:
+        latest = 0.0
+        for root, _, files in os.walk(self.source_dir):
+            for name in files:
+                latest = max(latest, os.path.getmtime(os.path.join(root, name)))
+        return latest
+
+    @staticmethod
+    def _write_atomic(path: Path, data: bytes) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = path.with_name(f".{path.name}.part")
+        temp_path.write_bytes(data)
+        os.replace(temp_path, path)
+
+    def _build_asset(self, relative_path: str, content: bytes) -> str:
+        digest = hashlib.sha256(content).hexdigest()[:12]
+        stem, ext = os.path.splitext(relative_path)
+        hashed_path = f"{stem}.{digest}{ext}"
+        target = self.build_dir / hashed_path
+
+        # Тот же хеш - файл и его сжатые версии уже собраны
+        if not target.exists():
+            if ext.lower() in COMPRESSIBLE_EXTENSIONS:
+                self._write_atomic(target.with_name(target.name + ".gz"), gzip.compress(content, 9, mtime=0))
+                if BROTLI_AVAILABLE:
+                    self._write_atomic(target.with_name(target.name + ".br"), brotli.compress(content, quality=11))
+            self._write_atomic(target, content)
+
+        return hashed_path
+
+    def build(self) -> Dict[str, str]:
+        """Сборка всех файлов из source_dir и запись manifest.json"""
+        manifest = {}
+        for root, _, files in os.walk(self.source_dir):
+            for name in sorted(files):
+                if name.startswith("."):
+                    continue
+                source = Path(root) / name
+                relative_path = source.relative_to(self.source_dir).as_posix()
+                manifest[relative_path] = self._build_asset(relative_path, source.read_bytes())
+
+        self._write_atomic(
+            self.build_dir / MANIFEST_NAME,
+            json.dumps(manifest, indent=2, sort_keys=True).encode()
+        )
+        self._set_manifest(manifest)
+        self._source_mtime = self._latest_source_mtime()
+        logger.info(f"📦 Static assets built: {len(manifest)} files -> {self.build_dir}")
+        return manifest
+
+    def load(self) -> Dict[str, str]:
+        """Манифест из сборки; если сборки нет или она устарела - собрать"""
+        manifest_path = self.build_dir / MANIFEST_NAME
+        if manifest_path.exists() and manifest_path.stat().st_mtime >= self._latest_source_mtime():
+            self._set_manifest(json.loads(manifest_path.read_text()))
+            self._source_mtime = self._latest_source_mtime()
+            return self.manifest
+        return self.build()
+
+    def _set_manifest(self, manifest: Dict[str, str]) -> None:
+        self.manifest = manifest
+        self.version = hashlib.sha256(json.dumps(manifest, sort_keys=True).encode()).hexdigest()[:12]
+        self._fingerprinted = {hashed: original for original, hashed in manifest.items()}
+
+    def _ensure_current(self) -> None:
+        if self.manifest is None:
+            self.load()
+            return
+        if not self.auto_reload:
+            return
+
+        now = time.monotonic()
+        if now - self._last_reload_check < self.RELOAD_CHECK_INTERVAL:
+            return
+        self._last_reload_check = now
+        if self._latest_source_mtime() > self._source_mtime:
+            self.build()
+
+    def current_version(self) -> str:
+        """Версия сборки (меняется при изменении любого файла статики)"""
+        self._ensure_current()
+        return self.version
+
+    def url(self, path: str) -> str:
+        """URL файла статики с хешем содержимого (для шаблонов)"""
+        self._ensure_current()
+        path = path.lstrip("/")
+        return f"{self.url_prefix}/{self.manifest.get(path, path)}"
+
+    def lookup(self, path: str) -> Optional[Tuple[Path, str]]:
+        """Собранный файл по пути с хешем: (путь на диске, исходный путь)"""
+        self._ensure_current()
+        original = self._fingerprinted.get(path)
+        if original is None:
+            return None
+        return self.build_dir / path, original
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    """
+    Отдача статики: файлы с хешем в имени - с годовым immutable кэшем и
+    готовой .br/.gz версией по Accept-Encoding; исходные пути - как обычно,
+    но с перепроверкой по ETag.
+    """
+
+    def __init__(self, *, assets: StaticAssets, **kwargs):
+        super().__init__(directory=str(assets.source_dir), **kwargs)
+        self.assets = assets
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        asset = self.assets.lookup(path.replace(os.sep, "/"))
+        if asset is None:
+            response = await super().get_response(path, scope)
+            response.headers.setdefault("Cache-Control", REVALIDATE_CACHE_CONTROL)
+            return response
+
+        file_path, original = asset
+        media_type = mimetypes.guess_type(original)[0] or "application/octet-stream"
+        headers = {"Cache-Control": IMMUTABLE_CACHE_CONTROL, "Vary": "Accept-Encoding"}
+
+        accepted = parse_accept_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        for encoding, suffix in sorted(ENCODING_PREFERENCE, key=lambda item: -accepted.get(item[0], 0.0)):
+            variant = file_path.with_name(file_path.name + suffix)
+            if accepted.get(encoding, 0.0) > 0 and variant.exists():
+                headers["Content-Encoding"] = encoding
+                return FileResponse(variant, headers=headers, media_type=media_type)
+
+        return FileResponse(file_path, headers=headers, media_type=media_type)
+
+
+static_assets = StaticAssets(
+    settings.STATIC_DIR,
+    settings.STATIC_BUILD_DIR,
+    settings.STATIC_URL,
+    auto_reload=os.getenv("ENVIRONMENT", "development") == "development"
+)
+
+
+if __name__ == "__main__":
+    # Сборка на этапе build образа: python -m src.core.static_assets
+    logging.basicConfig(level=logging.INFO)
+    static_assets.build()
@@ -1,4 +1,9 @@
 # src/core/templates.py
 from fastapi.templating import Jinja2Templates
 
-templates = Jinja2Templates(directory="src/templates")
\ No newline at end of file
+from src.core.static_assets import static_assets
+
+templates = Jinja2Templates(directory="src/templates")
+
+# {{ static_url('css/style.css') }} -> /static/css/style.<hash>.css
+templates.env.globals["static_url"] = static_assets.url
@@ -5,15 +5,19 @@ __all__ = [
     'Base',
     'User', 'SMSVerificationCode',
     'UserProfile', 'UserSettings', 'Subscription',
-    'Project', 'ProjectMedia', 'ProjectUpdate', 'UpdateMedia', 'Post', 'PostMedia', 'Comment', 'Like', 'Repost',
+    'Project', 'ProjectMedia', 'MediaBlob', 'ProjectUpdate', 'UpdateMedia', 'Post', 'PostMedia', 'Comment', 'Like', 'Repost',
     'Webinar', 'WebinarRegistration',
-    'Donation', 'Transaction', 'Wallet', 'PayoutRequest',
+    'Donation', 'Transaction', 'Wallet', 'PayoutRequest', 'StripeWebhookEvent', 'IdempotencyKey',
+    'JobWatermark', 'ProjectDonationRollup', 'ProjectDonationRollupDonor',
     'Notification', 'NotificationTemplate', 'UserNotificationSettings', 'EmailQueue'
 ]
 
 from .models_auth import User, SMSVerificationCode
-from .models_content import Project, Post, Like, Repost, ProjectMedia, ProjectUpdate, UpdateMedia, PostMedia, Comment
+from .models_content import Project, Post, Like, Repost, ProjectMedia, MediaBlob, ProjectUpdate, UpdateMedia, PostMedia, Comment
 from .models_notification import Notification, NotificationTemplate, UserNotificationSettings, EmailQueue
-from .models_payment import Donation, Transaction, Wallet, PayoutRequest
+from .models_payment import (
+    Donation, Transaction, Wallet, PayoutRequest, StripeWebhookEvent, IdempotencyKey,
+    JobWatermark, ProjectDonationRollup, ProjectDonationRollupDonor
+)
 from .models_user import UserProfile, UserSettings, Subscription
 from .models_webinar import Webinar, WebinarRegistration
@@ -69,6 +69,15 @@ class Project(Base):
     # НОВЫЕ ПОЛЯ ДЛЯ СТАТИСТИКИ ДОНАТОВ
     total_donations = Column(Float, default=0.0)  # Общая сумма донатов
     last_donation_at = Column(DateTime, nullable=True)  # Дата последнего доната
+    # Пересчитываются фоновой задачей по проектам с изменившимися донатами
+    donations_count = Column(Integer, default=0)
+    avg_donation = Column(Float, default=0.0)
+    max_donation = Column(Float, default=0.0)
+    completion_percentage = Column(Float, nullable=True)  # Процент от цели (не больше 100)
+
+    # Рейтинг по сумме проведенных донатов (пересчитывается фоновой задачей)
+    ranking_position = Column(Integer, nullable=True, index=True)
+    popularity_score = Column(Float, default=0.0)
 
     # Связи
     creator = relationship("User", back_populates="projects")
@@ -108,6 +117,7 @@ class ProjectMedia(Base):
     file_size = Column(Integer)  # в байтах
     duration = Column(Integer, nullable=True)  # для видео/аудио в секундах
     thumbnail_url = Column(String, nullable=True)  # превью для видео/аудио
+    variants = Column(JSON, nullable=True)  # адаптивные варианты {"640w": {"webp": url, "jpg": url}}
     description = Column(Text, nullable=True)
     sort_order = Column(Integer, default=0)  # порядок отображения
     is_approved = Column(Boolean, default=True)
@@ -117,6 +127,22 @@ class ProjectMedia(Base):
     project = relationship("Project", back_populates="media")
 
 
+class MediaBlob(Base):
+    """Контентно-адресуемое хранилище медиа: один файл на уникальный SHA-256"""
+    __tablename__ = "media_blobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    sha256 = Column(String(64), unique=True, index=True, nullable=False)
+    storage_key = Column(String, nullable=False)  # путь относительно MEDIA_ROOT
+    file_url = Column(String, nullable=False, index=True)
+    file_type = Column(Enum(MediaType))
+    file_size = Column(Integer)  # в байтах
+    mime_type = Column(String, nullable=True)
+    ref_count = Column(Integer, default=0)  # количество ссылок из медиа записей
+    created_at = Column(DateTime, default=datetime.now)
+    last_referenced_at = Column(DateTime, default=datetime.now)
+
+
 class ProjectUpdate(Base):
     __tablename__ = "project_updates"
 
@@ -191,6 +217,7 @@ class PostMedia(Base):
     file_size = Column(Integer, nullable=True)
     duration = Column(Integer, nullable=True)
     thumbnail_url = Column(String, nullable=True)
+    variants = Column(JSON, nullable=True)  # адаптивные варианты {"640w": {"webp": url, "jpg": url}}
     mime_type = Column(String, nullable=True)
     sort_order = Column(Integer, default=0)
     created_at = Column(DateTime, default=datetime.now)
@@ -1,5 +1,5 @@
 # src/database/models/notification_models.py
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, JSON, ForeignKey
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, JSON, ForeignKey, Index, text
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from .base import Base
@@ -86,6 +86,15 @@ class UserNotificationSettings(Base):
 
 class EmailQueue(Base):
     __tablename__ = "email_queue"
+    __table_args__ = (
+        # Обработчик очереди берет только письма, срок отправки которых наступил
+        Index(
+            "ix_email_queue_due",
+            "status", "scheduled_for", "priority",
+            postgresql_where=text("status IN ('pending', 'retrying')"),
+            sqlite_where=text("status IN ('pending', 'retrying')")
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
@@ -93,13 +102,14 @@ class EmailQueue(Base):
     subject = Column(String)
     template_name = Column(String)
     template_data = Column(JSON)
-    status = Column(String, default="pending")  # pending, sent, failed, retrying
+    status = Column(String, default="pending")  # pending, sending, sent, failed, retrying
     priority = Column(Integer, default=1)  # !!! 1-высокий, 5-низкий
     retry_count = Column(Integer, default=0)
     max_retries = Column(Integer, default=3)
     error_message = Column(Text, nullable=True)
 
     scheduled_for = Column(DateTime, default=datetime.now)
+    claimed_at = Column(DateTime, nullable=True)  # захват обработчиком очереди (status=sending)
     sent_at = Column(DateTime, nullable=True)
     created_at = Column(DateTime, default=datetime.now)
 
@@ -1,5 +1,5 @@
 # src/database/models/payment_models.py
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, Float, JSON, ForeignKey
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, Float, JSON, ForeignKey, Index, UniqueConstraint
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from .base import Base
@@ -7,6 +7,12 @@ from .base import Base
 
 class Donation(Base):
     __tablename__ = "donations"
+    __table_args__ = (
+        # Статистика проектов пересчитывается по донатам, измененным после отметки
+        Index("ix_donations_updated_at", "updated_at"),
+        # Повтор запроса с тем же Idempotency-Key находит уже созданный донат
+        UniqueConstraint("donor_id", "idempotency_key", name="uq_donations_donor_idempotency_key"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     amount = Column(Float)
@@ -16,6 +22,7 @@ class Donation(Base):
     is_anonymous = Column(Boolean, default=False)
     status = Column(String, default="completed")  # pending, completed, failed, refunded
     payment_method = Column(String, default="card")  # card, wallet, crypto
+    idempotency_key = Column(String(255), nullable=True)  # Idempotency-Key клиента
     created_at = Column(DateTime, default=datetime.now)
     updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now)
 
@@ -27,6 +34,12 @@ class Donation(Base):
 
 class Transaction(Base):
     __tablename__ = "transactions"
+    __table_args__ = (
+        # Сверка с платежной системой перебирает зависшие pending транзакции по возрасту
+        Index("ix_transactions_status_created_at", "status", "created_at"),
+        # Агрегаты донатов читают проведенные транзакции после отметки прогресса
+        Index("ix_transactions_completed_at_id", "completed_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     donation_id = Column(Integer, ForeignKey("donations.id"), nullable=True)
@@ -89,4 +102,79 @@ class PayoutRequest(Base):
     updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now)
     processed_at = Column(DateTime, nullable=True)
 
-    wallet = relationship("Wallet")
\ No newline at end of file
+    wallet = relationship("Wallet")
+
+class StripeWebhookEvent(Base):
+    """Входящий ящик вебхуков Stripe: сырое событие сохраняется до обработки"""
+    __tablename__ = "stripe_webhook_events"
+    __table_args__ = (
+        Index("ix_stripe_webhook_events_status_created", "status", "event_created_at"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    event_id = Column(String, unique=True, nullable=False)  # evt_... - ключ дедупликации
+    event_type = Column(String, nullable=False)
+    payload = Column(JSON, nullable=False)
+    status = Column(String, default="pending")  # pending, processing, processed, failed
+    attempts = Column(Integer, default=0)
+    last_error = Column(Text, nullable=True)
+
+    event_created_at = Column(DateTime, nullable=True)  # время события в Stripe (порядок обработки)
+    received_at = Column(DateTime, default=datetime.now)
+    claimed_at = Column(DateTime, nullable=True)
+    processed_at = Column(DateTime, nullable=True)
+
+
+class IdempotencyKey(Base):
+    """Ключ идемпотентности запроса (резервное хранилище, когда Redis недоступен)"""
+    __tablename__ = "idempotency_keys"
+    __table_args__ = (
+        UniqueConstraint("scope", "user_id", "key", name="uq_idempotency_keys_scope_user_key"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    scope = Column(String, nullable=False)  # donate, ...
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    key = Column(String(255), nullable=False)
+    request_hash = Column(String(64), nullable=False)  # SHA-256 параметров запроса
+    status = Column(String, default="in_progress")  # in_progress, completed
+    response = Column(JSON, nullable=True)
+
+    locked_until = Column(DateTime, nullable=True)
+    expires_at = Column(DateTime, nullable=True)
+    created_at = Column(DateTime, default=datetime.now)
+
+
+class JobWatermark(Base):
+    """Отметка прогресса инкрементальной фоновой задачи (до какой записи обработано)"""
+    __tablename__ = "job_watermarks"
+
+    name = Column(String, primary_key=True)
+    watermark_at = Column(DateTime, nullable=True)
+    watermark_id = Column(Integer, nullable=True)  # разрешает совпадения по времени
+    updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now)
+
+
+class ProjectDonationRollup(Base):
+    """Агрегаты проведенных донатов проекта за час или день (графики дашборда)"""
+    __tablename__ = "project_donation_rollups"
+
+    project_id = Column(Integer, ForeignKey("projects.id", ondelete="CASCADE"), primary_key=True)
+    granularity = Column(String, primary_key=True)  # hour, day
+    bucket_start = Column(DateTime, primary_key=True)
+
+    donations_count = Column(Integer, default=0, nullable=False)
+    total_amount = Column(Float, default=0.0, nullable=False)
+    max_amount = Column(Float, default=0.0, nullable=False)
+    unique_donors = Column(Integer, default=0, nullable=False)
+    updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now)
+
+
+class ProjectDonationRollupDonor(Base):
+    """Доноры интервала агрегата: по ним уникальные доноры считаются инкрементально"""
+    __tablename__ = "project_donation_rollup_donors"
+
+    project_id = Column(Integer, ForeignKey("projects.id", ondelete="CASCADE"), primary_key=True)
+    granularity = Column(String, primary_key=True)
+    bucket_start = Column(DateTime, primary_key=True)
+    donor_id = Column(Integer, primary_key=True)
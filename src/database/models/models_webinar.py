@@ -1,5 +1,5 @@
 # src/database/models/models_webinar.py
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, ForeignKey, JSON
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, ForeignKey, JSON, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from .base import Base
@@ -7,6 +7,10 @@ from .base import Base
 
 class Webinar(Base):
     __tablename__ = "webinars"
+    __table_args__ = (
+        # Задача напоминаний выбирает запланированные вебинары по времени начала
+        Index("ix_webinars_status_scheduled_at", "status", "scheduled_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String(200))
@@ -58,6 +62,10 @@ class Webinar(Base):
 
 class WebinarRegistration(Base):
     __tablename__ = "webinar_registrations"
+    __table_args__ = (
+        # Напоминания перебирают регистрации вебинара пачками по id
+        Index("ix_webinar_registrations_webinar_id_id", "webinar_id", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
@@ -65,6 +73,8 @@ class WebinarRegistration(Base):
     registered_at = Column(DateTime, default=datetime.now)
     attended = Column(Boolean, default=False)
     reminder_sent = Column(Boolean, default=False)  # Оптимизации рассылок
+    # За сколько минут до начала отправлено последнее напоминание (24 ч, 1 ч, 10 мин)
+    last_reminder_offset = Column(Integer, nullable=True)
 
     user = relationship("User", back_populates="webinar_registrations")
     webinar = relationship("Webinar", back_populates="registrations")
\ No newline at end of file
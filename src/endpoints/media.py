@@ -0,0 +1,96 @@
+# src/endpoints/media.py
+import os
+
+from fastapi import APIRouter, HTTPException, Query, Request
+from starlette import status
+from starlette.responses import FileResponse, Response
+
+from src.config.settings import settings
+from src.database.postgres import AsyncSessionFactory
+from src.services.media_service import media_service
+from src.services import storage_service
+from src.utils.file_utils import parse_blob_key
+
+media_router = APIRouter(prefix=settings.MEDIA_URL.rstrip("/"), tags=["media"])
+
+# Контентно-адресуемые файлы никогда не меняются по своему URL
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+DEFAULT_CACHE_CONTROL = "public, max-age=86400"
+
+MEDIA_CONTENT_TYPES = {
+    ".m3u8": "application/vnd.apple.mpegurl",
+    ".ts": "video/mp2t",
+}
+
+
+def _resolve_media_path(media_path: str) -> str:
+    """Безопасное преобразование пути из URL в путь внутри MEDIA_ROOT"""
+    root = os.path.realpath(media_service.media_root)
+    full_path = os.path.realpath(os.path.join(root, media_path))
+    if not full_path.startswith(root + os.sep) or not os.path.isfile(full_path):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Media not found")
+    return full_path
+
+
+@media_router.api_route("/{media_path:path}", methods=["GET", "HEAD"])
+async def serve_media(media_path: str, request: Request):
+    """Отдача медиа с поддержкой Range/206, ETag и долгим кэшированием
+
+    Тело отдается через FileResponse: поддерживает Range и multipart/byteranges,
+    а на серверах с расширением http.response.pathsend - zero-copy отправку.
+    Если задан MEDIA_ACCEL_REDIRECT_PREFIX, отдачу берет на себя nginx (sendfile).
+    """
+    full_path = _resolve_media_path(media_path)
+    relative_path = os.path.relpath(full_path, os.path.realpath(media_service.media_root)).replace(os.sep, "/")
+
+    blob_hash = await media_service.get_servable_hash(AsyncSessionFactory, relative_path)
+    if blob_hash is None:
+        # Неодобренные и неизвестные файлы не раскрываем
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Media not found")
+
+    is_content_addressed = relative_path.startswith(("blobs/", "derivatives/"))
+    headers = {
+        "Cache-Control": IMMUTABLE_CACHE_CONTROL if is_content_addressed else DEFAULT_CACHE_CONTROL,
+        "Accept-Ranges": "bytes",
+    }
+    if blob_hash and relative_path.startswith("blobs/"):
+        headers["ETag"] = f'"{blob_hash}"'
+
+    content_type = MEDIA_CONTENT_TYPES.get(os.path.splitext(full_path)[1].lower())
+
+    if settings.MEDIA_ACCEL_REDIRECT_PREFIX:
+        headers["X-Accel-Redirect"] = f"{settings.MEDIA_ACCEL_REDIRECT_PREFIX.rstrip('/')}/{relative_path}"
+        return Response(status_code=status.HTTP_200_OK, headers=headers, media_type=content_type)
+
+    response = FileResponse(full_path, headers=headers, media_type=content_type)
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and response.headers["etag"] in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(
+            status_code=status.HTTP_304_NOT_MODIFIED,
+            headers={"ETag": response.headers["etag"], "Cache-Control": headers["Cache-Control"]}
+        )
+
+    return response
+
+
+@media_router.put("/{media_path:path}")
+async def upload_media_object(
+    media_path: str,
+    request: Request,
+    size: int = Query(..., gt=0),
+    expires: int = Query(...),
+    signature: str = Query(...)
+):
+    """Прием файла по подписанной ссылке локального хранилища (аналог presigned PUT в S3)"""
+    backend = storage_service.storage_backend
+    sha256 = parse_blob_key(media_path)
+    if not isinstance(backend, storage_service.LocalStorageBackend) or not sha256:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Media not found")
+
+    content_type = request.headers.get("content-type", "")
+    if not backend.verify_upload_signature(media_path, content_type, size, expires, signature):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid or expired upload signature")
+
+    await backend.store_stream(media_path, request.stream(), sha256, size)
+    return Response(status_code=status.HTTP_200_OK, headers={"ETag": f'"{sha256}"'})
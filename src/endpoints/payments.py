@@ -1,14 +1,25 @@
 # src/routes/payment.py
-from typing import Optional
-from fastapi import APIRouter, Depends, Request, HTTPException, status
+from datetime import datetime
+from typing import List, Optional
+from fastapi import APIRouter, Depends, Header, Request, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from src.database.postgres import get_db
 from src.schemas.payment import (
     PaymentIntentResponse,
     PaymentIntentCreate,
-    WebhookResponse
+    WebhookResponse,
+    WebhookEventResponse,
+    WebhookReplayRequest,
+    DonationTimeSeriesResponse,
+    LeaderboardEntry
 )
-from src.services.payment_service import payment_service
+from src.database.redis_client import redis_manager
+from src.dependencies.rbac import admin_permission
+from src.repository.webhook_events_repository import webhook_events_repository
+from src.services.donation_stats_service import donation_stats_service
+from src.services.idempotency_service import idempotency_service
+from src.services.leaderboard_service import leaderboard_service
+from src.services.payment_service import payment_service, RECONCILIATION_METRICS_KEY
 from src.security.auth import get_current_user
 
 
@@ -21,19 +32,35 @@ payments_router = APIRouter(
 @payments_router.post("/donate", response_model=PaymentIntentResponse)
 async def create_donation(
     donation_data: PaymentIntentCreate,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
     current_user=Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
-    """Создание доната"""
-    try:
-        result = await payment_service.create_donation_intent(
+    """Создание доната (повтор с тем же Idempotency-Key вернет тот же платеж)"""
+    async def create_intent():
+        return await payment_service.create_donation_intent(
             db=db,  # ← ДОБАВИЛИ сессию БД
             amount=donation_data.amount,
             project_id=donation_data.project_id,
             donor_id=current_user.id,
-            currency=donation_data.currency
+            currency=donation_data.currency,
+            idempotency_key=idempotency_key
         )
 
+    try:
+        if idempotency_key is None:
+            result = await create_intent()
+        else:
+            result = await idempotency_service.execute(
+                db,
+                scope="donate",
+                user_id=current_user.id,
+                key=idempotency_key,
+                request_data=donation_data.model_dump(),
+                handler=create_intent,
+                lock_seconds=payment_service.provider.max_request_seconds
+            )
+
         return PaymentIntentResponse(
             client_secret=result['client_secret'],
             payment_intent_id=result['payment_intent_id'],
@@ -42,6 +69,14 @@ async def create_donation(
             currency=donation_data.currency,
             project_id=donation_data.project_id
         )
+    except HTTPException as e:
+        # Ошибки ключа идемпотентности отдаем клиенту как есть
+        if e.status_code in (status.HTTP_409_CONFLICT, status.HTTP_422_UNPROCESSABLE_CONTENT):
+            raise
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -67,6 +102,43 @@ async def stripe_webhook(
     return result
 
 
+@payments_router.get(
+    "/webhook/events",
+    response_model=List[WebhookEventResponse],
+    dependencies=[Depends(admin_permission)]
+)
+async def get_webhook_events(
+    event_status: str = "failed",
+    skip: int = 0,
+    limit: int = 100,
+    db: AsyncSession = Depends(get_db)
+):
+    """События входящего ящика вебхуков по статусу (только для admin)"""
+    return await webhook_events_repository.get_by_status(db, event_status, skip, limit)
+
+
+@payments_router.post("/webhook/events/replay", dependencies=[Depends(admin_permission)])
+async def replay_webhook_events(
+    replay_data: WebhookReplayRequest,
+    db: AsyncSession = Depends(get_db)
+):
+    """Повторная обработка упавших вебхуков (только для admin)"""
+    requeued = await payment_service.replay_failed_webhooks(db, replay_data.event_ids)
+    return {"requeued": requeued}
+
+
+@payments_router.get("/reconciliation/metrics", dependencies=[Depends(admin_permission)])
+async def get_reconciliation_metrics():
+    """Метрики последней сверки платежей со Stripe (только для admin)"""
+    metrics = await redis_manager.get_key(RECONCILIATION_METRICS_KEY)
+    if metrics is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Сверка платежей еще не выполнялась"
+        )
+    return metrics
+
+
 @payments_router.get("/status/{payment_intent_id}")
 async def get_payment_status(payment_intent_id: str):
     """Получение статуса платежа"""
@@ -114,4 +186,30 @@ async def get_recent_project_donations(
     db: AsyncSession = Depends(get_db)
 ):
     """Получение последних донатов проекта"""
-    return await donations_repository.get_recent_donations(db, project_id, limit)
\ No newline at end of file
+    return await donations_repository.get_recent_donations(db, project_id, limit)
+
+@payments_router.get("/donations/project/{project_id}/timeseries", response_model=DonationTimeSeriesResponse)
+async def get_project_donation_timeseries(
+    project_id: int,
+    granularity: str = "hour",
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    db: AsyncSession = Depends(get_db)
+):
+    """График донатов проекта по часам или дням (из готовых агрегатов)"""
+    return await donation_stats_service.get_timeseries(db, project_id, granularity, start, end)
+
+@payments_router.get("/leaderboards/projects", response_model=List[LeaderboardEntry])
+async def get_top_projects(limit: int = 10, db: AsyncSession = Depends(get_db)):
+    """Топ проектов по собранной сумме"""
+    return await leaderboard_service.get_top_projects(db, limit)
+
+@payments_router.get("/leaderboards/projects/{project_id}/donors", response_model=List[LeaderboardEntry])
+async def get_top_project_donors(project_id: int, limit: int = 10, db: AsyncSession = Depends(get_db)):
+    """Топ доноров проекта"""
+    return await leaderboard_service.get_top_donors(db, project_id, limit)
+
+@payments_router.get("/leaderboards/creators", response_model=List[LeaderboardEntry])
+async def get_top_creators(limit: int = 10, db: AsyncSession = Depends(get_db)):
+    """Топ авторов по сумме донатов"""
+    return await leaderboard_service.get_top_creators(db, limit)
\ No newline at end of file
@@ -1,5 +1,7 @@
 # src/endpoints/projects.py
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Query
+import os
+
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Query, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 
@@ -9,11 +11,14 @@ from src.database.postgres import get_db
 from src.security.auth import get_current_user
 from src.schemas.project import (
     ProjectCreate, ProjectResponse, ProjectUpdate, ProjectWithMediaResponse,
-    ProjectMediaResponse, PostCreate, PostResponse, CommentCreate, CommentResponse,
-    ProjectMediaCreate, ProjectNewsResponse, ProjectNewsCreate, ProjectNewsUpdate
+    ProjectMediaResponse, PostCreate, PostResponse, PostWithMediaResponse, CommentCreate, CommentResponse,
+    ProjectMediaCreate, ProjectNewsResponse, ProjectNewsCreate, ProjectNewsUpdate,
+    UploadSessionCreate, UploadSessionResponse, DirectUploadCreate, DirectUploadResponse, DirectUploadConfirm
 )
 from src.database.models.models_content import MediaType
-from src.utils.file_utils import validate_and_get_media_type, generate_file_path, save_uploaded_file
+from src.services.media_service import media_service
+from src.services.resumable_upload_service import resumable_upload_service
+from src.services.direct_upload_service import direct_upload_service
 from src.services.project_service import ProjectService
 from src.repository.project_media_repository import project_media_repository
 
@@ -70,36 +75,135 @@ async def get_project(
 @projects_router.post("/{project_id}/upload-media", response_model=ProjectMediaResponse)
 async def upload_project_media(
     project_id: int,
-    file: UploadFile = File(...),
+    file: UploadFile = File(None),
     description: str = Form(None),
+    content_sha256: Optional[str] = Form(None, min_length=64, max_length=64),
+    file_name: Optional[str] = Form(None),
     current_user=Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
-    """Загрузка медиа для проекта"""
+    """Загрузка медиа для проекта
+
+    Если клиент передал content_sha256 содержимого, которое он уже загружал
+    в свои проекты или посты, файл не передается и не записывается повторно.
+    """
     # Проверяем права доступа
     from src.repository.projects_repository import projects_repository
     project = await projects_repository.get(db, project_id)
     if not project or project.creator_id != current_user.id:
         raise HTTPException(status_code=404, detail="Project not found or access denied")
 
-    # Валидация и сохранение файла
-    media_type, mime_type = await validate_and_get_media_type(file)
-    file_path = generate_file_path(project_id, media_type, file.filename)
-    file_size = await save_uploaded_file(file, file_path)
-
-    # Создаем запись в БД через репозиторий
-    media_data = ProjectMediaCreate(
-        project_id=project_id,
-        file_url=f"/{file_path}",
-        file_type=media_type,
-        file_name=file.filename,
-        file_size=file_size,
-        mime_type=mime_type,
-        description=description
+    blob = await media_service.reuse_blob(db, content_sha256, current_user.id) if content_sha256 else None
+    if blob is None:
+        if file is None:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Content not found, upload the file"
+            )
+        # Потоковое сохранение в хранилище: тип по первым байтам и лимит размера
+        # проверяются по ходу записи, блоб хранит определенный тип
+        blob = await media_service.store_upload(db, file)
+
+    file_name = file.filename if file else (file_name or os.path.basename(blob.storage_key))
+    return await ProjectService.add_project_media(db, project_id, blob, file_name, description)
+
+
+@projects_router.post("/{project_id}/direct-uploads", response_model=DirectUploadResponse)
+async def create_direct_upload(
+    project_id: int,
+    upload_data: DirectUploadCreate,
+    current_user=Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Подписанная ссылка для загрузки файла напрямую в хранилище"""
+    from src.repository.projects_repository import projects_repository
+    project = await projects_repository.get(db, project_id)
+    if not project or project.creator_id != current_user.id:
+        raise HTTPException(status_code=404, detail="Project not found or access denied")
+
+    return await direct_upload_service.create_upload(
+        db, current_user.id, upload_data.file_name, upload_data.file_size, upload_data.sha256, upload_data.content_type
+    )
+
+
+@projects_router.post("/{project_id}/direct-uploads/confirm", response_model=ProjectMediaResponse)
+async def confirm_direct_upload(
+    project_id: int,
+    confirm_data: DirectUploadConfirm,
+    current_user=Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Подтверждение прямой загрузки и создание медиа проекта"""
+    from src.repository.projects_repository import projects_repository
+    project = await projects_repository.get(db, project_id)
+    if not project or project.creator_id != current_user.id:
+        raise HTTPException(status_code=404, detail="Project not found or access denied")
+
+    return await direct_upload_service.confirm_upload(
+        db, current_user.id, project_id, confirm_data.storage_key, confirm_data.file_name, confirm_data.description
+    )
+
+
+@projects_router.post("/{project_id}/uploads", response_model=UploadSessionResponse,
+                      status_code=status.HTTP_201_CREATED)
+async def create_upload_session(
+    project_id: int,
+    session_data: UploadSessionCreate,
+    current_user=Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Создание сессии возобновляемой загрузки (для больших видео)"""
+    from src.repository.projects_repository import projects_repository
+    project = await projects_repository.get(db, project_id)
+    if not project or project.creator_id != current_user.id:
+        raise HTTPException(status_code=404, detail="Project not found or access denied")
+
+    return await resumable_upload_service.create_session(
+        current_user.id, project_id, session_data.file_name, session_data.file_size, session_data.description
     )
 
-    media = await project_media_repository.create(db, media_data)
-    return ProjectMediaResponse.model_validate(media)
+
+@projects_router.get("/{project_id}/uploads/{upload_id}", response_model=UploadSessionResponse)
+async def get_upload_session(project_id: int, upload_id: str):
+    """Сколько байт уже принято - клиент продолжает с этого смещения"""
+    return await resumable_upload_service.get_status(upload_id, project_id)
+
+
+@projects_router.put("/{project_id}/uploads/{upload_id}", response_model=UploadSessionResponse)
+async def upload_chunk(
+    project_id: int,
+    upload_id: str,
+    request: Request,
+    offset: int = Query(..., ge=0)
+):
+    """Загрузка чанка по смещению
+
+    Идентификатор сессии служит токеном загрузки, поэтому запрос не
+    открывает сессию БД и не держит ее, пока идет передача байт.
+    """
+    return await resumable_upload_service.write_chunk(upload_id, project_id, offset, request.stream())
+
+
+@projects_router.post("/{project_id}/uploads/{upload_id}/finalize", response_model=ProjectMediaResponse)
+async def finalize_upload_session(
+    project_id: int,
+    upload_id: str,
+    current_user=Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Завершение загрузки и создание медиа проекта"""
+    return await resumable_upload_service.finalize(db, upload_id, project_id, current_user.id)
+
+
+@projects_router.delete("/{project_id}/uploads/{upload_id}")
+async def abort_upload_session(
+    project_id: int,
+    upload_id: str,
+    current_user=Depends(get_current_user)
+):
+    """Отмена загрузки"""
+    await resumable_upload_service.abort(upload_id, project_id, current_user.id)
+    return {"upload_id": upload_id, "status": "aborted"}
 
 
 @projects_router.get("/{project_id}/media", response_model=List[ProjectMediaResponse])
@@ -125,7 +229,7 @@ async def create_project_post(
     return await ProjectService.create_project_post(db, project_id, post_data, current_user.id)
 
 
-@projects_router.get("/{project_id}/posts", response_model=List[PostResponse])
+@projects_router.get("/{project_id}/posts", response_model=List[PostWithMediaResponse])
 async def get_project_posts(
     project_id: int,
     skip: int = Query(0, ge=0),
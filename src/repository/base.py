@@ -1,6 +1,7 @@
 # src/repository/base.py
 from typing import List, Optional, Any, TypeVar, Generic
 from sqlalchemy import select, and_, update
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
@@ -11,6 +12,12 @@ CreateSchemaType = TypeVar("CreateSchemaType")
 UpdateSchemaType = TypeVar("UpdateSchemaType")
 
 
+def dialect_insert(db: AsyncSession, model):
+    """INSERT с поддержкой ON CONFLICT для текущей БД (PostgreSQL, SQLite в тестах)"""
+    insert = sqlite.insert if db.bind.dialect.name == "sqlite" else postgresql.insert
+    return insert(model)
+
+
 class BaseRepository(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
     def __init__(self, model):
         self.model = model
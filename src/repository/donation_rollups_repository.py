@@ -0,0 +1,125 @@
+# src/repository/donation_rollups_repository.py
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Iterable, List, Tuple
+from sqlalchemy import select, case
+from sqlalchemy.engine import Row
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.database.models import ProjectDonationRollup, ProjectDonationRollupDonor
+from src.repository.base import dialect_insert
+
+GRANULARITIES = ("hour", "day")
+
+BucketKey = Tuple[int, str, datetime]
+
+
+def bucket_start(moment: datetime, granularity: str) -> datetime:
+    """Начало часового или суточного интервала, в который попадает момент"""
+    if granularity == "hour":
+        return moment.replace(minute=0, second=0, microsecond=0)
+    if granularity == "day":
+        return moment.replace(hour=0, minute=0, second=0, microsecond=0)
+    raise ValueError(f"Unknown granularity: {granularity}")
+
+
+class DonationRollupsRepository:
+    def __init__(self):
+        self.model = ProjectDonationRollup
+
+    async def apply_donations(self, db: AsyncSession, donations: Iterable[Row]) -> int:
+        """
+        Добавление пачки проведенных донатов (project_id, donor_id, amount,
+        completed_at) к часовым и суточным агрегатам без коммита.
+        Количество и сумма прибавляются, максимум сравнивается с текущим, а
+        уникальные доноры прибавляются только для доноров, впервые попавших
+        в интервал. Возвращает число затронутых агрегатов.
+        """
+        deltas: Dict[BucketKey, Dict[str, float]] = {}
+        donors: Dict[BucketKey, set] = defaultdict(set)
+        for donation in donations:
+            for granularity in GRANULARITIES:
+                key = (donation.project_id, granularity, bucket_start(donation.completed_at, granularity))
+                amount = donation.amount or 0.0
+                delta = deltas.setdefault(key, {"donations_count": 0, "total_amount": 0.0, "max_amount": 0.0})
+                delta["donations_count"] += 1
+                delta["total_amount"] += amount
+                delta["max_amount"] = max(delta["max_amount"], amount)
+                if donation.donor_id is not None:
+                    donors[key].add(donation.donor_id)
+        if not deltas:
+            return 0
+
+        new_donors: Dict[BucketKey, int] = defaultdict(int)
+        donor_rows = [
+            {"project_id": project_id, "granularity": granularity, "bucket_start": start, "donor_id": donor_id}
+            for (project_id, granularity, start), donor_ids in donors.items()
+            for donor_id in donor_ids
+        ]
+        if donor_rows:
+            stmt = (
+                dialect_insert(db, ProjectDonationRollupDonor)
+                .values(donor_rows)
+                .on_conflict_do_nothing()
+                .returning(
+                    ProjectDonationRollupDonor.project_id,
+                    ProjectDonationRollupDonor.granularity,
+                    ProjectDonationRollupDonor.bucket_start
+                )
+            )
+            for project_id, granularity, start in await db.execute(stmt):
+                new_donors[(project_id, granularity, start)] += 1
+
+        now = datetime.now()
+        rows = [
+            {
+                "project_id": project_id,
+                "granularity": granularity,
+                "bucket_start": start,
+                "unique_donors": new_donors[(project_id, granularity, start)],
+                "updated_at": now,
+                **delta
+            }
+            for (project_id, granularity, start), delta in deltas.items()
+        ]
+        stmt = dialect_insert(db, ProjectDonationRollup).values(rows)
+        excluded, table = stmt.excluded, ProjectDonationRollup
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["project_id", "granularity", "bucket_start"],
+            set_={
+                "donations_count": table.donations_count + excluded.donations_count,
+                "total_amount": table.total_amount + excluded.total_amount,
+                "max_amount": case(
+                    (excluded.max_amount > table.max_amount, excluded.max_amount),
+                    else_=table.max_amount
+                ),
+                "unique_donors": table.unique_donors + excluded.unique_donors,
+                "updated_at": excluded.updated_at,
+            }
+        )
+        await db.execute(stmt)
+        return len(rows)
+
+    async def get_series(
+            self,
+            db: AsyncSession,
+            project_id: int,
+            granularity: str,
+            start: datetime,
+            end: datetime
+    ) -> List[ProjectDonationRollup]:
+        """Агрегаты проекта за интервал [start, end) по возрастанию времени (только непустые)"""
+        stmt = (
+            select(ProjectDonationRollup)
+            .where(
+                ProjectDonationRollup.project_id == project_id,
+                ProjectDonationRollup.granularity == granularity,
+                ProjectDonationRollup.bucket_start >= start,
+                ProjectDonationRollup.bucket_start < end
+            )
+            .order_by(ProjectDonationRollup.bucket_start.asc())
+        )
+        result = await db.execute(stmt)
+        return list(result.scalars().all())
+
+
+donation_rollups_repository = DonationRollupsRepository()
@@ -1,9 +1,11 @@
 # src/repository/donations_repository.py
 from typing import List, Optional
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
-from src.repository.base import BaseRepository
-from src.database.models import Donation
+from datetime import datetime
+from sqlalchemy import select, func, update, exists
+from sqlalchemy.engine import Row
+from src.repository.base import BaseRepository, dialect_insert
+from src.database.models import Donation, Project, Transaction
 from src.schemas.payment import DonationCreate, DonationUpdate, DonationStatus
 
 
@@ -11,6 +13,71 @@ class DonationsRepository(BaseRepository[Donation, DonationCreate, DonationUpdat
     def __init__(self):
         super().__init__(Donation)
 
+    async def create(self, db: AsyncSession, obj_in: DonationCreate, **extra_data) -> Donation:
+        """Создание доната (валюта хранится в связанной транзакции)"""
+        db_obj = Donation(**obj_in.model_dump(exclude={'currency'}), **extra_data)
+        db.add(db_obj)
+        await db.commit()
+        await db.refresh(db_obj)
+        return db_obj
+
+    async def get_or_create_by_idempotency_key(
+            self,
+            db: AsyncSession,
+            obj_in: DonationCreate,
+            idempotency_key: str
+    ) -> Donation:
+        """
+        Донат по Idempotency-Key клиента (INSERT ... ON CONFLICT DO NOTHING).
+        Повтор запроса, в том числе после сбоя на полпути, получает уже
+        созданный донат, а не новую pending запись.
+        """
+        now = datetime.now()
+        stmt = (
+            dialect_insert(db, Donation)
+            .values(
+                **obj_in.model_dump(exclude={'currency'}, mode='json'),
+                idempotency_key=idempotency_key,
+                created_at=now,
+                updated_at=now
+            )
+            .on_conflict_do_nothing(index_elements=['donor_id', 'idempotency_key'])
+        )
+        await db.execute(stmt)
+        await db.commit()
+
+        result = await db.execute(
+            select(Donation).where(Donation.donor_id == obj_in.donor_id, Donation.idempotency_key == idempotency_key)
+        )
+        return result.scalar_one()
+
+    async def mark_completed(self, db: AsyncSession, donation_id: int) -> Optional[Donation]:
+        """
+        Перевод pending доната в completed без коммита (часть транзакции проведения).
+        Условный UPDATE блокирует строку: параллельное проведение того же доната
+        дождется коммита и получит None - донат уже проведен. Возвращенный или
+        отклоненный донат запоздавшее событие об успехе тоже не меняет.
+        """
+        stmt = (
+            update(Donation)
+            .where(Donation.id == donation_id, Donation.status == DonationStatus.PENDING.value)
+            .values(status=DonationStatus.COMPLETED.value, updated_at=datetime.now())
+            .returning(Donation)
+            .execution_options(synchronize_session=False)
+        )
+        return (await db.execute(stmt)).scalar_one_or_none()
+
+    async def mark_failed(self, db: AsyncSession, donation_id: int) -> Optional[Donation]:
+        """Перевод pending доната в failed без коммита (None - донат уже не pending)"""
+        stmt = (
+            update(Donation)
+            .where(Donation.id == donation_id, Donation.status == DonationStatus.PENDING.value)
+            .values(status=DonationStatus.FAILED.value, updated_at=datetime.now())
+            .returning(Donation)
+            .execution_options(synchronize_session=False)
+        )
+        return (await db.execute(stmt)).scalar_one_or_none()
+
     async def get_by_project(
             self,
             db: AsyncSession,
@@ -86,5 +153,132 @@ class DonationsRepository(BaseRepository[Donation, DonationCreate, DonationUpdat
         result = await db.execute(stmt)
         return result.scalars().all()
 
+    @staticmethod
+    def _changed_completed(changed_after: Optional[datetime], changed_until: datetime):
+        """Условие: проведенные донаты, измененные в интервале (changed_after, changed_until]"""
+        conditions = [Donation.status == DonationStatus.COMPLETED.value, Donation.updated_at <= changed_until]
+        if changed_after is not None:
+            conditions.append(Donation.updated_at > changed_after)
+        return conditions
+
+    async def get_largest_changed(
+            self,
+            db: AsyncSession,
+            changed_after: Optional[datetime],
+            changed_until: datetime,
+            min_amount: float,
+            limit: int = 10
+    ) -> List[Donation]:
+        """Крупнейшие донаты, проведенные в интервале (индекс по updated_at)"""
+        stmt = (
+            select(Donation)
+            .where(*self._changed_completed(changed_after, changed_until), Donation.amount >= min_amount)
+            .order_by(Donation.amount.desc())
+            .limit(limit)
+        )
+        result = await db.execute(stmt)
+        return list(result.scalars().all())
+
+    async def get_payment_method_stats(
+            self,
+            db: AsyncSession,
+            changed_after: Optional[datetime],
+            changed_until: datetime
+    ) -> List[Row]:
+        """Количество и сумма донатов по методам оплаты за интервал"""
+        stmt = (
+            select(
+                Donation.payment_method,
+                func.count(Donation.id).label('count'),
+                func.sum(Donation.amount).label('total')
+            )
+            .where(*self._changed_completed(changed_after, changed_until))
+            .group_by(Donation.payment_method)
+        )
+        result = await db.execute(stmt)
+        return list(result.all())
+
+    @staticmethod
+    def _settled_until(settled_until: Optional[datetime]):
+        """
+        Условие: донат проведен не позже settled_until (по completed_at его
+        транзакции - эта отметка после проведения не меняется)
+        """
+        return ~exists().where(
+            Transaction.donation_id == Donation.id,
+            Transaction.completed_at > settled_until
+        )
+
+    async def get_project_totals(
+            self,
+            db: AsyncSession,
+            limit: Optional[int] = None,
+            settled_until: Optional[datetime] = None
+    ) -> List[Row]:
+        """Суммы проведенных донатов по проектам (project_id, total) по убыванию"""
+        total = func.sum(Donation.amount).label('total')
+        stmt = (
+            select(Donation.project_id, total)
+            .where(Donation.status == DonationStatus.COMPLETED.value)
+            .group_by(Donation.project_id)
+            .order_by(total.desc())
+            .limit(limit)
+        )
+        if settled_until is not None:
+            stmt = stmt.where(self._settled_until(settled_until))
+        result = await db.execute(stmt)
+        return list(result.all())
+
+    async def get_donor_totals(
+            self,
+            db: AsyncSession,
+            project_id: Optional[int] = None,
+            limit: Optional[int] = None,
+            settled_until: Optional[datetime] = None
+    ) -> List[Row]:
+        """
+        Суммы проведенных донатов доноров по проектам (project_id, donor_id, total)
+        по убыванию. Анонимные донаты в рейтинг доноров не попадают.
+        """
+        total = func.sum(Donation.amount).label('total')
+        stmt = (
+            select(Donation.project_id, Donation.donor_id, total)
+            .where(
+                Donation.status == DonationStatus.COMPLETED.value,
+                Donation.donor_id.is_not(None),
+                Donation.is_anonymous.is_not(True)
+            )
+            .group_by(Donation.project_id, Donation.donor_id)
+            .order_by(total.desc())
+            .limit(limit)
+        )
+        if project_id is not None:
+            stmt = stmt.where(Donation.project_id == project_id)
+        if settled_until is not None:
+            stmt = stmt.where(self._settled_until(settled_until))
+        result = await db.execute(stmt)
+        return list(result.all())
+
+    async def get_creator_totals(
+            self,
+            db: AsyncSession,
+            limit: Optional[int] = None,
+            settled_until: Optional[datetime] = None
+    ) -> List[Row]:
+        """Суммы проведенных донатов по авторам проектов (creator_id, total) по убыванию"""
+        total = func.sum(Donation.amount).label('total')
+        stmt = (
+            select(Project.creator_id, total)
+            .join(Project, Project.id == Donation.project_id)
+            .where(Donation.status == DonationStatus.COMPLETED.value)
+            .group_by(Project.creator_id)
+            .order_by(total.desc())
+            .limit(limit)
+        )
+        if settled_until is not None:
+            stmt = stmt.where(self._settled_until(settled_until))
+        result = await db.execute(stmt)
+        return list(result.all())
+
 
 donations_repository = DonationsRepository()
\ No newline at end of file
@@ -0,0 +1,116 @@
+# src/repository/idempotency_keys_repository.py
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+from sqlalchemy import select, update, delete, or_, and_
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.database.models import IdempotencyKey
+from src.repository.base import dialect_insert
+
+
+class IdempotencyKeysRepository:
+    def __init__(self):
+        self.model = IdempotencyKey
+
+    @staticmethod
+    def _match(scope: str, user_id: int, key: str):
+        return and_(
+            IdempotencyKey.scope == scope,
+            IdempotencyKey.user_id == user_id,
+            IdempotencyKey.key == key
+        )
+
+    async def get(self, db: AsyncSession, scope: str, user_id: int, key: str) -> Optional[IdempotencyKey]:
+        """Получение ключа (всегда свежие данные из БД - ключ может ждать другой запрос)"""
+        stmt = (
+            select(IdempotencyKey)
+            .where(self._match(scope, user_id, key))
+            .execution_options(populate_existing=True)
+        )
+        result = await db.execute(stmt)
+        record = result.scalar_one_or_none()
+        await db.commit()
+        return record
+
+    async def try_acquire(
+            self,
+            db: AsyncSession,
+            scope: str,
+            user_id: int,
+            key: str,
+            request_hash: str,
+            lock_seconds: int
+    ) -> bool:
+        """
+        Захват ключа: INSERT ... ON CONFLICT DO NOTHING, а если ключ уже есть -
+        перехват только истекшего ответа или брошенной блокировки.
+        """
+        now = datetime.now()
+        values = {
+            "request_hash": request_hash,
+            "status": "in_progress",
+            "response": None,
+            "locked_until": now + timedelta(seconds=lock_seconds),
+            "expires_at": None,
+        }
+        stmt = (
+            dialect_insert(db, IdempotencyKey)
+            .values(scope=scope, user_id=user_id, key=key, created_at=now, **values)
+            .on_conflict_do_nothing(index_elements=["scope", "user_id", "key"])
+            .returning(IdempotencyKey.id)
+        )
+        acquired = (await db.execute(stmt)).scalar_one_or_none() is not None
+
+        if not acquired:
+            stmt = (
+                update(IdempotencyKey)
+                .where(
+                    self._match(scope, user_id, key),
+                    or_(
+                        and_(IdempotencyKey.status == "in_progress", IdempotencyKey.locked_until < now),
+                        and_(IdempotencyKey.status == "completed", IdempotencyKey.expires_at < now)
+                    )
+                )
+                .values(created_at=now, **values)
+                .returning(IdempotencyKey.id)
+                .execution_options(synchronize_session=False)
+            )
+            acquired = (await db.execute(stmt)).scalar_one_or_none() is not None
+
+        await db.commit()
+        return acquired
+
+    async def complete(
+            self,
+            db: AsyncSession,
+            scope: str,
+            user_id: int,
+            key: str,
+            response: Dict[str, Any],
+            ttl_seconds: int
+    ) -> None:
+        """Сохранение ответа и снятие блокировки"""
+        stmt = (
+            update(IdempotencyKey)
+            .where(self._match(scope, user_id, key))
+            .values(
+                status="completed",
+                response=response,
+                locked_until=None,
+                expires_at=datetime.now() + timedelta(seconds=ttl_seconds)
+            )
+            .execution_options(synchronize_session=False)
+        )
+        await db.execute(stmt)
+        await db.commit()
+
+    async def release(self, db: AsyncSession, scope: str, user_id: int, key: str) -> None:
+        """Снятие блокировки без ответа (запрос упал, повтор выполнится заново)"""
+        stmt = delete(IdempotencyKey).where(
+            self._match(scope, user_id, key),
+            IdempotencyKey.status == "in_progress"
+        )
+        await db.execute(stmt)
+        await db.commit()
+
+
+idempotency_keys_repository = IdempotencyKeysRepository()
@@ -0,0 +1,45 @@
+# src/repository/job_watermarks_repository.py
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.database.models import JobWatermark
+from src.repository.base import dialect_insert
+
+
+class JobWatermarksRepository:
+    def __init__(self):
+        self.model = JobWatermark
+
+    async def lock(self, db: AsyncSession, name: str) -> JobWatermark:
+        """
+        Получение отметки задачи с блокировкой строки до конца транзакции
+        (создается при первом запуске). Параллельный запуск той же задачи ждет
+        коммита, поэтому одни и те же записи не обрабатываются дважды.
+        """
+        await db.execute(
+            dialect_insert(db, JobWatermark)
+            .values(name=name, updated_at=datetime.now())
+            .on_conflict_do_nothing(index_elements=["name"])
+        )
+        stmt = (
+            select(JobWatermark)
+            .where(JobWatermark.name == name)
+            .with_for_update()
+            .execution_options(populate_existing=True)
+        )
+        return (await db.execute(stmt)).scalar_one()
+
+    async def get(self, db: AsyncSession, name: str) -> Optional[JobWatermark]:
+        stmt = select(JobWatermark).where(JobWatermark.name == name)
+        return (await db.execute(stmt)).scalar_one_or_none()
+
+    @staticmethod
+    def advance(watermark: JobWatermark, watermark_at: datetime, watermark_id: Optional[int] = None) -> None:
+        """Сдвиг отметки без коммита: сохраняется вместе с обработанными данными"""
+        watermark.watermark_at = watermark_at
+        watermark.watermark_id = watermark_id
+        watermark.updated_at = datetime.now()
+
+
+job_watermarks_repository = JobWatermarksRepository()
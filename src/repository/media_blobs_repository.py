@@ -0,0 +1,124 @@
+# src/repository/media_blobs_repository.py
+from collections import Counter
+from datetime import datetime
+from typing import Iterable, Optional
+from sqlalchemy import case, exists, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.database.models import MediaBlob
+from src.database.models.models_content import MediaType, Post, PostMedia, Project, ProjectMedia
+
+
+class MediaBlobsRepository:
+    def __init__(self):
+        self.model = MediaBlob
+
+    async def get_by_hash(self, db: AsyncSession, sha256: str) -> Optional[MediaBlob]:
+        """Получение блоба по SHA-256"""
+        stmt = select(MediaBlob).where(MediaBlob.sha256 == sha256)
+        result = await db.execute(stmt)
+        return result.scalar_one_or_none()
+
+    @staticmethod
+    def _referenced_by(user_id: int):
+        """Условие: на блоб ссылается медиа проекта или поста пользователя"""
+        return or_(
+            exists().where(
+                ProjectMedia.file_url == MediaBlob.file_url,
+                ProjectMedia.project_id == Project.id,
+                Project.creator_id == user_id
+            ),
+            exists().where(
+                PostMedia.file_url == MediaBlob.file_url,
+                PostMedia.post_id == Post.id,
+                Post.author_id == user_id
+            )
+        )
+
+    async def get_owned(self, db: AsyncSession, sha256: str, owner_id: int) -> Optional[MediaBlob]:
+        """Блоб по SHA-256, если пользователь уже ссылается на него"""
+        stmt = select(MediaBlob).where(MediaBlob.sha256 == sha256, self._referenced_by(owner_id))
+        result = await db.execute(stmt)
+        return result.scalar_one_or_none()
+
+    async def get_owned_by_url(self, db: AsyncSession, file_url: str, owner_id: int) -> Optional[MediaBlob]:
+        """Блоб по URL, если пользователь уже ссылается на него"""
+        stmt = select(MediaBlob).where(MediaBlob.file_url == file_url, self._referenced_by(owner_id))
+        result = await db.execute(stmt)
+        return result.scalar_one_or_none()
+
+    async def acquire(self, db: AsyncSession, sha256: str, owner_id: Optional[int] = None) -> Optional[MediaBlob]:
+        """
+        Атомарное увеличение счетчика ссылок существующего блоба.
+        С owner_id - только если пользователь уже ссылается на блоб из медиа
+        своих проектов или постов (иначе хеш подтверждал бы чужой файл).
+        """
+        conditions = [MediaBlob.sha256 == sha256]
+        if owner_id is not None:
+            conditions.append(self._referenced_by(owner_id))
+
+        stmt = (
+            update(MediaBlob)
+            .where(*conditions)
+            .values(
+                ref_count=MediaBlob.ref_count + 1,
+                last_referenced_at=datetime.now()
+            )
+            .returning(MediaBlob)
+            .execution_options(synchronize_session=False)
+        )
+        result = await db.execute(stmt)
+        blob = result.scalar_one_or_none()
+        await db.commit()
+        if blob:
+            # Объект мог уже находиться в identity map сессии со старым счетчиком
+            await db.refresh(blob)
+        return blob
+
+    async def create_or_acquire(
+            self,
+            db: AsyncSession,
+            sha256: str,
+            storage_key: str,
+            file_url: str,
+            file_type: MediaType,
+            file_size: int,
+            mime_type: Optional[str] = None
+    ) -> MediaBlob:
+        """Создание блоба со счетчиком 1 или увеличение счетчика, если блоб уже есть"""
+        blob = MediaBlob(
+            sha256=sha256,
+            storage_key=storage_key,
+            file_url=file_url,
+            file_type=file_type,
+            file_size=file_size,
+            mime_type=mime_type,
+            ref_count=1
+        )
+        db.add(blob)
+        try:
+            await db.commit()
+        except IntegrityError:
+            # Параллельная загрузка того же содержимого успела создать запись
+            await db.rollback()
+            return await self.acquire(db, sha256)
+
+        await db.refresh(blob)
+        return blob
+
+    async def release(self, db: AsyncSession, file_urls: Iterable[str]) -> None:
+        """
+        Уменьшение счетчиков ссылок после удаления медиа записей (по одной на
+        каждый URL из списка). Файл без ссылок удаляет сборщик мусора.
+        """
+        for file_url, count in Counter(url for url in file_urls if url).items():
+            await db.execute(
+                update(MediaBlob)
+                .where(MediaBlob.file_url == file_url)
+                .values(ref_count=case((MediaBlob.ref_count > count, MediaBlob.ref_count - count), else_=0))
+                .execution_options(synchronize_session=False)
+            )
+        await db.commit()
+
+
+media_blobs_repository = MediaBlobsRepository()
@@ -0,0 +1,12 @@
+# src/repository/post_media_repository.py
+from src.repository.base import BaseRepository
+from src.database.models.models_content import PostMedia
+from src.schemas.project import PostMediaCreate, PostMediaUpdate
+
+
+class PostMediaRepository(BaseRepository[PostMedia, PostMediaCreate, PostMediaUpdate]):
+    def __init__(self):
+        super().__init__(PostMedia)
+
+
+post_media_repository = PostMediaRepository()
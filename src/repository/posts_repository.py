@@ -1,6 +1,8 @@
 # src/repository/posts_repository.py
 from typing import List
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 from src.repository.base import BaseRepository
 from src.database.models.models_content import Post
 from src.schemas.project import PostCreate, PostUpdate
@@ -27,4 +29,24 @@ class PostsRepository(BaseRepository[Post, PostCreate, PostUpdate]):
             limit=limit
         )
 
+    async def get_by_project_with_media(
+        self,
+        db: AsyncSession,
+        project_id: int,
+        skip: int = 0,
+        limit: int = 50
+    ) -> List[Post]:
+        """Посты проекта с медиа (медиа всех постов страницы - одним запросом)"""
+        stmt = (
+            select(Post)
+            .where(Post.project_id == project_id)
+            .options(selectinload(Post.media))
+            .order_by(Post.created_at.desc())
+            .offset(skip)
+            .limit(limit)
+        )
+        result = await db.execute(stmt)
+        return result.scalars().all()
+
+
 posts_repository = PostsRepository()
\ No newline at end of file
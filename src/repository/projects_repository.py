@@ -1,9 +1,13 @@
 # src/repository/projects_repository.py
-from typing import List, Optional
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+from sqlalchemy import Numeric, and_, case, cast, exists, func, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.repository.base import BaseRepository
-from src.database.models.models_content import Project, ProjectStatus
+from src.database.models.models_content import Post, PostMedia, Project, ProjectMedia, ProjectStatus
+from src.database.models.models_payment import Donation
+from src.schemas.payment import DonationStatus
 from src.schemas.project import ProjectCreate, ProjectUpdate
 
 
@@ -87,6 +91,125 @@ class ProjectsRepository(BaseRepository[Project, ProjectCreate, ProjectUpdate]):
         # Используем универсальный метод
         await self.increment_field(db, project_id, 'views_count')
 
+    async def update_donation_stats(
+            self,
+            db: AsyncSession,
+            project_id: int,
+            amount: float,
+            donor_id: Optional[int] = None,
+            donation_id: Optional[int] = None,
+            donated_at: Optional[datetime] = None
+    ) -> Optional[int]:
+        """
+        Учет проведенного доната в счетчиках проекта одним UPDATE без коммита
+        (часть транзакции проведения). Донор считается новым, если у него нет
+        других проведенных донатов проекту. Возвращает creator_id проекта.
+        """
+        backer_increment = 1
+        if donor_id is not None:
+            has_other_donations = exists().where(
+                Donation.project_id == project_id,
+                Donation.donor_id == donor_id,
+                Donation.status == 'completed',
+                Donation.id != donation_id
+            )
+            backer_increment = case((has_other_donations, 0), else_=1)
+
+        stmt = (
+            update(Project)
+            .where(Project.id == project_id)
+            .values(
+                total_donations=func.coalesce(Project.total_donations, 0) + amount,
+                current_amount=func.coalesce(Project.current_amount, 0) + amount,
+                backers_count=func.coalesce(Project.backers_count, 0) + backer_increment,
+                last_donation_at=donated_at or datetime.now()
+            )
+            .returning(Project.creator_id)
+            .execution_options(synchronize_session=False)
+        )
+        return (await db.execute(stmt)).scalar_one_or_none()
+
+    async def refresh_donation_stats(
+            self,
+            db: AsyncSession,
+            changed_after: Optional[datetime],
+            changed_until: datetime
+    ) -> int:
+        """
+        Пересчет статистики донатов только у проектов, донаты которых менялись
+        в интервале (changed_after, changed_until], одним UPDATE ... FROM без
+        коммита. Сумма, количество, средний и максимальный донат, доноры и
+        процент от цели считаются по всем проведенным донатам проекта, поэтому
+        возвраты и повторная обработка интервала не искажают результат.
+        Возвращает число обновленных проектов.
+        """
+        touched = select(Donation.project_id).where(Donation.updated_at <= changed_until)
+        if changed_after is not None:
+            touched = touched.where(Donation.updated_at > changed_after)
+        touched = touched.distinct().subquery()
+
+        stats = (
+            select(
+                touched.c.project_id,
+                func.count(Donation.id).label('donations_count'),
+                # Как при проведении: донат без донора - отдельный донор
+                (
+                    func.count(func.distinct(Donation.donor_id))
+                    + func.count(case((Donation.donor_id.is_(None), Donation.id)))
+                ).label('backers_count'),
+                func.coalesce(func.sum(Donation.amount), 0.0).label('total_raised'),
+                func.coalesce(func.avg(Donation.amount), 0.0).label('avg_donation'),
+                func.coalesce(func.max(Donation.amount), 0.0).label('max_donation')
+            )
+            .select_from(touched)
+            .outerjoin(Donation, and_(
+                Donation.project_id == touched.c.project_id,
+                Donation.status == DonationStatus.COMPLETED.value
+            ))
+            .group_by(touched.c.project_id)
+            .subquery()
+        )
+
+        percentage = func.round(cast(stats.c.total_raised * 100 / Project.goal_amount, Numeric), 2)
+        stmt = (
+            update(Project)
+            .where(Project.id == stats.c.project_id)
+            .values(
+                donations_count=stats.c.donations_count,
+                backers_count=stats.c.backers_count,
+                total_donations=stats.c.total_raised,
+                avg_donation=stats.c.avg_donation,
+                max_donation=stats.c.max_donation,
+                completion_percentage=case(
+                    (Project.goal_amount > 0, case((percentage > 100, 100.0), else_=percentage)),
+                    else_=None
+                ),
+                updated_at=Project.updated_at  # статистика - не правка проекта
+            )
+            .execution_options(synchronize_session=False)
+        )
+        result = await db.execute(stmt)
+        return result.rowcount
+
+    async def get_titles(self, db: AsyncSession, project_ids: Iterable[int]) -> Dict[int, str]:
+        """Названия проектов по списку ID одним запросом"""
+        project_ids = list(project_ids)
+        if not project_ids:
+            return {}
+        result = await db.execute(select(Project.id, Project.title).where(Project.id.in_(project_ids)))
+        return {project_id: title for project_id, title in result}
+
+    async def get_media_urls(self, db: AsyncSession, project_id: int) -> List[str]:
+        """URL всех медиа проекта и его постов (по одному на медиа запись)"""
+        project_media = select(ProjectMedia.file_url).where(ProjectMedia.project_id == project_id)
+        post_media = (
+            select(PostMedia.file_url)
+            .join(Post, Post.id == PostMedia.post_id)
+            .where(Post.project_id == project_id)
+        )
+        result = await db.execute(project_media.union_all(post_media))
+        return list(result.scalars())
+
     async def get_with_media(self, db: AsyncSession, project_id: int) -> Optional[Project]:
         # Используем универсальный метод с отношениями
         return await self.get_with_relationships(db, project_id, ['media'])
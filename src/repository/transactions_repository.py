@@ -1,8 +1,11 @@
 # src/repository/transactions_repository.py
-from typing import List, Optional
+from datetime import datetime
+from typing import List, Optional, Tuple
+from sqlalchemy import select, update, or_, and_
+from sqlalchemy.engine import Row
 from sqlalchemy.ext.asyncio import AsyncSession
 from src.repository.base import BaseRepository
-from src.database.models import Transaction
+from src.database.models import Donation, Transaction
 from src.schemas.payment import TransactionCreate, TransactionUpdate
 
 
@@ -39,6 +42,114 @@ class TransactionsRepository(BaseRepository[Transaction, TransactionCreate, Tran
         )
         return transactions[0] if transactions else None
 
+    async def get_by_donation(self, db: AsyncSession, donation_id: int) -> Optional[Transaction]:
+        transactions = await self.get_by_field(
+            db,
+            field_name='donation_id',
+            field_value=donation_id,
+            order_by=Transaction.id.asc(),
+            limit=1
+        )
+        return transactions[0] if transactions else None
+
+    async def complete_for_donation(self, db: AsyncSession, donation_id: int, completed_at: datetime) -> int:
+        """Завершение pending транзакций доната без коммита (часть транзакции проведения)"""
+        stmt = (
+            update(Transaction)
+            .where(Transaction.donation_id == donation_id, Transaction.status == 'pending')
+            .values(status='completed', completed_at=completed_at, updated_at=completed_at)
+            .execution_options(synchronize_session=False)
+        )
+        result = await db.execute(stmt)
+        return result.rowcount
+
+    async def fail_for_donation(self, db: AsyncSession, donation_id: int) -> int:
+        """Перевод pending транзакций доната в failed без коммита"""
+        stmt = (
+            update(Transaction)
+            .where(Transaction.donation_id == donation_id, Transaction.status == 'pending')
+            .values(status='failed', updated_at=datetime.now())
+            .execution_options(synchronize_session=False)
+        )
+        result = await db.execute(stmt)
+        return result.rowcount
+
+    async def get_stale_pending(
+            self,
+            db: AsyncSession,
+            created_before: datetime,
+            after: Optional[Tuple[datetime, int]] = None,
+            limit: int = 100
+    ) -> List[Row]:
+        """
+        Страница зависших pending донатов Stripe (индекс status, created_at).
+        Постраничный обход по ключу (created_at, id): after - последняя строка
+        предыдущей страницы.
+        """
+        stmt = (
+            select(
+                Transaction.id,
+                Transaction.donation_id,
+                Transaction.amount,
+                Transaction.provider_transaction_id,
+                Transaction.created_at
+            )
+            .where(
+                Transaction.status == 'pending',
+                Transaction.created_at < created_before,
+                Transaction.transaction_type == 'donation',
+                Transaction.payment_provider == 'stripe'
+            )
+            .order_by(Transaction.created_at.asc(), Transaction.id.asc())
+            .limit(limit)
+        )
+        if after:
+            after_created_at, after_id = after
+            stmt = stmt.where(or_(
+                Transaction.created_at > after_created_at,
+                and_(Transaction.created_at == after_created_at, Transaction.id > after_id)
+            ))
+        result = await db.execute(stmt)
+        return list(result.all())
+
+    async def get_settled_donations(
+            self,
+            db: AsyncSession,
+            completed_until: datetime,
+            after: Optional[Tuple[datetime, int]] = None,
+            limit: int = 1000
+    ) -> List[Row]:
+        """
+        Страница проведенных донатов по времени проведения (индекс completed_at, id):
+        id, completed_at, amount, project_id, donor_id. after - ключ (completed_at, id)
+        последней уже обработанной транзакции.
+        """
+        stmt = (
+            select(
+                Transaction.id,
+                Transaction.completed_at,
+                Transaction.amount,
+                Donation.project_id,
+                Donation.donor_id
+            )
+            .join(Donation, Donation.id == Transaction.donation_id)
+            .where(
+                Transaction.status == 'completed',
+                Transaction.transaction_type == 'donation',
+                Transaction.completed_at <= completed_until
+            )
+            .order_by(Transaction.completed_at.asc(), Transaction.id.asc())
+            .limit(limit)
+        )
+        if after:
+            after_completed_at, after_id = after
+            stmt = stmt.where(or_(
+                Transaction.completed_at > after_completed_at,
+                and_(Transaction.completed_at == after_completed_at, Transaction.id > after_id)
+            ))
+        result = await db.execute(stmt)
+        return list(result.all())
+
     async def update_status(
             self,
             db: AsyncSession,
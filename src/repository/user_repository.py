@@ -1,7 +1,7 @@
 # src/repository/user_repository.py
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from typing import Optional, List
+from typing import Dict, Iterable, Optional, List
 
 from src.database import models
 
@@ -86,5 +86,15 @@ class UserRepository:
             return True
         return False
 
+    async def get_usernames(self, db: AsyncSession, user_ids: Iterable[int]) -> Dict[int, str]:
+        """Имена пользователей по списку ID одним запросом"""
+        user_ids = list(user_ids)
+        if not user_ids:
+            return {}
+        result = await db.execute(
+            select(models.User.id, models.User.username).where(models.User.id.in_(user_ids))
+        )
+        return {user_id: username for user_id, username in result}
+
 
 user_repository = UserRepository()
\ No newline at end of file
@@ -1,5 +1,7 @@
 # src/repository/wallets_repository.py
+from datetime import datetime
 from typing import Optional
+from sqlalchemy import update
 from sqlalchemy.ext.asyncio import AsyncSession
 from src.repository.base import BaseRepository
 from src.database.models import Wallet
@@ -21,24 +23,17 @@ class WalletsRepository(BaseRepository[Wallet, WalletCreate, WalletUpdate]):
             amount: float,
             operation: str = 'add'  # 'add' или 'subtract'
     ) -> Wallet:
-        """Обновление баланса кошелька"""
-        wallet = await self.get(db, wallet_id)
-        if not wallet:
-            raise ValueError(f"Wallet {wallet_id} not found")
-
+        """Обновление баланса кошелька (атомарно на стороне БД)"""
         if operation == 'add':
-            new_balance = wallet.balance + amount
-            new_total_earned = wallet.total_earned + amount
+            values = {
+                'balance': Wallet.balance + amount,
+                'total_earned': Wallet.total_earned + amount
+            }
         else:
-            new_balance = wallet.balance - amount
-            new_total_earned = wallet.total_earned  # total_earned не уменьшаем при выводе
+            # total_earned не уменьшаем при выводе
+            values = {'balance': Wallet.balance - amount}
 
-        update_data = {
-            'balance': new_balance,
-            'total_earned': new_total_earned
-        }
-
-        return await self.update(db, wallet, WalletUpdate(**update_data))
+        return await self._update_returning(db, wallet_id, values)
 
     async def increment_donated_amount(
             self,
@@ -47,16 +42,54 @@ class WalletsRepository(BaseRepository[Wallet, WalletCreate, WalletUpdate]):
             amount: float
     ) -> Wallet:
         """Увеличение общей суммы пожертвований"""
-        wallet = await self.get(db, wallet_id)
+        return await self._update_returning(db, wallet_id, {'total_donated': Wallet.total_donated + amount})
+
+    async def _update_returning(self, db: AsyncSession, wallet_id: int, values: dict) -> Wallet:
+        stmt = (
+            update(Wallet)
+            .where(Wallet.id == wallet_id)
+            .values(**values, updated_at=datetime.now())
+            .returning(Wallet)
+            .execution_options(synchronize_session=False)
+        )
+        wallet = (await db.execute(stmt)).scalar_one_or_none()
         if not wallet:
+            await db.rollback()
             raise ValueError(f"Wallet {wallet_id} not found")
 
-        new_total_donated = wallet.total_donated + amount
-        return await self.update(
-            db,
-            wallet,
-            WalletUpdate(total_donated=new_total_donated)
+        await db.commit()
+        # Объект мог уже находиться в identity map сессии со старым балансом
+        await db.refresh(wallet)
+        return wallet
+
+    async def credit_earnings(self, db: AsyncSession, user_id: int, amount: float) -> Optional[float]:
+        """
+        Зачисление дохода на кошелек пользователя: UPDATE ... RETURNING без
+        коммита, часть транзакции проведения доната. None - кошелька нет.
+        """
+        stmt = (
+            update(Wallet)
+            .where(Wallet.user_id == user_id)
+            .values(
+                balance=Wallet.balance + amount,
+                total_earned=Wallet.total_earned + amount,
+                updated_at=datetime.now()
+            )
+            .returning(Wallet.balance)
+            .execution_options(synchronize_session=False)
+        )
+        return (await db.execute(stmt)).scalar_one_or_none()
+
+    async def add_donated_amount(self, db: AsyncSession, user_id: int, amount: float) -> Optional[float]:
+        """Увеличение суммы пожертвований донора без коммита (часть проведения доната)"""
+        stmt = (
+            update(Wallet)
+            .where(Wallet.user_id == user_id)
+            .values(total_donated=Wallet.total_donated + amount, updated_at=datetime.now())
+            .returning(Wallet.total_donated)
+            .execution_options(synchronize_session=False)
         )
+        return (await db.execute(stmt)).scalar_one_or_none()
 
 
 wallets_repository = WalletsRepository()
\ No newline at end of file
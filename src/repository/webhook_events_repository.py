@@ -0,0 +1,152 @@
+# src/repository/webhook_events_repository.py
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+from sqlalchemy import select, update, or_, and_, case
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.database.models import StripeWebhookEvent
+from src.repository.base import dialect_insert
+
+
+class WebhookEventsRepository:
+    def __init__(self):
+        self.model = StripeWebhookEvent
+
+    async def insert_if_absent(
+            self,
+            db: AsyncSession,
+            event_id: str,
+            event_type: str,
+            payload: Dict[str, Any],
+            event_created_at: Optional[datetime] = None
+    ) -> bool:
+        """
+        Сохранение события в ящик (INSERT ... ON CONFLICT DO NOTHING).
+        Возвращает False, если событие с этим id уже было получено.
+        """
+        stmt = (
+            dialect_insert(db, StripeWebhookEvent)
+            .values(
+                event_id=event_id,
+                event_type=event_type,
+                payload=payload,
+                status="pending",
+                attempts=0,
+                event_created_at=event_created_at,
+                received_at=datetime.now()
+            )
+            .on_conflict_do_nothing(index_elements=["event_id"])
+            .returning(StripeWebhookEvent.id)
+        )
+        result = await db.execute(stmt)
+        inserted = result.scalar_one_or_none() is not None
+        await db.commit()
+        return inserted
+
+    async def claim_batch(
+            self,
+            db: AsyncSession,
+            limit: int,
+            claim_timeout_seconds: int,
+            max_attempts: int
+    ) -> List[StripeWebhookEvent]:
+        """
+        Захват пачки событий на обработку в порядке их создания в Stripe.
+        Строки блокируются через SKIP LOCKED, поэтому параллельные обработчики
+        берут разные события; зависшие в processing дольше таймаута забираются снова.
+        Каждый захват расходует попытку: события, исчерпавшие попытки (например,
+        раз за разом роняющие воркер), уходят в failed и больше не захватываются.
+        """
+        stale_threshold = datetime.now() - timedelta(seconds=claim_timeout_seconds)
+        claimable = or_(
+            StripeWebhookEvent.status == "pending",
+            and_(
+                StripeWebhookEvent.status == "processing",
+                StripeWebhookEvent.claimed_at < stale_threshold
+            )
+        )
+
+        # Dead-letter: дальнейшие повторы такого события бессмысленны
+        await db.execute(
+            update(StripeWebhookEvent)
+            .where(claimable, StripeWebhookEvent.attempts >= max_attempts)
+            .values(status="failed", last_error="Max attempts exceeded")
+            .execution_options(synchronize_session=False)
+        )
+
+        stmt = (
+            select(StripeWebhookEvent)
+            .where(claimable, StripeWebhookEvent.attempts < max_attempts)
+            .order_by(StripeWebhookEvent.event_created_at.asc(), StripeWebhookEvent.id.asc())
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        events = list((await db.execute(stmt)).scalars().all())
+
+        claimed_at = datetime.now()
+        for event in events:
+            event.status = "processing"
+            event.claimed_at = claimed_at
+            event.attempts = (event.attempts or 0) + 1
+        await db.commit()
+        return events
+
+    async def mark_processed(self, db: AsyncSession, event_id: int) -> None:
+        """Отметка об успешной обработке события (по первичному ключу)"""
+        await db.execute(
+            update(StripeWebhookEvent)
+            .where(StripeWebhookEvent.id == event_id)
+            .values(status="processed", processed_at=datetime.now(), last_error=None)
+            .execution_options(synchronize_session=False)
+        )
+        await db.commit()
+
+    async def mark_failed(self, db: AsyncSession, event_id: int, error: str, max_attempts: int) -> None:
+        """
+        Ошибка обработки: событие вернется в очередь, пока не исчерпаны попытки.
+        Статус считается по attempts в БД, загруженный объект события не нужен.
+        """
+        await db.execute(
+            update(StripeWebhookEvent)
+            .where(StripeWebhookEvent.id == event_id)
+            .values(
+                status=case((StripeWebhookEvent.attempts >= max_attempts, "failed"), else_="pending"),
+                last_error=error
+            )
+            .execution_options(synchronize_session=False)
+        )
+        await db.commit()
+
+    async def get_by_status(
+            self,
+            db: AsyncSession,
+            status: str,
+            skip: int = 0,
+            limit: int = 100
+    ) -> List[StripeWebhookEvent]:
+        """Получение событий по статусу"""
+        stmt = (
+            select(StripeWebhookEvent)
+            .where(StripeWebhookEvent.status == status)
+            .order_by(StripeWebhookEvent.event_created_at.asc(), StripeWebhookEvent.id.asc())
+            .offset(skip)
+            .limit(limit)
+        )
+        result = await db.execute(stmt)
+        return list(result.scalars().all())
+
+    async def requeue_failed(self, db: AsyncSession, event_ids: Optional[List[str]] = None) -> int:
+        """Возврат упавших событий в очередь (все или указанные evt_ id)"""
+        stmt = (
+            update(StripeWebhookEvent)
+            .where(StripeWebhookEvent.status == "failed")
+            .values(status="pending", attempts=0, claimed_at=None)
+            .execution_options(synchronize_session=False)
+        )
+        if event_ids:
+            stmt = stmt.where(StripeWebhookEvent.event_id.in_(event_ids))
+        result = await db.execute(stmt)
+        await db.commit()
+        return result.rowcount
+
+
+webhook_events_repository = WebhookEventsRepository()
@@ -1,5 +1,5 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_, func
+from sqlalchemy import select, and_, func, update
 from datetime import datetime, timedelta
 from typing import List, Optional, Tuple
 
@@ -170,6 +170,15 @@ class WebinarRepository:
             registration.reminder_sent = True
             await db.commit()
 
+    async def reset_reminders(self, db: AsyncSession, webinar_id: int) -> None:
+        """Сброс отметок о напоминаниях регистраций вебинара без коммита (перенос вебинара)"""
+        await db.execute(
+            update(models.WebinarRegistration)
+            .where(models.WebinarRegistration.webinar_id == webinar_id)
+            .values(reminder_sent=False, last_reminder_offset=None)
+            .execution_options(synchronize_session=False)
+        )
+
     async def check_webinar_exists(
             self,
             db: AsyncSession,
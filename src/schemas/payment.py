@@ -1,6 +1,6 @@
 # src/schemas/payment.py
 from pydantic import BaseModel, field_validator, ConfigDict
-from typing import Optional, Dict, Any, Literal
+from typing import Optional, Dict, Any, List, Literal
 from datetime import datetime
 from enum import Enum
 
@@ -246,6 +246,25 @@ class WebhookResponse(BaseModel):
     error: Optional[str] = None
 
 
+class WebhookEventResponse(BaseModel):
+    """Событие из входящего ящика вебхуков"""
+    event_id: str
+    event_type: str
+    status: str
+    attempts: int
+    last_error: Optional[str] = None
+    event_created_at: Optional[datetime] = None
+    received_at: datetime
+    processed_at: Optional[datetime] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class WebhookReplayRequest(BaseModel):
+    """Повтор упавших событий (пустой список - все упавшие)"""
+    event_ids: Optional[List[str]] = None
+
+
 # Statistics Schemas
 class DonationStatsResponse(BaseModel):
     """Статистика донатов"""
@@ -256,6 +275,34 @@ class DonationStatsResponse(BaseModel):
     donor_total: Optional[float] = None
 
 
+class DonationRollupPoint(BaseModel):
+    """Точка графика донатов проекта: агрегат за час или день"""
+    bucket_start: datetime
+    donations_count: int = 0
+    total_amount: float = 0.0
+    max_amount: float = 0.0
+    unique_donors: int = 0
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class DonationTimeSeriesResponse(BaseModel):
+    """Временной ряд донатов проекта (пустые интервалы заполнены нулями)"""
+    project_id: int
+    granularity: Literal["hour", "day"]
+    start: datetime
+    end: datetime
+    points: List[DonationRollupPoint]
+
+
+class LeaderboardEntry(BaseModel):
+    """Позиция в рейтинге: проект, донор или автор"""
+    rank: int
+    id: int
+    name: Optional[str] = None
+    total_amount: float
+
+
 class WalletStatsResponse(BaseModel):
     """Статистика кошелька"""
     balance: float
@@ -1,6 +1,6 @@
 # src/schemas/project.py
-from pydantic import BaseModel, ConfigDict, field_validator
-from typing import Optional, List
+from pydantic import BaseModel, ConfigDict, field_validator, model_validator
+from typing import Optional, List, Dict
 from datetime import datetime
 from enum import Enum
 from .user import UserResponse
@@ -15,6 +15,10 @@ class MediaType(str, Enum):
     OTHER = "other"
 
 
+# Изображения, которые до генерации превью показываются оригиналом
+PREVIEW_AS_ORIGINAL_TYPES = (MediaType.IMAGE, MediaType.GIF)
+
+
 class ProjectStatus(str, Enum):
     DRAFT = "draft"
     ACTIVE = "active"
@@ -43,6 +47,8 @@ class ProjectMediaBase(BaseModel):
 
 class ProjectMediaCreate(ProjectMediaBase):
     project_id: int
+    file_size: Optional[int] = None
+    mime_type: Optional[str] = None
 
 
 class ProjectMediaUpdate(BaseModel):
@@ -58,12 +64,78 @@ class ProjectMediaResponse(ProjectMediaBase):
     file_size: Optional[int] = None
     duration: Optional[int] = None
     thumbnail_url: Optional[str] = None
+    variants: Optional[Dict[str, Dict[str, str]]] = None
     mime_type: Optional[str] = None
     is_approved: bool
     created_at: datetime
 
     model_config = ConfigDict(from_attributes=True)
 
+    @model_validator(mode='after')
+    def fallback_thumbnail(self):
+        if self.thumbnail_url is None and self.file_type in PREVIEW_AS_ORIGINAL_TYPES:
+            self.thumbnail_url = self.file_url
+        return self
+
+
+# Схемы для возобновляемой загрузки медиа
+class UploadSessionCreate(BaseModel):
+    file_name: str
+    file_size: int
+    description: Optional[str] = None
+
+    @field_validator('file_size')
+    def validate_file_size(cls, v):
+        if v <= 0:
+            raise ValueError('Размер файла должен быть больше 0')
+        return v
+
+
+class UploadSessionResponse(BaseModel):
+    upload_id: str
+    project_id: int
+    file_name: str
+    file_size: int
+    received: int
+    chunk_size: Optional[int] = None
+    expires_in: Optional[int] = None
+
+
+# Схемы для прямой загрузки в хранилище
+class DirectUploadCreate(BaseModel):
+    file_name: str
+    file_size: int
+    sha256: str
+    content_type: Optional[str] = None
+
+    @field_validator('file_size')
+    def validate_file_size(cls, v):
+        if v <= 0:
+            raise ValueError('Размер файла должен быть больше 0')
+        return v
+
+    @field_validator('sha256')
+    def validate_sha256(cls, v):
+        v = v.lower()
+        if len(v) != 64 or any(c not in '0123456789abcdef' for c in v):
+            raise ValueError('sha256 должен быть hex-строкой из 64 символов')
+        return v
+
+
+class DirectUploadResponse(BaseModel):
+    storage_key: str
+    exists: bool = False
+    upload_url: Optional[str] = None
+    method: Optional[str] = None
+    headers: Optional[Dict[str, str]] = None
+    expires_in: Optional[int] = None
+
+
+class DirectUploadConfirm(BaseModel):
+    storage_key: str
+    file_name: str
+    description: Optional[str] = None
+
 
 # Схемы для проектов
 class ProjectBase(BaseModel):
@@ -197,6 +269,16 @@ class PostWithAuthorResponse(PostResponse):
 class PostWithMediaResponse(PostResponse):
     media: List['PostMediaResponse'] = []
 
+    @model_validator(mode='after')
+    def fallback_media_thumbnail(self):
+        # Превью основного медиа - из его медиа записи (сгенерированное или оригинал)
+        if self.media_thumbnail is None and self.media_url:
+            for media in self.media:
+                if media.file_url == self.media_url:
+                    self.media_thumbnail = media.thumbnail_url
+                    break
+        return self
+
 
 # Схемы для медиа постов
 class PostMediaBase(BaseModel):
@@ -224,11 +306,18 @@ class PostMediaResponse(PostMediaBase):
     file_size: Optional[int] = None
     duration: Optional[int] = None
     thumbnail_url: Optional[str] = None
+    variants: Optional[Dict[str, Dict[str, str]]] = None
     mime_type: Optional[str] = None
     created_at: datetime
 
     model_config = ConfigDict(from_attributes=True)
 
+    @model_validator(mode='after')
+    def fallback_thumbnail(self):
+        if self.thumbnail_url is None and self.file_type in PREVIEW_AS_ORIGINAL_TYPES:
+            self.thumbnail_url = self.file_url
+        return self
+
 
 # Схемы для комментариев
 class CommentBase(BaseModel):
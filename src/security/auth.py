@@ -159,16 +159,19 @@ async def generate_and_send_verification_codes(db: AsyncSession, user: models.Us
         logger.info(f"🎯 START: generate_and_send_verification_codes for {user.email}")
         logger.info(f"🔢 Generated code: {code}")
 
-        # ✅ EMAIL ЧЕРЕЗ CELERY С .delay()
-        from src.tasks.tasks import send_verification_codes_task
+        # ✅ EMAIL: быстрая полоса прямо из запроса, при сбое - через Celery
+        from src.services.async_email_service import async_email_service
 
-        logger.info(f"🚀 CALLING: send_verification_codes_task.delay() for {user.email}")
+        if not await async_email_service.send_verification_code_email(user.email, user.username, code):
+            from src.tasks.tasks import send_verification_codes_task
 
-        send_verification_codes_task.delay(
-            user_email=user.email,
-            username=user.username,
-            verification_code=code
-        )
+            logger.info(f"🚀 CALLING: send_verification_codes_task.delay() for {user.email}")
+
+            send_verification_codes_task.delay(
+                user_email=user.email,
+                username=user.username,
+                verification_code=code
+            )
 
         logger.info(f"✅ FINISH: generate_and_send_verification_codes completed for {user.email}")
 
@@ -177,7 +180,7 @@ async def generate_and_send_verification_codes(db: AsyncSession, user: models.Us
         if user.phone:
             sms_success = await sms_service.send_verification_code(user.phone, code)
 
-        logger.info(f"📧 Email task sent to Celery for {user.email}")
+        logger.info(f"📧 Email sent or queued for {user.email}")
         logger.info(f"📱 SMS sent: {sms_success}")
 
         return {
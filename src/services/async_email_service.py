@@ -0,0 +1,162 @@
+# src/services/async_email_service.py
+import asyncio
+import logging
+import ssl
+import time
+from typing import List, Optional
+
+from src.config.settings import settings
+from src.services.email_service import email_service
+
+logger = logging.getLogger(__name__)
+
+try:
+    import aiosmtplib
+
+    AIOSMTPLIB_AVAILABLE = True
+except ImportError:
+    AIOSMTPLIB_AVAILABLE = False
+    logger.warning("aiosmtplib not available, async emails use the pooled sync client in a thread")
+
+
+class AsyncSMTPPool:
+    """
+    Небольшой пул постоянных авторизованных aiosmtplib соединений.
+    Соединения открываются по требованию и переиспользуются; простоявшее
+    дольше max_idle секунд соединение проверяется через NOOP. Соединение,
+    на котором отправка упала или была отменена, закрывается, а не возвращается.
+    """
+
+    def __init__(self, size: int, timeout: float, max_idle: float):
+        self.size = size
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self._idle: List[tuple] = []  # (client, last_used)
+        self._slots = asyncio.Semaphore(size)
+
+    async def _connect(self) -> "aiosmtplib.SMTP":
+        client = aiosmtplib.SMTP(
+            hostname=email_service.smtp_server,
+            port=email_service.smtp_port,
+            use_tls=email_service.use_ssl,
+            start_tls=email_service.use_tls if not email_service.use_ssl else False,
+            tls_context=ssl.create_default_context(),
+            timeout=self.timeout
+        )
+        try:
+            await client.connect()
+            await client.login(email_service.smtp_username, email_service.smtp_password)
+        except BaseException:
+            client.close()
+            raise
+        return client
+
+    async def _checkout(self) -> "aiosmtplib.SMTP":
+        while self._idle:
+            client, last_used = self._idle.pop()
+            try:
+                if client.is_connected and (
+                        time.monotonic() - last_used < self.max_idle or await self._is_alive(client)):
+                    return client
+            except BaseException:
+                # Отмена во время NOOP не должна оставить соединение открытым
+                client.close()
+                raise
+            client.close()
+        return await self._connect()
+
+    @staticmethod
+    async def _is_alive(client: "aiosmtplib.SMTP") -> bool:
+        try:
+            return (await client.noop()).code == 250
+        except (aiosmtplib.SMTPException, OSError):
+            return False
+
+    async def send(self, message) -> None:
+        async with self._slots:
+            client = await self._checkout()
+            try:
+                await client.send_message(message)
+            except BaseException:
+                # В том числе CancelledError (asyncio.wait_for по таймауту)
+                client.close()
+                raise
+            self._idle.append((client, time.monotonic()))
+
+    async def close(self) -> None:
+        idle, self._idle = self._idle, []
+        for client, _ in idle:
+            try:
+                await client.quit()
+            except Exception:
+                client.close()
+
+
+class AsyncEmailService:
+    """
+    Отправка писем прямо из запроса, без очереди Celery: быстрая полоса для
+    кодов подтверждения и 2FA. Пул соединений создается и закрывается в
+    lifespan приложения; вне приложения (Celery, тесты без lifespan) сервис
+    не запущен и вызывающий код уходит в обычную очередь.
+    """
+
+    def __init__(self):
+        self.pool: Optional[AsyncSMTPPool] = None
+
+    @property
+    def started(self) -> bool:
+        return self.pool is not None
+
+    async def start(self) -> None:
+        self.pool = AsyncSMTPPool(
+            size=settings.SMTP_ASYNC_POOL_SIZE,
+            timeout=settings.SMTP_ASYNC_TIMEOUT_SECONDS,
+            max_idle=settings.SMTP_CONNECTION_MAX_IDLE_SECONDS
+        )
+
+    async def close(self) -> None:
+        pool, self.pool = self.pool, None
+        if pool and AIOSMTPLIB_AVAILABLE:
+            await pool.close()
+
+    async def send_email(self, to_email: str, subject: str, html_content: str,
+                         text_content: Optional[str] = None) -> None:
+        """Асинхронная отправка письма; ошибки SMTP пробрасываются"""
+        if not self.started:
+            raise RuntimeError("Async email service is not started")
+        if AIOSMTPLIB_AVAILABLE:
+            message = email_service.build_message(to_email, subject, html_content, text_content)
+            await self.pool.send(message)
+        else:
+            await asyncio.to_thread(email_service.deliver, to_email, subject, html_content, text_content)
+
+    async def send_verification_code_email(self, to_email: str, username: str, verification_code: str) -> bool:
+        """
+        Код подтверждения через быструю полосу. False - письмо не ушло
+        (сервис не запущен, SMTP недоступен или таймаут), нужен запасной путь.
+        """
+        if not self.started:
+            return False
+        started_at = time.monotonic()
+        try:
+            from src.services.template_service import template_service
+
+            html_content = template_service.render_email_template(
+                "verification_code.html",
+                username=username,
+                verification_code=verification_code,
+                code_expire_minutes=getattr(settings, 'SMS_CODE_EXPIRE_MINUTES', 10)
+            )
+            await asyncio.wait_for(
+                self.send_email(to_email, "🔐 Код подтверждения для CrowdPlatform", html_content),
+                timeout=settings.SMTP_ASYNC_TIMEOUT_SECONDS
+            )
+        except Exception as e:
+            logger.warning(f"⚠️ Fast lane email to {to_email} failed: {e}")
+            return False
+
+        logger.info(f"⚡ Verification code sent to {to_email} in {(time.monotonic() - started_at) * 1000:.0f} ms")
+        return True
+
+
+async_email_service = AsyncEmailService()
@@ -0,0 +1,122 @@
+# src/services/bulk_email_service.py
+import logging
+import math
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from src.config.settings import settings
+from src.services.email_service import email_service, is_transient_smtp_error
+
+logger = logging.getLogger(__name__)
+
+_process_pool: Optional[ProcessPoolExecutor] = None
+
+
+def get_email_process_pool() -> ProcessPoolExecutor:
+    """Пул процессов для рендера и сборки писем массовых рассылок (создается лениво)"""
+    global _process_pool
+    if _process_pool is None:
+        _process_pool = ProcessPoolExecutor(max_workers=settings.EMAIL_RENDER_PROCESS_WORKERS)
+    return _process_pool
+
+
+def build_messages(
+        template_name: str,
+        subject: str,
+        recipients: List[Dict[str, Any]],
+        shared: Optional[Dict[str, Any]] = None
+) -> List[Tuple[str, bytes]]:
+    """
+    Рендер шаблона и сборка MIME для части получателей (выполняется в пуле
+    процессов): [(email, письмо в bytes)]. Письмо возвращается уже
+    сериализованным - кодирование MIME тоже CPU работа.
+    """
+    from src.services.template_service import template_service
+
+    html_contents = template_service.render_many(
+        template_name, [recipient.get("context", {}) for recipient in recipients], shared
+    )
+    return [
+        (recipient["email"], email_service.build_message(recipient["email"], subject, html_content).as_bytes())
+        for recipient, html_content in zip(recipients, html_contents)
+    ]
+
+
+class BulkEmailService:
+    """
+    Массовые рассылки (напоминания о вебинарах и т.п.). Получатели делятся на
+    чанки по EMAIL_BULK_CHUNK_SIZE - одна Celery задача на чанк. Внутри задачи
+    рендер шаблона, html->text и сборка MIME идут в пуле процессов, а готовые
+    письма отправляются параллельно через пул SMTP соединений.
+    Получатель - dict {"email": ..., "context": {...}}; общие для всех данные
+    шаблона передаются один раз в shared.
+    """
+
+    @staticmethod
+    def chunk(recipients: List[Dict[str, Any]], size: Optional[int] = None) -> Iterator[List[Dict[str, Any]]]:
+        size = size or settings.EMAIL_BULK_CHUNK_SIZE
+        for start in range(0, len(recipients), size):
+            yield recipients[start:start + size]
+
+    def render_chunk(
+            self,
+            template_name: str,
+            subject: str,
+            recipients: List[Dict[str, Any]],
+            shared: Optional[Dict[str, Any]] = None,
+            executor: Optional[Executor] = None
+    ) -> List[Tuple[str, bytes]]:
+        """Сборка писем чанка: чанк делится между процессами пула"""
+        executor = executor or get_email_process_pool()
+        parts = max(1, min(settings.EMAIL_RENDER_PROCESS_WORKERS, len(recipients)))
+        part_size = math.ceil(len(recipients) / parts) if recipients else 1
+        futures = [
+            executor.submit(build_messages, template_name, subject, part, shared)
+            for part in self.chunk(recipients, part_size)
+        ]
+        messages = []
+        for future in futures:
+            messages.extend(future.result())
+        return messages
+
+    def send_chunk(
+            self,
+            template_name: str,
+            subject: str,
+            recipients: List[Dict[str, Any]],
+            shared: Optional[Dict[str, Any]] = None,
+            executor: Optional[Executor] = None
+    ) -> Tuple[Dict[str, int], List[Dict[str, Any]]]:
+        """
+        Сборка и отправка чанка; ошибка одного письма не останавливает остальные.
+        Возвращает статистику и получателей с временной ошибкой SMTP (для повтора).
+        """
+        messages = self.render_chunk(template_name, subject, recipients, shared, executor)
+
+        def deliver(message: Tuple[str, bytes]) -> Optional[Exception]:
+            to_email, raw_message = message
+            try:
+                email_service.deliver_raw(to_email, raw_message)
+                return None
+            except Exception as e:
+                logger.error(f"❌ Failed to send bulk email to {to_email}: {e}")
+                return e
+
+        with ThreadPoolExecutor(max_workers=settings.SMTP_POOL_SIZE) as sender:
+            errors = list(sender.map(deliver, messages))
+
+        # Письма собираются в порядке получателей
+        transient = [
+            recipient for recipient, error in zip(recipients, errors)
+            if error is not None and is_transient_smtp_error(error)
+        ]
+        stats = {
+            "sent": sum(error is None for error in errors),
+            "failed": sum(error is not None for error in errors),
+            "transient": len(transient),
+        }
+        logger.info(f"📨 Bulk email chunk '{template_name}': {stats}")
+        return stats, transient
+
+
+bulk_email_service = BulkEmailService()
@@ -0,0 +1,126 @@
+# src/services/direct_upload_service.py
+import logging
+import mimetypes
+from typing import Any, Dict, Optional
+
+from fastapi import HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette import status
+
+from src.config.settings import settings
+from src.repository.media_blobs_repository import media_blobs_repository
+from src.schemas.project import ProjectMediaResponse
+from src.services.media_service import media_service
+from src.services.project_service import ProjectService
+from src.services.storage_service import storage_backend
+from src.utils.file_utils import (
+    generate_blob_key, get_max_file_size, get_media_type_from_extension, parse_blob_key, resolve_media_type
+)
+
+logger = logging.getLogger(__name__)
+
+# Сколько первых байт объекта читать для проверки сигнатуры
+SNIFF_BYTES = 4096
+
+
+class DirectUploadService:
+    """
+    Прямая загрузка медиа в хранилище в обход воркеров API.
+
+    Клиент получает подписанный PUT на контентно-адресуемый ключ, загружает
+    файл напрямую и подтверждает загрузку; API проверяет объект (размер и
+    сигнатуру по первым байтам) и создает запись ProjectMedia.
+    """
+
+    def __init__(self):
+        self.storage = storage_backend
+
+    async def create_upload(
+            self,
+            db: AsyncSession,
+            user_id: int,
+            file_name: str,
+            file_size: int,
+            sha256: str,
+            content_type: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Подписанная ссылка для загрузки (или признак, что содержимое уже есть)"""
+        max_size = get_max_file_size(get_media_type_from_extension(file_name))
+        if file_size > max_size:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Файл слишком большой. Максимальный размер: {max_size // 1024 // 1024}MB"
+            )
+
+        sha256 = sha256.lower()
+        blob = await media_blobs_repository.get_owned(db, sha256, user_id)
+        if blob:
+            # Пользователь уже загружал это содержимое - загружать повторно не нужно.
+            # Про чужие файлы ответ ничего не сообщает: загрузка идет как обычно
+            return {"storage_key": blob.storage_key, "exists": True}
+
+        storage_key = generate_blob_key(sha256, file_name)
+        content_type = content_type or mimetypes.guess_type(file_name)[0] or "application/octet-stream"
+        presigned = self.storage.presign_put(
+            storage_key, content_type, sha256, file_size, settings.STORAGE_PRESIGN_EXPIRES_SECONDS
+        )
+
+        return {
+            "storage_key": storage_key,
+            "exists": False,
+            "upload_url": presigned.url,
+            "method": presigned.method,
+            "headers": presigned.headers,
+            "expires_in": presigned.expires_in,
+        }
+
+    async def confirm_upload(
+            self,
+            db: AsyncSession,
+            user_id: int,
+            project_id: int,
+            storage_key: str,
+            file_name: str,
+            description: Optional[str] = None
+    ) -> ProjectMediaResponse:
+        """Проверка загруженного объекта и создание медиа проекта"""
+        sha256 = parse_blob_key(storage_key)
+        if not sha256:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid storage key")
+
+        blob = await media_service.reuse_blob(db, sha256, user_id)
+        if blob is None:
+            # Объект проверяется всегда, если пользователь не ссылался на блоб раньше
+            stored = await self.storage.stat(storage_key)
+            if stored is None:
+                raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Object has not been uploaded")
+
+            head = await self.storage.read_head(storage_key, SNIFF_BYTES)
+            try:
+                media_type, mime_type = resolve_media_type(file_name, head)
+                max_size = get_max_file_size(media_type)
+                if stored.size > max_size:
+                    raise HTTPException(
+                        status_code=status.HTTP_400_BAD_REQUEST,
+                        detail=f"Файл слишком большой. Максимальный размер: {max_size // 1024 // 1024}MB"
+                    )
+            except HTTPException:
+                # Недопустимый объект не оставляем в хранилище
+                await self.storage.delete(storage_key)
+                raise
+
+            blob = await media_blobs_repository.create_or_acquire(
+                db,
+                sha256=sha256,
+                storage_key=storage_key,
+                file_url=self.storage.public_url(storage_key),
+                file_type=media_type,
+                file_size=stored.size,
+                mime_type=mime_type
+            )
+            logger.info(f"🪣 Direct upload confirmed: {storage_key} ({stored.size} bytes, {self.storage.name})")
+
+        return await ProjectService.add_project_media(db, project_id, blob, file_name, description)
+
+
+direct_upload_service = DirectUploadService()
@@ -0,0 +1,176 @@
+# src/services/donation_stats_service.py
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+from fastapi import HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.config.settings import settings
+from src.repository.donations_repository import donations_repository
+from src.repository.donation_rollups_repository import donation_rollups_repository, bucket_start
+from src.repository.job_watermarks_repository import job_watermarks_repository
+from src.repository.projects_repository import projects_repository
+from src.repository.transactions_repository import transactions_repository
+from src.schemas.payment import DonationRollupPoint, DonationTimeSeriesResponse
+
+logger = logging.getLogger(__name__)
+
+DONATION_ROLLUPS_WATERMARK = "donation_rollups"
+PROJECT_STATISTICS_WATERMARK = "project_statistics"
+LARGE_DONATION_AMOUNT = 1000
+
+BUCKET_STEPS = {"hour": timedelta(hours=1), "day": timedelta(days=1)}
+DEFAULT_RANGES = {"hour": timedelta(hours=24), "day": timedelta(days=30)}
+
+
+class DonationStatsService:
+    """
+    Статистика донатов проектов для дашбордов авторов.
+
+    Часовые и суточные агрегаты (количество, сумма, максимум, уникальные доноры)
+    обновляются инкрементально: фоновая задача берет только транзакции,
+    проведенные после сохраненной отметки, и прибавляет их к агрегатам в той же
+    транзакции БД, в которой сдвигает отметку. Графики читают готовые агрегаты,
+    не пересчитывая донаты.
+    """
+
+    async def refresh_rollups(
+            self,
+            db: AsyncSession,
+            batch_size: Optional[int] = None,
+            max_batches: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """Добавление к агрегатам донатов, проведенных после отметки, пачками"""
+        batch_size = batch_size or settings.DONATION_ROLLUP_BATCH_SIZE
+        max_batches = max_batches or settings.DONATION_ROLLUP_MAX_BATCHES
+        completed_until = datetime.now() - timedelta(seconds=settings.DONATION_ROLLUP_LAG_SECONDS)
+        stats = {"donations": 0, "buckets": 0, "batches": 0, "watermark": None}
+
+        for _ in range(max_batches):
+            try:
+                watermark = await job_watermarks_repository.lock(db, DONATION_ROLLUPS_WATERMARK)
+                after = (watermark.watermark_at, watermark.watermark_id) if watermark.watermark_at else None
+                rows = await transactions_repository.get_settled_donations(
+                    db, completed_until, after=after, limit=batch_size
+                )
+                if not rows:
+                    stats["watermark"] = watermark.watermark_at
+                    await db.rollback()
+                    break
+
+                stats["buckets"] += await donation_rollups_repository.apply_donations(db, rows)
+                job_watermarks_repository.advance(watermark, rows[-1].completed_at, rows[-1].id)
+                await db.commit()
+            except Exception:
+                await db.rollback()
+                raise
+
+            stats["donations"] += len(rows)
+            stats["batches"] += 1
+            stats["watermark"] = rows[-1].completed_at
+            if len(rows) < batch_size:
+                break
+
+        if stats["donations"]:
+            logger.info(
+                f"📊 Donation rollups updated: {stats['donations']} donations, "
+                f"{stats['buckets']} buckets, watermark {stats['watermark']}"
+            )
+        return stats
+
+    async def refresh_project_statistics(self, db: AsyncSession) -> Dict[str, Any]:
+        """
+        Пересчет статистики проектов, донаты которых изменились после отметки
+        (donations.updated_at). Обновление проектов и сдвиг отметки - одна
+        транзакция, поэтому сбой просто повторит тот же интервал.
+        """
+        changed_until = datetime.now() - timedelta(seconds=settings.PROJECT_STATS_LAG_SECONDS)
+        stats = {"projects_updated": 0, "large_donations": 0, "payment_methods": 0, "watermark": None}
+        try:
+            watermark = await job_watermarks_repository.lock(db, PROJECT_STATISTICS_WATERMARK)
+            changed_after = watermark.watermark_at
+            if changed_after is not None and changed_after >= changed_until:
+                stats["watermark"] = changed_after
+                await db.rollback()
+                return stats
+
+            stats["projects_updated"] = await projects_repository.refresh_donation_stats(
+                db, changed_after, changed_until
+            )
+
+            large_donations = await donations_repository.get_largest_changed(
+                db, changed_after, changed_until, min_amount=LARGE_DONATION_AMOUNT
+            )
+            for donation in large_donations:
+                logger.info(f"💰 Large donation: {donation.amount} to project {donation.project_id}")
+
+            payment_methods = await donations_repository.get_payment_method_stats(db, changed_after, changed_until)
+            for method, count, total in payment_methods:
+                logger.info(f"💳 Payment method {method}: {count} donations, total {total}")
+
+            job_watermarks_repository.advance(watermark, changed_until)
+            await db.commit()
+        except Exception:
+            await db.rollback()
+            raise
+
+        stats.update(
+            large_donations=len(large_donations),
+            payment_methods=len(payment_methods),
+            watermark=changed_until
+        )
+        logger.info(f"📊 Project statistics updated: {stats['projects_updated']} projects since {changed_after}")
+        return stats
+
+    async def get_timeseries(
+            self,
+            db: AsyncSession,
+            project_id: int,
+            granularity: str,
+            start: Optional[datetime] = None,
+            end: Optional[datetime] = None
+    ) -> DonationTimeSeriesResponse:
+        """Временной ряд донатов проекта за [start, end) с нулями в пустых интервалах"""
+        if granularity not in BUCKET_STEPS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="granularity должен быть hour или day"
+            )
+        step = BUCKET_STEPS[granularity]
+        end = end or datetime.now()
+        start = bucket_start(start or end - DEFAULT_RANGES[granularity], granularity)
+        if start >= end:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Начало интервала должно быть раньше конца"
+            )
+        if (end - start) / step > settings.DONATION_TIMESERIES_MAX_POINTS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Интервал содержит больше {settings.DONATION_TIMESERIES_MAX_POINTS} точек"
+            )
+
+        rollups = await donation_rollups_repository.get_series(db, project_id, granularity, start, end)
+        by_bucket = {rollup.bucket_start: rollup for rollup in rollups}
+
+        points = []
+        moment = start
+        while moment < end:
+            rollup = by_bucket.get(moment)
+            points.append(
+                DonationRollupPoint.model_validate(rollup) if rollup
+                else DonationRollupPoint(bucket_start=moment)
+            )
+            moment += step
+
+        return DonationTimeSeriesResponse(
+            project_id=project_id,
+            granularity=granularity,
+            start=start,
+            end=end,
+            points=points
+        )
+
+
+donation_stats_service = DonationStatsService()
@@ -1,15 +1,107 @@
 # src/services/email_service.py
 import smtplib
 import ssl
+import threading
+import time
+from contextlib import contextmanager
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from src.config.settings import settings
 import logging
-from typing import Optional
+from typing import Callable, Iterator, List, Optional
 import re
 
 logger = logging.getLogger(__name__)
 
+
+def is_transient_smtp_error(error: Exception) -> bool:
+    """
+    Временная ли ошибка отправки: обрыв соединения, таймаут, ответ 4xx или
+    отказ авторизации (сервер/учетка временно недоступны). 5xx на само письмо
+    (адрес не существует, письмо отклонено) повтором не исправить.
+    """
+    if isinstance(error, (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError,
+                          smtplib.SMTPAuthenticationError)):
+        return True
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return all(400 <= code < 500 for code, _ in error.recipients.values())
+    if isinstance(error, smtplib.SMTPResponseException):
+        return 400 <= error.smtp_code < 500
+    return isinstance(error, OSError)
+
+
+class SMTPConnectionPool:
+    """
+    Пул постоянных авторизованных SMTP соединений.
+
+    Соединение берется из пула на время отправки и возвращается обратно, поэтому
+    подключение и логин выполняются один раз на соединение, а не на письмо.
+    Число соединений ограничено size: столько писем уходит параллельно.
+    Соединение, простоявшее дольше max_idle секунд, проверяется через NOOP;
+    после max_messages писем оно переоткрывается (лимит многих SMTP серверов).
+    """
+
+    def __init__(self, factory: Callable[[], smtplib.SMTP], size: int, max_idle: int, max_messages: int):
+        self.factory = factory
+        self.size = size
+        self.max_idle = max_idle
+        self.max_messages = max_messages
+        self._idle: List[list] = []  # [server, last_used, messages_sent]
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def connection(self) -> Iterator[smtplib.SMTP]:
+        """Соединение из пула; после ошибки оно закрывается, а не возвращается"""
+        with self._slots:
+            entry = self._checkout()
+            try:
+                yield entry[0]
+            except Exception:
+                self._close(entry[0])
+                raise
+            entry[1] = time.monotonic()
+            entry[2] += 1
+            if entry[2] >= self.max_messages:
+                self._close(entry[0])
+            else:
+                with self._lock:
+                    self._idle.append(entry)
+
+    def _checkout(self) -> list:
+        while True:
+            with self._lock:
+                entry = self._idle.pop() if self._idle else None
+            if entry is None:
+                return [self.factory(), time.monotonic(), 0]
+            if time.monotonic() - entry[1] < self.max_idle or self._is_alive(entry[0]):
+                return entry
+            self._close(entry[0])
+
+    @staticmethod
+    def _is_alive(server: smtplib.SMTP) -> bool:
+        try:
+            return server.noop()[0] == 250
+        except smtplib.SMTPException:
+            return False
+        except OSError:
+            return False
+
+    @staticmethod
+    def _close(server: smtplib.SMTP) -> None:
+        try:
+            server.quit()
+        except Exception:
+            server.close()
+
+    def close(self) -> None:
+        """Закрытие всех простаивающих соединений"""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for server, _, _ in idle:
+            self._close(server)
+
+
 class EmailService:
     def __init__(self):
         # Настройки SMTP сервера
@@ -20,6 +112,12 @@ class EmailService:
         self.smtp_from_email = settings.SMTP_FROM_EMAIL
         self.use_ssl = settings.SMTP_USE_SSL
         self.use_tls = settings.SMTP_USE_TLS
+        self.pool = SMTPConnectionPool(
+            self._open_authenticated_connection,
+            size=settings.SMTP_POOL_SIZE,
+            max_idle=settings.SMTP_CONNECTION_MAX_IDLE_SECONDS,
+            max_messages=settings.SMTP_CONNECTION_MAX_MESSAGES
+        )
 
     def _create_smtp_connection(self) -> smtplib.SMTP:
         """Создание SMTP соединения"""
@@ -39,32 +137,63 @@ class EmailService:
             logger.error(f"Ошибка создания SMTP соединения: {e}")
             raise
 
+    def _open_authenticated_connection(self) -> smtplib.SMTP:
+        """Новое соединение для пула: подключение и логин"""
+        server = self._create_smtp_connection()
+        try:
+            server.login(self.smtp_username, self.smtp_password)
+        except Exception:
+            server.close()
+            raise
+        return server
+
+    def build_message(self, to_email: str, subject: str, html_content: str,
+                      text_content: Optional[str] = None) -> MIMEMultipart:
+        """Сборка письма: HTML и текстовая версия"""
+        message = MIMEMultipart("alternative")
+        message["Subject"] = subject
+        message["From"] = self.smtp_from_email
+        message["To"] = to_email
+
+        if not text_content:
+            text_content_clean = re.sub(r'<[^<]+?>', '', html_content)
+            text_content_clean = re.sub(r'\n\s*\n', '\n', text_content_clean)
+        else:
+            text_content_clean = text_content
+
+        part1 = MIMEText(text_content_clean, "plain")
+        part2 = MIMEText(html_content, "html")
+        message.attach(part1)
+        message.attach(part2)
+        return message
+
+    def deliver(self, to_email: str, subject: str, html_content: str,
+                text_content: Optional[str] = None) -> None:
+        """
+        Отправка письма через пул соединений; ошибки SMTP пробрасываются.
+        Если сервер закрыл простаивавшее соединение, письмо один раз
+        отправляется повторно через новое.
+        """
+        message = self.build_message(to_email, subject, html_content, text_content)
+        self._send_pooled(lambda server: server.send_message(message))
+
+    def deliver_raw(self, to_email: str, raw_message: bytes) -> None:
+        """Отправка заранее собранного письма (bytes) через пул соединений"""
+        self._send_pooled(lambda server: server.sendmail(self.smtp_from_email, [to_email], raw_message))
+
+    def _send_pooled(self, send: Callable[[smtplib.SMTP], object]) -> None:
+        try:
+            with self.pool.connection() as server:
+                send(server)
+        except smtplib.SMTPServerDisconnected:
+            with self.pool.connection() as server:
+                send(server)
+
     def send_email(self, to_email: str, subject: str, html_content: str,
                    text_content: Optional[str] = None) -> bool:
         """СИНХРОННАЯ отправка письма"""
         try:
-            # Создаем сообщение
-            message = MIMEMultipart("alternative")
-            message["Subject"] = subject
-            message["From"] = self.smtp_from_email
-            message["To"] = to_email
-
-            if not text_content:
-                text_content_clean = re.sub(r'<[^<]+?>', '', html_content)
-                text_content_clean = re.sub(r'\n\s*\n', '\n', text_content_clean)
-            else:
-                text_content_clean = text_content
-
-            part1 = MIMEText(text_content_clean, "plain")
-            part2 = MIMEText(html_content, "html")
-            message.attach(part1)
-            message.attach(part2)
-
-            # Отправляем письмо
-            with self._create_smtp_connection() as server:
-                server.login(self.smtp_username, self.smtp_password)
-                server.send_message(message)
-
+            self.deliver(to_email, subject, html_content, text_content)
             logger.info(f"✅ Письмо отправлено на {to_email}: {subject}")
             return True
 
@@ -0,0 +1,164 @@
+# src/services/idempotency_service.py
+import asyncio
+import hashlib
+import json
+import logging
+import math
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from fastapi import HTTPException
+from redis.exceptions import RedisError
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette import status
+
+from src.config.settings import settings
+from src.database.redis_client import redis_manager
+from src.repository.idempotency_keys_repository import idempotency_keys_repository
+
+logger = logging.getLogger(__name__)
+
+
+class IdempotencyService:
+    """
+    Идемпотентные запросы по заголовку Idempotency-Key.
+
+    Первый запрос с ключом берет короткую блокировку и выполняется, его ответ
+    сохраняется на IDEMPOTENCY_TTL_SECONDS. Повторы с тем же ключом получают
+    сохраненный ответ без побочных эффектов, а параллельные дубли ждут, пока
+    первый запрос завершится. Ключи и ответы хранятся в Redis; если Redis
+    недоступен, то же самое делает таблица idempotency_keys в PostgreSQL.
+    """
+
+    KEY_PREFIX = "idempotency"
+    MAX_KEY_LENGTH = 255
+    POLL_INTERVAL = 0.05
+
+    def __init__(self):
+        self.ttl = settings.IDEMPOTENCY_TTL_SECONDS
+        self.lock_seconds = settings.IDEMPOTENCY_LOCK_SECONDS
+        self.wait_seconds = settings.IDEMPOTENCY_WAIT_SECONDS
+
+    @staticmethod
+    def fingerprint(request_data: Dict[str, Any]) -> str:
+        """Хеш параметров запроса: тот же ключ с другими параметрами - ошибка клиента"""
+        serialized = json.dumps(request_data, sort_keys=True, default=str)
+        return hashlib.sha256(serialized.encode()).hexdigest()
+
+    def _redis_key(self, scope: str, user_id: int, key: str) -> str:
+        return f"{self.KEY_PREFIX}:{scope}:{user_id}:{key}"
+
+    async def execute(
+            self,
+            db: AsyncSession,
+            scope: str,
+            user_id: int,
+            key: str,
+            request_data: Dict[str, Any],
+            handler: Callable[[], Awaitable[Dict[str, Any]]],
+            lock_seconds: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """
+        Выполнение handler не более одного раза на ключ (ответ - JSON-совместимый dict).
+        lock_seconds - худшая длительность handler: блокировка не должна истечь,
+        пока первый запрос еще выполняется, иначе дубль выполнится параллельно.
+        """
+        if not key or len(key) > self.MAX_KEY_LENGTH:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Idempotency-Key должен содержать от 1 до {self.MAX_KEY_LENGTH} символов"
+            )
+
+        lock_seconds = max(self.lock_seconds, math.ceil(lock_seconds or 0))
+        request_hash = self.fingerprint(request_data)
+        redis_key = self._redis_key(scope, user_id, key)
+        use_redis = redis_manager.redis_client is not None
+
+        deadline = time.monotonic() + self.wait_seconds
+        while True:
+            try:
+                if use_redis:
+                    stored = await self._redis_lookup(redis_key)
+                    acquired = stored is None and await self._redis_acquire(redis_key, lock_seconds)
+                else:
+                    stored, acquired = await self._db_lookup_or_acquire(
+                        db, scope, user_id, key, request_hash, lock_seconds
+                    )
+            except RedisError as e:
+                logger.warning(f"⚠️ Redis unavailable for idempotency keys, using database: {e}")
+                use_redis = False
+                continue
+
+            if stored is not None:
+                if stored["request_hash"] != request_hash:
+                    raise HTTPException(
+                        status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
+                        detail="Idempotency-Key уже использован с другими параметрами запроса"
+                    )
+                logger.info(f"🔁 Idempotent replay: {scope} key={key} user={user_id}")
+                return stored["response"]
+
+            if acquired:
+                break
+
+            # Такой же запрос выполняется прямо сейчас - ждем его ответ
+            if time.monotonic() >= deadline:
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail="Запрос с этим Idempotency-Key еще выполняется"
+                )
+            await asyncio.sleep(self.POLL_INTERVAL)
+
+        try:
+            response = await handler()
+        except Exception:
+            # Ошибку не сохраняем: повтор с тем же ключом выполнится заново
+            await self._release(db, scope, user_id, key, redis_key, use_redis)
+            raise
+
+        await self._store(db, scope, user_id, key, redis_key, use_redis, request_hash, response, lock_seconds)
+        return response
+
+    async def _redis_lookup(self, redis_key: str) -> Optional[Dict[str, Any]]:
+        stored = await redis_manager.redis_client.get(redis_key)
+        return json.loads(stored) if stored else None
+
+    async def _redis_acquire(self, redis_key: str, lock_seconds: int) -> bool:
+        return bool(await redis_manager.redis_client.set(f"{redis_key}:lock", "1", nx=True, ex=lock_seconds))
+
+    async def _db_lookup_or_acquire(self, db, scope, user_id, key, request_hash, lock_seconds):
+        if await idempotency_keys_repository.try_acquire(db, scope, user_id, key, request_hash, lock_seconds):
+            return None, True
+
+        record = await idempotency_keys_repository.get(db, scope, user_id, key)
+        if record and record.status == "completed":
+            return {"request_hash": record.request_hash, "response": record.response}, False
+        return None, False
+
+    async def _store(self, db, scope, user_id, key, redis_key, use_redis, request_hash, response, lock_seconds) -> None:
+        if use_redis:
+            try:
+                stored = json.dumps({"request_hash": request_hash, "response": response})
+                await redis_manager.redis_client.set(redis_key, stored, ex=self.ttl)
+                await redis_manager.redis_client.delete(f"{redis_key}:lock")
+                return
+            except RedisError as e:
+                logger.warning(f"⚠️ Failed to store idempotent response in Redis, using database: {e}")
+                if not await idempotency_keys_repository.try_acquire(
+                        db, scope, user_id, key, request_hash, lock_seconds):
+                    return
+        await idempotency_keys_repository.complete(db, scope, user_id, key, response, self.ttl)
+
+    async def _release(self, db, scope, user_id, key, redis_key, use_redis) -> None:
+        try:
+            if use_redis:
+                await redis_manager.redis_client.delete(f"{redis_key}:lock")
+            else:
+                await db.rollback()
+                await idempotency_keys_repository.release(db, scope, user_id, key)
+        except Exception as e:
+            # Блокировка все равно истечет сама через IDEMPOTENCY_LOCK_SECONDS
+            logger.warning(f"⚠️ Failed to release idempotency lock {redis_key}: {e}")
+
+
+idempotency_service = IdempotencyService()
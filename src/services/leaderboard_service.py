@@ -0,0 +1,244 @@
+# src/services/leaderboard_service.py
+import json
+import logging
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from redis.exceptions import RedisError, WatchError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.database.redis_client import redis_manager
+from src.repository.donations_repository import donations_repository
+from src.repository.projects_repository import projects_repository
+from src.repository.user_repository import user_repository
+
+logger = logging.getLogger(__name__)
+
+
+class LeaderboardService:
+    """
+    Рейтинги в Redis (ZSET): топ проектов по собранной сумме, топ доноров
+    каждого проекта и топ авторов. Проведение доната увеличивает счет через
+    ZINCRBY, поэтому чтение топа - один ZREVRANGE без сортировки донатов в БД.
+    Redis здесь - кэш: задача rebuild_leaderboards пересобирает рейтинги из
+    PostgreSQL, а без Redis топ считается запросом к БД.
+    """
+
+    PROJECTS_KEY = "leaderboard:projects"
+    CREATORS_KEY = "leaderboard:creators"
+    PROJECT_DONORS_PATTERN = "leaderboard:project:*:donors"
+    # Журнал приращений: член - донат и его приращения, счет - время проведения
+    JOURNAL_KEY = "leaderboard:journal"
+    JOURNAL_RETENTION = 6 * 3600
+    # Пересборка берет из БД донаты, проведенные раньше now - SETTLE_MARGIN,
+    # остальное - из журнала (запас на коммит проведения после отметки времени)
+    SETTLE_MARGIN = 60
+    MAX_SWAP_ATTEMPTS = 5
+    # Не чаще одного запроса пересборки за REBUILD_REQUEST_TTL при пропавших ключах
+    REBUILD_REQUEST_KEY = "leaderboard:rebuild:requested"
+    REBUILD_REQUEST_TTL = 300
+    REBUILD_CHUNK_SIZE = 1000
+    MAX_LIMIT = 100
+
+    @staticmethod
+    def project_donors_key(project_id: int) -> str:
+        return f"leaderboard:project:{project_id}:donors"
+
+    async def record_donation(
+            self,
+            project_id: int,
+            creator_id: Optional[int],
+            donor_id: Optional[int],
+            amount: float,
+            donation_id: int,
+            settled_at: datetime,
+            is_anonymous: bool = False
+    ) -> bool:
+        """
+        Учет проведенного доната в рейтингах (вызывается после коммита проведения).
+        settled_at - время проведения, записанное в completed_at транзакции.
+        """
+        client = redis_manager.redis_client
+        if client is None:
+            return False
+        increments = [(self.PROJECTS_KEY, str(project_id))]
+        if creator_id is not None:
+            increments.append((self.CREATORS_KEY, str(creator_id)))
+        if donor_id is not None and not is_anonymous:
+            increments.append((self.project_donors_key(project_id), str(donor_id)))
+        entry = json.dumps({"donation_id": donation_id, "increments": [[key, member, amount] for key, member in increments]})
+        expired_before = (datetime.now() - timedelta(seconds=self.JOURNAL_RETENTION)).timestamp()
+        try:
+            # Приращения и запись журнала применяются вместе: пересборка видит
+            # донат либо в журнале, либо уже после подмены рейтингов
+            pipe = client.pipeline(transaction=True)
+            for key, member in increments:
+                pipe.zincrby(key, amount, member)
+            pipe.zadd(self.JOURNAL_KEY, {entry: settled_at.timestamp()})
+            pipe.zremrangebyscore(self.JOURNAL_KEY, "-inf", expired_before)
+            await pipe.execute()
+            return True
+        except RedisError as e:
+            # Расхождение исправит следующая пересборка рейтингов
+            logger.warning(f"⚠️ Failed to update leaderboards for project {project_id}: {e}")
+            return False
+
+    async def get_top_projects(self, db: AsyncSession, limit: int = 10) -> List[Dict[str, Any]]:
+        """Топ проектов по собранной сумме"""
+        limit = self._clamp(limit)
+        scores = await self._read_top(self.PROJECTS_KEY, limit)
+        if scores is None:
+            scores = [(project_id, total) for project_id, total in
+                      await donations_repository.get_project_totals(db, limit=limit)]
+        titles = await projects_repository.get_titles(db, [member for member, _ in scores])
+        return self._entries(scores, titles)
+
+    async def get_top_donors(self, db: AsyncSession, project_id: int, limit: int = 10) -> List[Dict[str, Any]]:
+        """Топ доноров проекта (без анонимных донатов)"""
+        limit = self._clamp(limit)
+        scores = await self._read_top(self.project_donors_key(project_id), limit)
+        if scores is None:
+            scores = [(donor_id, total) for _, donor_id, total in
+                      await donations_repository.get_donor_totals(db, project_id=project_id, limit=limit)]
+        usernames = await user_repository.get_usernames(db, [member for member, _ in scores])
+        return self._entries(scores, usernames)
+
+    async def get_top_creators(self, db: AsyncSession, limit: int = 10) -> List[Dict[str, Any]]:
+        """Топ авторов по сумме донатов во все их проекты"""
+        limit = self._clamp(limit)
+        scores = await self._read_top(self.CREATORS_KEY, limit)
+        if scores is None:
+            scores = [(creator_id, total) for creator_id, total in
+                      await donations_repository.get_creator_totals(db, limit=limit)]
+        usernames = await user_repository.get_usernames(db, [member for member, _ in scores])
+        return self._entries(scores, usernames)
+
+    async def rebuild(self, db: AsyncSession) -> Dict[str, int]:
+        """
+        Пересборка всех рейтингов из PostgreSQL. Каждый ZSET собирается во
+        временном ключе и подменяется атомарно, поэтому читатели не видят
+        пустой или наполовину собранный рейтинг.
+
+        Снимок из БД берет только донаты, проведенные не позже отметки
+        settled_until. Более поздние донаты приходят из журнала: при подмене
+        (WATCH журнала + MULTI) записи журнала после отметки добавляются во
+        временные ключи. Донат попадает в рейтинг ровно один раз - из БД, из
+        журнала или приращением после подмены, как бы ни легли по времени
+        коммит проведения, чтение БД и вызов record_donation.
+        """
+        client = redis_manager.redis_client
+        if client is None:
+            raise RuntimeError("Redis is not available")
+
+        settled_until = datetime.now() - timedelta(seconds=self.SETTLE_MARGIN)
+        projects = await donations_repository.get_project_totals(db, settled_until=settled_until)
+        creators = await donations_repository.get_creator_totals(db, settled_until=settled_until)
+        donors_by_project = defaultdict(dict)
+        for project_id, donor_id, total in await donations_repository.get_donor_totals(db, settled_until=settled_until):
+            donors_by_project[project_id][str(donor_id)] = total
+
+        boards = {
+            self.PROJECTS_KEY: {str(project_id): total for project_id, total in projects},
+            self.CREATORS_KEY: {str(creator_id): total for creator_id, total in creators},
+        }
+        for project_id, donors in donors_by_project.items():
+            boards[self.project_donors_key(project_id)] = donors
+
+        # Рейтинги доноров проектов без донатов в снимке: останутся только
+        # записи журнала, а без них рейтинг удаляется
+        async for key in client.scan_iter(match=self.PROJECT_DONORS_PATTERN):
+            boards.setdefault(key, {})
+
+        pipe = client.pipeline(transaction=False)
+        for key, scores in boards.items():
+            self._queue_snapshot(pipe, key, scores)
+            if len(pipe) >= self.REBUILD_CHUNK_SIZE:
+                await pipe.execute()
+        await pipe.execute()
+
+        await self._swap(client, boards, settled_until.timestamp())
+
+        stats = {"projects": len(projects), "creators": len(creators), "donor_boards": len(donors_by_project)}
+        logger.info(f"🏆 Leaderboards rebuilt: {stats}")
+        return stats
+
+    async def _swap(self, client, boards: Dict[str, Dict[str, float]], since: float) -> None:
+        """Записи журнала после отметки во временные ключи и подмена рейтингов в одном MULTI"""
+        async with client.pipeline(transaction=True) as pipe:
+            for _ in range(self.MAX_SWAP_ATTEMPTS):
+                try:
+                    # Новое проведение между чтением журнала и EXEC отменяет MULTI
+                    await pipe.watch(self.JOURNAL_KEY)
+                    entries = await pipe.zrangebyscore(self.JOURNAL_KEY, f"({since}", "+inf")
+                    pipe.multi()
+                    keys = set(boards)
+                    for entry in entries:
+                        for key, member, amount in json.loads(entry)["increments"]:
+                            if key not in keys:
+                                # Рейтинг есть только в журнале: убираем остатки прошлых пересборок
+                                pipe.delete(self._temp_key(key))
+                                keys.add(key)
+                            pipe.zincrby(self._temp_key(key), amount, member)
+                    for key in keys:
+                        # Пустой результат удаляет рейтинг
+                        pipe.zunionstore(key, [self._temp_key(key)])
+                        pipe.delete(self._temp_key(key))
+                    await pipe.execute()
+                    return
+                except WatchError:
+                    logger.info("🔁 Leaderboard journal changed during rebuild, retrying swap")
+        raise RuntimeError("Leaderboard swap failed: journal keeps changing")
+
+    @staticmethod
+    def _temp_key(key: str) -> str:
+        return f"{key}:rebuild"
+
+    def _queue_snapshot(self, pipe, key: str, scores: Dict[str, float]) -> None:
+        temp_key = self._temp_key(key)
+        pipe.delete(temp_key)
+        items = list(scores.items())
+        for start in range(0, len(items), self.REBUILD_CHUNK_SIZE):
+            pipe.zadd(temp_key, dict(items[start:start + self.REBUILD_CHUNK_SIZE]))
+
+    async def _read_top(self, key: str, limit: int) -> Optional[List[tuple]]:
+        """
+        Топ из ZSET: [(id, сумма)] или None, если Redis недоступен или ключа нет
+        (Redis очищен или перезапущен) - тогда топ считается по БД, а
+        рейтинги ставятся на пересборку
+        """
+        client = redis_manager.redis_client
+        if client is None:
+            return None
+        try:
+            members = await client.zrevrange(key, 0, limit - 1, withscores=True)
+            if not members and not await client.exists(key):
+                await self._request_rebuild(client)
+                return None
+        except RedisError as e:
+            logger.warning(f"⚠️ Leaderboard {key} unavailable, using database: {e}")
+            return None
+        return [(int(member), score) for member, score in members]
+
+    async def _request_rebuild(self, client) -> None:
+        if not await client.set(self.REBUILD_REQUEST_KEY, "1", nx=True, ex=self.REBUILD_REQUEST_TTL):
+            return
+        # Если брокер недоступен, рейтинги пересоберет периодический запуск
+        try:
+            from src.tasks.tasks import rebuild_leaderboards
+            rebuild_leaderboards.delay()
+        except Exception as e:
+            logger.warning(f"⚠️ Failed to enqueue leaderboards rebuild: {e}")
+
+    def _clamp(self, limit: int) -> int:
+        return max(1, min(limit, self.MAX_LIMIT))
+
+    @staticmethod
+    def _entries(scores: List[tuple], names: Dict[int, str]) -> List[Dict[str, Any]]:
+        return [
+            {"rank": rank, "id": member, "name": names.get(member), "total_amount": float(total or 0)}
+            for rank, (member, total) in enumerate(scores, 1)
+        ]
+
+
+leaderboard_service = LeaderboardService()
@@ -0,0 +1,159 @@
+# src/services/media_service.py
+import logging
+import os
+import time
+import uuid
+from typing import Dict, Optional, Tuple
+
+from fastapi import UploadFile
+from sqlalchemy import select, exists
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.config.settings import settings
+from src.database.models.models_content import MediaBlob, ProjectMedia, PostMedia
+from src.repository.media_blobs_repository import media_blobs_repository
+from src.utils.file_utils import stream_upload_to_disk, generate_blob_key, UploadResult
+
+logger = logging.getLogger(__name__)
+
+
+class MediaService:
+    """Контентно-адресуемое хранение медиа с дедупликацией по SHA-256"""
+
+    # Сколько секунд кэшировать решение о доступности файла
+    ACCESS_CACHE_TTL = 60
+    ACCESS_CACHE_MAX_SIZE = 10000
+
+    def __init__(self):
+        self.media_root = settings.MEDIA_ROOT
+        self.media_url = settings.MEDIA_URL
+        self._access_cache: Dict[str, Tuple[float, Optional[str]]] = {}
+
+    def get_blob_path(self, storage_key: str) -> str:
+        """Абсолютный путь к файлу блоба на диске"""
+        return os.path.join(self.media_root, storage_key)
+
+    def get_blob_url(self, storage_key: str) -> str:
+        """Публичный URL блоба"""
+        return f"{self.media_url.rstrip('/')}/{storage_key}"
+
+    def url_to_path(self, file_url: str) -> Optional[str]:
+        """Путь на диске для локального медиа URL (None для внешних ссылок)"""
+        prefix = f"{self.media_url.rstrip('/')}/"
+        if not file_url or not file_url.startswith(prefix):
+            return None
+        return os.path.join(self.media_root, file_url[len(prefix):])
+
+    def get_derivatives_key(self, file_url: str) -> str:
+        """Ключ каталога производных файлов (SHA-256 для контентно-адресуемых блобов)"""
+        stem = os.path.splitext(os.path.basename(file_url))[0]
+        return f"derivatives/{stem[:2]}/{stem}"
+
+    async def _resolve_source_url(self, db: AsyncSession, relative_path: str) -> Optional[str]:
+        """URL исходного файла для блоба или его производного файла"""
+        parts = relative_path.split("/")
+        if parts[0] == "derivatives" and len(parts) >= 4:
+            result = await db.execute(
+                select(MediaBlob.file_url).where(MediaBlob.sha256 == parts[2])
+            )
+            return result.scalar_one_or_none()
+        return self.get_blob_url(relative_path)
+
+    async def _check_access(self, db: AsyncSession, relative_path: str) -> Optional[str]:
+        """
+        Проверка, можно ли отдавать файл публично.
+
+        Файл отдается, если на него ссылается одобренное медиа проекта или
+        медиа поста. Возвращает SHA-256 содержимого (для ETag) или пустую
+        строку для файлов вне контентно-адресуемого хранилища; None - доступ запрещен.
+        """
+        if relative_path.startswith("blobs/tmp/"):
+            return None
+
+        source_url = await self._resolve_source_url(db, relative_path)
+        if not source_url:
+            return None
+
+        approved = await db.execute(
+            select(
+                exists().where(ProjectMedia.file_url == source_url, ProjectMedia.is_approved == True)
+                | exists().where(PostMedia.file_url == source_url)
+            )
+        )
+        if not approved.scalar():
+            return None
+
+        blob_hash = await db.execute(
+            select(MediaBlob.sha256).where(MediaBlob.file_url == source_url)
+        )
+        return blob_hash.scalar_one_or_none() or ""
+
+    async def get_servable_hash(self, session_factory, relative_path: str) -> Optional[str]:
+        """Проверка доступа с коротким кэшем в памяти (запросы Range идут пачками)"""
+        now = time.monotonic()
+        cached = self._access_cache.get(relative_path)
+        if cached and cached[0] > now:
+            return cached[1]
+
+        async with session_factory() as db:
+            result = await self._check_access(db, relative_path)
+
+        if len(self._access_cache) >= self.ACCESS_CACHE_MAX_SIZE:
+            self._access_cache.clear()
+        self._access_cache[relative_path] = (now + self.ACCESS_CACHE_TTL, result)
+        return result
+
+    async def reuse_blob(self, db: AsyncSession, sha256: str, user_id: int) -> Optional[MediaBlob]:
+        """
+        Переиспользование уже сохраненного содержимого без передачи файла.
+        Только для блобов, на которые пользователь уже ссылается: знание хеша
+        не доказывает владение файлом, а ответ не должен выдавать чужие файлы.
+        """
+        blob = await media_blobs_repository.acquire(db, sha256.lower(), owner_id=user_id)
+        if blob:
+            logger.info(f"♻️ Media blob reused: {blob.sha256}")
+        return blob
+
+    async def store_upload(self, db: AsyncSession, file: UploadFile) -> MediaBlob:
+        """Потоковое сохранение загрузки в хранилище с дедупликацией"""
+        temp_path = os.path.join(self.media_root, "blobs", "tmp", f"{uuid.uuid4()}.upload")
+        upload = await stream_upload_to_disk(file, temp_path)
+
+        return await self.store_local_file(db, temp_path, file.filename, upload)
+
+    async def store_local_file(self, db: AsyncSession, temp_path: str, filename: str,
+                               upload: UploadResult) -> MediaBlob:
+        """Перенос проверенного временного файла в хранилище с дедупликацией"""
+        blob = await media_blobs_repository.acquire(db, upload.sha256)
+        if blob:
+            blob_path = self.get_blob_path(blob.storage_key)
+            if os.path.exists(blob_path):
+                # Такое содержимое уже есть - второй экземпляр не храним
+                os.remove(temp_path)
+                logger.info(f"♻️ Duplicate upload deduplicated: {upload.sha256}")
+            else:
+                # Файл удален сборщиком мусора, коммит которого не прошел - восстанавливаем
+                os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+                os.replace(temp_path, blob_path)
+                logger.warning(f"⚠️ Media blob file restored from upload: {blob.storage_key}")
+            return blob
+
+        storage_key = generate_blob_key(upload.sha256, filename)
+        blob_path = self.get_blob_path(storage_key)
+        os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+        os.replace(temp_path, blob_path)
+
+        blob = await media_blobs_repository.create_or_acquire(
+            db,
+            sha256=upload.sha256,
+            storage_key=storage_key,
+            file_url=self.get_blob_url(storage_key),
+            file_type=upload.media_type,
+            file_size=upload.file_size,
+            mime_type=upload.mime_type
+        )
+        logger.info(f"💾 Media blob stored: {storage_key} ({upload.file_size} bytes)")
+        return blob
+
+
+media_service = MediaService()
@@ -0,0 +1,167 @@
+# src/services/mocks/stripe_mock.py
+"""
+Локальный фейковый сервер Stripe API для тестов и разработки.
+
+Поддерживает создание/получение/список/отмену PaymentIntent и создание Refund, учитывает
+Idempotency-Key и умеет имитировать сбои (5xx) для проверки повторов.
+
+Запуск: python -m src.services.mocks.stripe_mock  (STRIPE_API_BASE=http://127.0.0.1:12111)
+"""
+import secrets
+import time
+from typing import Any, Dict, Tuple
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+
+def _parse_form(items) -> Dict[str, Any]:
+    """Разбор form-encoded параметров Stripe вида metadata[key]=value"""
+    result: Dict[str, Any] = {}
+    for key, value in items:
+        parts = key.replace("]", "").split("[")
+        target = result
+        for part in parts[:-1]:
+            target = target.setdefault(part, {})
+        target[parts[-1]] = value
+    return result
+
+
+def _error(status_code: int, message: str, error_type: str = "invalid_request_error") -> JSONResponse:
+    return JSONResponse(status_code=status_code, content={"error": {"type": error_type, "message": message}})
+
+
+class FakeStripe:
+    """Состояние фейкового Stripe: объекты, ответы по ключам идемпотентности, сбои"""
+
+    def __init__(self):
+        self.reset()
+        self.app = self._create_app()
+
+    def reset(self) -> None:
+        self.payment_intents: Dict[str, Dict[str, Any]] = {}
+        self.refunds: Dict[str, Dict[str, Any]] = {}
+        self.idempotent_responses: Dict[str, Tuple[int, Dict[str, Any]]] = {}
+        self.requests = []
+        self.fail_next = 0
+
+    def _create_app(self) -> FastAPI:
+        app = FastAPI(title="Fake Stripe API")
+
+        @app.middleware("http")
+        async def record_and_fail(request: Request, call_next):
+            self.requests.append((request.method, request.url.path, request.headers.get("idempotency-key")))
+            if self.fail_next > 0:
+                self.fail_next -= 1
+                return _error(500, "Simulated Stripe outage", "api_error")
+            return await call_next(request)
+
+        @app.post("/v1/payment_intents")
+        async def create_payment_intent(request: Request):
+            params = _parse_form((await request.form()).multi_items())
+            return self._idempotent(request, lambda: self._create_payment_intent(params))
+
+        @app.get("/v1/payment_intents")
+        async def list_payment_intents(request: Request):
+            return self._list_payment_intents(_parse_form(request.query_params.multi_items()))
+
+        @app.post("/v1/payment_intents/{intent_id}/cancel")
+        async def cancel_payment_intent(request: Request, intent_id: str):
+            return self._idempotent(request, lambda: self._cancel_payment_intent(intent_id))
+
+        @app.get("/v1/payment_intents/{intent_id}")
+        async def retrieve_payment_intent(intent_id: str):
+            intent = self.payment_intents.get(intent_id)
+            if not intent:
+                return _error(404, f"No such payment_intent: '{intent_id}'")
+            return intent
+
+        @app.post("/v1/refunds")
+        async def create_refund(request: Request):
+            params = _parse_form((await request.form()).multi_items())
+            return self._idempotent(request, lambda: self._create_refund(params))
+
+        return app
+
+    def _idempotent(self, request: Request, handler) -> JSONResponse:
+        key = request.headers.get("idempotency-key")
+        if key and key in self.idempotent_responses:
+            status_code, body = self.idempotent_responses[key]
+        else:
+            status_code, body = handler()
+            if key:
+                self.idempotent_responses[key] = (status_code, body)
+        return JSONResponse(status_code=status_code, content=body)
+
+    def _create_payment_intent(self, params: Dict[str, Any]) -> Tuple[int, Dict[str, Any]]:
+        if "amount" not in params or "currency" not in params:
+            return 400, {"error": {"type": "invalid_request_error", "message": "Missing amount or currency"}}
+
+        intent_id = f"pi_{secrets.token_hex(12)}"
+        intent = {
+            "id": intent_id,
+            "object": "payment_intent",
+            "amount": int(params["amount"]),
+            "currency": params["currency"],
+            "status": "requires_payment_method",
+            "client_secret": f"{intent_id}_secret_{secrets.token_hex(8)}",
+            "created": int(time.time()),
+            "description": params.get("description"),
+            "metadata": params.get("metadata", {}),
+        }
+        self.payment_intents[intent_id] = intent
+        return 200, intent
+
+    def _list_payment_intents(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        created = params.get("created", {})
+        intents = sorted(
+            (
+                intent for intent in self.payment_intents.values()
+                if int(created.get("gte", 0)) <= intent["created"] <= int(created.get("lte", 2 ** 62))
+            ),
+            key=lambda intent: intent["created"],
+            reverse=True  # как в Stripe: сначала новые
+        )
+        if params.get("starting_after"):
+            ids = [intent["id"] for intent in intents]
+            intents = intents[ids.index(params["starting_after"]) + 1:]
+
+        limit = int(params.get("limit", 10))
+        return {
+            "object": "list",
+            "url": "/v1/payment_intents",
+            "data": intents[:limit],
+            "has_more": len(intents) > limit,
+        }
+
+    def _cancel_payment_intent(self, intent_id: str) -> Tuple[int, Dict[str, Any]]:
+        intent = self.payment_intents.get(intent_id)
+        if not intent:
+            return 404, {"error": {"type": "invalid_request_error", "message": f"No such payment_intent: '{intent_id}'"}}
+        if intent["status"] in ("succeeded", "canceled"):
+            return 400, {"error": {"type": "invalid_request_error",
+                                   "message": f"PaymentIntent has a status of {intent['status']}"}}
+        intent["status"] = "canceled"
+        return 200, intent
+
+    def _create_refund(self, params: Dict[str, Any]) -> Tuple[int, Dict[str, Any]]:
+        intent = self.payment_intents.get(params.get("payment_intent", ""))
+        if not intent:
+            return 404, {"error": {"type": "invalid_request_error", "message": "No such payment_intent"}}
+
+        refund = {
+            "id": f"re_{secrets.token_hex(12)}",
+            "object": "refund",
+            "amount": int(params.get("amount", intent["amount"])),
+            "currency": intent["currency"],
+            "payment_intent": intent["id"],
+            "status": "succeeded",
+        }
+        self.refunds[refund["id"]] = refund
+        return 200, refund
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    uvicorn.run(FakeStripe().app, host="127.0.0.1", port=12111)
@@ -0,0 +1,162 @@
+# src/services/payment_provider.py
+import logging
+from typing import Any, AsyncIterator, Dict, Optional
+
+import httpx
+import stripe
+
+from src.config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+class RetryBudget:
+    """
+    Бюджет повторов запросов.
+
+    Каждый запрос пополняет бюджет на ratio, каждый повтор тратит единицу.
+    При массовом сбое Stripe повторы не умножают нагрузку: их не больше
+    ratio от потока запросов (плюс небольшой начальный запас).
+    """
+
+    def __init__(self, ratio: float, reserve: float = 10.0, max_tokens: float = 100.0):
+        self.ratio = ratio
+        self.max_tokens = max_tokens
+        self.tokens = reserve
+
+    def record_request(self) -> None:
+        self.tokens = min(self.max_tokens, self.tokens + self.ratio)
+
+    def try_spend(self) -> bool:
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+
+class PooledHTTPX:
+    """
+    Модуль httpx для базового клиента SDK: AsyncClient сразу создается с
+    лимитами пула, поэтому SDK не создает второй клиент, который пришлось бы закрывать.
+    """
+
+    def __init__(self, limits: httpx.Limits):
+        self.limits = limits
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(httpx, name)
+
+    def AsyncClient(self, **kwargs) -> httpx.AsyncClient:
+        return httpx.AsyncClient(limits=self.limits, **kwargs)
+
+
+class BudgetedHTTPXClient(stripe.HTTPXClient):
+    """HTTP клиент Stripe: общий пул соединений httpx, таймауты и бюджет повторов"""
+
+    def __init__(self, retry_budget: RetryBudget, max_connections: int, **kwargs):
+        limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+        super().__init__(_lib=PooledHTTPX(limits), **kwargs)
+        self.retry_budget = retry_budget
+
+    async def request_with_retries_async(self, *args, **kwargs):
+        self.retry_budget.record_request()
+        return await super().request_with_retries_async(*args, **kwargs)
+
+    def _should_retry(self, response, api_connection_error, num_retries, max_network_retries):
+        if not super()._should_retry(response, api_connection_error, num_retries, max_network_retries):
+            return False
+        if not self.retry_budget.try_spend():
+            logger.warning("⚠️ Stripe retry budget exhausted, not retrying")
+            return False
+        return True
+
+
+class StripeProvider:
+    """
+    Асинхронный клиент Stripe.
+
+    Запросы идут через async API SDK (StripeClient + httpx), поэтому ожидание
+    ответа Stripe не блокирует event loop. Повторы безопасны: SDK передает
+    Idempotency-Key, а для создания платежа ключ задается явно.
+    """
+
+    def __init__(
+            self,
+            api_key: str,
+            api_base: str = "",
+            timeout: float = 10,
+            max_network_retries: int = 2,
+            max_connections: int = 20,
+            retry_budget_ratio: float = 0.2
+    ):
+        self.api_key = api_key
+        self.api_base = api_base
+        self.timeout = timeout
+        self.max_network_retries = max_network_retries
+        self.max_connections = max_connections
+        self.retry_budget = RetryBudget(retry_budget_ratio)
+        self._client: Optional[stripe.StripeClient] = None
+        self._http_client: Optional[BudgetedHTTPXClient] = None
+
+    @property
+    def max_request_seconds(self) -> float:
+        """Худшая длительность одного вызова: все попытки по таймауту и паузы между ними"""
+        return (
+            self.timeout * (self.max_network_retries + 1)
+            + stripe.HTTPClient.MAX_DELAY * self.max_network_retries
+        )
+
+    @property
+    def client(self) -> stripe.StripeClient:
+        # Создается лениво: пул соединений httpx привязывается к работающему event loop
+        if self._client is None:
+            self._http_client = BudgetedHTTPXClient(
+                retry_budget=self.retry_budget,
+                max_connections=self.max_connections,
+                timeout=httpx.Timeout(self.timeout, connect=min(self.timeout, 5))
+            )
+            self._client = stripe.StripeClient(
+                self.api_key or "sk_test_missing",
+                http_client=self._http_client,
+                max_network_retries=self.max_network_retries,
+                base_addresses={"api": self.api_base} if self.api_base else None
+            )
+        return self._client
+
+    async def create_payment_intent(self, params: Dict[str, Any],
+                                    idempotency_key: Optional[str] = None) -> stripe.PaymentIntent:
+        options = {"idempotency_key": idempotency_key} if idempotency_key else None
+        return await self.client.v1.payment_intents.create_async(params=params, options=options)
+
+    async def retrieve_payment_intent(self, payment_intent_id: str) -> stripe.PaymentIntent:
+        return await self.client.v1.payment_intents.retrieve_async(payment_intent_id)
+
+    async def list_payment_intents(self, created_gte: int, created_lte: int) -> AsyncIterator[stripe.PaymentIntent]:
+        """Все платежи, созданные в интервале (unix time), постранично по 100"""
+        page = await self.client.v1.payment_intents.list_async(
+            params={"created": {"gte": created_gte, "lte": created_lte}, "limit": 100}
+        )
+        async for intent in page.auto_paging_iter():
+            yield intent
+
+    async def cancel_payment_intent(self, payment_intent_id: str) -> stripe.PaymentIntent:
+        return await self.client.v1.payment_intents.cancel_async(payment_intent_id)
+
+    async def create_refund(self, params: Dict[str, Any]) -> stripe.Refund:
+        return await self.client.v1.refunds.create_async(params=params)
+
+    async def close(self) -> None:
+        if self._http_client is not None:
+            await self._http_client.close_async()
+        self._client = None
+        self._http_client = None
+
+
+stripe_provider = StripeProvider(
+    api_key=settings.STRIPE_SECRET_KEY,
+    api_base=settings.STRIPE_API_BASE,
+    timeout=settings.STRIPE_TIMEOUT_SECONDS,
+    max_network_retries=settings.STRIPE_MAX_NETWORK_RETRIES,
+    max_connections=settings.STRIPE_MAX_CONNECTIONS,
+    retry_budget_ratio=settings.STRIPE_RETRY_BUDGET_RATIO
+)
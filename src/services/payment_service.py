@@ -1,24 +1,40 @@
 # src/services/payment_service.py
+import json
+import time
 import stripe
 from fastapi import HTTPException, status
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 import logging
 from sqlalchemy.ext.asyncio import AsyncSession
-from datetime import datetime
+from datetime import datetime, timedelta
 
 from src.config.settings import settings
 from src.repository.donations_repository import donations_repository
 from src.repository.transactions_repository import transactions_repository
 from src.repository.wallets_repository import wallets_repository
 from src.repository.projects_repository import projects_repository
-from src.schemas.payment import DonationCreate, TransactionCreate, TransactionUpdate, DonationUpdate, DonationStatus
+from src.repository.webhook_events_repository import webhook_events_repository
+from src.services.leaderboard_service import leaderboard_service
+from src.services.payment_provider import StripeProvider, stripe_provider
+from src.schemas.payment import DonationCreate, TransactionCreate, TransactionUpdate, DonationStatus
 
 logger = logging.getLogger(__name__)
 
+# Ключ Redis с метриками последней сверки платежей (пишет Celery, читает админка)
+RECONCILIATION_METRICS_KEY = "payments:reconciliation:last_run"
+
+
+def to_cents(amount: Optional[float]) -> int:
+    """
+    Сумма в минимальных единицах (копейки/центы) для Stripe. Округление, а не
+    отбрасывание дробной части: int(19.99 * 100) дает 1998
+    """
+    return round((amount or 0) * 100)
+
 
 class PaymentService:
-    def __init__(self):
-        stripe.api_key = settings.STRIPE_SECRET_KEY
+    def __init__(self, provider: StripeProvider = stripe_provider):
+        self.provider = provider
         self.webhook_secret = settings.STRIPE_WEBHOOK_SECRET
 
     async def create_donation_intent(
@@ -27,9 +43,10 @@ class PaymentService:
             amount: float,
             project_id: int,
             donor_id: int,
-            currency: str = 'rub'
+            currency: str = 'rub',
+            idempotency_key: Optional[str] = None
     ) -> Dict[str, Any]:
-        """Создание платежного намерения для доната"""
+        """Создание платежного намерения для доната (idempotency_key - ключ клиента)"""
         try:
             # Валидация суммы
             if amount <= 0:
@@ -46,7 +63,8 @@ class PaymentService:
                     detail="Проект не найден"
                 )
 
-            # Создаем запись о донате в БД со статусом pending
+            # Создаем запись о донате в БД со статусом pending; с ключом клиента
+            # повтор запроса находит донат первой попытки
             donation_data = DonationCreate(
                 project_id=project_id,
                 donor_id=donor_id,
@@ -54,37 +72,69 @@ class PaymentService:
                 currency=currency.upper(),
                 status=DonationStatus.PENDING  # ← ИСПОЛЬЗУЕМ ENUM
             )
-            donation = await donations_repository.create(db, donation_data)
-
-            # Создаем транзакцию
-            transaction_data = TransactionCreate(
-                donation_id=donation.id,
-                user_id=donor_id,
-                amount=amount,
-                currency=currency.upper(),
-                transaction_type='donation',
-                status='pending',
-                payment_provider='stripe',
-                description=f"Донат для проекта: {project.title}"
-            )
-            transaction = await transactions_repository.create(db, transaction_data)
+            if idempotency_key:
+                donation = await donations_repository.get_or_create_by_idempotency_key(
+                    db, donation_data, idempotency_key
+                )
+                if donation.project_id != project_id or donation.amount != amount:
+                    raise HTTPException(
+                        status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
+                        detail="Idempotency-Key уже использован с другими параметрами запроса"
+                    )
+                transaction = await transactions_repository.get_by_donation(db, donation.id)
+            else:
+                donation = await donations_repository.create(db, donation_data)
+                transaction = None
+
+            # Создаем транзакцию (если первая попытка не успела)
+            if transaction is None:
+                transaction_data = TransactionCreate(
+                    donation_id=donation.id,
+                    user_id=donor_id,
+                    amount=amount,
+                    currency=currency.upper(),
+                    transaction_type='donation',
+                    status='pending',
+                    payment_provider='stripe',
+                    description=f"Донат для проекта: {project.title}"
+                )
+                transaction = await transactions_repository.create(db, transaction_data)
+
+            if transaction.provider_transaction_id:
+                # Платеж уже создан прошлой попыткой - отдаем его
+                intent = await self.provider.retrieve_payment_intent(transaction.provider_transaction_id)
+                logger.info(f"🔁 Reusing payment intent: donation_id={donation.id}, intent={intent.id}")
+                return {
+                    'client_secret': intent.client_secret,
+                    'payment_intent_id': intent.id,
+                    'donation_id': donation.id
+                }
 
             # Конвертация в минимальные единицы (копейки/центы)
-            amount_in_cents = int(amount * 100)
-
-            # Создание платежного намерения в Stripe
-            intent = stripe.PaymentIntent.create(
-                amount=amount_in_cents,
-                currency=currency,
-                metadata={
-                    'project_id': str(project_id),
-                    'donor_id': str(donor_id),
-                    'donation_id': str(donation.id),
-                    'transaction_id': str(transaction.id),
-                    'type': 'donation'
+            amount_in_cents = to_cents(amount)
+
+            # Создание платежного намерения в Stripe: ключ клиента (если передан) или
+            # донат - повтор после таймаута не создаст второй платеж. Донат и
+            # транзакция при повторе те же, поэтому и параметры запроса совпадают
+            stripe_idempotency_key = (
+                f"donate-{donor_id}-{idempotency_key}" if idempotency_key
+                else f"donation-intent-{donation.id}"
+            )
+            intent = await self.provider.create_payment_intent(
+                {
+                    'amount': amount_in_cents,
+                    'currency': currency,
+                    'metadata': {
+                        'project_id': str(project_id),
+                        'donor_id': str(donor_id),
+                        'donation_id': str(donation.id),
+                        'transaction_id': str(transaction.id),
+                        'type': 'donation'
+                    },
+                    'description': f"Донат для проекта #{project_id}",
+                    'automatic_payment_methods': {'enabled': True},
                 },
-                description=f"Донат для проекта #{project_id}",
-                automatic_payment_methods={'enabled': True},
+                idempotency_key=stripe_idempotency_key
             )
 
             # Обновляем транзакцию с ID платежа от Stripe
@@ -102,7 +152,9 @@ class PaymentService:
                 'donation_id': donation.id
             }
 
-        except stripe.error.StripeError as e:
+        except HTTPException:
+            raise
+        except stripe.StripeError as e:
             logger.error(f"Stripe error creating donation intent: {e}")
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -116,53 +168,61 @@ class PaymentService:
             )
 
     async def _save_donation_to_db(self, db: AsyncSession, payment_intent: Dict[str, Any]) -> Dict[str, Any]:
-        """Сохранение успешного доната в БД"""
+        """
+        Проведение успешного доната одной транзакцией БД: статус доната и
+        транзакции, счетчики проекта и кошельки меняются атомарными
+        UPDATE ... SET x = x + :amount, коммит один на все изменения.
+        """
+        metadata = payment_intent.get('metadata', {})
         try:
-            metadata = payment_intent.get('metadata', {})
             donation_id = int(metadata.get('donation_id'))
-            transaction_id = int(metadata.get('transaction_id'))
             amount = payment_intent['amount'] / 100  # Конвертируем обратно
+            settled_at = datetime.now()
+
+            # Изменения идут в SAVEPOINT: при ошибке откатывается только проведение,
+            # а не вся сессия вызывающего (например, пачки событий из ящика)
+            async with db.begin_nested():
+                # Условный UPDATE - и смена статуса, и защита от повторного проведения
+                donation = await donations_repository.mark_completed(db, donation_id)
+                if donation:
+                    project_id, donor_id = donation.project_id, donation.donor_id
+                    is_anonymous = donation.is_anonymous
+                    await transactions_repository.complete_for_donation(db, donation_id, settled_at)
+
+                    creator_id = await projects_repository.update_donation_stats(
+                        db,
+                        project_id=project_id,
+                        amount=amount,
+                        donor_id=donor_id,
+                        donation_id=donation_id,
+                        donated_at=settled_at
+                    )
 
-            # Обновляем статус доната
-            donation = await donations_repository.get(db, donation_id)
-            if not donation:
-                return {'success': False, 'error': 'Donation not found'}
+                    # Доход создателя проекта и сумма пожертвований донора
+                    if creator_id is not None:
+                        if await wallets_repository.credit_earnings(db, creator_id, amount) is None:
+                            logger.warning(f"⚠️ Creator {creator_id} has no wallet, earnings not credited")
+                    if donor_id is not None:
+                        await wallets_repository.add_donated_amount(db, donor_id, amount)
 
-            await donations_repository.update(
-                db,
-                donation,
-                DonationUpdate(status=DonationStatus.COMPLETED)  # ← ИСПОЛЬЗУЕМ ENUM
+            if not donation:
+                existing = await donations_repository.get(db, donation_id)
+                if not existing:
+                    return {'success': False, 'error': 'Donation not found'}
+                if existing.status == DonationStatus.COMPLETED.value:
+                    # Событие доставлено повторно - донат уже проведен
+                    logger.info(f"Donation already settled: donation_id={donation_id}")
+                else:
+                    # Запоздавшее событие об успехе не возвращает донат из refunded/failed
+                    logger.warning(f"⚠️ Succeeded event for {existing.status} donation {donation_id} ignored")
+                return {'success': True, 'donation_id': donation_id}
+
+            await db.commit()
+
+            await leaderboard_service.record_donation(
+                project_id, creator_id, donor_id, amount, donation_id, settled_at, is_anonymous
             )
 
-            # Обновляем статус транзакции
-            transaction = await transactions_repository.get(db, transaction_id)
-            if transaction:
-                await transactions_repository.update(
-                    db,
-                    transaction,
-                    TransactionUpdate(
-                        status='completed',
-                        completed_at=datetime.now()
-                    )
-                )
-
-            # Обновляем баланс создателя проекта и статистику
-            project = await projects_repository.get(db, donation.project_id)
-            if project:
-                # Обновляем баланс кошелька создателя
-                wallet = await wallets_repository.get_by_user(db, project.creator_id)
-                if wallet:
-                    await wallets_repository.update_balance(db, wallet.id, amount, 'add')
-                    # Увеличиваем общую сумму пожертвований пользователя
-                    await wallets_repository.increment_donated_amount(db, wallet.id, amount)
-
-                # ОБНОВЛЯЕМ СТАТИСТИКУ ДОНАТОВ ПРОЕКТА ← ДОБАВЛЕНО!
-                await projects_repository.update_donation_stats(
-                    db,
-                    project_id=donation.project_id,
-                    amount=amount
-                )
-
             logger.info(f"Donation saved to DB: donation_id={donation_id}, amount={amount}")
             return {'success': True, 'donation_id': donation_id}
 
@@ -193,30 +253,118 @@ class PaymentService:
             }
 
     async def handle_webhook(self, db: AsyncSession, payload: bytes, sig_header: str) -> Dict[str, Any]:
-        """Обработка вебхуков от Stripe с передачей сессии БД"""
+        """
+        Прием вебхука Stripe: проверка подписи и сохранение сырого события во
+        входящий ящик. Ответ возвращается сразу, обработка идет в Celery.
+        """
         try:
-            event = stripe.Webhook.construct_event(
+            stripe.Webhook.construct_event(
                 payload, sig_header, self.webhook_secret
             )
+            event = json.loads(payload)
 
-            # Обработка различных типов событий
-            if event['type'] == 'payment_intent.succeeded':
-                return await self._handle_payment_success(db, event)
-            elif event['type'] == 'payment_intent.payment_failed':
-                return await self._handle_payment_failure(event)
-            elif event['type'] == 'payment_intent.canceled':
-                return await self._handle_payment_cancellation(event)
-            else:
-                logger.info(f"Unhandled event type: {event['type']}")
-                return {'status': 'unhandled'}
+            created = event.get('created')
+            inserted = await webhook_events_repository.insert_if_absent(
+                db,
+                event_id=event['id'],
+                event_type=event['type'],
+                payload=event,
+                event_created_at=datetime.fromtimestamp(created) if created else None
+            )
 
-        except ValueError as e:
+        except (ValueError, KeyError, TypeError) as e:
             logger.error(f"Invalid payload: {e}")
             raise HTTPException(status_code=400, detail="Invalid payload")
         except stripe._error.SignatureVerificationError as e:
             logger.error(f"Invalid signature: {e}")
             raise HTTPException(status_code=400, detail="Invalid signature")
 
+        if not inserted:
+            # Stripe повторил доставку - событие уже в ящике
+            logger.info(f"Duplicate webhook event: {event['id']}")
+            return {'status': 'duplicate'}
+
+        self._enqueue_webhook_processing()
+        return {'status': 'received'}
+
+    @staticmethod
+    def _enqueue_webhook_processing() -> None:
+        # Если брокер недоступен, событие заберет периодический запуск обработчика
+        try:
+            from src.tasks.tasks import process_webhook_inbox
+            process_webhook_inbox.delay()
+        except Exception as e:
+            logger.warning(f"⚠️ Failed to enqueue webhook inbox processing: {e}")
+
+    async def process_webhook_event(self, db: AsyncSession, event: Dict[str, Any]) -> Dict[str, Any]:
+        """Обработка одного события Stripe из входящего ящика"""
+        if event['type'] == 'payment_intent.succeeded':
+            return await self._handle_payment_success(db, event)
+        elif event['type'] == 'payment_intent.payment_failed':
+            return await self._handle_payment_failure(event)
+        elif event['type'] == 'payment_intent.canceled':
+            return await self._handle_payment_cancellation(db, event)
+        else:
+            logger.info(f"Unhandled event type: {event['type']}")
+            return {'status': 'unhandled'}
+
+    async def process_webhook_inbox(
+            self,
+            db: AsyncSession,
+            batch_size: Optional[int] = None,
+            max_batches: Optional[int] = None
+    ) -> Dict[str, int]:
+        """
+        Обработка накопившихся событий пачками в порядке их создания в Stripe.
+        Повторная обработка безопасна: уже проведенный донат не проводится снова.
+        """
+        batch_size = batch_size or settings.WEBHOOK_INBOX_BATCH_SIZE
+        max_batches = max_batches or settings.WEBHOOK_INBOX_MAX_BATCHES
+        stats = {'processed': 0, 'failed': 0}
+
+        for _ in range(max_batches):
+            events = await webhook_events_repository.claim_batch(
+                db, batch_size, settings.WEBHOOK_INBOX_CLAIM_TIMEOUT_SECONDS,
+                settings.WEBHOOK_INBOX_MAX_ATTEMPTS
+            )
+
+            # Поля событий читаются до обработки: откат после ошибки истекает
+            # ORM-объекты, а ленивая загрузка в async-сессии невозможна
+            claimed = [(event.id, event.event_id, event.payload) for event in events]
+
+            for event_pk, event_id, payload in claimed:
+                try:
+                    result = await self.process_webhook_event(db, payload)
+                    error = result.get('error') if result.get('status') == 'error' else None
+                except Exception as e:
+                    await db.rollback()
+                    error = str(e)
+
+                if error:
+                    logger.error(f"❌ Webhook event {event_id} failed: {error}")
+                    await webhook_events_repository.mark_failed(
+                        db, event_pk, error, settings.WEBHOOK_INBOX_MAX_ATTEMPTS
+                    )
+                    stats['failed'] += 1
+                else:
+                    await webhook_events_repository.mark_processed(db, event_pk)
+                    stats['processed'] += 1
+
+            if len(events) < batch_size:
+                break
+
+        if stats['processed'] or stats['failed']:
+            logger.info(f"📥 Webhook inbox processed: {stats}")
+        return stats
+
+    async def replay_failed_webhooks(self, db: AsyncSession, event_ids: Optional[List[str]] = None) -> int:
+        """Повторная обработка упавших событий (все или указанные evt_ id)"""
+        requeued = await webhook_events_repository.requeue_failed(db, event_ids)
+        if requeued:
+            logger.info(f"🔁 Webhook events requeued: {requeued}")
+            self._enqueue_webhook_processing()
+        return requeued
+
     async def _handle_payment_failure(self, event: Dict[str, Any]) -> Dict[str, Any]:
         """Обработка неудачного платежа"""
         payment_intent = event['data']['object']
@@ -224,16 +372,157 @@ class PaymentService:
             f"Payment failed: {payment_intent['id']}, reason: {payment_intent.get('last_payment_error', {}).get('message', 'Unknown')}")
         return {'status': 'failed', 'payment_intent': payment_intent['id']}
 
-    async def _handle_payment_cancellation(self, event: Dict[str, Any]) -> Dict[str, Any]:
+    async def _handle_payment_cancellation(self, db: AsyncSession, event: Dict[str, Any]) -> Dict[str, Any]:
         """Обработка отмены платежа"""
         payment_intent = event['data']['object']
+        donation_id = payment_intent.get('metadata', {}).get('donation_id')
+        if donation_id:
+            await self._fail_donation(db, int(donation_id))
         logger.info(f"Payment canceled: {payment_intent['id']}")
         return {'status': 'canceled', 'payment_intent': payment_intent['id']}
 
+    async def _fail_donation(self, db: AsyncSession, donation_id: int) -> bool:
+        """Перевод pending доната и его транзакций в failed одной транзакцией БД"""
+        # SAVEPOINT: ошибка откатывает только этот донат, сессия вызывающего не трогается
+        async with db.begin_nested():
+            if not await donations_repository.mark_failed(db, donation_id):
+                return False
+            await transactions_repository.fail_for_donation(db, donation_id)
+
+        await db.commit()
+        logger.info(f"Donation failed: donation_id={donation_id}")
+        return True
+
+    async def reconcile_pending_transactions(
+            self,
+            db: AsyncSession,
+            min_age_minutes: Optional[int] = None,
+            batch_size: Optional[int] = None,
+            max_batches: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Сверка зависших pending донатов со Stripe (на случай потерянных вебхуков).
+
+        Транзакции старше min_age_minutes перебираются пачками, состояние
+        платежей каждой пачки берется одним списком Stripe за интервал их
+        создания. Оплаченные проводятся, отмененные и брошенные (старше
+        RECONCILE_ABANDON_HOURS) переводятся в failed. Возвращает метрики
+        расхождений.
+        """
+        started = time.monotonic()
+        now = datetime.now()
+        created_before = now - timedelta(minutes=min_age_minutes or settings.RECONCILE_MIN_AGE_MINUTES)
+        abandon_before = now - timedelta(hours=settings.RECONCILE_ABANDON_HOURS)
+        batch_size = batch_size or settings.RECONCILE_BATCH_SIZE
+        max_batches = max_batches or settings.RECONCILE_MAX_BATCHES
+
+        metrics = {
+            'checked': 0, 'settled': 0, 'failed': 0, 'expired': 0, 'still_pending': 0,
+            'missing': 0, 'amount_mismatch': 0, 'errors': 0,
+            'drift_amount': 0.0, 'oldest_pending_seconds': 0
+        }
+
+        cursor = None
+        for _ in range(max_batches):
+            rows = await transactions_repository.get_stale_pending(db, created_before, cursor, batch_size)
+            if not rows:
+                break
+            cursor = (rows[-1].created_at, rows[-1].id)
+
+            try:
+                intents = await self._fetch_payment_intents(rows)
+            except stripe.StripeError as e:
+                logger.error(f"❌ Reconciliation: failed to fetch payment intents: {e}")
+                metrics['errors'] += 1
+                break
+
+            for row in rows:
+                metrics['checked'] += 1
+                outcome = await self._reconcile_transaction(db, row, intents, abandon_before)
+                metrics[outcome] += 1
+                if outcome == 'settled':
+                    metrics['drift_amount'] += row.amount or 0
+                elif outcome == 'still_pending':
+                    age = (now - row.created_at).total_seconds()
+                    metrics['oldest_pending_seconds'] = max(metrics['oldest_pending_seconds'], int(age))
+
+            if len(rows) < batch_size:
+                break
+
+        metrics['drift_amount'] = round(metrics['drift_amount'], 2)
+        metrics['duration_seconds'] = round(time.monotonic() - started, 3)
+        metrics['finished_at'] = datetime.now().isoformat()
+        logger.info(f"🧾 Payment reconciliation: {metrics}")
+        return metrics
+
+    async def _fetch_payment_intents(self, rows) -> Dict[str, Any]:
+        """Платежи пачки транзакций: по id платежа и по transaction_id из metadata"""
+        intents: Dict[str, Any] = {}
+        created = [row.created_at.timestamp() for row in rows]
+        window_start = int(min(created)) - 60
+        window_end = int(max(created)) + settings.RECONCILE_LIST_SLACK_SECONDS
+
+        # Один список за интервал дешевле запросов по каждому платежу, пока интервал короткий
+        if window_end - window_start <= settings.RECONCILE_LIST_WINDOW_HOURS * 3600:
+            async for intent in self.provider.list_payment_intents(window_start, window_end):
+                intents[intent.id] = intent
+                transaction_id = (intent.get('metadata') or {}).get('transaction_id')
+                if transaction_id:
+                    intents[f"transaction:{transaction_id}"] = intent
+
+        for row in rows:
+            provider_id = row.provider_transaction_id
+            if provider_id and provider_id not in intents:
+                try:
+                    intents[provider_id] = await self.provider.retrieve_payment_intent(provider_id)
+                except stripe.InvalidRequestError:
+                    pass  # платежа нет в Stripe
+        return intents
+
+    async def _reconcile_transaction(self, db: AsyncSession, row, intents: Dict[str, Any],
+                                     abandon_before: datetime) -> str:
+        intent = intents.get(row.provider_transaction_id) or intents.get(f"transaction:{row.id}")
+        abandoned = row.created_at < abandon_before
+
+        if intent is None:
+            # Платеж так и не был создан в Stripe
+            if abandoned and await self._fail_donation(db, row.donation_id):
+                return 'missing'
+            return 'still_pending'
+
+        if intent.amount != to_cents(row.amount):
+            logger.error(f"❌ Reconciliation: amount mismatch for transaction {row.id}: "
+                         f"{intent.amount} != {row.amount}")
+            return 'amount_mismatch'
+
+        if intent.status == 'succeeded':
+            result = await self._save_donation_to_db(db, {
+                'id': intent.id,
+                'amount': intent.amount,
+                'metadata': {'donation_id': str(row.donation_id)}
+            })
+            return 'settled' if result['success'] else 'errors'
+
+        if intent.status == 'canceled':
+            await self._fail_donation(db, row.donation_id)
+            return 'failed'
+
+        if intent.status == 'requires_payment_method' and abandoned:
+            # Оплату так и не начали: отменяем платеж, чтобы его нельзя было провести позже
+            try:
+                await self.provider.cancel_payment_intent(intent.id)
+            except stripe.StripeError as e:
+                logger.warning(f"⚠️ Reconciliation: failed to cancel {intent.id}: {e}")
+                return 'errors'
+            await self._fail_donation(db, row.donation_id)
+            return 'expired'
+
+        return 'still_pending'
+
     async def get_payment_status(self, payment_intent_id: str) -> Dict[str, Any]:
         """Получение статуса платежа"""
         try:
-            intent = stripe.PaymentIntent.retrieve(payment_intent_id)
+            intent = await self.provider.retrieve_payment_intent(payment_intent_id)
             return {
                 'status': intent.status,
                 'amount': intent.amount / 100,  # Конвертируем обратно
@@ -253,13 +542,13 @@ class PaymentService:
         try:
             refund_params = {'payment_intent': payment_intent_id}
             if amount:
-                refund_params['amount'] = int(amount * 100)
+                refund_params['amount'] = to_cents(amount)
 
-            refund = stripe.Refund.create(**refund_params)
+            refund = await self.provider.create_refund(refund_params)
             logger.info(f"Refund created: {refund.id}")
             return refund.id
 
-        except stripe.error.StripeError as e:
+        except stripe.StripeError as e:
             logger.error(f"Error creating refund: {e}")
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
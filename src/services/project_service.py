@@ -1,19 +1,26 @@
 # src/services/project_service.py
+import logging
+import os
 from typing import List, Optional
 from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import HTTPException, status
 
-from src.database.models.models_content import Project, ProjectStatus
+from src.database.models.models_content import Project, ProjectStatus, MediaBlob, MediaType, PostType
 from src.schemas.project import (
     ProjectCreate, ProjectResponse, ProjectUpdate, ProjectWithMediaResponse,
-    ProjectMediaResponse, PostResponse, CommentResponse, ProjectNewsResponse
+    ProjectMediaResponse, ProjectMediaCreate, PostResponse, PostWithMediaResponse, PostMediaCreate,
+    CommentResponse, ProjectNewsResponse
 )
 from src.repository.projects_repository import projects_repository
 from src.repository.project_media_repository import project_media_repository
 from src.repository.posts_repository import posts_repository
+from src.repository.post_media_repository import post_media_repository
 from src.repository.comments_repository import comments_repository
 from src.repository.likes_repository import likes_repository
 from src.repository.project_news_repository import project_news_repository
+from src.repository.media_blobs_repository import media_blobs_repository
+
+logger = logging.getLogger(__name__)
 
 
 class ProjectService:
@@ -125,10 +132,13 @@ class ProjectService:
         if project.creator_id != creator_id:
             raise HTTPException(status_code=403, detail="Not enough permissions")
 
+        # Медиа удаляются каскадом вместе с проектом - освобождаем их блобы
+        media_urls = await projects_repository.get_media_urls(db, project_id)
         success = await projects_repository.delete(db, project_id)
         if not success:
             raise HTTPException(status_code=404, detail="Project not found")
 
+        await media_blobs_repository.release(db, media_urls)
         return {"message": "Project deleted successfully"}
 
     # Методы для медиа
@@ -150,6 +160,43 @@ class ProjectService:
         )
         return [ProjectMediaResponse.model_validate(media) for media in media_files]
 
+    @classmethod
+    async def add_project_media(
+            cls,
+            db: AsyncSession,
+            project_id: int,
+            blob: MediaBlob,
+            file_name: str,
+            description: Optional[str] = None
+    ) -> ProjectMediaResponse:
+        """Создание медиа проекта из сохраненного блоба и запуск фоновой обработки"""
+        media_data = ProjectMediaCreate(
+            project_id=project_id,
+            file_url=blob.file_url,
+            file_type=blob.file_type,
+            file_name=file_name,
+            file_size=blob.file_size,
+            mime_type=blob.mime_type,
+            description=description
+        )
+        # Схема приводит тип к строковому enum API, в модель передаем enum БД
+        media = await project_media_repository.create(db, media_data, file_type=blob.file_type)
+
+        cls._enqueue_media_processing(media, "project")
+        return ProjectMediaResponse.model_validate(media)
+
+    @staticmethod
+    def _enqueue_media_processing(media, media_kind: str) -> None:
+        """Превью, адаптивные варианты и HLS генерируются в фоне после коммита"""
+        try:
+            from src.tasks.tasks import generate_media_derivatives, process_video_media
+            if media.file_type in (MediaType.IMAGE, MediaType.GIF):
+                generate_media_derivatives.delay(media.id, media_kind)
+            elif media.file_type == MediaType.VIDEO:
+                process_video_media.delay(media.id, media_kind)
+        except Exception as e:
+            logger.warning(f"⚠️ Failed to enqueue media processing for {media_kind} media {media.id}: {e}")
+
     # Методы для постов
     @classmethod
     async def create_project_post(
@@ -164,14 +211,44 @@ class ProjectService:
         if not project:
             raise HTTPException(status_code=404, detail="Project not found")
 
+        # Схема приводит тип к строковому enum API, в модель передаем enum БД
         post = await posts_repository.create(
             db,
             post_data,
             author_id=author_id,
-            project_id=project_id
+            project_id=project_id,
+            post_type=PostType(post_data.post_type.value)
         )
+        if post.media_url:
+            await cls._attach_post_media(db, post.id, post.media_url, author_id)
+            await db.refresh(post)
         return PostResponse.model_validate(post)
 
+    @classmethod
+    async def _attach_post_media(cls, db: AsyncSession, post_id: int, media_url: str, author_id: int) -> None:
+        """
+        Медиа записи поста для файла из хранилища, на который автор уже
+        ссылается: ссылка учитывается в блобе, производные генерируются в фоне.
+        Внешние и чужие URL остаются только в media_url поста.
+        """
+        blob = await media_blobs_repository.get_owned_by_url(db, media_url, author_id)
+        if not blob:
+            return
+        blob = await media_blobs_repository.acquire(db, blob.sha256, author_id)
+        if not blob:
+            return
+
+        media_data = PostMediaCreate(
+            post_id=post_id,
+            file_url=blob.file_url,
+            file_type=blob.file_type,
+            file_name=os.path.basename(blob.file_url)
+        )
+        media = await post_media_repository.create(
+            db, media_data, file_type=blob.file_type, file_size=blob.file_size, mime_type=blob.mime_type
+        )
+        cls._enqueue_media_processing(media, "post")
+
     @classmethod
     async def get_project_posts(
             cls,
@@ -179,10 +256,10 @@ class ProjectService:
             project_id: int,
             skip: int = 0,
             limit: int = 50
-    ) -> List[PostResponse]:
-        """Получение постов проекта"""
-        posts = await posts_repository.get_by_project(db, project_id, skip, limit)
-        return [PostResponse.model_validate(post) for post in posts]
+    ) -> List[PostWithMediaResponse]:
+        """Получение постов проекта с медиа (превью и адаптивные варианты)"""
+        posts = await posts_repository.get_by_project_with_media(db, project_id, skip, limit)
+        return [PostWithMediaResponse.model_validate(post) for post in posts]
 
     # Методы для комментариев
     @classmethod
@@ -0,0 +1,212 @@
+# src/services/resumable_upload_service.py
+import asyncio
+import logging
+import os
+import secrets
+import time
+from typing import Any, AsyncIterator, Dict, Optional
+
+import aiofiles
+from fastapi import HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette import status
+
+from src.config.settings import settings
+from src.database.redis_client import redis_manager
+from src.schemas.project import ProjectMediaResponse
+from src.services.media_service import media_service
+from src.services.project_service import ProjectService
+from src.utils.file_utils import (
+    get_media_type_from_extension, get_max_file_size, resolve_media_type, inspect_stored_file
+)
+
+logger = logging.getLogger(__name__)
+
+
+class ResumableUploadService:
+    """
+    Возобновляемая загрузка больших файлов чанками.
+
+    Состояние сессии (сколько байт принято) хранится в Redis, байты - во
+    временном файле. БД используется только при создании сессии (проверка
+    прав) и при финализации, которая создает запись ProjectMedia.
+    """
+
+    KEY_PREFIX = "upload_session"
+
+    def __init__(self):
+        self.uploads_dir = os.path.join(settings.MEDIA_ROOT, "uploads")
+        self.session_ttl = settings.UPLOAD_SESSION_TTL_SECONDS
+        self.max_chunk_size = settings.UPLOAD_MAX_CHUNK_SIZE
+
+    @property
+    def redis(self):
+        if not redis_manager.redis_client:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Upload sessions are temporarily unavailable"
+            )
+        return redis_manager.redis_client
+
+    def _key(self, upload_id: str) -> str:
+        return f"{self.KEY_PREFIX}:{upload_id}"
+
+    def _temp_path(self, upload_id: str) -> str:
+        return os.path.join(self.uploads_dir, f"{upload_id}.part")
+
+    @staticmethod
+    def _to_response(upload_id: str, session: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "upload_id": upload_id,
+            "project_id": int(session["project_id"]),
+            "file_name": session["file_name"],
+            "file_size": int(session["file_size"]),
+            "received": int(session["received"]),
+        }
+
+    async def create_session(
+            self,
+            user_id: int,
+            project_id: int,
+            file_name: str,
+            file_size: int,
+            description: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Создание сессии загрузки"""
+        max_size = get_max_file_size(get_media_type_from_extension(file_name))
+        if file_size > max_size:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Файл слишком большой. Максимальный размер: {max_size // 1024 // 1024}MB"
+            )
+
+        upload_id = secrets.token_urlsafe(24)
+        session = {
+            "user_id": user_id,
+            "project_id": project_id,
+            "file_name": file_name,
+            "file_size": file_size,
+            "received": 0,
+            "description": description or "",
+            "created_at": int(time.time()),
+        }
+
+        os.makedirs(self.uploads_dir, exist_ok=True)
+        async with aiofiles.open(self._temp_path(upload_id), 'wb'):
+            pass
+
+        key = self._key(upload_id)
+        await self.redis.hset(key, mapping=session)
+        await self.redis.expire(key, self.session_ttl)
+
+        logger.info(f"📤 Upload session created: {upload_id} for project {project_id} ({file_size} bytes)")
+        return {
+            **self._to_response(upload_id, {k: str(v) for k, v in session.items()}),
+            "chunk_size": self.max_chunk_size,
+            "expires_in": self.session_ttl,
+        }
+
+    async def get_session(self, upload_id: str, project_id: int) -> Dict[str, Any]:
+        """Состояние сессии (для возобновления после обрыва)"""
+        session = await self.redis.hgetall(self._key(upload_id))
+        if not session or int(session["project_id"]) != project_id:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Upload session not found")
+        return session
+
+    async def get_status(self, upload_id: str, project_id: int) -> Dict[str, Any]:
+        session = await self.get_session(upload_id, project_id)
+        return self._to_response(upload_id, session)
+
+    async def write_chunk(self, upload_id: str, project_id: int, offset: int,
+                          body: AsyncIterator[bytes]) -> Dict[str, Any]:
+        """Запись чанка по смещению; смещение должно совпадать с уже принятым объемом"""
+        key = self._key(upload_id)
+        lock_key = f"{key}:lock"
+
+        if not await self.redis.set(lock_key, "1", nx=True, ex=60):
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Chunk upload already in progress")
+
+        try:
+            session = await self.get_session(upload_id, project_id)
+            received = int(session["received"])
+            file_size = int(session["file_size"])
+
+            if offset != received:
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail={"message": "Offset mismatch", "received": received}
+                )
+
+            written = 0
+            async with aiofiles.open(self._temp_path(upload_id), 'r+b') as f:
+                await f.seek(offset)
+                async for piece in body:
+                    written += len(piece)
+                    if written > self.max_chunk_size or offset + written > file_size:
+                        raise HTTPException(
+                            status_code=status.HTTP_413_CONTENT_TOO_LARGE,
+                            detail="Chunk exceeds the allowed or declared size"
+                        )
+                    await f.write(piece)
+
+            if offset == 0 and written:
+                # Тип файла проверяем по первым байтам сразу, а не после загрузки 100MB
+                async with aiofiles.open(self._temp_path(upload_id), 'rb') as f:
+                    head = await f.read(4096)
+                media_type, _ = resolve_media_type(session["file_name"], head)
+                if file_size > get_max_file_size(media_type):
+                    raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Файл слишком большой")
+
+            received = offset + written
+            await self.redis.hset(key, "received", received)
+            await self.redis.expire(key, self.session_ttl)
+
+            return self._to_response(upload_id, {**session, "received": str(received)})
+        finally:
+            await self.redis.delete(lock_key)
+
+    async def finalize(self, db: AsyncSession, upload_id: str, project_id: int,
+                       user_id: int) -> ProjectMediaResponse:
+        """Сборка загрузки: проверка, перенос в хранилище и создание ProjectMedia"""
+        session = await self.get_session(upload_id, project_id)
+        if int(session["user_id"]) != user_id:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Upload session not found")
+
+        received = int(session["received"])
+        if received != int(session["file_size"]):
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail={"message": "Upload is incomplete", "received": received}
+            )
+
+        temp_path = self._temp_path(upload_id)
+        # Обрезаем хвост от оборванных чанков и проверяем файл вне event loop
+        os.truncate(temp_path, received)
+        upload = await asyncio.to_thread(inspect_stored_file, temp_path, session["file_name"])
+
+        blob = await media_service.store_local_file(db, temp_path, session["file_name"], upload)
+        media = await ProjectService.add_project_media(
+            db,
+            project_id,
+            blob,
+            session["file_name"],
+            session.get("description") or None
+        )
+
+        await self.redis.delete(self._key(upload_id))
+        logger.info(f"✅ Upload session finalized: {upload_id} -> media {media.id}")
+        return media
+
+    async def abort(self, upload_id: str, project_id: int, user_id: int) -> None:
+        """Отмена загрузки и удаление временного файла"""
+        session = await self.get_session(upload_id, project_id)
+        if int(session["user_id"]) != user_id:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Upload session not found")
+
+        await self.redis.delete(self._key(upload_id))
+        temp_path = self._temp_path(upload_id)
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+resumable_upload_service = ResumableUploadService()
@@ -0,0 +1,326 @@
+# src/services/storage_service.py
+import base64
+import hashlib
+import hmac
+import logging
+import os
+import time
+import uuid
+from abc import ABC, abstractmethod
+from datetime import datetime, timezone
+from typing import AsyncIterator, Dict, NamedTuple, Optional, Tuple
+from urllib.parse import quote, urlencode, urlsplit
+
+import aiofiles
+import httpx
+from fastapi import HTTPException
+from starlette import status
+
+from src.config.settings import settings
+from src.services.media_service import media_service
+
+logger = logging.getLogger(__name__)
+
+# SHA-256 пустого тела запроса (HEAD/GET/DELETE)
+EMPTY_PAYLOAD_SHA256 = hashlib.sha256(b"").hexdigest()
+
+
+class PresignedUpload(NamedTuple):
+    """Подписанная ссылка для прямой загрузки файла клиентом"""
+    url: str
+    method: str
+    headers: Dict[str, str]
+    expires_in: int
+
+
+class StoredObject(NamedTuple):
+    """Метаданные объекта в хранилище"""
+    size: int
+    content_type: Optional[str]
+
+
+class StorageBackend(ABC):
+    """Хранилище блобов медиа: ключи вида blobs/{ab}/{cd}/{sha256}{ext}"""
+
+    name = "base"
+
+    @abstractmethod
+    def public_url(self, storage_key: str) -> str:
+        ...
+
+    @abstractmethod
+    def presign_put(self, storage_key: str, content_type: str, sha256: str, file_size: int,
+                    expires_in: int) -> PresignedUpload:
+        ...
+
+    @abstractmethod
+    async def stat(self, storage_key: str) -> Optional[StoredObject]:
+        ...
+
+    @abstractmethod
+    async def read_head(self, storage_key: str, length: int) -> bytes:
+        ...
+
+    @abstractmethod
+    async def delete(self, storage_key: str) -> None:
+        ...
+
+
+class LocalStorageBackend(StorageBackend):
+    """
+    Файлы в MEDIA_ROOT.
+
+    Подписанная ссылка указывает на PUT {MEDIA_URL}/{key} самого приложения
+    (аналог presigned PUT в S3) - для разработки и одиночного сервера.
+    """
+
+    name = "local"
+
+    def __init__(self, secret_key: Optional[str] = None):
+        self.secret_key = secret_key or settings.SECRET_KEY
+
+    def public_url(self, storage_key: str) -> str:
+        return media_service.get_blob_url(storage_key)
+
+    def _upload_signature(self, storage_key: str, content_type: str, file_size: int, expires: int) -> str:
+        message = f"PUT\n{storage_key}\n{content_type}\n{file_size}\n{expires}"
+        return hmac.new(self.secret_key.encode(), message.encode(), hashlib.sha256).hexdigest()
+
+    def presign_put(self, storage_key: str, content_type: str, sha256: str, file_size: int,
+                    expires_in: int) -> PresignedUpload:
+        expires = int(time.time()) + expires_in
+        query = urlencode({
+            "size": file_size,
+            "expires": expires,
+            "signature": self._upload_signature(storage_key, content_type, file_size, expires),
+        })
+        return PresignedUpload(
+            url=f"{self.public_url(storage_key)}?{query}",
+            method="PUT",
+            headers={"Content-Type": content_type},
+            expires_in=expires_in
+        )
+
+    def verify_upload_signature(self, storage_key: str, content_type: str, file_size: int,
+                                expires: int, signature: str) -> bool:
+        if expires < time.time():
+            return False
+        expected = self._upload_signature(storage_key, content_type, file_size, expires)
+        return hmac.compare_digest(expected, signature)
+
+    async def store_stream(self, storage_key: str, body: AsyncIterator[bytes], sha256: str, file_size: int) -> None:
+        """Прием тела PUT: размер и хеш должны совпасть с подписанными"""
+        temp_path = os.path.join(media_service.media_root, "blobs", "tmp", f"{uuid.uuid4()}.upload")
+        os.makedirs(os.path.dirname(temp_path), exist_ok=True)
+
+        hasher = hashlib.sha256()
+        received = 0
+        try:
+            async with aiofiles.open(temp_path, 'wb') as f:
+                async for piece in body:
+                    received += len(piece)
+                    if received > file_size:
+                        raise HTTPException(
+                            status_code=status.HTTP_413_CONTENT_TOO_LARGE,
+                            detail="Body exceeds the signed size"
+                        )
+                    hasher.update(piece)
+                    await f.write(piece)
+
+            if received != file_size or hasher.hexdigest() != sha256:
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Content checksum mismatch")
+
+            blob_path = media_service.get_blob_path(storage_key)
+            os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+            os.replace(temp_path, blob_path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    async def stat(self, storage_key: str) -> Optional[StoredObject]:
+        path = media_service.get_blob_path(storage_key)
+        if not os.path.isfile(path):
+            return None
+        return StoredObject(size=os.path.getsize(path), content_type=None)
+
+    async def read_head(self, storage_key: str, length: int) -> bytes:
+        async with aiofiles.open(media_service.get_blob_path(storage_key), 'rb') as f:
+            return await f.read(length)
+
+    async def delete(self, storage_key: str) -> None:
+        path = media_service.get_blob_path(storage_key)
+        if os.path.exists(path):
+            os.remove(path)
+
+
+class S3StorageBackend(StorageBackend):
+    """
+    S3-совместимое хранилище (AWS S3, MinIO) с подписью AWS Signature V4.
+
+    Клиент загружает файл напрямую в бакет по presigned PUT; заголовок
+    x-amz-checksum-sha256 входит в подпись, поэтому хранилище само отклонит
+    тело, не совпадающее с хешем из ключа.
+    """
+
+    name = "s3"
+    SERVICE = "s3"
+    ALGORITHM = "AWS4-HMAC-SHA256"
+
+    def __init__(
+            self,
+            endpoint_url: str,
+            bucket: str,
+            region: str,
+            access_key_id: str,
+            secret_access_key: str,
+            addressing_style: str = "path",
+            public_base_url: str = "",
+            client: Optional[httpx.AsyncClient] = None
+    ):
+        self.endpoint_url = endpoint_url.rstrip("/")
+        self.bucket = bucket
+        self.region = region
+        self.access_key_id = access_key_id
+        self.secret_access_key = secret_access_key
+        self.addressing_style = addressing_style
+        self.public_base_url = public_base_url.rstrip("/")
+        self._client = client
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(timeout=30)
+        return self._client
+
+    def object_url(self, storage_key: str) -> str:
+        quoted_key = quote(storage_key, safe="/~")
+        if self.addressing_style == "virtual":
+            parsed = urlsplit(self.endpoint_url)
+            return f"{parsed.scheme}://{self.bucket}.{parsed.netloc}/{quoted_key}"
+        return f"{self.endpoint_url}/{self.bucket}/{quoted_key}"
+
+    def public_url(self, storage_key: str) -> str:
+        if self.public_base_url:
+            return f"{self.public_base_url}/{storage_key}"
+        return self.object_url(storage_key)
+
+    def _sign(self, method: str, url: str, headers: Dict[str, str], query: Dict[str, str],
+              payload_hash: str, now: datetime) -> Tuple[str, str, str]:
+        """Подпись SigV4: возвращает (scope, signed headers, signature)"""
+        parsed = urlsplit(url)
+        amz_date = now.strftime("%Y%m%dT%H%M%SZ")
+        date_stamp = now.strftime("%Y%m%d")
+        scope = f"{date_stamp}/{self.region}/{self.SERVICE}/aws4_request"
+
+        canonical_headers = {k.lower(): v.strip() for k, v in headers.items()}
+        canonical_headers["host"] = parsed.netloc
+        signed_headers = ";".join(sorted(canonical_headers))
+
+        canonical_request = "\n".join([
+            method,
+            parsed.path or "/",
+            "&".join(
+                f"{quote(k, safe='-_.~')}={quote(v, safe='-_.~')}" for k, v in sorted(query.items())
+            ),
+            "".join(f"{k}:{canonical_headers[k]}\n" for k in sorted(canonical_headers)),
+            signed_headers,
+            payload_hash,
+        ])
+        string_to_sign = "\n".join([
+            self.ALGORITHM,
+            amz_date,
+            scope,
+            hashlib.sha256(canonical_request.encode()).hexdigest(),
+        ])
+
+        signing_key = f"AWS4{self.secret_access_key}".encode()
+        for part in (date_stamp, self.region, self.SERVICE, "aws4_request"):
+            signing_key = hmac.new(signing_key, part.encode(), hashlib.sha256).digest()
+        signature = hmac.new(signing_key, string_to_sign.encode(), hashlib.sha256).hexdigest()
+
+        return scope, signed_headers, signature
+
+    def presign_url(self, method: str, storage_key: str, expires_in: int,
+                    headers: Optional[Dict[str, str]] = None, now: Optional[datetime] = None) -> str:
+        """Подписанная ссылка (подпись в query string)"""
+        now = now or datetime.now(timezone.utc)
+        url = self.object_url(storage_key)
+        signed_header_names = ";".join(sorted({"host", *(k.lower() for k in (headers or {}))}))
+        query = {
+            "X-Amz-Algorithm": self.ALGORITHM,
+            "X-Amz-Credential": f"{self.access_key_id}/{now.strftime('%Y%m%d')}/{self.region}/{self.SERVICE}/aws4_request",
+            "X-Amz-Date": now.strftime("%Y%m%dT%H%M%SZ"),
+            "X-Amz-Expires": str(expires_in),
+            "X-Amz-SignedHeaders": signed_header_names,
+        }
+        _, _, signature = self._sign(method, url, headers or {}, query, "UNSIGNED-PAYLOAD", now)
+        return f"{url}?{urlencode({**query, 'X-Amz-Signature': signature}, quote_via=quote, safe='-_.~')}"
+
+    def presign_put(self, storage_key: str, content_type: str, sha256: str, file_size: int,
+                    expires_in: int) -> PresignedUpload:
+        headers = {
+            "Content-Type": content_type,
+            "x-amz-checksum-sha256": base64.b64encode(bytes.fromhex(sha256)).decode(),
+        }
+        return PresignedUpload(
+            url=self.presign_url("PUT", storage_key, expires_in, headers),
+            method="PUT",
+            headers=headers,
+            expires_in=expires_in
+        )
+
+    async def _request(self, method: str, storage_key: str, headers: Optional[Dict[str, str]] = None) -> httpx.Response:
+        """Запрос к хранилищу с подписью в заголовке Authorization"""
+        now = datetime.now(timezone.utc)
+        url = self.object_url(storage_key)
+        headers = {
+            **(headers or {}),
+            "x-amz-content-sha256": EMPTY_PAYLOAD_SHA256,
+            "x-amz-date": now.strftime("%Y%m%dT%H%M%SZ"),
+        }
+        scope, signed_headers, signature = self._sign(method, url, headers, {}, EMPTY_PAYLOAD_SHA256, now)
+        headers["Authorization"] = (
+            f"{self.ALGORITHM} Credential={self.access_key_id}/{scope}, "
+            f"SignedHeaders={signed_headers}, Signature={signature}"
+        )
+        return await self.client.request(method, url, headers=headers)
+
+    async def stat(self, storage_key: str) -> Optional[StoredObject]:
+        response = await self._request("HEAD", storage_key)
+        if response.status_code == status.HTTP_404_NOT_FOUND:
+            return None
+        response.raise_for_status()
+        return StoredObject(
+            size=int(response.headers["content-length"]),
+            content_type=response.headers.get("content-type")
+        )
+
+    async def read_head(self, storage_key: str, length: int) -> bytes:
+        response = await self._request("GET", storage_key, {"Range": f"bytes=0-{length - 1}"})
+        response.raise_for_status()
+        return response.content[:length]
+
+    async def delete(self, storage_key: str) -> None:
+        response = await self._request("DELETE", storage_key)
+        if response.status_code != status.HTTP_404_NOT_FOUND:
+            response.raise_for_status()
+
+
+def create_storage_backend() -> StorageBackend:
+    """Хранилище по настройке STORAGE_BACKEND"""
+    if settings.STORAGE_BACKEND == "s3":
+        logger.info(f"🪣 Using S3 storage: {settings.S3_ENDPOINT_URL}/{settings.S3_BUCKET}")
+        return S3StorageBackend(
+            endpoint_url=settings.S3_ENDPOINT_URL,
+            bucket=settings.S3_BUCKET,
+            region=settings.S3_REGION,
+            access_key_id=settings.S3_ACCESS_KEY_ID,
+            secret_access_key=settings.S3_SECRET_ACCESS_KEY,
+            addressing_style=settings.S3_ADDRESSING_STYLE,
+            public_base_url=settings.S3_PUBLIC_URL
+        )
+    return LocalStorageBackend()
+
+
+storage_backend = create_storage_backend()
@@ -1,34 +1,62 @@
 # src/services/template_service.py
-from jinja2 import Environment, FileSystemLoader, select_autoescape, TemplateNotFound
+from jinja2 import Environment, FileSystemLoader, FileSystemBytecodeCache, Template, select_autoescape, TemplateNotFound
 from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
 import logging
+import os
+
+from src.config.settings import settings
 
 logger = logging.getLogger(__name__)
 
 class TemplateService:
+    EMAILS_PREFIX = "emails/"
+
     def __init__(self):
         # Путь к директории с шаблонами
         self.templates_dir = Path(__file__).parent.parent / "templates"
 
         logger.info(f"📁 Templates directory: {self.templates_dir}")
 
+        # Байткод скомпилированных шаблонов на диске: общий для всех процессов
+        # Celery, новый воркер не компилирует шаблоны заново
+        bytecode_cache = None
+        if settings.TEMPLATE_BYTECODE_CACHE_DIR:
+            os.makedirs(settings.TEMPLATE_BYTECODE_CACHE_DIR, exist_ok=True)
+            bytecode_cache = FileSystemBytecodeCache(settings.TEMPLATE_BYTECODE_CACHE_DIR)
+
         # Jinja2 environment
         self.env = Environment(
             loader=FileSystemLoader(self.templates_dir),
             autoescape=select_autoescape(['html', 'xml']),
             trim_blocks=True,
-            lstrip_blocks=True
+            lstrip_blocks=True,
+            bytecode_cache=bytecode_cache,
+            auto_reload=settings.TEMPLATE_AUTO_RELOAD
         )
+        # Предзагруженные email шаблоны: рендер без поиска и проверки файла
+        self._email_templates: Dict[str, Template] = {}
+
+    def preload_email_templates(self) -> int:
+        """Компиляция всех emails/* шаблонов заранее (при старте воркера)"""
+        names = self.env.list_templates(filter_func=lambda name: name.startswith(self.EMAILS_PREFIX))
+        for name in names:
+            self._email_templates[name[len(self.EMAILS_PREFIX):]] = self.env.get_template(name)
+        logger.info(f"🎨 Preloaded {len(names)} email templates")
+        return len(names)
+
+    def get_email_template(self, template_name: str) -> Template:
+        """Скомпилированный email шаблон (из предзагрузки или из окружения Jinja)"""
+        template = self._email_templates.get(template_name)
+        if template is None or (self.env.auto_reload and not template.is_up_to_date):
+            template = self.env.get_template(f"{self.EMAILS_PREFIX}{template_name}")
+            self._email_templates[template_name] = template
+        return template
 
     def render_email_template(self, template_name: str, **context) -> str:
         """Рендерит email шаблон"""
         try:
-            logger.info(f"🎨 Rendering email template: {template_name}")
-            template_path = f"emails/{template_name}"
-            template = self.env.get_template(template_path)
-            result = template.render(**context)
-            logger.info(f"✅ Template rendered successfully: {template_name}")
-            return result
+            return self.get_email_template(template_name).render(**context)
         except TemplateNotFound as e:
             logger.error(f"❌ Template not found: {template_name} - {e}")
             # HTML: Запасной вариант
@@ -37,6 +65,34 @@ class TemplateService:
             logger.error(f"❌ Error rendering template {template_name}: {e}")
             return self._get_fallback_template(template_name, context)
 
+    def render_many(
+            self,
+            template_name: str,
+            contexts: Iterable[Dict[str, Any]],
+            shared: Optional[Dict[str, Any]] = None
+    ) -> List[str]:
+        """
+        Рендер одного шаблона для множества получателей: шаблон берется один
+        раз, общие данные (shared) объединяются с данными каждого получателя.
+        Ошибка в одном контексте дает запасной шаблон только для него.
+        """
+        shared = shared or {}
+        try:
+            template = self.get_email_template(template_name)
+        except TemplateNotFound as e:
+            logger.error(f"❌ Template not found: {template_name} - {e}")
+            return [self._get_fallback_template(template_name, {**shared, **context}) for context in contexts]
+
+        results = []
+        for context in contexts:
+            merged = {**shared, **context}
+            try:
+                results.append(template.render(merged))
+            except Exception as e:
+                logger.error(f"❌ Error rendering template {template_name}: {e}")
+                results.append(self._get_fallback_template(template_name, merged))
+        return results
+
     def _get_fallback_template(self, template_name: str, context: dict) -> str:
         """Запасной шаблон при ошибке"""
         if "welcome_email" in template_name:
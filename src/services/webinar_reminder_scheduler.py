@@ -0,0 +1,137 @@
+# src/services/webinar_reminder_scheduler.py
+import logging
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+
+from redis.exceptions import RedisError
+
+from src.config.settings import settings
+from src.services.notification_service import notification_service
+
+logger = logging.getLogger(__name__)
+
+
+def describe_offset(minutes: int) -> str:
+    """Срок до начала вебинара словами: «24 часа», «1 час», «10 минут»"""
+    if minutes % 60 == 0:
+        value, forms = minutes // 60, ("час", "часа", "часов")
+    else:
+        value, forms = minutes, ("минуту", "минуты", "минут")
+    if value % 10 == 1 and value % 100 != 11:
+        form = forms[0]
+    elif 2 <= value % 10 <= 4 and not 12 <= value % 100 <= 14:
+        form = forms[1]
+    else:
+        form = forms[2]
+    return f"{value} {form}"
+
+
+class WebinarReminderScheduler:
+    """
+    Отложенные напоминания о вебинарах. Срок отправки (начало минус
+    WEBINAR_REMINDER_OFFSETS_MINUTES) ближайших WEBINAR_REMINDER_LOOKAHEAD_SECONDS
+    сразу ставится задачей send_webinar_reminders с countdown, более дальние
+    ждут в Redis (ZSET, элемент «webinar_id:offset», счет - момент отправки):
+    диспетчер раз в несколько минут забирает подошедшие и ставит их так же.
+    Длинные ETA в брокер не попадают - Redis-брокер переотправил бы их по
+    visibility_timeout.
+
+    Уже поставленные задачи при переносе или отмене не отзываются: выборка
+    claim_due_reminders для вебинара, который не начинается в ближайшие
+    offset минут или отменен, пуста. Если Redis недоступен, часовое
+    напоминание отправит задача send_webinar_reminders по расписанию.
+    """
+
+    DUE_KEY = "webinar_reminders:due"
+
+    @property
+    def redis_client(self):
+        return notification_service.redis_client
+
+    @staticmethod
+    def member(webinar_id: int, offset_minutes: int) -> str:
+        return f"{webinar_id}:{offset_minutes}"
+
+    def schedule(self, webinar_id: int, scheduled_at: datetime) -> int:
+        """
+        (Пере)планирование напоминаний вебинара: старые элементы удаляются,
+        ближайшие сроки ставятся задачами, дальние добавляются в ZSET.
+        Возвращает число запланированных сроков.
+        """
+        now = datetime.now()
+        horizon = now + timedelta(seconds=settings.WEBINAR_REMINDER_LOOKAHEAD_SECONDS)
+        scheduled, due = 0, {}
+        for offset in settings.WEBINAR_REMINDER_OFFSETS_MINUTES:
+            send_at = scheduled_at - timedelta(minutes=offset)
+            if send_at <= now:
+                continue
+            scheduled += 1
+            if send_at > horizon or not self.enqueue(webinar_id, offset, send_at, now):
+                due[self.member(webinar_id, offset)] = send_at.timestamp()
+
+        try:
+            pipe = self.redis_client.pipeline()
+            pipe.zrem(self.DUE_KEY, *self._members(webinar_id))
+            if due:
+                pipe.zadd(self.DUE_KEY, due)
+            pipe.execute()
+        except RedisError as e:
+            logger.warning(f"⚠️ Failed to schedule reminders for webinar {webinar_id}: {e}")
+            return scheduled - len(due)
+
+        logger.info(f"⏰ Scheduled {scheduled} reminders for webinar {webinar_id}")
+        return scheduled
+
+    def unschedule(self, webinar_id: int) -> None:
+        """Отмена напоминаний вебинара (вебинар отменен или завершен)"""
+        try:
+            self.redis_client.zrem(self.DUE_KEY, *self._members(webinar_id))
+        except RedisError as e:
+            logger.warning(f"⚠️ Failed to unschedule reminders for webinar {webinar_id}: {e}")
+
+    @staticmethod
+    def enqueue(webinar_id: int, offset_minutes: int, send_at: datetime, now: Optional[datetime] = None) -> bool:
+        """Задача напоминаний к сроку send_at; False, если брокер недоступен"""
+        from src.tasks.tasks import send_webinar_reminders
+
+        countdown = max((send_at - (now or datetime.now())).total_seconds(), 0)
+        try:
+            send_webinar_reminders.apply_async(
+                kwargs={"webinar_id": webinar_id, "offset_minutes": offset_minutes}, countdown=countdown
+            )
+            return True
+        except Exception as e:
+            logger.warning(f"⚠️ Failed to enqueue reminder {offset_minutes} for webinar {webinar_id}: {e}")
+            return False
+
+    def pop_upcoming(self, now: Optional[datetime] = None, limit: int = 100) -> List[Tuple[int, int, datetime]]:
+        """
+        Напоминания со сроком в ближайшие WEBINAR_REMINDER_LOOKAHEAD_SECONDS
+        [(webinar_id, offset, send_at)]. Элемент забирает тот, чей ZREM его
+        удалил, поэтому параллельные диспетчеры не ставят задачу дважды.
+        """
+        now = now or datetime.now()
+        horizon = now + timedelta(seconds=settings.WEBINAR_REMINDER_LOOKAHEAD_SECONDS)
+        members = self.redis_client.zrangebyscore(
+            self.DUE_KEY, "-inf", horizon.timestamp(), start=0, num=limit, withscores=True
+        )
+        if not members:
+            return []
+
+        pipe = self.redis_client.pipeline(transaction=False)
+        for member, _ in members:
+            pipe.zrem(self.DUE_KEY, member)
+        removed = pipe.execute()
+
+        upcoming = []
+        for (member, score), claimed in zip(members, removed):
+            if claimed:
+                webinar_id, offset = member.split(":")
+                upcoming.append((int(webinar_id), int(offset), datetime.fromtimestamp(score)))
+        return upcoming
+
+    def _members(self, webinar_id: int) -> List[str]:
+        return [self.member(webinar_id, offset) for offset in settings.WEBINAR_REMINDER_OFFSETS_MINUTES]
+
+
+webinar_reminder_scheduler = WebinarReminderScheduler()
@@ -12,6 +12,7 @@ from src.config.settings import settings
 from src.database import models
 from src.services.notification_service import notification_service
 from src.services.template_service import template_service
+from src.services.webinar_reminder_scheduler import webinar_reminder_scheduler
 from src.repository.webinar_repository import webinar_repository
 from src.repository.user_repository import user_repository
 
@@ -220,6 +221,9 @@ class WebinarService:
 
             notification_service.create_webinar_announcement(announcement_data)
 
+            # 5. ПЛАНИРУЕМ НАПОМИНАНИЯ
+            webinar_reminder_scheduler.schedule(webinar.id, webinar.scheduled_at)
+
             logger.info(f"🎉 Webinar fully created: {webinar.id} by user {creator_id}")
             logger.info(f"   - Room: {webinar.meta_data.get('livekit_room', 'NOT_CREATED')}")
             logger.info(f"   - LiveKit available: {webinar.meta_data.get('livekit_available', False)}")
@@ -273,12 +277,20 @@ class WebinarService:
                     detail="Not enough permissions to edit this webinar"
                 )
 
+            rescheduled = (
+                    "scheduled_at" in update_data and update_data["scheduled_at"] != webinar.scheduled_at
+            )
+
             # Обновляем данные
             for field, value in update_data.items():
                 if hasattr(webinar, field):
                     setattr(webinar, field, value)
                     logger.debug(f"Updated field {field} for webinar {webinar_id}")
 
+            # После переноса напоминания отправляются заново, уже к новому времени
+            if rescheduled:
+                await webinar_repository.reset_reminders(db, webinar_id)
+
             webinar.updated_at = datetime.now()
             await db.commit()
             await db.refresh(webinar)
@@ -302,6 +314,12 @@ class WebinarService:
 
             notification_service.create_webinar_announcement(announcement_data)
 
+            # Перенос сдвигает напоминания, отмена их снимает
+            if webinar.status != "scheduled":
+                webinar_reminder_scheduler.unschedule(webinar.id)
+            elif rescheduled or "status" in update_data:
+                webinar_reminder_scheduler.schedule(webinar.id, webinar.scheduled_at)
+
             logger.info(f"✅ Webinar {webinar_id} updated successfully")
             return webinar
 
@@ -1,5 +1,6 @@
 # src/tasks/celery_app.py
 from celery import Celery
+from celery.signals import worker_process_init
 from src.config.settings import settings
 
 celery_app = Celery('crowdfunding')
@@ -16,6 +17,26 @@ celery_app.conf.update(
     broker_connection_retry_on_startup=True,
 )
 
+# CPU-нагруженная обработка медиа идет в отдельную очередь:
+# celery -A src.tasks.celery_app worker -Q media --pool=threads
+# (задачи сами отдают работу в пул процессов, prefork-воркеры не могут порождать процессы)
+celery_app.conf.task_routes = {
+    'src.tasks.tasks.generate_media_derivatives': {'queue': 'media'},
+    'src.tasks.tasks.process_video_media': {'queue': 'media'},
+    # Массовые рассылки собирают письма в пуле процессов по той же причине:
+    # celery -A src.tasks.celery_app worker -Q bulk_email --pool=threads
+    'src.tasks.tasks.send_bulk_email_chunk': {'queue': 'bulk_email'},
+}
+
+
+@worker_process_init.connect
+def preload_email_templates(**kwargs):
+    """Email шаблоны компилируются при старте процесса воркера, а не на первом письме"""
+    from src.services.template_service import template_service
+
+    template_service.preload_email_templates()
+
+
 # Автоматическое обнаружение задач
 celery_app.autodiscover_tasks(['src.tasks'])
 
@@ -27,7 +48,32 @@ celery_app.conf.beat_schedule = {
         'schedule': 60.0,
     },
 
+    # 💳 Платежи (страховка на случай, если задача не была поставлена при приеме вебхука)
+    'process-webhook-inbox': {
+        'task': 'src.tasks.tasks.process_webhook_inbox',
+        'schedule': 30.0,
+    },
+    'reconcile-pending-payments': {
+        'task': 'src.tasks.tasks.reconcile_pending_payments',
+        'schedule': 600.0,  # Каждые 10 минут
+    },
+    'rebuild-leaderboards': {
+        'task': 'src.tasks.tasks.rebuild_leaderboards',
+        'schedule': 86400.0,  # Раз в день: исправляет расхождения после сбоев Redis
+    },
+    'update-donation-rollups': {
+        'task': 'src.tasks.tasks.update_donation_rollups',
+        'schedule': 300.0,  # Каждые 5 минут
+    },
+
     # 🔔 Уведомления и напоминания
+    'dispatch-webinar-reminders': {
+        'task': 'src.tasks.tasks.dispatch_webinar_reminders',
+        # Ставит отложенные задачи на сроки следующих WEBINAR_REMINDER_LOOKAHEAD_SECONDS,
+        # точность отправки дает ETA задачи, а не частота запуска
+        'schedule': 300.0,  # Каждые 5 минут
+    },
+    # Страховка на случай недоступности Redis при создании или переносе вебинара
     'send-webinar-reminders': {
         'task': 'src.tasks.tasks.send_webinar_reminders',
         'schedule': 3600.0,
@@ -48,5 +94,9 @@ celery_app.conf.beat_schedule = {
         'task': 'src.tasks.tasks.cleanup_old_data',
         'schedule': 86400.0,  # Раз в день (24 часа)
     },
+    'cleanup-media-blobs': {
+        'task': 'src.tasks.tasks.cleanup_media_blobs',
+        'schedule': 86400.0,  # Раз в день (24 часа)
+    },
 }
 # 3600.0, 86400.0
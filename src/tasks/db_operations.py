@@ -1,6 +1,8 @@
 # src/tasks/db_operations.py
 import logging
-from sqlalchemy import create_engine, select, and_
+import random
+from datetime import datetime, timedelta
+from sqlalchemy import create_engine, select, insert, update, func, and_, or_
 from sqlalchemy.orm import sessionmaker
 
 from src.config.settings import settings
@@ -24,43 +26,69 @@ def get_sync_db():
 
 # СИНХРОННЫЕ версии методов репозиториев
 class SyncWebinarRepository:
-    def get_upcoming_webinars_for_reminders(self, db):
-        """Синхронная версия - получение вебинаров для напоминаний"""
-        from datetime import datetime, timedelta
-
+    # Допуск на раннее срабатывание отложенной задачи (расхождение часов воркеров)
+    REMINDER_EARLY_TOLERANCE = timedelta(minutes=1)
+
+    def claim_due_reminders(self, db, limit, offset_minutes=60, webinar_id=None):
+        """
+        Пачка регистраций, которым еще не отправлено напоминание за
+        offset_minutes до начала (и более раннее тоже): один запрос с данными
+        пользователя и вебинара. Без webinar_id - все вебинары, начинающиеся
+        в ближайшие offset_minutes. С webinar_id (отложенная задача
+        планировщика) вебинар тоже должен начинаться в ближайшие offset_minutes
+        с запасом REMINDER_EARLY_TOLERANCE - задача, поставленная до переноса
+        вебинара на более позднее время, ничего не выберет. Строки блокируются
+        FOR UPDATE SKIP LOCKED - параллельный запуск задачи берет другие.
+        """
         now = datetime.now()
-        reminder_start = now + timedelta(hours=1)  # За 1 час до начала
-
-        webinars = db.scalars(
-            select(models.Webinar).where(
-                models.Webinar.scheduled_at.between(now, reminder_start),
-                models.Webinar.status == "scheduled"
+        registration, webinar, user = models.WebinarRegistration, models.Webinar, models.User
+
+        if webinar_id is None:
+            due = webinar.scheduled_at.between(now, now + timedelta(minutes=offset_minutes))
+        else:
+            due = and_(
+                webinar.id == webinar_id,
+                webinar.scheduled_at > now,
+                webinar.scheduled_at <= now + timedelta(minutes=offset_minutes) + self.REMINDER_EARLY_TOLERANCE
             )
-        ).all()
-
-        return webinars
 
-    def get_registrations_for_reminder(self, db, webinar_id):
-        """Синхронная версия - получение регистраций для напоминаний"""
-        registrations = db.scalars(
-            select(models.WebinarRegistration).where(
-                models.WebinarRegistration.webinar_id == webinar_id,
-                models.WebinarRegistration.reminder_sent == False
+        rows = db.execute(
+            select(
+                registration.id.label("registration_id"),
+                registration.user_id,
+                user.email,
+                user.username,
+                webinar.id.label("webinar_id"),
+                webinar.title.label("webinar_title"),
+                webinar.scheduled_at,
+                webinar.duration
             )
-        ).all()
-
-        return registrations
-
-    def mark_reminder_sent(self, db, registration_id):
-        """Синхронная версия - отметка о отправленном напоминании"""
-        registration = db.scalar(
-            select(models.WebinarRegistration).where(
-                models.WebinarRegistration.id == registration_id
+            .join(webinar, webinar.id == registration.webinar_id)
+            .join(user, user.id == registration.user_id)
+            .where(
+                due,
+                webinar.status == "scheduled",
+                or_(
+                    registration.last_reminder_offset.is_(None),
+                    registration.last_reminder_offset > offset_minutes
+                )
             )
+            .order_by(registration.id)
+            .limit(limit)
+            .with_for_update(of=registration, skip_locked=True)
+        ).mappings().all()
+
+        return [dict(row) for row in rows]
+
+    def mark_reminders_sent(self, db, registration_ids, offset_minutes=60):
+        """Отметка об отправленных напоминаниях одним UPDATE (коммит - у вызывающего)"""
+        if not registration_ids:
+            return
+        db.execute(
+            update(models.WebinarRegistration)
+            .where(models.WebinarRegistration.id.in_(registration_ids))
+            .values(reminder_sent=True, last_reminder_offset=offset_minutes)
         )
-        if registration:
-            registration.reminder_sent = True
-            db.commit()
 
 
 sync_webinar_repository = SyncWebinarRepository()
@@ -87,5 +115,123 @@ class SyncNotificationService:
         db.commit()
         return notification
 
+    def create_notifications(self, db, notifications):
+        """Массовое создание уведомлений одним INSERT (коммит - у вызывающего)"""
+        if not notifications:
+            return
+        db.execute(
+            insert(models.Notification),
+            [{"meta_data": {}, "is_read": False, **notification} for notification in notifications]
+        )
+
+
+sync_notification_service = SyncNotificationService()
+
+class SyncEmailQueueRepository:
+    def _claimable(self, claim_timeout_seconds):
+        """
+        Письма к отправке: pending/retrying, срок которых наступил (частичный
+        индекс ix_email_queue_due), и зависшие в sending дольше таймаута
+        """
+        now = datetime.now()
+        stale_threshold = now - timedelta(seconds=claim_timeout_seconds)
+        return or_(
+            and_(
+                models.EmailQueue.status.in_(("pending", "retrying")),
+                models.EmailQueue.scheduled_for <= now
+            ),
+            and_(
+                models.EmailQueue.status == "sending",
+                models.EmailQueue.claimed_at < stale_threshold
+            )
+        )
+
+    def count_claimable(self, db, claim_timeout_seconds):
+        """Глубина очереди"""
+        return db.scalar(
+            select(func.count(models.EmailQueue.id)).where(self._claimable(claim_timeout_seconds))
+        )
+
+    def claim_batch(self, db, limit, claim_timeout_seconds):
+        """
+        Захват пачки писем (FOR UPDATE SKIP LOCKED): параллельные обработчики
+        берут разные строки, захваченные помечаются sending и коммитятся сразу.
+        Повторный захват зависшего в sending письма (воркер упал на отправке)
+        расходует попытку; исчерпавшее попытки письмо помечается failed.
+        Возвращает словари с данными писем (без ORM объектов).
+        """
+        emails = db.scalars(
+            select(models.EmailQueue)
+            .where(self._claimable(claim_timeout_seconds))
+            .order_by(models.EmailQueue.priority.asc(), models.EmailQueue.scheduled_for.asc())
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        ).all()
+
+        claimed_at = datetime.now()
+        jobs = []
+        for email_job in emails:
+            retry_count = email_job.retry_count or 0
+            max_retries = email_job.max_retries if email_job.max_retries is not None else 3
+            if email_job.status == "sending":
+                if retry_count >= max_retries:
+                    email_job.status = "failed"
+                    email_job.error_message = "Claim timed out: max retries exceeded"
+                    logger.warning(f"⚠️ Email {email_job.id} failed: stuck in sending, retries exhausted")
+                    continue
+                retry_count += 1
+                email_job.retry_count = retry_count
+
+            email_job.status = "sending"
+            email_job.claimed_at = claimed_at
+            jobs.append({
+                "id": email_job.id,
+                "email": email_job.email,
+                "subject": email_job.subject,
+                "html_content": (email_job.template_data or {}).get("message", ""),
+                "retry_count": retry_count,
+                "max_retries": max_retries,
+            })
+        db.commit()
+        return jobs
+
+    def mark_sent(self, db, email_ids):
+        """Отметка отправленных писем одним UPDATE"""
+        if not email_ids:
+            return
+        db.execute(
+            update(models.EmailQueue)
+            .where(models.EmailQueue.id.in_(email_ids))
+            .values(status="sent", sent_at=datetime.now(), error_message=None)
+        )
+        db.commit()
+
+    @staticmethod
+    def retry_delay(retry_count):
+        """Экспоненциальная задержка повтора с разбросом (половина задержки случайна)"""
+        delay = min(settings.EMAIL_RETRY_MAX_SECONDS, settings.EMAIL_RETRY_BASE_SECONDS * 2 ** retry_count)
+        return timedelta(seconds=delay / 2 + random.uniform(0, delay / 2))
+
+    def mark_failed(self, db, job, error, transient):
+        """
+        Ошибка отправки: временная ошибка откладывает письмо на повтор
+        (retrying, scheduled_for в будущем), пока не исчерпаны max_retries;
+        иначе письмо помечается failed окончательно. Возвращает True при повторе.
+        """
+        retry = transient and job["retry_count"] < job["max_retries"]
+        if retry:
+            values = {
+                "status": "retrying",
+                "retry_count": job["retry_count"] + 1,
+                "scheduled_for": datetime.now() + self.retry_delay(job["retry_count"]),
+                "claimed_at": None,
+                "error_message": error,
+            }
+        else:
+            values = {"status": "failed", "error_message": error}
+        db.execute(update(models.EmailQueue).where(models.EmailQueue.id == job["id"]).values(**values))
+        db.commit()
+        return retry
+
 
-sync_notification_service = SyncNotificationService()
\ No newline at end of file
+sync_email_queue_repository = SyncEmailQueueRepository()
@@ -1,12 +1,14 @@
 # src/tasks/tasks.py
-from sqlalchemy import create_engine, select, func, delete
+from sqlalchemy import create_engine, select, func, delete, update
 from sqlalchemy.orm import sessionmaker
 from datetime import datetime, timedelta
 import logging
 import asyncio
+import os
 
 from src.config.settings import settings
 from src.database import models
+from src.database.models.models_content import MediaType
 from src.services.email_service import email_service
 
 from src.services.template_service import template_service
@@ -38,6 +40,21 @@ def run_async(coro):
         return loop.run_until_complete(coro)
 
 
+async def ensure_async_redis():
+    """
+    Подключение async Redis для сервисов, вызываемых из Celery (в API его
+    поднимает lifespan). Без Redis сервисы работают в режиме без кэша.
+    """
+    from src.database.redis_client import redis_manager
+
+    if redis_manager.redis_client is None:
+        try:
+            await redis_manager.init_redis()
+        except Exception as e:
+            logger.warning(f"⚠️ Async Redis unavailable in worker: {e}")
+            redis_manager.redis_client = None
+
+
 # ========== EMAIL ЗАДАЧИ ==========
 
 @celery_app.task
@@ -86,45 +103,55 @@ def send_verification_codes_task(user_email: str, username: str, verification_co
 # ========== ПЕРИОДИЧЕСКИЕ ЗАДАЧИ ==========
 
 @celery_app.task
-def send_webinar_reminders():
-    """Отправка напоминаний о вебинарах (использует синхронные репозитории)"""
+def send_webinar_reminders(webinar_id: int = None, offset_minutes: int = 60):
+    """
+    Напоминания о вебинаре за offset_minutes до начала (ставит планировщик
+    отложенной задачей к сроку). Без webinar_id - запуск по расписанию: часовое напоминание
+    всем вебинарам ближайшего часа, которым его еще не отправил планировщик.
+    Регистрации обрабатываются пачками: один запрос с пользователями и
+    вебинарами, уведомления одним INSERT, отметка одним UPDATE и один коммит
+    на пачку; письма ставятся после коммита, одна задача на чанк получателей.
+    """
+    from src.services.webinar_reminder_scheduler import describe_offset
+
+    starts_in = describe_offset(offset_minutes)
     db = SessionLocal()
+    reminder_count = 0
     try:
-        webinars = sync_webinar_repository.get_upcoming_webinars_for_reminders(db)
-        reminder_count = 0
-
-        for webinar in webinars:
-            registrations = sync_webinar_repository.get_registrations_for_reminder(db, webinar.id)
-
-            for registration in registrations:
-                try:
-                    # Создаем уведомление через синхронный сервис
-                    sync_notification_service.create_notification(
-                        db=db,
-                        user_id=registration.user_id,
-                        title="🔔 Вебинар скоро начнется",
-                        message=f"Вебинар '{webinar.title}' начинается через 1 час",
-                        notification_type="webinar_reminder",
-                        related_entity_type="webinar",
-                        related_entity_id=webinar.id,
-                        action_url=f"{settings.PLATFORM_URL}/webinars/{webinar.id}/join"
-                    )
-
-                    # Отправляем email напоминание
-                    send_webinar_reminder_email.delay(
-                        user_email=registration.user.email,
-                        username=registration.user.username,
-                        webinar_title=webinar.title,
-                        scheduled_at=webinar.scheduled_at,
-                        webinar_id=webinar.id
-                    )
-
-                    sync_webinar_repository.mark_reminder_sent(db, registration.id)
-                    reminder_count += 1
-
-                except Exception as e:
-                    logger.error(f"❌ Error processing registration {registration.id}: {e}")
-                    continue
+        while True:
+            rows = sync_webinar_repository.claim_due_reminders(
+                db, settings.WEBINAR_REMINDER_BATCH_SIZE, offset_minutes, webinar_id
+            )
+            if not rows:
+                break
+
+            sync_notification_service.create_notifications(db, [
+                {
+                    "user_id": row["user_id"],
+                    "title": "🔔 Вебинар скоро начнется",
+                    "message": f"Вебинар '{row['webinar_title']}' начинается через {starts_in}",
+                    "notification_type": "webinar_reminder",
+                    "related_entity_type": "webinar",
+                    "related_entity_id": row["webinar_id"],
+                    "action_url": f"{settings.PLATFORM_URL}/webinars/{row['webinar_id']}/join"
+                }
+                for row in rows
+            ])
+            sync_webinar_repository.mark_reminders_sent(
+                db, [row["registration_id"] for row in rows], offset_minutes
+            )
+            db.commit()
+
+            # Email напоминания: одна задача на чанк получателей
+            by_webinar = {}
+            for row in rows:
+                by_webinar.setdefault(row["webinar_id"], []).append(row)
+            for webinar_rows in by_webinar.values():
+                enqueue_webinar_reminder_emails(webinar_rows[0], starts_in, [
+                    {"email": row["email"], "context": {"username": row["username"]}} for row in webinar_rows
+                ])
+
+            reminder_count += len(rows)
 
         logger.info(f"✅ Webinar reminders sent: {reminder_count}")
         return reminder_count
@@ -132,92 +159,157 @@ def send_webinar_reminders():
     except Exception as e:
         logger.error(f"❌ Error sending webinar reminders: {e}")
         db.rollback()
-        return 0
+        return reminder_count
     finally:
         db.close()
 
 
+def enqueue_webinar_reminder_emails(webinar: dict, starts_in: str, recipients: list) -> int:
+    """Постановка email напоминаний о вебинаре (webinar - строка claim_due_reminders)"""
+    return enqueue_bulk_email(
+        "webinar_reminder.html",
+        f"🔔 Напоминание: вебинар '{webinar['webinar_title']}'",
+        recipients,
+        shared={
+            "webinar_title": webinar["webinar_title"],
+            "scheduled_at": webinar["scheduled_at"].strftime("%d.%m.%Y в %H:%M"),
+            "duration": webinar["duration"],
+            "starts_in": starts_in,
+            "webinar_url": f"{settings.PLATFORM_URL}/webinars/{webinar['webinar_id']}/join"
+        }
+    )
+
+
 @celery_app.task
-def send_webinar_reminder_email(user_email: str, username: str, webinar_title: str, scheduled_at: datetime, webinar_id: int):
-    """Email напоминание о вебинаре"""
+def dispatch_webinar_reminders():
+    """Диспетчер планировщика: подходящие сроки -> отложенные задачи напоминаний"""
+    from src.services.webinar_reminder_scheduler import webinar_reminder_scheduler
+
     try:
-        logger.info(f"📅 Sending webinar reminder to {user_email}")
+        upcoming = webinar_reminder_scheduler.pop_upcoming(limit=settings.WEBINAR_REMINDER_DISPATCH_LIMIT)
+    except Exception as e:
+        logger.error(f"❌ Error reading webinar reminder schedule: {e}")
+        return 0
+
+    for webinar_id, offset_minutes, send_at in upcoming:
+        webinar_reminder_scheduler.enqueue(webinar_id, offset_minutes, send_at)
+    if upcoming:
+        logger.info(f"⏰ Dispatched {len(upcoming)} webinar reminders")
+    return len(upcoming)
 
-        # ✅ СИНХРОННЫЙ вызов
-        success = email_service.send_email(
-            to_email=user_email,
-            subject=f"🔔 Напоминание: вебинар '{webinar_title}'",
-            html_content=template_service.render_email_template(
-                "webinar_reminder.html",
-                username=username,
-                webinar_title=webinar_title,
-                scheduled_at=scheduled_at.strftime("%d.%m.%Y в %H:%M"),
-                webinar_url=f"{settings.PLATFORM_URL}/webinars/{webinar_id}/join"
-            )
-        )
 
-        if success:
-            logger.info(f"✅ Webinar reminder sent to {user_email}")
+def enqueue_bulk_email(template_name: str, subject: str, recipients: list, shared: dict = None) -> int:
+    """Массовая рассылка: получатели делятся на чанки, на чанк - одна задача"""
+    from src.services.bulk_email_service import bulk_email_service
+
+    chunks = 0
+    for chunk in bulk_email_service.chunk(recipients):
+        send_bulk_email_chunk.delay(template_name, subject, chunk, shared)
+        chunks += 1
+    return chunks
+
+
+@celery_app.task
+def send_bulk_email_chunk(template_name: str, subject: str, recipients: list, shared: dict = None,
+                          attempt: int = 0):
+    """
+    Рендер и сборка писем чанка в пуле процессов, отправка через пул SMTP соединений.
+    Получатели с временной ошибкой SMTP уходят в новую задачу с экспоненциальной
+    задержкой, пока не исчерпаны EMAIL_BULK_MAX_RETRIES повторов.
+    """
+    from src.services.bulk_email_service import bulk_email_service
+    from src.tasks.db_operations import sync_email_queue_repository
+
+    try:
+        stats, transient = bulk_email_service.send_chunk(template_name, subject, recipients, shared)
+    except Exception as e:
+        logger.error(f"❌ Error sending bulk email chunk '{template_name}': {e}")
+        return {"sent": 0, "failed": len(recipients), "transient": 0, "retrying": 0}
+
+    stats["retrying"] = 0
+    if transient:
+        if attempt < settings.EMAIL_BULK_MAX_RETRIES:
+            delay = sync_email_queue_repository.retry_delay(attempt)
+            send_bulk_email_chunk.apply_async(
+                args=(template_name, subject, transient, shared),
+                kwargs={"attempt": attempt + 1},
+                countdown=delay.total_seconds()
+            )
+            stats["retrying"] = len(transient)
+            logger.warning(
+                f"🔁 Bulk email '{template_name}': {len(transient)} recipients retry "
+                f"in {delay.total_seconds():.0f}s (attempt {attempt + 1})"
+            )
         else:
-            logger.error(f"❌ Failed to send webinar reminder to {user_email}")
+            logger.error(f"❌ Bulk email '{template_name}': {len(transient)} recipients failed after retries")
+    return stats
 
-        return success
 
+def _send_queued_email(job: dict):
+    """Отправка письма из очереди через пул SMTP соединений: None - успех, иначе исключение"""
+    try:
+        email_service.deliver(job["email"], job["subject"], job["html_content"])
+        return None
     except Exception as e:
-        logger.error(f"❌ Error sending webinar reminder: {e}")
-        return False
+        logger.error(f"❌ Failed to send email {job['id']} to {job['email']}: {e}")
+        return e
 
 
 @celery_app.task
-def process_email_queue():
-    """Обработка очереди email"""
+def process_email_queue(fan_out: bool = True):
+    """
+    Обработка очереди email: пачки захватываются через SKIP LOCKED и
+    отправляются параллельно через пул SMTP соединений, пока очередь не
+    опустеет или не кончится бюджет времени. При глубокой очереди запуск по
+    расписанию ставит дополнительные параллельные обработчики.
+    """
+    import math
+    import time
+    from concurrent.futures import ThreadPoolExecutor
+    from src.services.email_service import is_transient_smtp_error
+    from src.tasks.db_operations import sync_email_queue_repository
+
+    batch_size = settings.EMAIL_QUEUE_BATCH_SIZE
+    claim_timeout = settings.EMAIL_QUEUE_CLAIM_TIMEOUT_SECONDS
     db = SessionLocal()
+    sent_count = failed_count = retry_count = 0
     try:
-        pending_emails = db.scalars(
-            select(models.EmailQueue).where(
-                models.EmailQueue.status == "pending"
-            ).order_by(
-                models.EmailQueue.priority.asc(),
-                models.EmailQueue.created_at.asc()
-            ).limit(10)
-        ).all()
-
-        processed_count = 0
-
-        for email_job in pending_emails:
-            try:
-                # ✅ СИНХРОННЫЙ вызов
-                success = email_service.send_email(
-                    to_email=email_job.email,
-                    subject=email_job.subject,
-                    html_content=email_job.template_data.get("message", "")
-                )
-
-                if success:
-                    email_job.status = "sent"
-                    email_job.sent_at = datetime.now()
-                    processed_count += 1
-                    logger.info(f"✅ Email sent to {email_job.email}")
-                else:
-                    email_job.status = "failed"
-                    email_job.error_message = "SMTP error"
-                    logger.error(f"❌ Failed to send email to {email_job.email}")
-
-                db.commit()
-
-            except Exception as e:
-                logger.error(f"❌ Error processing email {email_job.id}: {e}")
-                email_job.status = "failed"
-                email_job.error_message = str(e)
-                db.commit()
-
-        logger.info(f"✅ Email queue processed: {processed_count} emails")
-        return processed_count
+        if fan_out:
+            depth = sync_email_queue_repository.count_claimable(db, claim_timeout)
+            extra_workers = min(settings.EMAIL_QUEUE_MAX_PARALLEL, math.ceil(depth / batch_size)) - 1
+            for _ in range(max(extra_workers, 0)):
+                process_email_queue.delay(fan_out=False)
+            if extra_workers > 0:
+                logger.info(f"📧 Email queue depth {depth}: started {extra_workers} extra workers")
+
+        deadline = time.monotonic() + settings.EMAIL_QUEUE_TIME_BUDGET_SECONDS
+        with ThreadPoolExecutor(max_workers=settings.SMTP_POOL_SIZE) as executor:
+            while time.monotonic() < deadline:
+                jobs = sync_email_queue_repository.claim_batch(db, batch_size, claim_timeout)
+                if not jobs:
+                    break
+
+                errors = list(executor.map(_send_queued_email, jobs))
+                sent_ids = [job["id"] for job, error in zip(jobs, errors) if error is None]
+                sync_email_queue_repository.mark_sent(db, sent_ids)
+                for job, error in zip(jobs, errors):
+                    if error is None:
+                        continue
+                    if sync_email_queue_repository.mark_failed(
+                            db, job, str(error) or error.__class__.__name__, is_transient_smtp_error(error)):
+                        retry_count += 1
+                    else:
+                        failed_count += 1
+
+                sent_count += len(sent_ids)
+
+        logger.info(f"✅ Email queue processed: {sent_count} sent, {retry_count} retrying, {failed_count} failed")
+        return {"sent": sent_count, "retrying": retry_count, "failed": failed_count}
 
     except Exception as e:
         logger.error(f"❌ Error processing email queue: {e}")
         db.rollback()
-        return 0
+        return {"sent": sent_count, "retrying": retry_count, "failed": failed_count}
     finally:
         db.close()
 
@@ -229,40 +321,52 @@ def update_project_rankings():
     try:
         logger.info("🏆 Updating project rankings...")
 
-        from sqlalchemy import case, desc
+        from sqlalchemy import case
 
-        # Обновляем рейтинг проектов на основе суммы донатов
-        project_rankings = db.execute(
+        # Сумма проведенных донатов и место в рейтинге считаются в самой БД
+        # (оконная функция); проекты без донатов получают NULL и выбывают из рейтинга
+        totals = (
             select(
-                models.Project.id,
+                models.Donation.project_id,
                 func.sum(models.Donation.amount).label('total_raised')
-            ).select_from(
-                models.Project
-            ).join(
-                models.Donation,
-                models.Donation.project_id == models.Project.id
-            ).where(
-                models.Donation.status == 'completed'
-            ).group_by(
-                models.Project.id
-            ).order_by(
-                desc('total_raised')
             )
-        ).fetchall()
+            .where(models.Donation.status == 'completed')
+            .group_by(models.Donation.project_id)
+            .subquery()
+        )
+        rankings = (
+            select(
+                models.Project.id.label('project_id'),
+                func.coalesce(totals.c.total_raised, 0.0).label('total_raised'),
+                case(
+                    (totals.c.total_raised.is_(None), None),
+                    else_=func.rank().over(order_by=totals.c.total_raised.desc().nulls_last())
+                ).label('position')
+            )
+            .outerjoin(totals, totals.c.project_id == models.Project.id)
+            .subquery()
+        )
 
-        # Обновляем позиции в рейтинге
-        for rank, (project_id, total_raised) in enumerate(project_rankings, 1):
-            project = db.scalar(
-                select(models.Project).where(models.Project.id == project_id)
+        # Один UPDATE ... FROM на все проекты; строки без изменений не перезаписываются
+        rankings_changed = db.execute(
+            update(models.Project)
+            .where(
+                models.Project.id == rankings.c.project_id,
+                models.Project.ranking_position.is_distinct_from(rankings.c.position)
+                | models.Project.popularity_score.is_distinct_from(rankings.c.total_raised)
             )
-            if project:
-                project.ranking_position = rank
-                project.popularity_score = total_raised or 0
+            .values(
+                ranking_position=rankings.c.position,
+                popularity_score=rankings.c.total_raised,
+                updated_at=models.Project.updated_at  # рейтинг - не правка проекта
+            )
+            .execution_options(synchronize_session=False)
+        ).rowcount
 
         db.commit()
 
-        logger.info(f"✅ Project rankings updated: {len(project_rankings)} projects ranked")
-        return {"projects_ranked": len(project_rankings)}
+        logger.info(f"✅ Project rankings updated: {rankings_changed} projects changed position")
+        return {"rankings_changed": rankings_changed}
 
     except Exception as e:
         logger.error(f"❌ Error updating project rankings: {e}")
@@ -292,9 +396,18 @@ def cleanup_old_data():
             )
         ).rowcount
 
+        # Истекшие ключи идемпотентности
+        deleted_idempotency_keys = db.execute(
+            delete(models.IdempotencyKey).where(
+                models.IdempotencyKey.expires_at < datetime.now()
+            )
+        ).rowcount
+
         db.commit()
-        logger.info(f"✅ Cleanup completed: {deleted_notifications} notifications, {deleted_emails} emails")
-        return {"notifications": deleted_notifications, "emails": deleted_emails}
+        logger.info(f"✅ Cleanup completed: {deleted_notifications} notifications, {deleted_emails} emails, "
+                    f"{deleted_idempotency_keys} idempotency keys")
+        return {"notifications": deleted_notifications, "emails": deleted_emails,
+                "idempotency_keys": deleted_idempotency_keys}
 
     except Exception as e:
         logger.error(f"❌ Error cleaning up old data: {e}")
@@ -305,111 +418,328 @@ def cleanup_old_data():
 
 
 @celery_app.task
-def update_project_statistics():
-    """Обновление статистики проектов на основе донатов"""
+def cleanup_media_blobs():
+    """Сборка мусора в контентно-адресуемом хранилище медиа"""
     db = SessionLocal()
     try:
-        logger.info("📊 Updating project statistics from donations...")
-
-        # 1. Сумма донатов по каждому проекту
-        from sqlalchemy import func, desc
+        # 1. Пересчитываем счетчики ссылок по фактическим медиа записям
+        #    (записи могли удалиться каскадно вместе с проектом или постом)
+        project_refs = select(func.count(models.ProjectMedia.id)).where(
+            models.ProjectMedia.file_url == models.MediaBlob.file_url
+        ).scalar_subquery()
+        post_refs = select(func.count(models.PostMedia.id)).where(
+            models.PostMedia.file_url == models.MediaBlob.file_url
+        ).scalar_subquery()
+        db.execute(
+            update(models.MediaBlob).values(ref_count=project_refs + post_refs)
+        )
+        db.commit()
 
-        project_stats = db.execute(
-            select(
-                models.Donation.project_id,
-                func.count(models.Donation.id).label('donations_count'),
-                func.sum(models.Donation.amount).label('total_raised'),
-                func.avg(models.Donation.amount).label('avg_donation'),
-                func.max(models.Donation.amount).label('max_donation')
-            ).where(
-                models.Donation.status == 'completed'
-            ).group_by(
-                models.Donation.project_id
-            ).order_by(
-                desc('total_raised')  # Сортировка по сумме донатов (от большего к меньшему)
+        # 2. Удаляем блобы без ссылок, пережившие грейс-период загрузки. Условие
+        #    проверяется в самом DELETE: блоб, который успели переиспользовать
+        #    после пересчета, не удаляется. Файлы удаляются до коммита, пока
+        #    DELETE держит блокировки строк: параллельный acquire того же SHA-256
+        #    ждет коммита и уже не находит запись, поэтому загрузка кладет свой
+        #    файл заново после удаления старого, а не перед ним
+        grace_threshold = datetime.now() - timedelta(minutes=settings.MEDIA_BLOB_GC_GRACE_MINUTES)
+        orphan_blobs = db.execute(
+            delete(models.MediaBlob)
+            .where(
+                models.MediaBlob.ref_count <= 0,
+                models.MediaBlob.last_referenced_at < grace_threshold
             )
-        ).fetchall()
+            .returning(models.MediaBlob.storage_key, models.MediaBlob.file_size)
+        ).all()
 
-        updated_count = 0
+        removed_bytes = 0
+        for storage_key, file_size in orphan_blobs:
+            try:
+                os.remove(os.path.join(settings.MEDIA_ROOT, storage_key))
+            except FileNotFoundError:
+                pass
+            removed_bytes += file_size or 0
+        db.commit()
 
-        for stat in project_stats:
-            project_id, donations_count, total_raised, avg_donation, max_donation = stat
+        # 3. Временные файлы брошенных возобновляемых загрузок (сессия в Redis уже истекла)
+        uploads_dir = os.path.join(settings.MEDIA_ROOT, "uploads")
+        stale_threshold = datetime.now().timestamp() - settings.UPLOAD_SESSION_TTL_SECONDS
+        if os.path.isdir(uploads_dir):
+            for entry in os.scandir(uploads_dir):
+                if entry.is_file() and entry.stat().st_mtime < stale_threshold:
+                    removed_bytes += entry.stat().st_size
+                    os.remove(entry.path)
 
-            # Находим проект
-            project = db.scalar(
-                select(models.Project).where(models.Project.id == project_id)
-            )
+        logger.info(f"✅ Media GC completed: {len(orphan_blobs)} blobs, {removed_bytes} bytes freed")
+        return {"blobs_removed": len(orphan_blobs), "bytes_freed": removed_bytes}
 
-            if project:
-                # Обновляем статистику проекта
-                project.total_raised = total_raised or 0
-                project.donations_count = donations_count or 0
-                project.avg_donation = avg_donation or 0
-                project.max_donation = max_donation or 0
-
-                # Обновляем процент завершения если есть цель
-                if project.goal_amount and project.goal_amount > 0:
-                    project.completion_percentage = min(
-                        round((total_raised / project.goal_amount) * 100, 2),
-                        100.0
-                    )
-
-                updated_count += 1
-
-        # 2. Топ донаты за последние 24 часа
-        twenty_four_hours_ago = datetime.now() - timedelta(hours=24)
-        recent_large_donations = db.scalars(
-            select(models.Donation).where(
-                models.Donation.status == 'completed',
-                models.Donation.created_at >= twenty_four_hours_ago,
-                models.Donation.amount >= 1000  # Крупные донаты (от 1000)
-            ).order_by(
-                desc(models.Donation.amount)
-            ).limit(10)
-        ).all()
+    except Exception as e:
+        logger.error(f"❌ Error cleaning up media blobs: {e}")
+        db.rollback()
+        return {"blobs_removed": 0, "bytes_freed": 0}
+    finally:
+        db.close()
 
-        # Логируем крупные донаты
-        for donation in recent_large_donations:
-            logger.info(f"💰 Large donation: {donation.amount} to project {donation.project_id}")
 
-        # 3. Статистика по методам оплаты
-        payment_methods_stats = db.execute(
-            select(
-                models.Donation.payment_method,
-                func.count(models.Donation.id).label('count'),
-                func.sum(models.Donation.amount).label('total')
-            ).where(
-                models.Donation.status == 'completed'
-            ).group_by(
-                models.Donation.payment_method
-            )
-        ).fetchall()
+@celery_app.task
+def update_project_statistics():
+    """Инкрементальное обновление статистики проектов по измененным донатам"""
+    from src.database.postgres import AsyncSessionFactory
+    from src.services.donation_stats_service import donation_stats_service
+
+    async def refresh():
+        async with AsyncSessionFactory() as db:
+            return await donation_stats_service.refresh_project_statistics(db)
+
+    try:
+        stats = run_async(refresh())
+    except Exception as e:
+        logger.error(f"❌ Error updating project statistics: {e}")
+        return False
+
+    if stats["watermark"]:
+        stats["watermark"] = stats["watermark"].isoformat()
+    return stats
+
+
+# ========== МЕДИА ЗАДАЧИ ==========
+
+MEDIA_MODELS = {
+    "project": models.ProjectMedia,
+    "post": models.PostMedia,
+}
 
-        # Логируем статистику по методам оплаты
-        for method_stat in payment_methods_stats:
-            method, count, total = method_stat
-            logger.info(f"💳 Payment method {method}: {count} donations, total {total}")
 
+@celery_app.task
+def generate_media_derivatives(media_id: int, media_kind: str = "project"):
+    """Генерация превью и адаптивных вариантов изображения в пуле процессов"""
+    from src.services.media_service import media_service
+    from src.utils.image_utils import build_image_variants, get_media_process_pool
+
+    db = SessionLocal()
+    try:
+        media = db.get(MEDIA_MODELS[media_kind], media_id)
+        if not media or media.file_type not in (MediaType.IMAGE, MediaType.GIF):
+            return False
+
+        source_path = media_service.url_to_path(media.file_url)
+        if not source_path or not os.path.exists(source_path):
+            logger.warning(f"⚠️ Media source not found for {media_kind} media {media_id}")
+            return False
+
+        # Производные файлы общие для всех записей с тем же содержимым
+        derivatives_key = media_service.get_derivatives_key(media.file_url)
+        output_dir = os.path.join(media_service.media_root, derivatives_key)
+        variant_files = get_media_process_pool().submit(
+            build_image_variants, source_path, output_dir
+        ).result()
+
+        derivatives_url = media_service.get_blob_url(derivatives_key)
+        variants = {
+            name: {ext: f"{derivatives_url}/{filename}" for ext, filename in formats.items()}
+            for name, formats in variant_files.items()
+        }
+        thumbnail_url = variants["thumb"]["webp"]
+
+        # Обновляем одним запросом все медиа записи, ссылающиеся на этот файл
+        for media_model in MEDIA_MODELS.values():
+            db.execute(
+                update(media_model)
+                .where(media_model.file_url == media.file_url)
+                .values(thumbnail_url=thumbnail_url, variants=variants)
+            )
+        db.execute(
+            update(models.Post)
+            .where(models.Post.media_url == media.file_url, models.Post.media_thumbnail.is_(None))
+            .values(media_thumbnail=thumbnail_url)
+        )
         db.commit()
 
-        logger.info(f"✅ Project statistics updated: {updated_count} projects, "
-                    f"{len(recent_large_donations)} large donations in 24h, "
-                    f"{len(payment_methods_stats)} payment methods")
+        logger.info(f"🖼️ Media derivatives generated for {media_kind} media {media_id}: {list(variants)}")
+        return variants
 
-        return {
-            "projects_updated": updated_count,
-            "large_donations_24h": len(recent_large_donations),
-            "payment_methods": len(payment_methods_stats)
+    except Exception as e:
+        logger.error(f"❌ Error generating media derivatives: {e}")
+        db.rollback()
+        return False
+    finally:
+        db.close()
+
+
+@celery_app.task
+def process_video_media(media_id: int, media_kind: str = "project"):
+    """Пробинг, постер и HLS нарезка загруженного видео"""
+    from src.services.media_service import media_service
+    from src.utils import video_utils
+
+    db = SessionLocal()
+    try:
+        media = db.get(MEDIA_MODELS[media_kind], media_id)
+        if not media or media.file_type != MediaType.VIDEO:
+            return False
+
+        if not video_utils.ffmpeg_available():
+            logger.warning("⚠️ ffmpeg not found, video processing skipped")
+            return False
+
+        source_path = media_service.url_to_path(media.file_url)
+        if not source_path or not os.path.exists(source_path):
+            logger.warning(f"⚠️ Video source not found for {media_kind} media {media_id}")
+            return False
+
+        # Результаты лежат рядом с остальными производными этого содержимого
+        derivatives_key = media_service.get_derivatives_key(media.file_url)
+        output_dir = os.path.join(media_service.media_root, derivatives_key)
+        derivatives_url = media_service.get_blob_url(derivatives_key)
+        os.makedirs(output_dir, exist_ok=True)
+
+        probe = video_utils.probe_video(source_path)
+        poster_at = min(1.0, (probe["duration"] or 0) / 2)
+        video_utils.extract_poster_frame(source_path, os.path.join(output_dir, "poster.jpg"), poster_at)
+        video_utils.build_hls_renditions(source_path, os.path.join(output_dir, "hls"), probe)
+
+        poster_url = f"{derivatives_url}/poster.jpg"
+        variants = {
+            "poster": {"jpg": poster_url},
+            "hls": {"m3u8": f"{derivatives_url}/hls/master.m3u8"},
+            "source": {
+                key: str(value) for key, value in probe.items() if value is not None
+            },
         }
 
+        for media_model in MEDIA_MODELS.values():
+            db.execute(
+                update(media_model)
+                .where(media_model.file_url == media.file_url)
+                .values(duration=probe["duration"], thumbnail_url=poster_url, variants=variants)
+            )
+        db.execute(
+            update(models.Project)
+            .where(models.Project.video_url == media.file_url)
+            .values(video_duration=probe["duration"], video_thumbnail=poster_url)
+        )
+        db.execute(
+            update(models.Post)
+            .where(models.Post.media_url == media.file_url)
+            .values(media_duration=probe["duration"], media_thumbnail=poster_url)
+        )
+        db.commit()
+
+        logger.info(f"🎬 Video processed for {media_kind} media {media_id}: {probe}")
+        return variants
+
     except Exception as e:
-        logger.error(f"❌ Error updating project statistics: {e}")
+        logger.error(f"❌ Error processing video media: {e}")
         db.rollback()
         return False
     finally:
         db.close()
 
 
+# ========== ПЛАТЕЖИ ==========
+
+@celery_app.task
+def process_webhook_inbox():
+    """Обработка входящего ящика вебхуков Stripe (общий async путь проведения платежей)"""
+    from src.database.postgres import AsyncSessionFactory
+    from src.services.payment_service import payment_service
+
+    async def process():
+        await ensure_async_redis()  # рейтинги обновляются при проведении донатов
+        async with AsyncSessionFactory() as db:
+            return await payment_service.process_webhook_inbox(db)
+
+    try:
+        return run_async(process())
+    except Exception as e:
+        logger.error(f"❌ Error processing webhook inbox: {e}")
+        return {"processed": 0, "failed": 0}
+
+
+@celery_app.task
+def replay_failed_webhooks(event_ids: list = None):
+    """Повторная обработка упавших вебхуков Stripe (все или указанные evt_ id)"""
+    from src.database.postgres import AsyncSessionFactory
+    from src.services.payment_service import payment_service
+
+    async def replay():
+        async with AsyncSessionFactory() as db:
+            return await payment_service.replay_failed_webhooks(db, event_ids)
+
+    try:
+        return run_async(replay())
+    except Exception as e:
+        logger.error(f"❌ Error replaying failed webhooks: {e}")
+        return 0
+
+
+@celery_app.task
+def reconcile_pending_payments():
+    """Сверка зависших pending платежей со Stripe, метрики расхождений - в Redis"""
+    from src.database.postgres import AsyncSessionFactory
+    from src.services.payment_service import payment_service, RECONCILIATION_METRICS_KEY
+
+    async def reconcile():
+        await ensure_async_redis()
+        async with AsyncSessionFactory() as db:
+            return await payment_service.reconcile_pending_transactions(db)
+
+    try:
+        metrics = run_async(reconcile())
+    except Exception as e:
+        logger.error(f"❌ Error reconciling pending payments: {e}")
+        return False
+
+    try:
+        import redis
+        import json
+
+        r = redis.Redis(host=settings.REDIS_HOST, port=settings.REDIS_PORT, db=settings.REDIS_DB)
+        r.set(RECONCILIATION_METRICS_KEY, json.dumps(metrics))
+    except Exception as e:
+        logger.warning(f"⚠️ Failed to export reconciliation metrics: {e}")
+
+    return metrics
+
+
+@celery_app.task
+def update_donation_rollups():
+    """Инкрементальное обновление часовых и суточных агрегатов донатов проектов"""
+    from src.database.postgres import AsyncSessionFactory
+    from src.services.donation_stats_service import donation_stats_service
+
+    async def refresh():
+        async with AsyncSessionFactory() as db:
+            return await donation_stats_service.refresh_rollups(db)
+
+    try:
+        stats = run_async(refresh())
+    except Exception as e:
+        logger.error(f"❌ Error updating donation rollups: {e}")
+        return False
+
+    if stats["watermark"]:
+        stats["watermark"] = stats["watermark"].isoformat()
+    return stats
+
+
+@celery_app.task
+def rebuild_leaderboards():
+    """Пересборка рейтингов проектов, доноров и авторов в Redis из PostgreSQL"""
+    from src.database.postgres import AsyncSessionFactory
+    from src.services.leaderboard_service import leaderboard_service
+
+    async def rebuild():
+        await ensure_async_redis()
+        async with AsyncSessionFactory() as db:
+            return await leaderboard_service.rebuild(db)
+
+    try:
+        return run_async(rebuild())
+    except Exception as e:
+        logger.error(f"❌ Error rebuilding leaderboards: {e}")
+        return False
+
+
 # ========== УВЕДОМЛЕНИЯ Websocket ==========
 
 @celery_app.task
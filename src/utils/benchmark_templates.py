@@ -0,0 +1,51 @@
+"""
+Бенчмарк рендера email шаблонов: N писем по одному через
+render_email_template против пакетного render_many
+"""
+import argparse
+import time
+
+from src.services.template_service import template_service
+
+
+def make_contexts(count: int):
+    return [
+        {
+            "username": f"user{i}",
+            "webinar_title": "Как запустить краудфандинговый проект",
+            "scheduled_at": "19.10.2026 18:00",
+            "duration": 90,
+        }
+        for i in range(count)
+    ]
+
+
+def run(template_name: str, count: int):
+    contexts = make_contexts(count)
+
+    started_at = time.perf_counter()
+    template_service.preload_email_templates()
+    preload_seconds = time.perf_counter() - started_at
+
+    started_at = time.perf_counter()
+    for context in contexts:
+        template_service.render_email_template(template_name, **context)
+    single_seconds = time.perf_counter() - started_at
+
+    started_at = time.perf_counter()
+    template_service.render_many(template_name, contexts)
+    batch_seconds = time.perf_counter() - started_at
+
+    print(f"📊 {template_name}, {count} писем")
+    print(f"   предзагрузка шаблонов:  {preload_seconds * 1000:.1f} ms")
+    print(f"   render_email_template:  {single_seconds:.3f} s ({count / single_seconds:.0f} писем/с)")
+    print(f"   render_many:            {batch_seconds:.3f} s ({count / batch_seconds:.0f} писем/с)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Бенчмарк рендера email шаблонов")
+    parser.add_argument('--template', default='webinar_reminder.html', help='Шаблон из templates/emails')
+    parser.add_argument('--count', type=int, default=10000, help='Количество писем')
+
+    args = parser.parse_args()
+    run(args.template, args.count)
@@ -1,7 +1,10 @@
 # src/utils/file_utils.py
+import hashlib
+import mimetypes
 import os
+import re
 import aiofiles
-from typing import Tuple
+from typing import NamedTuple, Optional, Tuple
 from fastapi import UploadFile, HTTPException
 from starlette import status
 
@@ -32,6 +35,11 @@ SUPPORTED_MIME_TYPES = {
     'text/plain': MediaType.DOCUMENT,
 }
 
+# Контентно-адресуемый ключ блоба: blobs/{ab}/{cd}/{sha256}{ext}
+BLOB_EXTENSION = r"\.[a-z0-9]{1,10}"
+BLOB_EXTENSION_PATTERN = re.compile(rf"^{BLOB_EXTENSION}$")
+BLOB_KEY_PATTERN = re.compile(rf"^blobs/[0-9a-f]{{2}}/[0-9a-f]{{2}}/([0-9a-f]{{64}})({BLOB_EXTENSION})?$")
+
 # Расширения файлов как fallback
 EXTENSION_TO_MEDIA_TYPE = {
     '.jpg': MediaType.IMAGE,
@@ -64,34 +72,150 @@ MAX_FILE_SIZES = {
     MediaType.OTHER: 5 * 1024 * 1024,       # 5MB
 }
 
+# Размер чанка при потоковом чтении загрузки
+UPLOAD_CHUNK_SIZE = 1024 * 1024  # 1MB
+
+# Сигнатуры файлов (magic bytes) для определения типа по первым байтам
+MAGIC_SIGNATURES = (
+    (b'\xff\xd8\xff', 'image/jpeg'),
+    (b'\x89PNG\r\n\x1a\n', 'image/png'),
+    (b'GIF87a', 'image/gif'),
+    (b'GIF89a', 'image/gif'),
+    (b'%PDF-', 'application/pdf'),
+    (b'\x1aE\xdf\xa3', 'video/webm'),
+    (b'ID3', 'audio/mpeg'),
+    (b'\xff\xfb', 'audio/mpeg'),
+    (b'\xff\xf3', 'audio/mpeg'),
+    (b'\xff\xf2', 'audio/mpeg'),
+    (b'OggS', 'audio/ogg'),
+    (b'\x00\x00\x01\xba', 'video/mpeg'),
+    (b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1', 'application/msword'),
+)
+
+# Сигнатуры внутри RIFF контейнера (байты 8-12)
+RIFF_SUBTYPES = {
+    b'WEBP': 'image/webp',
+    b'WAVE': 'audio/wav',
+    b'AVI ': 'video/x-msvideo',
+}
+
+# Бренды ISO BMFF контейнера (байты 8-12 после "ftyp"). Неизвестный бренд
+# не считается видео: в том же контейнере лежат HEIF/AVIF изображения и др.
+FTYP_BRANDS = {
+    b'isom': 'video/mp4',
+    b'iso2': 'video/mp4',
+    b'iso4': 'video/mp4',
+    b'iso5': 'video/mp4',
+    b'iso6': 'video/mp4',
+    b'mp41': 'video/mp4',
+    b'mp42': 'video/mp4',
+    b'avc1': 'video/mp4',
+    b'dash': 'video/mp4',
+    b'mmp4': 'video/mp4',
+    b'MSNV': 'video/mp4',
+    b'M4V ': 'video/mp4',
+    b'qt  ': 'video/quicktime',
+    b'M4A ': 'audio/mp4',
+    b'M4B ': 'audio/mp4',
+    # Изображения HEIF/AVIF распознаются, но не поддерживаются
+    b'heic': 'image/heic',
+    b'heix': 'image/heic',
+    b'mif1': 'image/heif',
+    b'msf1': 'image/heif',
+    b'avif': 'image/avif',
+    b'avis': 'image/avif',
+}
+
+
+class UploadResult(NamedTuple):
+    """Результат потокового сохранения загрузки"""
+    media_type: MediaType
+    mime_type: str
+    file_size: int
+    sha256: str
+
+
 def get_media_type_from_extension(filename: str) -> MediaType:
     """Определение типа медиа по расширению файла"""
     ext = os.path.splitext(filename)[1].lower()
     return EXTENSION_TO_MEDIA_TYPE.get(ext, MediaType.OTHER)
 
-async def validate_and_get_media_type(file: UploadFile) -> Tuple[MediaType, str]:
-    """Упрощенная валидация файла по расширению без python-magic"""
 
-    contents = await file.read()
-    await file.seek(0)
+def sniff_mime_type(head: bytes) -> Optional[str]:
+    """Определение MIME типа по первым байтам файла"""
+    if head[:4] == b'RIFF' and len(head) >= 12:
+        return RIFF_SUBTYPES.get(head[8:12])
+
+    if head[4:8] == b'ftyp':
+        return FTYP_BRANDS.get(head[8:12])
+
+    for signature, mime_type in MAGIC_SIGNATURES:
+        if head.startswith(signature):
+            return mime_type
+
+    stripped = head.lstrip()
+    if stripped.startswith(b'<svg') or (stripped.startswith(b'<?xml') and b'<svg' in head):
+        return 'image/svg+xml'
+
+    return None
+
+
+def resolve_media_type(filename: str, head: bytes) -> Tuple[MediaType, str]:
+    """Определение типа медиа по сигнатуре, с расширением файла как fallback"""
+    extension_type = get_media_type_from_extension(filename)
+    sniffed_mime = sniff_mime_type(head)
+
+    if sniffed_mime:
+        if sniffed_mime not in SUPPORTED_MIME_TYPES:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Формат файла не поддерживается: {sniffed_mime}"
+            )
+        return SUPPORTED_MIME_TYPES[sniffed_mime], sniffed_mime
+
+    # Сигнатура не распознана - доверяем расширению только для текстовых/офисных форматов
+    if extension_type in (MediaType.DOCUMENT, MediaType.OTHER):
+        guessed_mime = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+        return extension_type, guessed_mime
+
+    raise HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail=f"Содержимое файла не соответствует формату: {filename}"
+    )
+
+
+def get_max_file_size(media_type: MediaType) -> int:
+    """Максимальный размер файла для типа медиа"""
+    return MAX_FILE_SIZES.get(media_type, 5 * 1024 * 1024)
+
 
-    media_type = get_media_type_from_extension(file.filename)
+def _raise_too_large(max_size: int):
+    raise HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail=f"Файл слишком большой. Максимальный размер: {max_size // 1024 // 1024}MB"
+    )
 
-    if not media_type:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Неподдерживаемый формат файла: {file.filename}"
-        )
 
-    # Проверка размера файла
-    max_size = MAX_FILE_SIZES.get(media_type, 5 * 1024 * 1024)
-    if len(contents) > max_size:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Файл слишком большой. Максимальный размер: {max_size // 1024 // 1024}MB"
-        )
+def _check_declared_size(file: UploadFile, media_type: MediaType) -> int:
+    """Лимит размера для типа; размер известен заранее, если multipart парсер уже сохранил файл"""
+    max_size = get_max_file_size(media_type)
+    if file.size is not None and file.size > max_size:
+        _raise_too_large(max_size)
+    return max_size
 
-    return media_type, f"determined/from-extension-{media_type.value}"
+
+async def validate_and_get_media_type(file: UploadFile) -> Tuple[MediaType, str]:
+    """
+    Валидация файла по первым байтам без чтения всего содержимого в память.
+    Для сохранения в хранилище не нужна: stream_upload_to_disk проверяет тот
+    же первый чанк и возвращает тип в UploadResult.
+    """
+    head = await file.read(UPLOAD_CHUNK_SIZE)
+    await file.seek(0)
+
+    media_type, mime_type = resolve_media_type(file.filename, head)
+    _check_declared_size(file, media_type)
+    return media_type, mime_type
 
 
 def generate_file_path(project_id: int, media_type: MediaType, filename: str) -> str:
@@ -106,12 +230,93 @@ def generate_file_path(project_id: int, media_type: MediaType, filename: str) ->
     return f"media/projects/{project_id}/{media_type.value}/{unique_filename}"
 
 
+def generate_blob_key(sha256: str, filename: str) -> str:
+    """Генерация контентно-адресуемого ключа хранения"""
+    ext = os.path.splitext(filename)[1].lower()
+    # Расширение, которое не примет parse_blob_key (.tar_gz, .jpeg~, слишком длинное), не сохраняем
+    if not BLOB_EXTENSION_PATTERN.match(ext):
+        ext = ""
+
+    # Структура папок: blobs/{ab}/{cd}/{sha256}{ext} - шардирование по префиксу хеша
+    return f"blobs/{sha256[:2]}/{sha256[2:4]}/{sha256}{ext}"
+
+
+def parse_blob_key(storage_key: str) -> Optional[str]:
+    """SHA-256 из контентно-адресуемого ключа (None, если ключ не из хранилища блобов)"""
+    match = BLOB_KEY_PATTERN.match(storage_key)
+    if not match or storage_key[6:8] != match.group(1)[:2] or storage_key[9:11] != match.group(1)[2:4]:
+        return None
+    return match.group(1)
+
+
+def inspect_stored_file(file_path: str, filename: str) -> UploadResult:
+    """
+    Проверка уже записанного на диск файла: тип по сигнатуре, лимит размера и хеш.
+
+    Синхронная функция - для файлов, собранных из чанков; вызывать через
+    asyncio.to_thread, чтобы не блокировать event loop.
+    """
+    hasher = hashlib.sha256()
+    file_size = 0
+
+    with open(file_path, 'rb') as f:
+        chunk = f.read(UPLOAD_CHUNK_SIZE)
+        media_type, mime_type = resolve_media_type(filename, chunk)
+        max_size = get_max_file_size(media_type)
+
+        while chunk:
+            file_size += len(chunk)
+            if file_size > max_size:
+                _raise_too_large(max_size)
+            hasher.update(chunk)
+            chunk = f.read(UPLOAD_CHUNK_SIZE)
+
+    return UploadResult(media_type, mime_type, file_size, hasher.hexdigest())
+
+
 async def save_uploaded_file(file: UploadFile, file_path: str) -> int:
     """Сохранение загруженного файла"""
-    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+    result = await stream_upload_to_disk(file, file_path)
+    return result.file_size
+
+
+async def stream_upload_to_disk(file: UploadFile, file_path: str) -> UploadResult:
+    """
+    Потоковое сохранение загрузки чанками.
+
+    Тип определяется по первым байтам (один раз - результат возвращается
+    вызывающему), лимит размера проверяется до записи по известному размеру и
+    на каждом чанке, содержимое хешируется по ходу записи. Файл пишется во временный
+    файл рядом с целевым и атомарно переименовывается только после успешной
+    проверки, так что в памяти одновременно находится не больше одного чанка.
+    """
+    directory = os.path.dirname(file_path)
+    os.makedirs(directory, exist_ok=True)
+
+    await file.seek(0)
+    chunk = await file.read(UPLOAD_CHUNK_SIZE)
+    media_type, mime_type = resolve_media_type(file.filename, chunk)
+    max_size = _check_declared_size(file, media_type)
+
+    hasher = hashlib.sha256()
+    file_size = 0
+    temp_path = os.path.join(directory, f".{os.path.basename(file_path)}.part")
+
+    try:
+        async with aiofiles.open(temp_path, 'wb') as f:
+            while chunk:
+                file_size += len(chunk)
+                if file_size > max_size:
+                    _raise_too_large(max_size)
+
+                hasher.update(chunk)
+                await f.write(chunk)
+                chunk = await file.read(UPLOAD_CHUNK_SIZE)
 
-    async with aiofiles.open(file_path, 'wb') as f:
-        content = await file.read()
-        await f.write(content)
+        os.replace(temp_path, file_path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
 
-    return len(content)
\ No newline at end of file
+    return UploadResult(media_type, mime_type, file_size, hasher.hexdigest())
@@ -0,0 +1,93 @@
+# src/utils/image_utils.py
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional
+
+from src.config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+try:
+    from PIL import Image, ImageOps
+
+    PIL_AVAILABLE = True
+except ImportError:
+    logger.warning("Pillow not available, media derivatives are disabled")
+    PIL_AVAILABLE = False
+
+# Ширины адаптивных вариантов (больше оригинала не увеличиваем)
+RESPONSIVE_WIDTHS = (320, 640, 1280)
+
+# Квадратное превью для списков
+THUMBNAIL_SIZE = 320
+
+# Форматы вариантов: расширение -> (формат Pillow, параметры сохранения)
+VARIANT_FORMATS = {
+    "webp": ("WEBP", {"quality": 80, "method": 4}),
+    "jpg": ("JPEG", {"quality": 82, "optimize": True, "progressive": True}),
+}
+
+_process_pool: Optional[ProcessPoolExecutor] = None
+
+
+def get_media_process_pool() -> ProcessPoolExecutor:
+    """Пул процессов для CPU-нагруженной обработки медиа (создается лениво)"""
+    global _process_pool
+    if _process_pool is None:
+        _process_pool = ProcessPoolExecutor(max_workers=settings.MEDIA_PROCESS_WORKERS)
+    return _process_pool
+
+
+def _save_variant(image, output_dir: str, name: str) -> Dict[str, str]:
+    """Сохранение одного варианта во всех форматах"""
+    saved = {}
+    for ext, (pil_format, options) in VARIANT_FORMATS.items():
+        variant = image
+        if pil_format == "JPEG" and variant.mode not in ("RGB", "L"):
+            variant = variant.convert("RGB")
+
+        filename = f"{name}.{ext}"
+        temp_path = os.path.join(output_dir, f".{filename}.part")
+        variant.save(temp_path, pil_format, **options)
+        os.replace(temp_path, os.path.join(output_dir, filename))
+        saved[ext] = filename
+    return saved
+
+
+def build_image_variants(source_path: str, output_dir: str) -> Dict[str, Dict[str, str]]:
+    """
+    Генерация превью и адаптивных вариантов изображения.
+
+    Выполняется в пуле процессов, поэтому функция модульная и принимает
+    только пути. Возвращает имена файлов относительно output_dir:
+    {"thumb": {"webp": "thumb.webp", "jpg": "thumb.jpg"}, "640w": {...}}
+    """
+    if not PIL_AVAILABLE:
+        raise RuntimeError("Pillow is not installed")
+
+    os.makedirs(output_dir, exist_ok=True)
+
+    with Image.open(source_path) as original:
+        # Для GIF берем первый кадр
+        original.seek(0)
+        image = ImageOps.exif_transpose(original)
+        if image.mode not in ("RGB", "RGBA", "L"):
+            image = image.convert("RGBA" if "transparency" in image.info else "RGB")
+
+        variants = {
+            "thumb": _save_variant(
+                ImageOps.fit(image, (THUMBNAIL_SIZE, THUMBNAIL_SIZE), Image.Resampling.LANCZOS),
+                output_dir,
+                "thumb"
+            )
+        }
+
+        for width in RESPONSIVE_WIDTHS:
+            if width >= image.width:
+                break
+            height = round(image.height * width / image.width)
+            resized = image.resize((width, height), Image.Resampling.LANCZOS)
+            variants[f"{width}w"] = _save_variant(resized, output_dir, f"{width}w")
+
+    return variants
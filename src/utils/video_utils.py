@@ -0,0 +1,152 @@
+# src/utils/video_utils.py
+import json
+import logging
+import os
+import shutil
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Профили HLS: (имя, высота кадра, битрейт видео, битрейт аудио)
+HLS_RENDITIONS: Tuple[Tuple[str, int, str, str], ...] = (
+    ("360p", 360, "800k", "96k"),
+    ("720p", 720, "2800k", "128k"),
+)
+
+HLS_SEGMENT_SECONDS = 6
+
+# Ограничение числа одновременно работающих процессов ffmpeg на воркер
+_ffmpeg_slots = threading.BoundedSemaphore(settings.FFMPEG_MAX_PROCESSES)
+
+
+def ffmpeg_available() -> bool:
+    """Проверка наличия ffmpeg и ffprobe"""
+    return bool(shutil.which(settings.FFMPEG_BIN) and shutil.which(settings.FFPROBE_BIN))
+
+
+def _run(args: List[str], timeout: int) -> subprocess.CompletedProcess:
+    """Запуск ffmpeg/ffprobe с учетом лимита одновременных процессов"""
+    with _ffmpeg_slots:
+        return subprocess.run(args, capture_output=True, timeout=timeout, check=True)
+
+
+def parse_probe_output(raw: str) -> Dict[str, Any]:
+    """Разбор JSON вывода ffprobe"""
+    data = json.loads(raw)
+    streams = data.get("streams", [])
+    video = next((s for s in streams if s.get("codec_type") == "video"), {})
+    audio = next((s for s in streams if s.get("codec_type") == "audio"), {})
+
+    duration = data.get("format", {}).get("duration") or video.get("duration")
+
+    return {
+        "duration": round(float(duration)) if duration else None,
+        "video_codec": video.get("codec_name"),
+        "audio_codec": audio.get("codec_name"),
+        "width": video.get("width"),
+        "height": video.get("height"),
+    }
+
+
+def probe_video(source_path: str) -> Dict[str, Any]:
+    """Длительность, кодеки и размер кадра видео"""
+    result = _run(
+        [
+            settings.FFPROBE_BIN, "-v", "error",
+            "-print_format", "json", "-show_format", "-show_streams",
+            source_path,
+        ],
+        timeout=60,
+    )
+    return parse_probe_output(result.stdout.decode())
+
+
+def extract_poster_frame(source_path: str, output_path: str, at_seconds: float) -> str:
+    """Извлечение кадра-постера в JPEG"""
+    temp_path = f"{output_path}.part.jpg"
+    _run(
+        [
+            settings.FFMPEG_BIN, "-y", "-v", "error",
+            "-ss", f"{at_seconds:.2f}", "-i", source_path,
+            "-frames:v", "1", "-q:v", "3", temp_path,
+        ],
+        timeout=120,
+    )
+    os.replace(temp_path, output_path)
+    return output_path
+
+
+def select_renditions(source_height: Optional[int]) -> List[Tuple[str, int, str, str]]:
+    """Профили не выше исходного разрешения (минимум один)"""
+    if not source_height:
+        return list(HLS_RENDITIONS[:1])
+    selected = [r for r in HLS_RENDITIONS if r[1] <= source_height]
+    return selected or list(HLS_RENDITIONS[:1])
+
+
+def build_master_playlist(renditions: List[Tuple[str, int, str, str]], probe: Dict[str, Any]) -> str:
+    """Мастер-плейлист HLS со всеми профилями"""
+    lines = ["#EXTM3U", "#EXT-X-VERSION:3"]
+    for name, height, video_bitrate, audio_bitrate in renditions:
+        bandwidth = (int(video_bitrate.rstrip("k")) + int(audio_bitrate.rstrip("k"))) * 1000
+        stream_info = f"#EXT-X-STREAM-INF:BANDWIDTH={bandwidth}"
+        if probe.get("width") and probe.get("height"):
+            width = round(probe["width"] * height / probe["height"] / 2) * 2
+            stream_info += f",RESOLUTION={width}x{height}"
+        lines.append(stream_info)
+        lines.append(f"{name}/index.m3u8")
+    return "\n".join(lines) + "\n"
+
+
+def _encode_rendition(source_path: str, output_dir: str, rendition: Tuple[str, int, str, str],
+                      has_audio: bool) -> None:
+    name, height, video_bitrate, audio_bitrate = rendition
+    rendition_dir = os.path.join(output_dir, name)
+    os.makedirs(rendition_dir, exist_ok=True)
+
+    args = [
+        settings.FFMPEG_BIN, "-y", "-v", "error", "-i", source_path,
+        "-vf", f"scale=-2:{height}",
+        "-c:v", "libx264", "-preset", "veryfast", "-profile:v", "main",
+        "-b:v", video_bitrate, "-maxrate", video_bitrate, "-bufsize", video_bitrate,
+        "-g", str(HLS_SEGMENT_SECONDS * 30), "-sc_threshold", "0",
+    ]
+    args += ["-c:a", "aac", "-b:a", audio_bitrate] if has_audio else ["-an"]
+    args += [
+        "-f", "hls", "-hls_time", str(HLS_SEGMENT_SECONDS), "-hls_playlist_type", "vod",
+        "-hls_segment_filename", os.path.join(rendition_dir, "segment_%04d.ts"),
+        os.path.join(rendition_dir, "index.m3u8"),
+    ]
+    _run(args, timeout=settings.FFMPEG_TIMEOUT_SECONDS)
+
+
+def build_hls_renditions(source_path: str, output_dir: str, probe: Dict[str, Any]) -> str:
+    """
+    Нарезка видео в HLS в нескольких битрейтах.
+
+    Профили кодируются параллельно, но общее число процессов ffmpeg
+    ограничено FFMPEG_MAX_PROCESSES. Мастер-плейлист пишется последним,
+    чтобы плеер не увидел незавершенный набор сегментов.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    renditions = select_renditions(probe.get("height"))
+    has_audio = bool(probe.get("audio_codec"))
+
+    with ThreadPoolExecutor(max_workers=len(renditions)) as executor:
+        futures = [
+            executor.submit(_encode_rendition, source_path, output_dir, rendition, has_audio)
+            for rendition in renditions
+        ]
+        for future in futures:
+            future.result()
+
+    master_path = os.path.join(output_dir, "master.m3u8")
+    with open(f"{master_path}.part", "w") as f:
+        f.write(build_master_playlist(renditions, probe))
+    os.replace(f"{master_path}.part", master_path)
+    return master_path
@@ -0,0 +1,90 @@
+# tests/test_page_cache.py
+import os
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.templating import Jinja2Templates
+from fastapi.testclient import TestClient
+
+from src.core.page_cache import PageRenderCache
+from src.core.static_assets import StaticAssets
+
+
+class TestPageRenderCache:
+    @pytest.fixture
+    def setup(self, tmp_path):
+        templates_dir = tmp_path / "templates"
+        templates_dir.mkdir()
+        (templates_dir / "base.html").write_text(
+            '<link href="{{ static_url(\'css/style.css\') }}">{% block content %}{% endblock %}'
+        )
+        (templates_dir / "index.html").write_text(
+            '{% extends "base.html" %}{% block content %}<h1>Главная</h1>{% endblock %}'
+        )
+
+        static_dir = tmp_path / "static" / "css"
+        static_dir.mkdir(parents=True)
+        (static_dir / "style.css").write_text("body { margin: 0; }")
+
+        assets = StaticAssets(tmp_path / "static", tmp_path / "build", "/static", auto_reload=True)
+        templates = Jinja2Templates(directory=str(templates_dir))
+        templates.env.globals["static_url"] = assets.url
+        cache = PageRenderCache(templates, assets, auto_reload=True)
+        cache.RELOAD_CHECK_INTERVAL = 0
+        assets.RELOAD_CHECK_INTERVAL = 0
+
+        app = FastAPI()
+
+        @app.get("/")
+        async def index(request: Request):
+            return cache.render(request, "index.html")
+
+        return TestClient(app), cache, templates_dir, assets
+
+    def test_page_is_rendered_once_and_revalidated(self, setup, monkeypatch):
+        """Тест: страница рендерится один раз, повторный визит получает 304"""
+        client, cache, _, _ = setup
+        calls = []
+        original_render = cache._render
+        monkeypatch.setattr(cache, "_render", lambda *args: calls.append(args[1]) or original_render(*args))
+
+        first = client.get("/", headers={"Accept-Encoding": "gzip"})
+        assert first.status_code == 200
+        assert first.headers["content-encoding"] == "gzip"
+        assert "<h1>Главная</h1>" in first.text
+        assert "/static/css/style." in first.text
+
+        second = client.get("/", headers={"If-None-Match": first.headers["etag"]})
+        assert second.status_code == 304
+        assert second.content == b''
+
+        assert client.get("/", headers={"Accept-Encoding": "identity"}).text == first.text
+        assert calls == ["index.html"]
+
+    def test_template_change_invalidates_cache(self, setup):
+        """Тест: изменение шаблона (в т.ч. базового) сбрасывает кэш"""
+        client, _, templates_dir, _ = setup
+        first = client.get("/")
+
+        base = templates_dir / "base.html"
+        base.write_text("<main>{% block content %}{% endblock %}</main>")
+        mtime = os.path.getmtime(base) + 5
+        os.utime(base, (mtime, mtime))
+
+        second = client.get("/", headers={"If-None-Match": first.headers["etag"]})
+        assert second.status_code == 200
+        assert second.text == "<main><h1>Главная</h1></main>"
+
+    def test_static_rebuild_invalidates_cache(self, setup):
+        """Тест: новая сборка статики меняет URL в закэшированной странице"""
+        client, _, _, assets = setup
+        first = client.get("/")
+
+        style = assets.source_dir / "css" / "style.css"
+        style.write_text("body { margin: 1px; }")
+        mtime = os.path.getmtime(style) + 5
+        os.utime(style, (mtime, mtime))
+
+        second = client.get("/")
+        assert second.headers["etag"] != first.headers["etag"]
+        assert assets.url("css/style.css") in second.text
@@ -0,0 +1,83 @@
+# tests/test_static_assets.py
+import gzip
+import json
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.core import static_assets as static_module
+from src.core.static_assets import StaticAssets, PrecompressedStaticFiles, parse_accept_encoding
+
+CSS = b"body { color: #333; }\n" * 50
+
+
+class TestStaticAssets:
+    @pytest.fixture
+    def assets(self, tmp_path):
+        source_dir = tmp_path / "static"
+        (source_dir / "css").mkdir(parents=True)
+        (source_dir / "css" / "style.css").write_bytes(CSS)
+        (source_dir / "logo.png").write_bytes(b'\x89PNG\r\n\x1a\n')
+        return StaticAssets(source_dir, tmp_path / "build", "/static")
+
+    @pytest.fixture
+    def client(self, assets):
+        app = FastAPI()
+        app.mount("/static", PrecompressedStaticFiles(assets=assets), name="static")
+        return TestClient(app)
+
+    def test_build_writes_manifest_and_compressed_siblings(self, assets):
+        """Тест сборки: хеш в имени, .gz/.br и манифест"""
+        manifest = assets.build()
+
+        hashed = manifest["css/style.css"]
+        assert hashed.startswith("css/style.") and hashed.endswith(".css") and hashed != "css/style.css"
+        assert gzip.decompress((assets.build_dir / f"{hashed}.gz").read_bytes()) == CSS
+        if static_module.BROTLI_AVAILABLE:
+            assert static_module.brotli.decompress((assets.build_dir / f"{hashed}.br").read_bytes()) == CSS
+
+        # Уже сжатые форматы повторно не сжимаются
+        assert not (assets.build_dir / f"{manifest['logo.png']}.gz").exists()
+        assert json.loads((assets.build_dir / "manifest.json").read_text()) == manifest
+        assert assets.url("css/style.css") == f"/static/{hashed}"
+
+    def test_fingerprint_changes_with_content(self, assets):
+        """Тест: изменение файла меняет URL"""
+        old_url = assets.url("/css/style.css")
+        (assets.source_dir / "css" / "style.css").write_bytes(CSS + b"a { color: red; }\n")
+
+        assert assets.build()["css/style.css"] not in old_url
+        assert assets.url("missing.js") == "/static/missing.js"
+
+    def test_serves_precompressed_variant(self, assets, client):
+        """Тест отдачи сжатой версии по Accept-Encoding с immutable кэшем"""
+        url = assets.url("css/style.css")
+
+        response = client.get(url, headers={"Accept-Encoding": "gzip"})
+        assert response.status_code == 200
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.headers["cache-control"] == "public, max-age=31536000, immutable"
+        assert response.headers["vary"] == "Accept-Encoding"
+        assert response.headers["content-type"].startswith("text/css")
+        assert response.content == CSS
+
+        identity = client.get(url, headers={"Accept-Encoding": "identity"})
+        assert "content-encoding" not in identity.headers
+        assert identity.content == CSS
+
+        if static_module.BROTLI_AVAILABLE:
+            response = client.get(url, headers={"Accept-Encoding": "gzip, br"})
+            assert response.headers["content-encoding"] == "br"
+
+    def test_unhashed_path_revalidates(self, assets, client):
+        """Тест: исходный путь без хеша отдается с перепроверкой"""
+        response = client.get("/static/css/style.css")
+
+        assert response.status_code == 200
+        assert response.headers["cache-control"] == "no-cache"
+        assert response.content == CSS
+
+    def test_parse_accept_encoding(self):
+        """Тест разбора Accept-Encoding"""
+        assert parse_accept_encoding("gzip;q=0.5, br, identity;q=0") == {"gzip": 0.5, "br": 1.0, "identity": 0.0}
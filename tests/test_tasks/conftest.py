@@ -0,0 +1,23 @@
+# tests/test_tasks/conftest.py
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from src.database.models.base import Base
+
+
+@pytest.fixture
+def sync_session_factory(monkeypatch):
+    """Синхронная SQLite БД для Celery задач (подменяет SessionLocal в tasks)"""
+    sync_engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
+    Base.metadata.create_all(sync_engine)
+    factory = sessionmaker(autocommit=False, autoflush=False, bind=sync_engine)
+    monkeypatch.setattr("src.tasks.tasks.SessionLocal", factory)
+    yield factory
+    Base.metadata.drop_all(sync_engine)
+    sync_engine.dispose()
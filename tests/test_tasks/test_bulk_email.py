@@ -0,0 +1,101 @@
+# tests/test_tasks/test_bulk_email.py
+import smtplib
+from concurrent.futures import ProcessPoolExecutor
+from email import message_from_bytes
+from unittest.mock import patch
+
+from src.config.settings import settings
+from src.services.bulk_email_service import BulkEmailService
+from src.services.email_service import EmailService
+from src.tasks.tasks import enqueue_bulk_email, send_bulk_email_chunk
+
+SHARED = {"webinar_title": "Запуск проекта", "scheduled_at": "19.10.2026 в 18:00", "duration": 90,
+          "webinar_url": "https://example.com/webinars/1/join"}
+
+
+class FakeSMTP:
+    """SMTP сервер в памяти для готовых писем (sendmail)"""
+    connections = []
+
+    def __init__(self, *args, **kwargs):
+        self.sent = []
+        FakeSMTP.connections.append(self)
+
+    def login(self, username, password):
+        pass
+
+    def sendmail(self, from_addr, to_addrs, message):
+        if to_addrs[0].startswith("bounce"):
+            raise smtplib.SMTPRecipientsRefused({to_addrs[0]: (550, b"No such user")})
+        if to_addrs[0].startswith("greylist"):
+            raise smtplib.SMTPRecipientsRefused({to_addrs[0]: (451, b"Try again later")})
+        self.sent.append((to_addrs[0], message))
+
+    def noop(self):
+        return 250, b"OK"
+
+    def quit(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def recipients(*emails):
+    return [{"email": email, "context": {"username": email.split("@")[0]}} for email in emails]
+
+
+class TestBulkEmail:
+    def test_chunk_is_built_in_process_pool_and_sent(self, monkeypatch):
+        """Тест: письма чанка собираются в пуле процессов и уходят через пул SMTP"""
+        FakeSMTP.connections = []
+        monkeypatch.setattr(settings, "EMAIL_RENDER_PROCESS_WORKERS", 2)
+        service = BulkEmailService()
+
+        with patch("smtplib.SMTP_SSL", FakeSMTP), \
+                patch("src.services.bulk_email_service.email_service", EmailService()), \
+                ProcessPoolExecutor(max_workers=2) as executor:
+            stats, transient = service.send_chunk(
+                "webinar_reminder.html", "🔔 Напоминание", recipients("alice@example.com", "bob@example.com",
+                                                                     "bounce@example.com", "greylist@example.com"),
+                shared=SHARED, executor=executor
+            )
+
+        assert stats == {"sent": 2, "failed": 2, "transient": 1}
+        assert transient == recipients("greylist@example.com")
+        sent = {to: message_from_bytes(raw) for connection in FakeSMTP.connections for to, raw in connection.sent}
+        assert set(sent) == {"alice@example.com", "bob@example.com"}
+        html = sent["alice@example.com"].get_payload()[1].get_payload(decode=True).decode()
+        assert "alice" in html and "Запуск проекта" in html
+        assert sent["alice@example.com"].get_payload()[0].get_content_type() == "text/plain"
+
+    def test_one_task_per_chunk(self, monkeypatch):
+        """Тест: Celery получает одну задачу на чанк получателей, а не на письмо"""
+        monkeypatch.setattr(settings, "EMAIL_BULK_CHUNK_SIZE", 2)
+
+        with patch("src.tasks.tasks.send_bulk_email_chunk.delay") as mock_delay:
+            chunks = enqueue_bulk_email("webinar_reminder.html", "Subject",
+                                        recipients(*[f"user{i}@example.com" for i in range(5)]), SHARED)
+
+        assert chunks == mock_delay.call_count == 3
+        assert [len(call.args[2]) for call in mock_delay.call_args_list] == [2, 2, 1]
+
+    def test_transient_failures_are_retried_with_backoff(self, monkeypatch):
+        """Тест: получатели с временной ошибкой уходят в новую задачу с задержкой, после лимита - нет"""
+        monkeypatch.setattr(settings, "EMAIL_BULK_MAX_RETRIES", 2)
+        chunk = recipients("alice@example.com", "greylist@example.com")
+        result = ({"sent": 1, "failed": 1, "transient": 1}, chunk[1:])
+
+        with patch("src.services.bulk_email_service.bulk_email_service.send_chunk", return_value=result), \
+                patch("src.tasks.tasks.send_bulk_email_chunk.apply_async") as mock_apply:
+            stats = send_bulk_email_chunk("webinar_reminder.html", "Subject", chunk, SHARED, attempt=1)
+            assert stats == {"sent": 1, "failed": 1, "transient": 1, "retrying": 1}
+            assert mock_apply.call_args.kwargs["args"] == ("webinar_reminder.html", "Subject", chunk[1:], SHARED)
+            assert mock_apply.call_args.kwargs["kwargs"] == {"attempt": 2}
+            base = settings.EMAIL_RETRY_BASE_SECONDS
+            assert base <= mock_apply.call_args.kwargs["countdown"] <= 2 * base
+
+            mock_apply.reset_mock()
+            stats = send_bulk_email_chunk("webinar_reminder.html", "Subject", chunk[1:], SHARED, attempt=2)
+            assert stats["retrying"] == 0
+            mock_apply.assert_not_called()
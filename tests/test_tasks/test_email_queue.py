@@ -0,0 +1,162 @@
+# tests/test_tasks/test_email_queue.py
+import smtplib
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+from sqlalchemy import select
+
+from src.config.settings import settings
+from src.database.models import EmailQueue
+from src.services.email_service import EmailService
+from src.tasks.tasks import process_email_queue
+
+
+class FakeSMTP:
+    """SMTP сервер в памяти: считает подключения, логины и письма"""
+    connections = []
+
+    def __init__(self, *args, **kwargs):
+        self.logins = 0
+        self.sent = []
+        self.alive = True
+        FakeSMTP.connections.append(self)
+
+    def login(self, username, password):
+        self.logins += 1
+
+    def send_message(self, message):
+        if not self.alive:
+            raise smtplib.SMTPServerDisconnected("Connection unexpectedly closed")
+        self.sent.append(message["To"])
+
+    def noop(self):
+        if not self.alive:
+            raise smtplib.SMTPServerDisconnected("Connection unexpectedly closed")
+        return 250, b"OK"
+
+    def quit(self):
+        self.alive = False
+
+    def close(self):
+        self.alive = False
+
+
+def add_emails(session, count, **fields):
+    for index in range(count):
+        session.add(EmailQueue(email=f"user{index}@example.com", subject="Webinar",
+                               template_data={"message": "<p>Hi</p>"}, **fields))
+    session.commit()
+
+
+class TestSMTPConnectionPool:
+    def test_connection_is_reused(self):
+        """Тест: письма уходят через одно авторизованное соединение"""
+        FakeSMTP.connections = []
+        with patch("smtplib.SMTP_SSL", FakeSMTP):
+            service = EmailService()
+            for index in range(5):
+                assert service.send_email(f"user{index}@example.com", "Subject", "<p>Hi</p>")
+
+        assert len(FakeSMTP.connections) == 1
+        assert FakeSMTP.connections[0].logins == 1
+        assert len(FakeSMTP.connections[0].sent) == 5
+
+    def test_dropped_connection_is_replaced(self):
+        """Тест: закрытое сервером соединение заменяется новым, письмо не теряется"""
+        FakeSMTP.connections = []
+        with patch("smtplib.SMTP_SSL", FakeSMTP):
+            service = EmailService()
+            service.send_email("first@example.com", "Subject", "<p>Hi</p>")
+            FakeSMTP.connections[0].alive = False
+
+            assert service.send_email("second@example.com", "Subject", "<p>Hi</p>")
+
+        assert len(FakeSMTP.connections) == 2
+        assert FakeSMTP.connections[1].sent == ["second@example.com"]
+
+
+class TestEmailQueue:
+    def test_queue_is_drained_in_batches(self, sync_session_factory, monkeypatch):
+        """Тест: очередь отправляется пачками до конца, зависшие захваты забираются снова"""
+        monkeypatch.setattr(settings, "EMAIL_QUEUE_BATCH_SIZE", 3)
+        session = sync_session_factory()
+        add_emails(session, 7)
+        stale = datetime.now() - timedelta(seconds=settings.EMAIL_QUEUE_CLAIM_TIMEOUT_SECONDS + 1)
+        add_emails(session, 1, status="sending", claimed_at=stale)
+        add_emails(session, 1, status="sending", claimed_at=datetime.now())  # обрабатывается другим воркером
+
+        delivered = []
+
+        def deliver(to_email, subject, html_content, text_content=None):
+            if to_email == "user3@example.com":
+                raise smtplib.SMTPRecipientsRefused({to_email: (550, b"No such user")})
+            delivered.append(to_email)
+
+        with patch("src.tasks.tasks.email_service.deliver", side_effect=deliver), \
+                patch("src.tasks.tasks.process_email_queue.delay") as mock_delay:
+            result = process_email_queue()
+
+        assert result == {"sent": 7, "retrying": 0, "failed": 1}
+        # Глубина очереди 8 при пачке 3 - еще два параллельных обработчика
+        assert mock_delay.call_count == 2
+        statuses = [row.status for row in session.scalars(select(EmailQueue).order_by(EmailQueue.id))]
+        assert statuses.count("sent") == 7
+        assert statuses.count("failed") == 1
+        assert statuses[-1] == "sending"
+
+    def test_transient_errors_are_retried_with_backoff(self, sync_session_factory):
+        """Тест: временная ошибка SMTP откладывает письмо с растущей задержкой, затем failed"""
+        session = sync_session_factory()
+        add_emails(session, 1, max_retries=2)
+        add_emails(session, 1, scheduled_for=datetime.now() + timedelta(hours=1))  # срок еще не наступил
+        outage = smtplib.SMTPServerDisconnected("Connection unexpectedly closed")
+
+        delays = []
+        with patch("src.tasks.tasks.email_service.deliver", side_effect=outage) as mock_deliver, \
+                patch("src.tasks.tasks.process_email_queue.delay"):
+            for expected in ({"sent": 0, "retrying": 1, "failed": 0},
+                             {"sent": 0, "retrying": 1, "failed": 0},
+                             {"sent": 0, "retrying": 0, "failed": 1}):
+                started = datetime.now()
+                assert process_email_queue() == expected
+                email = session.scalars(
+                    select(EmailQueue).order_by(EmailQueue.id).execution_options(populate_existing=True)
+                ).first()
+                delays.append((email.scheduled_for - started).total_seconds())
+                # Делаем письмо доступным для следующего запуска
+                email.scheduled_for = datetime.now() - timedelta(seconds=1)
+                session.commit()
+
+        assert mock_deliver.call_count == 3
+        assert email.status == "failed" and email.retry_count == 2
+        base = settings.EMAIL_RETRY_BASE_SECONDS
+        assert base / 2 <= delays[0] <= base + 1
+        assert base <= delays[1] <= 2 * base + 1
+
+    def test_permanent_errors_are_not_retried(self, sync_session_factory):
+        """Тест: отказ 5xx по адресу - письмо сразу failed"""
+        session = sync_session_factory()
+        add_emails(session, 1)
+        refused = smtplib.SMTPRecipientsRefused({"user0@example.com": (550, b"No such user")})
+
+        with patch("src.tasks.tasks.email_service.deliver", side_effect=refused), \
+                patch("src.tasks.tasks.process_email_queue.delay"):
+            assert process_email_queue() == {"sent": 0, "retrying": 0, "failed": 1}
+
+    def test_stale_claims_use_up_retries(self, sync_session_factory):
+        """Тест: повторный захват зависшего в sending письма расходует попытку, после лимита - failed"""
+        session = sync_session_factory()
+        stale = datetime.now() - timedelta(seconds=settings.EMAIL_QUEUE_CLAIM_TIMEOUT_SECONDS + 1)
+        add_emails(session, 1, status="sending", claimed_at=stale, retry_count=0, max_retries=1)
+        add_emails(session, 1, status="sending", claimed_at=stale, retry_count=1, max_retries=1)
+
+        with patch("src.tasks.tasks.email_service.deliver") as mock_deliver, \
+                patch("src.tasks.tasks.process_email_queue.delay"):
+            assert process_email_queue() == {"sent": 1, "retrying": 0, "failed": 0}
+
+        mock_deliver.assert_called_once()
+        emails = session.scalars(
+            select(EmailQueue).order_by(EmailQueue.id).execution_options(populate_existing=True)
+        ).all()
+        assert [(e.status, e.retry_count) for e in emails] == [("sent", 1), ("failed", 1)]
+        assert emails[1].error_message == "Claim timed out: max retries exceeded"
@@ -0,0 +1,69 @@
+# tests/test_tasks/test_media_gc.py
+import os
+from datetime import datetime, timedelta
+
+from sqlalchemy import select
+
+from src.config.settings import settings
+from src.database.models import MediaBlob, Project, ProjectMedia, User
+from src.database.models.models_content import MediaType
+from src.tasks.tasks import cleanup_media_blobs
+
+
+def add_blob(session, media_root, name, last_referenced_at):
+    storage_key = f"blobs/{name}.png"
+    (media_root / "blobs").mkdir(exist_ok=True)
+    (media_root / storage_key).write_bytes(b"png")
+    blob = MediaBlob(sha256=name * 64, storage_key=storage_key, file_url=f"/media/{storage_key}",
+                     file_type=MediaType.IMAGE, file_size=3, ref_count=1, last_referenced_at=last_referenced_at)
+    session.add(blob)
+    session.commit()
+    return storage_key, blob.file_url
+
+
+class TestMediaBlobGC:
+    def test_only_unreferenced_old_blobs_are_removed(self, sync_session_factory, tmp_path, monkeypatch):
+        """Тест: удаляются только блобы без ссылок старше грейс-периода вместе с файлами"""
+        monkeypatch.setattr(settings, "MEDIA_ROOT", str(tmp_path))
+        session = sync_session_factory()
+        old = datetime.now() - timedelta(days=1)
+        orphan, _ = add_blob(session, tmp_path, "a", old)
+        referenced, referenced_url = add_blob(session, tmp_path, "b", old)
+        fresh, _ = add_blob(session, tmp_path, "c", datetime.now())
+
+        creator = User(email="creator@example.com", phone="+79990000001", username="creator",
+                       hashed_password="hash", is_active=True)
+        session.add(creator)
+        session.flush()
+        project = Project(title="Project", goal_amount=1000.0, creator_id=creator.id)
+        session.add(project)
+        session.flush()
+        session.add(ProjectMedia(project_id=project.id, file_url=referenced_url, file_type=MediaType.IMAGE))
+        session.commit()
+
+        result = cleanup_media_blobs()
+
+        assert result == {"blobs_removed": 1, "bytes_freed": 3}
+        remaining = set(session.scalars(select(MediaBlob.storage_key)))
+        assert remaining == {referenced, fresh}
+        assert not (tmp_path / orphan).exists()
+        assert (tmp_path / referenced).exists() and (tmp_path / fresh).exists()
+
+    def test_failed_unlink_keeps_blob_row(self, sync_session_factory, tmp_path, monkeypatch):
+        """Тест: файл удаляется в транзакции DELETE - при ошибке удаления запись блоба остается"""
+        monkeypatch.setattr(settings, "MEDIA_ROOT", str(tmp_path))
+        session = sync_session_factory()
+        orphan, _ = add_blob(session, tmp_path, "d", datetime.now() - timedelta(days=1))
+        session.query(MediaBlob).update({MediaBlob.ref_count: 0})
+        session.commit()
+
+        def remove(path):
+            raise PermissionError(path)
+
+        monkeypatch.setattr(os, "remove", remove)
+        assert cleanup_media_blobs() == {"blobs_removed": 0, "bytes_freed": 0}
+
+        session.expire_all()
+        assert set(session.scalars(select(MediaBlob.storage_key))) == {orphan}
+        assert (tmp_path / orphan).exists()
+
@@ -0,0 +1,68 @@
+# tests/test_tasks/test_project_rankings.py
+from sqlalchemy import event, select
+
+from src.database.models import Donation, Project, User
+from src.tasks.tasks import update_project_rankings
+
+
+def seed_projects(session, totals):
+    """Проекты с проведенными донатами: totals - список сумм донатов каждого проекта"""
+    creator = User(email="creator@example.com", phone="+79990000001", username="creator",
+                   hashed_password="hash", is_active=True)
+    session.add(creator)
+    session.flush()
+    projects = []
+    for amounts in totals:
+        project = Project(title="Project", goal_amount=1000.0, creator_id=creator.id)
+        session.add(project)
+        session.flush()
+        for amount in amounts:
+            session.add(Donation(project_id=project.id, donor_id=creator.id, amount=amount, status="completed"))
+        projects.append(project.id)
+    session.commit()
+    return projects
+
+
+def rankings(session):
+    rows = session.execute(
+        select(Project.id, Project.ranking_position, Project.popularity_score).order_by(Project.id)
+        .execution_options(populate_existing=True)
+    )
+    return {project_id: (position, score) for project_id, position, score in rows}
+
+
+class TestProjectRankings:
+    def test_rankings_are_computed_in_one_statement(self, sync_session_factory):
+        """Тест: места в рейтинге считаются одним UPDATE без выборки каждого проекта"""
+        session = sync_session_factory()
+        first, second, tied, empty = seed_projects(session, [[100, 50], [300], [150], []])
+
+        statements = []
+
+        def record(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        engine = session.get_bind()
+        event.listen(engine, "before_cursor_execute", record)
+        result = update_project_rankings()
+        event.remove(engine, "before_cursor_execute", record)
+
+        # Проект без донатов уже не в рейтинге - его строка не меняется
+        assert result == {"rankings_changed": 3}
+        assert [sql.split()[0] for sql in statements] == ["UPDATE"]
+        assert rankings(session) == {
+            second: (1, 300.0), first: (2, 150.0), tied: (2, 150.0), empty: (None, 0.0)
+        }
+
+    def test_unchanged_rankings_are_not_rewritten(self, sync_session_factory):
+        """Тест: повторный пересчет не перезаписывает строки, выбывшие проекты теряют место"""
+        session = sync_session_factory()
+        first, second = seed_projects(session, [[100], [200]])
+        update_project_rankings()
+        assert update_project_rankings() == {"rankings_changed": 0}
+
+        session.query(Donation).filter(Donation.project_id == second).update({"status": "refunded"})
+        session.commit()
+
+        assert update_project_rankings() == {"rankings_changed": 2}
+        assert rankings(session) == {first: (1, 100.0), second: (None, 0.0)}
@@ -0,0 +1,88 @@
+# tests/test_tasks/test_webinar_reminders.py
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+from sqlalchemy import event, select
+
+from src.config.settings import settings
+from src.database.models import Notification, User, Webinar, WebinarRegistration
+from src.tasks.tasks import send_webinar_reminders
+
+
+def seed_webinar(session, registrants, starts_in=timedelta(minutes=30), status="scheduled"):
+    """Вебинар с зарегистрированными пользователями"""
+    webinar = Webinar(title="Запуск проекта", scheduled_at=datetime.now() + starts_in, duration=90, status=status)
+    session.add(webinar)
+    session.flush()
+    for index in range(registrants):
+        user = User(email=f"w{webinar.id}u{index}@example.com", phone=f"+7999{webinar.id:03d}{index:04d}",
+                    username=f"w{webinar.id}u{index}", hashed_password="hash", is_active=True)
+        session.add(user)
+        session.flush()
+        session.add(WebinarRegistration(user_id=user.id, webinar_id=webinar.id))
+    session.commit()
+    return webinar.id
+
+
+class TestWebinarReminders:
+    def test_reminders_are_sent_in_batches(self, sync_session_factory, monkeypatch):
+        """Тест: напоминания идут пачками - запросов на пачку, а не на регистрацию"""
+        session = sync_session_factory()
+        due = seed_webinar(session, 5)
+        seed_webinar(session, 2, starts_in=timedelta(hours=3))
+        seed_webinar(session, 2, status="cancelled")
+        monkeypatch.setattr(settings, "WEBINAR_REMINDER_BATCH_SIZE", 2)
+        monkeypatch.setattr(settings, "EMAIL_BULK_CHUNK_SIZE", 500)
+
+        statements = []
+
+        def record(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        engine = session.get_bind()
+        event.listen(engine, "before_cursor_execute", record)
+        with patch("src.tasks.tasks.send_bulk_email_chunk.delay") as mock_delay:
+            assert send_webinar_reminders() == 5
+        event.remove(engine, "before_cursor_execute", record)
+
+        # 3 пачки (2 + 2 + 1) и пустая выборка: SELECT, INSERT и UPDATE на пачку
+        assert len([s for s in statements if s.lstrip().upper().startswith("SELECT")]) == 4
+        assert len([s for s in statements if s.lstrip().upper().startswith("INSERT")]) == 3
+        assert len([s for s in statements if s.lstrip().upper().startswith("UPDATE")]) == 3
+
+        assert mock_delay.call_count == 3
+        recipients = [recipient["email"] for call in mock_delay.call_args_list for recipient in call.args[2]]
+        assert len(recipients) == len(set(recipients)) == 5
+        assert mock_delay.call_args_list[0].args[3]["duration"] == 90
+
+        notifications = session.scalars(select(Notification)).all()
+        assert len(notifications) == 5
+        assert {n.related_entity_id for n in notifications} == {due}
+        assert notifications[0].meta_data == {} and notifications[0].is_read is False
+
+        reminded = session.scalars(
+            select(WebinarRegistration.webinar_id).where(WebinarRegistration.reminder_sent == True)
+        ).all()
+        assert set(reminded) == {due} and len(reminded) == 5
+
+        # Повторный запуск ничего не отправляет
+        with patch("src.tasks.tasks.send_bulk_email_chunk.delay") as mock_delay:
+            assert send_webinar_reminders() == 0
+        mock_delay.assert_not_called()
+
+    def test_scheduled_offsets_are_sent_once_each(self, sync_session_factory):
+        """Тест: напоминания по планировщику за 24 ч и за 1 ч уходят по одному разу"""
+        session = sync_session_factory()
+        webinar_id = seed_webinar(session, 3, starts_in=timedelta(minutes=50))
+
+        with patch("src.tasks.tasks.send_bulk_email_chunk.delay") as mock_delay:
+            assert send_webinar_reminders(webinar_id=webinar_id, offset_minutes=1440) == 3
+            assert send_webinar_reminders(webinar_id=webinar_id, offset_minutes=1440) == 0
+            assert send_webinar_reminders(webinar_id=webinar_id, offset_minutes=60) == 3
+            # Часовой запуск по расписанию не дублирует напоминание планировщика
+            assert send_webinar_reminders() == 0
+
+        assert [call.args[3]["starts_in"] for call in mock_delay.call_args_list] == ["24 часа", "1 час"]
+        messages = session.scalars(select(Notification.message)).all()
+        assert sorted(set(messages)) == ["Вебинар 'Запуск проекта' начинается через 1 час",
+                                         "Вебинар 'Запуск проекта' начинается через 24 часа"]
@@ -0,0 +1,49 @@
+# tests/test_template_service.py
+import os
+
+from src.config.settings import settings
+from src.services.template_service import TemplateService
+
+
+def reminder_context(username):
+    return {"username": username, "webinar_title": "Запуск проекта", "scheduled_at": "19.10.2026 18:00", "duration": 90}
+
+
+class TestTemplateService:
+    def test_preload_compiles_email_templates_to_bytecode_cache(self, tmp_path, monkeypatch):
+        """Тест: предзагрузка компилирует все emails/* и пишет байткод в общий каталог"""
+        monkeypatch.setattr(settings, "TEMPLATE_BYTECODE_CACHE_DIR", str(tmp_path / "jinja"))
+        service = TemplateService()
+
+        count = service.preload_email_templates()
+
+        assert count == len([name for name in os.listdir(service.templates_dir / "emails") if name.endswith(".html")])
+        assert "webinar_reminder.html" in service._email_templates
+        assert os.listdir(tmp_path / "jinja")
+
+        # Новый процесс с тем же каталогом берет готовый байткод
+        assert TemplateService().preload_email_templates() == count
+
+    def test_render_many_matches_single_render(self, tmp_path, monkeypatch):
+        """Тест: пакетный рендер дает те же письма, что и рендер по одному"""
+        monkeypatch.setattr(settings, "TEMPLATE_BYTECODE_CACHE_DIR", str(tmp_path / "jinja"))
+        service = TemplateService()
+        contexts = [{"username": name} for name in ("alice", "bob")]
+        shared = {key: value for key, value in reminder_context(None).items() if key != "username"}
+
+        rendered = service.render_many("webinar_reminder.html", contexts, shared=shared)
+
+        assert rendered == [
+            service.render_email_template("webinar_reminder.html", **reminder_context(name)) for name in ("alice", "bob")
+        ]
+        assert "alice" in rendered[0] and "bob" in rendered[1]
+
+    def test_render_many_unknown_template_uses_fallback(self, tmp_path, monkeypatch):
+        """Тест: неизвестный шаблон дает запасное письмо для каждого получателя"""
+        monkeypatch.setattr(settings, "TEMPLATE_BYTECODE_CACHE_DIR", str(tmp_path / "jinja"))
+        service = TemplateService()
+
+        rendered = service.render_many("missing.html", [{"username": "alice"}, {"username": "bob"}])
+
+        assert len(rendered) == 2
+        assert rendered[0] == service._get_fallback_template("missing.html", {"username": "alice"})
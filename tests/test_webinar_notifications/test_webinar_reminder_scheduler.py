@@ -0,0 +1,183 @@
+# tests/test_webinar_notifications/test_webinar_reminder_scheduler.py
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import select
+
+from src.database.models import WebinarRegistration
+from src.services.webinar_reminder_scheduler import (
+    WebinarReminderScheduler, describe_offset, webinar_reminder_scheduler
+)
+from src.services.webinar_service import webinar_service
+from src.tasks.db_operations import sync_webinar_repository
+from src.tasks.tasks import dispatch_webinar_reminders, send_webinar_reminders
+
+
+class FakeSortedSetRedis:
+    """Синхронный Redis в памяти: только ZSET команды планировщика"""
+
+    def __init__(self):
+        self.zsets = {}
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    def zadd(self, key, mapping):
+        self.zsets.setdefault(key, {}).update(mapping)
+        return len(mapping)
+
+    def zrem(self, key, *members):
+        zset = self.zsets.get(key, {})
+        return sum(zset.pop(member, None) is not None for member in members)
+
+    def zrangebyscore(self, key, min_score, max_score, start=None, num=None, withscores=False):
+        items = sorted((score, member) for member, score in self.zsets.get(key, {}).items() if score <= max_score)
+        items = items[start:start + num if num is not None else None]
+        return [(member, score) if withscores else member for score, member in items]
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.commands = []
+
+    def __getattr__(self, name):
+        def queue(*args, **kwargs):
+            self.commands.append((name, args, kwargs))
+            return self
+        return queue
+
+    def execute(self):
+        return [getattr(self.redis, name)(*args, **kwargs) for name, args, kwargs in self.commands]
+
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    redis = FakeSortedSetRedis()
+    monkeypatch.setattr(WebinarReminderScheduler, "redis_client", property(lambda self: redis))
+    return redis
+
+
+@pytest.fixture
+def enqueued(monkeypatch):
+    """Отложенные задачи напоминаний: [(webinar_id, offset, countdown)]"""
+    calls = []
+
+    def apply_async(kwargs, countdown):
+        calls.append((kwargs["webinar_id"], kwargs["offset_minutes"], countdown))
+
+    monkeypatch.setattr(send_webinar_reminders, "apply_async", apply_async)
+    return calls
+
+
+def due_entries(redis):
+    zset = redis.zsets.get(WebinarReminderScheduler.DUE_KEY, {})
+    return {member: datetime.fromtimestamp(score) for member, score in zset.items()}
+
+
+class TestWebinarReminderScheduler:
+    def test_schedule_reschedule_and_dispatch(self, fake_redis, enqueued):
+        """Тест: дальние сроки ждут в Redis, ближние и подошедшие ставятся задачами с ETA один раз"""
+        starts_at = datetime.now().replace(microsecond=0) + timedelta(days=2)
+
+        assert webinar_reminder_scheduler.schedule(7, starts_at) == 3
+        assert due_entries(fake_redis) == {
+            "7:1440": starts_at - timedelta(days=1),
+            "7:60": starts_at - timedelta(hours=1),
+            "7:10": starts_at - timedelta(minutes=10),
+        }
+        assert enqueued == []
+
+        # Перенос на ближайшие полчаса: прошедшие сроки не ставятся
+        starts_at = datetime.now().replace(microsecond=0) + timedelta(minutes=30)
+        assert webinar_reminder_scheduler.schedule(7, starts_at) == 1
+        assert list(due_entries(fake_redis)) == ["7:10"]
+
+        assert webinar_reminder_scheduler.pop_upcoming(now=starts_at - timedelta(minutes=25)) == []
+        now = starts_at - timedelta(minutes=15)
+        assert webinar_reminder_scheduler.pop_upcoming(now=now) == [(7, 10, starts_at - timedelta(minutes=10))]
+        assert webinar_reminder_scheduler.pop_upcoming(now=now) == []
+
+        # Срок в пределах WEBINAR_REMINDER_LOOKAHEAD_SECONDS ставится задачей сразу
+        starts_at = datetime.now() + timedelta(minutes=15)
+        assert webinar_reminder_scheduler.schedule(8, starts_at) == 1
+        assert due_entries(fake_redis) == {}
+        [(webinar_id, offset, countdown)] = enqueued
+        assert (webinar_id, offset) == (8, 10) and 290 < countdown <= 300
+
+    def test_dispatcher_enqueues_upcoming_reminders(self, fake_redis, enqueued):
+        """Тест: диспетчер ставит задачу с ETA на каждый подошедший срок"""
+        now = datetime.now()
+        fake_redis.zadd(WebinarReminderScheduler.DUE_KEY, {
+            "3:60": (now + timedelta(minutes=5)).timestamp(),
+            "4:10": (now - timedelta(seconds=30)).timestamp(),
+            "5:1440": (now + timedelta(hours=5)).timestamp(),
+        })
+
+        assert dispatch_webinar_reminders() == 2
+
+        assert [(webinar_id, offset) for webinar_id, offset, _ in enqueued] == [(4, 10), (3, 60)]
+        assert enqueued[0][2] == 0 and 290 < enqueued[1][2] <= 300
+        assert list(due_entries(fake_redis)) == ["5:1440"]
+
+    @pytest.mark.asyncio
+    async def test_update_webinar_moves_reminders(self, db_session, test_user, test_webinar, fake_redis, enqueued):
+        """Тест: перенос вебинара двигает напоминания, отмена их снимает"""
+        new_start = test_webinar.scheduled_at.replace(microsecond=0) + timedelta(days=3)
+
+        await webinar_service.update_webinar(db_session, test_webinar.id, test_user.id, {"scheduled_at": new_start})
+        assert due_entries(fake_redis)[f"{test_webinar.id}:60"] == new_start - timedelta(hours=1)
+
+        await webinar_service.update_webinar(db_session, test_webinar.id, test_user.id, {"status": "cancelled"})
+        assert due_entries(fake_redis) == {}
+
+    @pytest.mark.asyncio
+    async def test_reschedule_resends_reminders(self, db_session, test_user, test_webinar,
+                                                test_webinar_registration, fake_redis, enqueued):
+        """Тест: после переноса вебинара напоминания отправляются заново"""
+        webinar_id = test_webinar.id
+
+        async def send_daily_reminders():
+            def send(session):
+                rows = sync_webinar_repository.claim_due_reminders(session, 100, 1440, webinar_id)
+                sync_webinar_repository.mark_reminders_sent(session, [row["registration_id"] for row in rows], 1440)
+                session.commit()
+                return len(rows)
+            return await db_session.run_sync(send)
+
+        assert await send_daily_reminders() == 1
+        assert await send_daily_reminders() == 0
+
+        new_start = test_webinar.scheduled_at - timedelta(hours=2)
+        await webinar_service.update_webinar(db_session, webinar_id, test_user.id, {"scheduled_at": new_start})
+
+        registration = (await db_session.execute(
+            select(WebinarRegistration).where(WebinarRegistration.webinar_id == webinar_id)
+            .execution_options(populate_existing=True)
+        )).scalar_one()
+        assert (registration.reminder_sent, registration.last_reminder_offset) == (False, None)
+        assert await send_daily_reminders() == 1
+
+        # Изменение без переноса отметки не сбрасывает
+        await webinar_service.update_webinar(db_session, webinar_id, test_user.id, {"title": "Renamed"})
+        assert await send_daily_reminders() == 0
+
+    @pytest.mark.asyncio
+    async def test_stale_reminder_after_postponing_sends_nothing(self, db_session, test_user, test_webinar,
+                                                                 test_webinar_registration, fake_redis, enqueued):
+        """Тест: задача, поставленная до переноса вебинара на более позднее время, ничего не отправляет"""
+        webinar_id = test_webinar.id
+        new_start = test_webinar.scheduled_at + timedelta(days=2)
+        await webinar_service.update_webinar(db_session, webinar_id, test_user.id, {"scheduled_at": new_start})
+
+        # Старая задача «за 24 часа» срабатывает по прежнему сроку
+        rows = await db_session.run_sync(
+            lambda session: sync_webinar_repository.claim_due_reminders(session, 100, 1440, webinar_id)
+        )
+        assert rows == []
+
+    def test_describe_offset(self):
+        """Тест: срок до начала словами"""
+        assert [describe_offset(minutes) for minutes in (1440, 60, 120, 10, 1, 22)] == [
+            "24 часа", "1 час", "2 часа", "10 минут", "1 минуту", "22 минуты"
+        ]
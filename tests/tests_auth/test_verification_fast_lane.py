@@ -0,0 +1,161 @@
+# tests/tests_auth/test_verification_fast_lane.py
+import asyncio
+import smtplib
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+
+from src.security.auth import generate_and_send_verification_codes
+from src.services.async_email_service import AsyncSMTPPool, async_email_service
+from src.services.email_service import email_service
+
+
+class FakeAsyncSMTPError(Exception):
+    pass
+
+
+class FakeAsyncSMTP:
+    """aiosmtplib.SMTP в памяти: считает подключения, письма и NOOP"""
+    clients = []
+    send_delay = 0
+
+    def __init__(self, **kwargs):
+        self.is_connected = False
+        self.alive = True
+        self.logins = 0
+        self.noops = 0
+        self.sent = []
+        FakeAsyncSMTP.clients.append(self)
+
+    async def connect(self):
+        self.is_connected = True
+
+    async def login(self, username, password):
+        self.logins += 1
+
+    async def noop(self):
+        self.noops += 1
+        if not self.alive:
+            raise FakeAsyncSMTPError("Server disconnected")
+        return SimpleNamespace(code=250)
+
+    async def send_message(self, message):
+        await asyncio.sleep(FakeAsyncSMTP.send_delay)
+        self.sent.append(message["To"])
+
+    async def quit(self):
+        self.is_connected = False
+
+    def close(self):
+        self.is_connected = False
+
+
+@pytest.fixture
+def fake_aiosmtplib(monkeypatch):
+    FakeAsyncSMTP.clients = []
+    FakeAsyncSMTP.send_delay = 0
+    monkeypatch.setattr("src.services.async_email_service.AIOSMTPLIB_AVAILABLE", True)
+    monkeypatch.setattr(
+        "src.services.async_email_service.aiosmtplib",
+        SimpleNamespace(SMTP=FakeAsyncSMTP, SMTPException=FakeAsyncSMTPError),
+        raising=False
+    )
+    return FakeAsyncSMTP
+
+
+def message_to(address: str):
+    return email_service.build_message(address, "Code", "<p>123456</p>")
+
+
+@pytest.fixture
+async def started_async_email():
+    await async_email_service.start()
+    yield async_email_service
+    await async_email_service.close()
+
+
+class TestVerificationFastLane:
+    @pytest.mark.asyncio
+    async def test_code_is_sent_from_request(self, db_session, test_user, started_async_email):
+        """Тест: код подтверждения уходит сразу из запроса, минуя Celery"""
+        with patch("src.services.email_service.email_service.deliver") as mock_deliver, \
+                patch("src.services.async_email_service.AIOSMTPLIB_AVAILABLE", False), \
+                patch("src.tasks.tasks.send_verification_codes_task.delay") as mock_delay:
+            result = await generate_and_send_verification_codes(db_session, test_user)
+
+        assert result["email_sent"] is True
+        mock_deliver.assert_called_once()
+        assert mock_deliver.call_args.args[0] == test_user.email
+        mock_delay.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_smtp_failure_falls_back_to_celery(self, db_session, test_user, started_async_email):
+        """Тест: при сбое SMTP письмо уходит через очередь Celery"""
+        with patch("src.services.email_service.email_service.deliver",
+                   side_effect=smtplib.SMTPServerDisconnected("down")), \
+                patch("src.services.async_email_service.AIOSMTPLIB_AVAILABLE", False), \
+                patch("src.tasks.tasks.send_verification_codes_task.delay") as mock_delay:
+            await generate_and_send_verification_codes(db_session, test_user)
+
+        mock_delay.assert_called_once()
+        assert mock_delay.call_args.kwargs["verification_code"].isdigit()
+
+    @pytest.mark.asyncio
+    async def test_not_started_uses_celery(self, db_session, test_user):
+        """Тест: без lifespan (быстрая полоса не запущена) - обычная очередь"""
+        with patch("src.tasks.tasks.send_verification_codes_task.delay") as mock_delay:
+            await generate_and_send_verification_codes(db_session, test_user)
+
+        mock_delay.assert_called_once()
+
+
+class TestAsyncSMTPPool:
+    @pytest.mark.asyncio
+    async def test_connection_is_reused(self, fake_aiosmtplib):
+        """Тест: письма уходят через одно авторизованное соединение"""
+        pool = AsyncSMTPPool(size=2, timeout=1, max_idle=30)
+        for index in range(3):
+            await pool.send(message_to(f"user{index}@example.com"))
+
+        assert len(fake_aiosmtplib.clients) == 1
+        client = fake_aiosmtplib.clients[0]
+        assert (client.logins, client.noops, len(client.sent)) == (1, 0, 3)
+
+        await pool.close()
+        assert not client.is_connected
+
+    @pytest.mark.asyncio
+    async def test_cancelled_send_closes_connection(self, fake_aiosmtplib):
+        """Тест: отмена отправки по таймауту закрывает соединение, а не теряет его"""
+        pool = AsyncSMTPPool(size=1, timeout=1, max_idle=30)
+        fake_aiosmtplib.send_delay = 1
+
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(pool.send(message_to("slow@example.com")), timeout=0.01)
+
+        stuck = fake_aiosmtplib.clients[0]
+        assert not stuck.is_connected
+
+        fake_aiosmtplib.send_delay = 0
+        await pool.send(message_to("next@example.com"))
+        assert len(fake_aiosmtplib.clients) == 2
+        assert fake_aiosmtplib.clients[1].sent == ["next@example.com"]
+
+    @pytest.mark.asyncio
+    async def test_idle_connection_is_checked_with_noop(self, fake_aiosmtplib):
+        """Тест: долго простоявшее соединение проверяется NOOP, мертвое заменяется"""
+        pool = AsyncSMTPPool(size=1, timeout=1, max_idle=0)
+        await pool.send(message_to("first@example.com"))
+        await pool.send(message_to("second@example.com"))
+
+        first = fake_aiosmtplib.clients[0]
+        assert (first.noops, first.sent) == (1, ["first@example.com", "second@example.com"])
+
+        # Сервер закрыл соединение, пока оно простаивало
+        first.alive = False
+        await pool.send(message_to("third@example.com"))
+
+        assert not first.is_connected
+        assert len(fake_aiosmtplib.clients) == 2
+        assert fake_aiosmtplib.clients[1].sent == ["third@example.com"]
@@ -0,0 +1,39 @@
+# tests/tests_payments/conftest.py
+import socket
+import threading
+import time
+
+import pytest
+import uvicorn
+
+from src.services.mocks.stripe_mock import FakeStripe
+from src.services.payment_provider import StripeProvider
+
+
+@pytest.fixture(scope="module")
+def fake_stripe():
+    """Фейковый Stripe на локальном порту (реальный HTTP, как api.stripe.com)"""
+    fake = FakeStripe()
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+
+    server = uvicorn.Server(uvicorn.Config(fake.app, host="127.0.0.1", port=port, log_level="warning", ws="none"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+
+    fake.base_url = f"http://127.0.0.1:{port}"
+    yield fake
+
+    server.should_exit = True
+    thread.join(timeout=5)
+
+
+@pytest.fixture
+async def provider(fake_stripe):
+    fake_stripe.reset()
+    provider = StripeProvider(api_key="sk_test_fake", api_base=fake_stripe.base_url, timeout=5)
+    yield provider
+    await provider.close()
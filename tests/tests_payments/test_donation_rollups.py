@@ -0,0 +1,88 @@
+# tests/tests_payments/test_donation_rollups.py
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import select
+
+from src.database.models import Donation, JobWatermark, Transaction
+from src.services.donation_stats_service import donation_stats_service, DONATION_ROLLUPS_WATERMARK
+
+
+async def settle_donation(db_session, project_id: int, donor_id, amount: float, completed_at: datetime) -> None:
+    donation = Donation(project_id=project_id, donor_id=donor_id, amount=amount, status="completed")
+    db_session.add(donation)
+    await db_session.flush()
+    db_session.add(Transaction(
+        donation_id=donation.id, user_id=donor_id, amount=amount, transaction_type="donation",
+        status="completed", payment_provider="stripe", completed_at=completed_at
+    ))
+    await db_session.commit()
+
+
+class TestDonationRollups:
+    @pytest.mark.asyncio
+    async def test_rollups_are_updated_incrementally(self, db_session, test_user, test_project):
+        """Тест: агрегаты по часам и дням пополняются только новыми донатами после отметки"""
+        project_id, user_id = test_project.id, test_user.id
+        hour = (datetime.now() - timedelta(days=1)).replace(hour=10, minute=0, second=0, microsecond=0)
+
+        await settle_donation(db_session, project_id, user_id, 100, hour + timedelta(minutes=5))
+        await settle_donation(db_session, project_id, user_id, 300, hour + timedelta(minutes=5))
+        await settle_donation(db_session, project_id, None, 50, hour + timedelta(hours=1, minutes=1))
+
+        stats = await donation_stats_service.refresh_rollups(db_session, batch_size=2)
+        assert stats["donations"] == 3 and stats["batches"] == 2
+
+        # Повторный запуск без новых донатов ничего не прибавляет
+        assert (await donation_stats_service.refresh_rollups(db_session))["donations"] == 0
+
+        await settle_donation(db_session, project_id, user_id, 200, hour + timedelta(hours=1, minutes=30))
+        # Донат внутри окна отставания еще не учитывается
+        await settle_donation(db_session, project_id, user_id, 999, datetime.now())
+        assert (await donation_stats_service.refresh_rollups(db_session))["donations"] == 1
+
+        series = await donation_stats_service.get_timeseries(
+            db_session, project_id, "hour", start=hour, end=hour + timedelta(hours=3)
+        )
+        points = [point.model_dump(exclude={"bucket_start"}) for point in series.points]
+        assert points == [
+            {"donations_count": 2, "total_amount": 400.0, "max_amount": 300.0, "unique_donors": 1},
+            {"donations_count": 2, "total_amount": 250.0, "max_amount": 200.0, "unique_donors": 1},
+            {"donations_count": 0, "total_amount": 0.0, "max_amount": 0.0, "unique_donors": 0},
+        ]
+
+        day = hour.replace(hour=0)
+        daily = await donation_stats_service.get_timeseries(
+            db_session, project_id, "day", start=day, end=day + timedelta(days=1)
+        )
+        assert [point.model_dump() for point in daily.points] == [{
+            "bucket_start": day, "donations_count": 4, "total_amount": 650.0,
+            "max_amount": 300.0, "unique_donors": 1
+        }]
+
+        watermark = (await db_session.execute(
+            select(JobWatermark).where(JobWatermark.name == DONATION_ROLLUPS_WATERMARK)
+        )).scalar_one()
+        assert watermark.watermark_at == hour + timedelta(hours=1, minutes=30)
+
+    @pytest.mark.asyncio
+    async def test_timeseries_validation(self, db_session):
+        """Тест: неверная гранулярность и слишком длинный интервал - 400"""
+        with pytest.raises(HTTPException) as exc_info:
+            await donation_stats_service.get_timeseries(db_session, 1, "minute")
+        assert exc_info.value.status_code == 400
+
+        with pytest.raises(HTTPException) as exc_info:
+            await donation_stats_service.get_timeseries(
+                db_session, 1, "hour", start=datetime.now() - timedelta(days=365)
+            )
+        assert exc_info.value.status_code == 400
+
+    def test_timeseries_endpoint(self, client):
+        """Тест: эндпоинт графика отдает заполненный нулями ряд"""
+        response = client.get("/payments/donations/project/1/timeseries", params={"granularity": "day"})
+
+        assert response.status_code == 200
+        assert response.json()["granularity"] == "day"
+        assert len(response.json()["points"]) in (30, 31)
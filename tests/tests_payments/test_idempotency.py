@@ -0,0 +1,148 @@
+# tests/tests_payments/test_idempotency.py
+import asyncio
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from fastapi import HTTPException, status
+from redis.exceptions import ConnectionError as RedisConnectionError
+
+from src.database.redis_client import redis_manager
+from src.services.idempotency_service import idempotency_service
+
+
+class FakeRedis:
+    """Минимальный асинхронный Redis в памяти для ключей идемпотентности"""
+
+    def __init__(self):
+        self.data = {}
+        self.expiry = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def set(self, key, value, nx=False, ex=None):
+        if nx and key in self.data:
+            return None
+        self.data[key] = value
+        self.expiry[key] = ex
+        return True
+
+    async def delete(self, key):
+        return int(self.data.pop(key, None) is not None)
+
+
+class BrokenRedis:
+    async def get(self, key):
+        raise RedisConnectionError("Connection refused")
+
+
+def counting_handler(delay: float = 0):
+    calls = []
+
+    async def handler():
+        calls.append(1)
+        await asyncio.sleep(delay)
+        return {"payment_intent_id": f"pi_{len(calls)}"}
+
+    return handler, calls
+
+
+class TestIdempotencyService:
+    @pytest.mark.asyncio
+    async def test_database_fallback_replays_response(self, db_session):
+        """Тест: без Redis ответ хранится в БД, повтор не выполняет запрос"""
+        handler, calls = counting_handler()
+        request = {"amount": 100, "project_id": 1}
+
+        first = await idempotency_service.execute(db_session, "donate", 1, "key-1", request, handler)
+        second = await idempotency_service.execute(db_session, "donate", 1, "key-1", request, handler)
+
+        assert first == second == {"payment_intent_id": "pi_1"}
+        assert len(calls) == 1
+
+        # Тот же ключ другого пользователя - независимый запрос
+        await idempotency_service.execute(db_session, "donate", 2, "key-1", request, handler)
+        assert len(calls) == 2
+
+    @pytest.mark.asyncio
+    async def test_key_reuse_with_other_params_is_rejected(self, db_session):
+        """Тест: тот же ключ с другими параметрами - 422"""
+        handler, _ = counting_handler()
+        await idempotency_service.execute(db_session, "donate", 1, "key-2", {"amount": 100}, handler)
+
+        with pytest.raises(HTTPException) as exc_info:
+            await idempotency_service.execute(db_session, "donate", 1, "key-2", {"amount": 200}, handler)
+        assert exc_info.value.status_code == status.HTTP_422_UNPROCESSABLE_CONTENT
+
+    @pytest.mark.asyncio
+    async def test_failed_request_can_be_retried(self, db_session):
+        """Тест: ошибка не сохраняется, повтор с тем же ключом выполняется заново"""
+        failing = AsyncMock(side_effect=RuntimeError("Stripe timeout"))
+        with pytest.raises(RuntimeError):
+            await idempotency_service.execute(db_session, "donate", 1, "key-3", {}, failing)
+
+        handler, calls = counting_handler()
+        assert await idempotency_service.execute(db_session, "donate", 1, "key-3", {}, handler) == {
+            "payment_intent_id": "pi_1"
+        }
+
+    @pytest.mark.asyncio
+    async def test_concurrent_duplicates_wait_for_first_result(self, db_session, monkeypatch):
+        """Тест: параллельные дубли ждут ответ первого запроса, а не выполняются"""
+        monkeypatch.setattr(redis_manager, "redis_client", FakeRedis())
+        handler, calls = counting_handler(delay=0.1)
+
+        results = await asyncio.gather(*[
+            idempotency_service.execute(db_session, "donate", 1, "key-4", {"amount": 1}, handler)
+            for _ in range(3)
+        ])
+
+        assert results == [{"payment_intent_id": "pi_1"}] * 3
+        assert len(calls) == 1
+
+    @pytest.mark.asyncio
+    async def test_lock_outlives_slow_handler(self, db_session, monkeypatch):
+        """Тест: блокировка держится не меньше худшей длительности handler"""
+        fake_redis = FakeRedis()
+        monkeypatch.setattr(redis_manager, "redis_client", fake_redis)
+        handler, _ = counting_handler()
+
+        await idempotency_service.execute(db_session, "donate", 1, "key-6", {}, handler, lock_seconds=40.5)
+        await idempotency_service.execute(db_session, "donate", 1, "key-7", {}, handler, lock_seconds=1)
+
+        assert fake_redis.expiry["idempotency:donate:1:key-6:lock"] == 41
+        assert fake_redis.expiry["idempotency:donate:1:key-7:lock"] == idempotency_service.lock_seconds
+
+    @pytest.mark.asyncio
+    async def test_redis_error_falls_back_to_database(self, db_session, monkeypatch):
+        """Тест: при сбое Redis ключи хранятся в БД"""
+        monkeypatch.setattr(redis_manager, "redis_client", BrokenRedis())
+        handler, calls = counting_handler()
+
+        await idempotency_service.execute(db_session, "donate", 1, "key-5", {}, handler)
+        await idempotency_service.execute(db_session, "donate", 1, "key-5", {}, handler)
+
+        assert len(calls) == 1
+
+    def test_donate_endpoint_uses_idempotency_key(self, client):
+        """Тест: повтор /payments/donate с тем же ключом не создает второй донат"""
+        donation_data = {"amount": 500.0, "project_id": 1, "currency": "rub"}
+
+        with patch('src.endpoints.payments.payment_service.create_donation_intent',
+                   new_callable=AsyncMock) as mock_service:
+            mock_service.return_value = {
+                'client_secret': 'cs_test_secret',
+                'payment_intent_id': 'pi_test123',
+                'donation_id': 7
+            }
+
+            headers = {"Idempotency-Key": "retry-me"}
+            first = client.post("/payments/donate", json=donation_data, headers=headers)
+            second = client.post("/payments/donate", json=donation_data, headers=headers)
+            conflict = client.post("/payments/donate", json={**donation_data, "amount": 1.0}, headers=headers)
+
+        assert first.status_code == second.status_code == status.HTTP_200_OK
+        assert first.json() == second.json()
+        assert conflict.status_code == status.HTTP_422_UNPROCESSABLE_CONTENT
+        mock_service.assert_awaited_once()
+        assert mock_service.await_args.kwargs["idempotency_key"] == "retry-me"
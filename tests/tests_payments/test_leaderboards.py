@@ -0,0 +1,374 @@
+# tests/tests_payments/test_leaderboards.py
+import fnmatch
+import uuid
+from datetime import timedelta
+
+import pytest
+from redis.exceptions import ConnectionError as RedisConnectionError, WatchError
+from sqlalchemy import update
+
+from src.database.models import Donation, Project, Transaction, User
+from src.database.redis_client import redis_manager
+from src.repository.donations_repository import donations_repository
+from src.services.leaderboard_service import leaderboard_service
+from src.services.payment_service import PaymentService
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.commands = []
+        self.watched = None
+        self.queueing = True
+
+    def __len__(self):
+        return len(self.commands)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.reset()
+
+    def __getattr__(self, name):
+        if not self.queueing:
+            # После WATCH и до MULTI команды выполняются сразу
+            return getattr(self.redis, name)
+
+        def queue(*args, **kwargs):
+            self.commands.append((name, args, kwargs))
+        return queue
+
+    async def watch(self, *keys):
+        self.watched = {key: self.redis.versions.get(key, 0) for key in keys}
+        self.queueing = False
+
+    def multi(self):
+        self.queueing = True
+
+    async def reset(self):
+        self.commands, self.watched, self.queueing = [], None, True
+
+    async def execute(self):
+        changed = self.watched and any(self.redis.versions.get(key, 0) != version
+                                       for key, version in self.watched.items())
+        commands = self.commands
+        await self.reset()
+        if changed:
+            raise WatchError("Watched variable changed.")
+        return [await getattr(self.redis, name)(*args, **kwargs) for name, args, kwargs in commands]
+
+
+class FakeRedis:
+    """Минимальный асинхронный Redis в памяти с сортированными множествами и WATCH"""
+
+    def __init__(self):
+        self.zsets = {}
+        self.values = {}
+        self.versions = {}
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    def _touch(self, key):
+        self.versions[key] = self.versions.get(key, 0) + 1
+
+    async def zincrby(self, key, amount, member):
+        self._touch(key)
+        zset = self.zsets.setdefault(key, {})
+        zset[member] = zset.get(member, 0) + amount
+        return zset[member]
+
+    async def zadd(self, key, mapping):
+        self._touch(key)
+        self.zsets.setdefault(key, {}).update(mapping)
+        return len(mapping)
+
+    async def zrevrange(self, key, start, end, withscores=False):
+        items = sorted(self.zsets.get(key, {}).items(), key=lambda item: (-item[1], item[0]))
+        return items[start:end + 1]
+
+    async def zrangebyscore(self, key, min, max):
+        exclusive = str(min).startswith("(")
+        low = float(str(min).lstrip("("))
+        return [member for member, score in sorted(self.zsets.get(key, {}).items(), key=lambda item: item[1])
+                if (score > low if exclusive else score >= low) and score <= float(max)]
+
+    async def zremrangebyscore(self, key, min, max):
+        zset = self.zsets.get(key, {})
+        removed = [member for member, score in zset.items() if float(min) <= score <= float(max)]
+        for member in removed:
+            del zset[member]
+        if removed:
+            self._touch(key)
+            if not zset:
+                self.zsets.pop(key)
+        return len(removed)
+
+    async def zunionstore(self, dest, keys):
+        self._touch(dest)
+        union = {}
+        for key in keys:
+            for member, score in self.zsets.get(key, {}).items():
+                union[member] = union.get(member, 0) + score
+        self.zsets.pop(dest, None)
+        if union:
+            self.zsets[dest] = union
+        return len(union)
+
+    async def set(self, key, value, ex=None, nx=False):
+        if nx and key in self.values:
+            return None
+        self.values[key] = value
+        return True
+
+    async def exists(self, *keys):
+        return sum(key in self.zsets or key in self.values for key in keys)
+
+    async def delete(self, *keys):
+        for key in keys:
+            self._touch(key)
+        return sum(
+            (self.zsets.pop(key, None) is not None) + (self.values.pop(key, None) is not None)
+            for key in keys
+        )
+
+    async def scan_iter(self, match=None):
+        for key in list(self.zsets):
+            if match is None or fnmatch.fnmatch(key, match):
+                yield key
+
+
+class JournalRacingRedis(FakeRedis):
+    """FakeRedis, в котором между чтением журнала и EXEC проходит одно проведение"""
+
+    def __init__(self, on_journal_read):
+        super().__init__()
+        self.on_journal_read = on_journal_read
+
+    async def zrangebyscore(self, key, min, max):
+        entries = await super().zrangebyscore(key, min, max)
+        if self.on_journal_read is not None:
+            callback, self.on_journal_read = self.on_journal_read, None
+            await callback()
+        return entries
+
+
+class BrokenRedis:
+    async def zrevrange(self, *args, **kwargs):
+        raise RedisConnectionError("Connection refused")
+
+
+async def create_donor(db_session) -> int:
+    unique_id = uuid.uuid4().hex[:8]
+    user = User(email=f"donor_{unique_id}@example.com", phone=f"+7997{unique_id}",
+                username=f"donor_{unique_id}", hashed_password="hash", is_active=True)
+    db_session.add(user)
+    await db_session.commit()
+    return user.id
+
+
+async def settle(db_session, service, project_id: int, donor_id: int, amount: float, anonymous: bool = False):
+    donation = Donation(project_id=project_id, donor_id=donor_id, amount=amount,
+                        status="pending", is_anonymous=anonymous)
+    db_session.add(donation)
+    await db_session.flush()
+    donation_id = donation.id
+    db_session.add(Transaction(donation_id=donation_id, user_id=donor_id, amount=amount,
+                               transaction_type="donation", status="pending", payment_provider="stripe"))
+    await db_session.commit()
+    intent = {"id": f"pi_{donation_id}", "amount": int(amount * 100), "metadata": {"donation_id": str(donation_id)}}
+    assert (await service._save_donation_to_db(db_session, intent))["success"]
+    return intent
+
+
+async def age_settlements(db_session, fake_redis, seconds: int):
+    """Сдвигает время проведения всех донатов (в БД и в журнале) в прошлое"""
+    await db_session.execute(
+        update(Transaction).where(Transaction.completed_at.is_not(None))
+        .values(completed_at=Transaction.completed_at - timedelta(seconds=seconds))
+    )
+    await db_session.commit()
+    journal = fake_redis.zsets.get(leaderboard_service.JOURNAL_KEY, {})
+    for entry in journal:
+        journal[entry] -= seconds
+
+
+class TestLeaderboards:
+    @pytest.mark.asyncio
+    async def test_settlement_updates_leaderboards(self, db_session, test_user, test_project, monkeypatch):
+        """Тест: проведение доната увеличивает счет проекта, автора и донора (ZINCRBY)"""
+        fake_redis = FakeRedis()
+        monkeypatch.setattr(redis_manager, "redis_client", fake_redis)
+        service = PaymentService()
+        project_id, creator_id = test_project.id, test_user.id
+        other = Project(title="Other", goal_amount=100.0, creator_id=creator_id)
+        db_session.add(other)
+        await db_session.commit()
+        other_id = other.id
+        alice, bob = await create_donor(db_session), await create_donor(db_session)
+
+        intent = await settle(db_session, service, project_id, alice, 100)
+        await settle(db_session, service, project_id, bob, 300)
+        await settle(db_session, service, project_id, alice, 50)
+        await settle(db_session, service, project_id, bob, 1000, anonymous=True)
+        await settle(db_session, service, other_id, alice, 200)
+        # Повторное проведение того же доната счет не меняет
+        await service._save_donation_to_db(db_session, intent)
+
+        projects = await leaderboard_service.get_top_projects(db_session)
+        assert [(e["rank"], e["id"], e["name"], e["total_amount"]) for e in projects] == [
+            (1, project_id, "Test Project", 1450.0), (2, other_id, "Other", 200.0)
+        ]
+        donors = await leaderboard_service.get_top_donors(db_session, project_id)
+        assert [(e["rank"], e["id"], e["total_amount"]) for e in donors] == [(1, bob, 300.0), (2, alice, 150.0)]
+        creators = await leaderboard_service.get_top_creators(db_session, limit=1)
+        assert [(e["id"], e["total_amount"]) for e in creators] == [(creator_id, 1650.0)]
+
+        # Пересборка из PostgreSQL дает тот же результат и убирает лишние рейтинги
+        await age_settlements(db_session, fake_redis, 7200)
+        fake_redis.zsets[leaderboard_service.PROJECTS_KEY]["999"] = 5.0
+        fake_redis.zsets[leaderboard_service.project_donors_key(999)] = {"1": 5.0}
+        snapshot = {key: dict(value) for key, value in fake_redis.zsets.items() if "999" not in key}
+        snapshot[leaderboard_service.PROJECTS_KEY].pop("999")
+
+        stats = await leaderboard_service.rebuild(db_session)
+
+        assert stats == {"projects": 2, "creators": 1, "donor_boards": 2}
+        assert fake_redis.zsets == snapshot
+
+    @pytest.mark.asyncio
+    async def test_donation_during_rebuild_is_not_lost(self, db_session, test_user, test_project, monkeypatch):
+        """Тест: донат, проведенный после чтения БД пересборкой, учитывается один раз"""
+        fake_redis = FakeRedis()
+        monkeypatch.setattr(redis_manager, "redis_client", fake_redis)
+        service = PaymentService()
+        project_id, creator_id = test_project.id, test_user.id
+        alice, bob = await create_donor(db_session), await create_donor(db_session)
+        await settle(db_session, service, project_id, alice, 100)
+        await age_settlements(db_session, fake_redis, 7200)
+
+        read_donor_totals = donations_repository.get_donor_totals
+
+        async def donor_totals_then_settle(db, *args, **kwargs):
+            totals = await read_donor_totals(db, *args, **kwargs)
+            # Параллельное проведение уже после чтения БД пересборкой
+            await settle(db_session, service, project_id, bob, 40)
+            return totals
+
+        monkeypatch.setattr(donations_repository, "get_donor_totals", donor_totals_then_settle)
+        await leaderboard_service.rebuild(db_session)
+
+        boards = {key: value for key, value in fake_redis.zsets.items() if key != leaderboard_service.JOURNAL_KEY}
+        assert boards == {
+            leaderboard_service.PROJECTS_KEY: {str(project_id): 140.0},
+            leaderboard_service.CREATORS_KEY: {str(creator_id): 140.0},
+            leaderboard_service.project_donors_key(project_id): {str(alice): 100.0, str(bob): 40.0},
+        }
+
+    @pytest.mark.asyncio
+    async def test_late_recorded_donation_is_counted_once(self, db_session, test_user, test_project, monkeypatch):
+        """Тест: донат, закоммиченный до чтения БД, но записанный в Redis позже, не считается дважды"""
+        fake_redis = FakeRedis()
+        monkeypatch.setattr(redis_manager, "redis_client", fake_redis)
+        service = PaymentService()
+        project_id = test_project.id
+        alice, bob = await create_donor(db_session), await create_donor(db_session)
+        await settle(db_session, service, project_id, alice, 100)
+        await age_settlements(db_session, fake_redis, 7200)
+
+        # Проведения закоммичены, но record_donation еще не вызван
+        delayed = []
+        record_donation = leaderboard_service.record_donation
+
+        async def delay_record(*args, **kwargs):
+            delayed.append((args, kwargs))
+            return True
+
+        monkeypatch.setattr(leaderboard_service, "record_donation", delay_record)
+        await settle(db_session, service, project_id, alice, 30)
+        await settle(db_session, service, project_id, bob, 40)
+        monkeypatch.setattr(leaderboard_service, "record_donation", record_donation)
+
+        read_donor_totals = donations_repository.get_donor_totals
+
+        async def donor_totals_then_record(db, *args, **kwargs):
+            totals = await read_donor_totals(db, *args, **kwargs)
+            # Первый записывается между чтением БД и подменой рейтингов
+            args_, kwargs_ = delayed[0]
+            await record_donation(*args_, **kwargs_)
+            return totals
+
+        monkeypatch.setattr(donations_repository, "get_donor_totals", donor_totals_then_record)
+        await leaderboard_service.rebuild(db_session)
+        # Второй - уже после подмены
+        args_, kwargs_ = delayed[1]
+        await record_donation(*args_, **kwargs_)
+
+        assert fake_redis.zsets[leaderboard_service.PROJECTS_KEY] == {str(project_id): 170.0}
+        assert fake_redis.zsets[leaderboard_service.project_donors_key(project_id)] == {
+            str(alice): 130.0, str(bob): 40.0
+        }
+
+    @pytest.mark.asyncio
+    async def test_swap_retries_when_journal_changes(self, db_session, test_user, test_project, monkeypatch):
+        """Тест: проведение между чтением журнала и подменой перезапускает подмену"""
+        service = PaymentService()
+        project_id = test_project.id
+        donor_id = await create_donor(db_session)
+
+        async def settle_concurrently():
+            await settle(db_session, service, project_id, donor_id, 25)
+
+        fake_redis = JournalRacingRedis(settle_concurrently)
+        monkeypatch.setattr(redis_manager, "redis_client", fake_redis)
+        await settle(db_session, service, project_id, donor_id, 100)
+
+        await leaderboard_service.rebuild(db_session)
+
+        assert fake_redis.zsets[leaderboard_service.PROJECTS_KEY] == {str(project_id): 125.0}
+        assert not [key for key in fake_redis.zsets if key.endswith(":rebuild")]
+
+    @pytest.mark.asyncio
+    async def test_missing_leaderboard_falls_back_and_requests_rebuild(
+            self, db_session, test_user, test_project, monkeypatch
+    ):
+        """Тест: при пропавшем ключе (очищенный Redis) топ берется из БД и ставится пересборка"""
+        from src.tasks import tasks
+
+        service = PaymentService()
+        project_id = test_project.id
+        donor_id = await create_donor(db_session)
+        monkeypatch.setattr(redis_manager, "redis_client", None)
+        await settle(db_session, service, project_id, donor_id, 70)
+
+        fake_redis = FakeRedis()
+        monkeypatch.setattr(redis_manager, "redis_client", fake_redis)
+        requested = []
+        monkeypatch.setattr(tasks.rebuild_leaderboards, "delay", lambda: requested.append(True))
+
+        for _ in range(2):
+            top = await leaderboard_service.get_top_projects(db_session)
+            assert [(e["id"], e["total_amount"]) for e in top] == [(project_id, 70.0)]
+        assert requested == [True]
+
+    @pytest.mark.asyncio
+    async def test_database_fallback(self, db_session, test_user, test_project, monkeypatch):
+        """Тест: без Redis топ считается запросом к БД"""
+        service = PaymentService()
+        project_id = test_project.id
+        donor_id = await create_donor(db_session)
+        await settle(db_session, service, project_id, donor_id, 70)
+
+        for client in (None, BrokenRedis()):
+            monkeypatch.setattr(redis_manager, "redis_client", client)
+            top = await leaderboard_service.get_top_donors(db_session, project_id)
+            assert [(e["rank"], e["id"], e["total_amount"]) for e in top] == [(1, donor_id, 70.0)]
+
+    def test_leaderboard_endpoints(self, client):
+        """Тест: эндпоинты рейтингов отвечают списком"""
+        for path in ("/payments/leaderboards/projects", "/payments/leaderboards/creators",
+                     "/payments/leaderboards/projects/1/donors"):
+            response = client.get(path, params={"limit": 5})
+            assert response.status_code == 200
+            assert response.json() == []
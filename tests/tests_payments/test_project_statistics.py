@@ -0,0 +1,96 @@
+# tests/tests_payments/test_project_statistics.py
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import select, update
+
+from src.config.settings import settings
+from src.database.models import Donation, Project, Transaction
+from src.services.donation_stats_service import donation_stats_service
+from src.services.payment_service import PaymentService
+
+
+async def add_donation(db_session, project_id: int, donor_id: int, amount: float, changed_at: datetime,
+                       status: str = "completed") -> int:
+    donation = Donation(project_id=project_id, donor_id=donor_id, amount=amount, status=status,
+                        created_at=changed_at, updated_at=changed_at)
+    db_session.add(donation)
+    await db_session.commit()
+    return donation.id
+
+
+async def project_stats(db_session, project_id: int) -> dict:
+    project = (await db_session.execute(
+        select(Project).where(Project.id == project_id).execution_options(populate_existing=True)
+    )).scalar_one()
+    return {
+        "donations_count": project.donations_count,
+        "total_donations": project.total_donations,
+        "avg_donation": project.avg_donation,
+        "max_donation": project.max_donation,
+        "backers_count": project.backers_count,
+        "completion_percentage": project.completion_percentage,
+    }
+
+
+class TestProjectStatistics:
+    @pytest.mark.asyncio
+    async def test_only_changed_projects_are_recomputed(self, db_session, test_user, test_project, monkeypatch):
+        """Тест: пересчитываются только проекты с донатами, измененными после отметки"""
+        project_id, user_id = test_project.id, test_user.id
+        other = Project(title="Other", goal_amount=100.0, creator_id=user_id)
+        db_session.add(other)
+        await db_session.commit()
+        other_id = other.id
+        past = datetime.now() - timedelta(hours=1)
+
+        await add_donation(db_session, project_id, user_id, 200, past)
+        refunded_id = await add_donation(db_session, project_id, user_id, 400, past)
+        await add_donation(db_session, other_id, user_id, 150, past)
+        await add_donation(db_session, project_id, user_id, 999, past, status="pending")
+
+        first = await donation_stats_service.refresh_project_statistics(db_session)
+        assert first["projects_updated"] == 2
+        assert await project_stats(db_session, project_id) == {
+            "donations_count": 2, "total_donations": 600.0, "avg_donation": 300.0, "max_donation": 400.0,
+            "backers_count": 1, "completion_percentage": 60.0
+        }
+        assert (await project_stats(db_session, other_id))["completion_percentage"] == 100.0
+
+        # Без новых изменений пересчитывать нечего
+        assert (await donation_stats_service.refresh_project_statistics(db_session))["projects_updated"] == 0
+
+        # Возврат доната меняет updated_at - пересчитывается только его проект
+        monkeypatch.setattr(settings, "PROJECT_STATS_LAG_SECONDS", 0)
+        await db_session.execute(update(Donation).where(Donation.id == refunded_id).values(status="refunded"))
+        await db_session.commit()
+
+        second = await donation_stats_service.refresh_project_statistics(db_session)
+        assert second["projects_updated"] == 1
+        assert await project_stats(db_session, project_id) == {
+            "donations_count": 1, "total_donations": 200.0, "avg_donation": 200.0, "max_donation": 200.0,
+            "backers_count": 1, "completion_percentage": 20.0
+        }
+
+    @pytest.mark.asyncio
+    async def test_refresh_keeps_backers_counted_at_settlement(self, db_session, test_user, test_project, monkeypatch):
+        """Тест: пересчет дает то же число доноров, что и проведение (донат без донора - отдельный донор)"""
+        project_id, user_id = test_project.id, test_user.id
+        service = PaymentService()
+        for donor_id, amount in ((user_id, 100.0), (user_id, 50.0), (None, 30.0), (None, 20.0)):
+            donation = Donation(project_id=project_id, donor_id=donor_id, amount=amount, status="pending")
+            db_session.add(donation)
+            await db_session.flush()
+            db_session.add(Transaction(donation_id=donation.id, user_id=donor_id, amount=amount,
+                                       transaction_type="donation", status="pending", payment_provider="stripe"))
+            await db_session.commit()
+            intent = {"id": f"pi_{donation.id}", "amount": int(amount * 100),
+                      "metadata": {"donation_id": str(donation.id)}}
+            assert (await service._save_donation_to_db(db_session, intent))["success"]
+
+        settled = (await project_stats(db_session, project_id))["backers_count"]
+        assert settled == 3
+
+        monkeypatch.setattr(settings, "PROJECT_STATS_LAG_SECONDS", 0)
+        assert (await donation_stats_service.refresh_project_statistics(db_session))["projects_updated"] == 1
+        assert (await project_stats(db_session, project_id))["backers_count"] == settled
@@ -0,0 +1,124 @@
+# tests/tests_payments/test_reconciliation.py
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import select, update
+
+from src.database.models import Donation, Transaction
+from src.services.payment_service import PaymentService
+
+
+async def age_donation(db_session, fake_stripe, result, hours: float):
+    """Сдвиг времени создания транзакции и платежа в прошлое"""
+    created_at = datetime.now() - timedelta(hours=hours)
+    await db_session.execute(
+        update(Transaction)
+        .where(Transaction.donation_id == result['donation_id'])
+        .values(created_at=created_at)
+    )
+    await db_session.commit()
+    if result.get('payment_intent_id'):
+        fake_stripe.payment_intents[result['payment_intent_id']]['created'] = int(created_at.timestamp())
+
+
+async def donation_statuses(db_session):
+    rows = await db_session.execute(
+        select(Donation.id, Donation.status, Transaction.status)
+        .join(Transaction, Transaction.donation_id == Donation.id)
+        .execution_options(populate_existing=True)
+    )
+    return {donation_id: (donation_status, transaction_status) for donation_id, donation_status, transaction_status in rows}
+
+
+class TestPaymentReconciliation:
+    @pytest.mark.asyncio
+    async def test_stuck_transactions_are_settled_or_failed(self, db_session, test_user, test_project,
+                                                            fake_stripe, provider):
+        """Тест: зависшие pending транзакции сверяются со Stripe пачками"""
+        service = PaymentService(provider=provider)
+        project_id, user_id = test_project.id, test_user.id
+
+        async def donate(amount):
+            return await service.create_donation_intent(db_session, amount, project_id, user_id)
+
+        paid, canceled, waiting, abandoned, fresh = [await donate(amount) for amount in (100, 20, 30, 40, 50)]
+        fake_stripe.payment_intents[paid['payment_intent_id']]['status'] = 'succeeded'
+        fake_stripe.payment_intents[canceled['payment_intent_id']]['status'] = 'canceled'
+
+        # Платеж, который так и не дошел до Stripe
+        lost = Donation(project_id=project_id, donor_id=user_id, amount=60, status="pending")
+        db_session.add(lost)
+        await db_session.flush()
+        db_session.add(Transaction(donation_id=lost.id, user_id=user_id, amount=60, status="pending",
+                                   transaction_type="donation", payment_provider="stripe"))
+        await db_session.commit()
+        lost_result = {'donation_id': lost.id}
+
+        for result, hours in [(lost_result, 48), (abandoned, 48), (paid, 2), (canceled, 2), (waiting, 2)]:
+            await age_donation(db_session, fake_stripe, result, hours)
+        fake_stripe.requests.clear()
+
+        metrics = await service.reconcile_pending_transactions(db_session, batch_size=2)
+
+        assert {key: metrics[key] for key in ('checked', 'settled', 'failed', 'expired', 'missing', 'still_pending')} == {
+            'checked': 5, 'settled': 1, 'failed': 1, 'expired': 1, 'missing': 1, 'still_pending': 1
+        }
+        assert metrics['drift_amount'] == 100
+        assert metrics['oldest_pending_seconds'] >= 2 * 3600 - 60
+
+        statuses = await donation_statuses(db_session)
+        assert statuses[paid['donation_id']] == ('completed', 'completed')
+        assert statuses[canceled['donation_id']] == ('failed', 'failed')
+        assert statuses[abandoned['donation_id']] == ('failed', 'failed')
+        assert statuses[lost.id] == ('failed', 'failed')
+        assert statuses[waiting['donation_id']] == ('pending', 'pending')
+        assert statuses[fresh['donation_id']] == ('pending', 'pending')
+        assert fake_stripe.payment_intents[abandoned['payment_intent_id']]['status'] == 'canceled'
+
+        # Состояние платежей берется списком на пачку, а не запросом на каждый платеж
+        methods = [(method, path) for method, path, _ in fake_stripe.requests]
+        assert methods.count(("GET", "/v1/payment_intents")) == 3
+        assert not [path for method, path in methods if method == "GET" and path != "/v1/payment_intents"]
+
+    @pytest.mark.asyncio
+    async def test_amount_mismatch_is_not_settled(self, db_session, test_user, test_project, fake_stripe, provider):
+        """Тест: расхождение суммы фиксируется в метриках, донат не проводится"""
+        service = PaymentService(provider=provider)
+        result = await service.create_donation_intent(db_session, 10, test_project.id, test_user.id)
+        intent = fake_stripe.payment_intents[result['payment_intent_id']]
+        intent.update(status='succeeded', amount=999)
+        await age_donation(db_session, fake_stripe, result, 1)
+
+        metrics = await service.reconcile_pending_transactions(db_session)
+
+        assert metrics['amount_mismatch'] == 1
+        assert (await donation_statuses(db_session))[result['donation_id']] == ('pending', 'pending')
+
+    @pytest.mark.asyncio
+    async def test_fractional_amount_is_settled(self, db_session, test_user, test_project, fake_stripe, provider):
+        """Тест: сумма с копейками (19.99) совпадает при создании платежа и при сверке"""
+        service = PaymentService(provider=provider)
+        result = await service.create_donation_intent(db_session, 19.99, test_project.id, test_user.id)
+        intent = fake_stripe.payment_intents[result['payment_intent_id']]
+        assert intent['amount'] == 1999
+        intent['status'] = 'succeeded'
+        await age_donation(db_session, fake_stripe, result, 1)
+
+        metrics = await service.reconcile_pending_transactions(db_session)
+
+        assert (metrics['amount_mismatch'], metrics['settled']) == (0, 1)
+        assert (await donation_statuses(db_session))[result['donation_id']] == ('completed', 'completed')
+
+    @pytest.mark.asyncio
+    async def test_canceled_webhook_fails_donation(self, db_session, test_user, test_project, fake_stripe, provider):
+        """Тест: событие отмены платежа переводит донат в failed"""
+        service = PaymentService(provider=provider)
+        result = await service.create_donation_intent(db_session, 10, test_project.id, test_user.id)
+
+        await service.process_webhook_event(db_session, {
+            'type': 'payment_intent.canceled',
+            'data': {'object': {'id': result['payment_intent_id'],
+                                'metadata': {'donation_id': str(result['donation_id'])}}}
+        })
+
+        assert (await donation_statuses(db_session))[result['donation_id']] == ('failed', 'failed')
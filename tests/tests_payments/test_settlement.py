@@ -0,0 +1,138 @@
+# tests/tests_payments/test_settlement.py
+import uuid
+
+import pytest
+
+from src.database.models import Donation, Transaction, User, Wallet
+from src.repository.wallets_repository import wallets_repository
+from src.services.payment_service import PaymentService
+
+
+async def create_user(db_session) -> User:
+    unique_id = uuid.uuid4().hex[:8]
+    user = User(
+        email=f"donor_{unique_id}@example.com",
+        phone=f"+7998{unique_id}",
+        username=f"donor_{unique_id}",
+        hashed_password="mock_hashed_password_12345",
+        is_active=True
+    )
+    db_session.add(user)
+    await db_session.commit()
+    return user
+
+
+async def create_pending_donation(db_session, project_id: int, donor_id: int, amount: float) -> Donation:
+    donation = Donation(project_id=project_id, donor_id=donor_id, amount=amount, status="pending")
+    db_session.add(donation)
+    await db_session.flush()
+    db_session.add(Transaction(
+        donation_id=donation.id, user_id=donor_id, amount=amount,
+        transaction_type="donation", status="pending", payment_provider="stripe"
+    ))
+    await db_session.commit()
+    return donation
+
+
+def succeeded_intent(donation: Donation) -> dict:
+    return {
+        "id": f"pi_{donation.id}",
+        "amount": int(donation.amount * 100),
+        "metadata": {"donation_id": str(donation.id)},
+    }
+
+
+class TestDonationSettlement:
+    @pytest.mark.asyncio
+    async def test_settlement_updates_everything_once(self, db_session, test_user, test_project):
+        """Тест: проведение меняет донат, транзакцию, проект и кошельки, повтор ничего не меняет"""
+        donor = await create_user(db_session)
+        creator_id, donor_id = test_user.id, donor.id
+        db_session.add_all([Wallet(user_id=creator_id), Wallet(user_id=donor_id)])
+        await db_session.commit()
+        donation = await create_pending_donation(db_session, test_project.id, donor.id, 150.0)
+        service = PaymentService()
+
+        intent = succeeded_intent(donation)
+        first = await service._save_donation_to_db(db_session, intent)
+        second = await service._save_donation_to_db(db_session, intent)
+
+        assert first == second == {"success": True, "donation_id": int(intent["metadata"]["donation_id"])}
+
+        for obj in (donation, test_project):
+            await db_session.refresh(obj)
+        transaction = await db_session.get(Transaction, donation.id)
+        creator_wallet = await wallets_repository.get_by_user(db_session, creator_id)
+        donor_wallet = await wallets_repository.get_by_user(db_session, donor_id)
+        await db_session.refresh(creator_wallet)
+        await db_session.refresh(donor_wallet)
+
+        assert donation.status == "completed"
+        assert transaction.status == "completed" and transaction.completed_at is not None
+        assert (test_project.current_amount, test_project.total_donations, test_project.backers_count) == (150, 150, 1)
+        assert test_project.last_donation_at is not None
+        assert (creator_wallet.balance, creator_wallet.total_earned) == (150, 150)
+        assert donor_wallet.total_donated == 150
+
+    @pytest.mark.asyncio
+    async def test_backers_are_counted_once_per_donor(self, db_session, test_project):
+        """Тест: повторный донат того же донора не увеличивает число поддержавших"""
+        donor = await create_user(db_session)
+        other_donor = await create_user(db_session)
+        service = PaymentService()
+
+        for user, amount in [(donor, 10.0), (donor, 20.0), (other_donor, 5.0)]:
+            donation = await create_pending_donation(db_session, test_project.id, user.id, amount)
+            result = await service._save_donation_to_db(db_session, succeeded_intent(donation))
+            assert result["success"]
+
+        await db_session.refresh(test_project)
+        assert (test_project.current_amount, test_project.backers_count) == (35, 2)
+
+    @pytest.mark.asyncio
+    async def test_late_success_does_not_resurrect_donation(self, db_session, test_project):
+        """Тест: запоздавшее событие об успехе не проводит возвращенный или отклоненный донат"""
+        donor = await create_user(db_session)
+        service = PaymentService()
+
+        for final_status in ("refunded", "failed"):
+            donation = await create_pending_donation(db_session, test_project.id, donor.id, 40.0)
+            donation.status = final_status
+            transaction = await db_session.get(Transaction, donation.id)
+            transaction.status = final_status
+            await db_session.commit()
+
+            result = await service._save_donation_to_db(db_session, succeeded_intent(donation))
+            assert result == {"success": True, "donation_id": donation.id}
+
+            for obj in (donation, transaction, test_project):
+                await db_session.refresh(obj)
+            assert donation.status == transaction.status == final_status
+            assert transaction.completed_at is None
+            assert (test_project.current_amount, test_project.backers_count) == (0, 0)
+
+    @pytest.mark.asyncio
+    async def test_unknown_donation_is_reported(self, db_session):
+        """Тест: несуществующий донат - ошибка без изменений"""
+        result = await PaymentService()._save_donation_to_db(
+            db_session, {"id": "pi_x", "amount": 100, "metadata": {"donation_id": "999"}}
+        )
+        assert result == {"success": False, "error": "Donation not found"}
+
+    @pytest.mark.asyncio
+    async def test_update_balance_uses_database_value(self, db_session, test_user):
+        """Тест: баланс увеличивается от значения в БД, а не от устаревшего объекта"""
+        user_id = test_user.id
+        wallet = Wallet(user_id=user_id, balance=100.0, total_earned=100.0)
+        db_session.add(wallet)
+        await db_session.commit()
+
+        # Параллельное зачисление прошло мимо объекта в сессии
+        await wallets_repository.credit_earnings(db_session, user_id, 50.0)
+        await db_session.commit()
+
+        updated = await wallets_repository.update_balance(db_session, wallet.id, 25.0, 'add')
+        assert (updated.balance, updated.total_earned) == (175.0, 175.0)
+
+        updated = await wallets_repository.update_balance(db_session, wallet.id, 75.0, 'subtract')
+        assert (updated.balance, updated.total_earned) == (100.0, 175.0)
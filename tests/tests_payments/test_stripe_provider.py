@@ -0,0 +1,140 @@
+# tests/tests_payments/test_stripe_provider.py
+from unittest.mock import patch
+
+from sqlalchemy import func, select
+
+import httpx
+import pytest
+import stripe
+from fastapi import HTTPException
+
+from src.database.models import Donation, Transaction
+
+from src.repository.transactions_repository import transactions_repository
+from src.services.payment_provider import BudgetedHTTPXClient, RetryBudget, StripeProvider
+from src.services.payment_service import PaymentService
+
+
+class TestStripeProvider:
+    @pytest.mark.asyncio
+    async def test_donation_intent_status_and_refund(self, db_session, test_user, test_project, fake_stripe, provider):
+        """Тест создания платежа, получения статуса и возврата через фейковый Stripe"""
+        service = PaymentService(provider=provider)
+
+        result = await service.create_donation_intent(db_session, 150.5, test_project.id, test_user.id)
+
+        intent = fake_stripe.payment_intents[result['payment_intent_id']]
+        assert intent['amount'] == 15050
+        assert intent['metadata']['donation_id'] == str(result['donation_id'])
+        assert result['client_secret'] == intent['client_secret']
+
+        transaction = await transactions_repository.get_by_provider_id(db_session, result['payment_intent_id'])
+        assert transaction.donation_id == result['donation_id']
+
+        payment_status = await service.get_payment_status(result['payment_intent_id'])
+        assert payment_status['status'] == 'requires_payment_method'
+        assert payment_status['amount'] == 150.5
+
+        refund_id = await service.create_refund(result['payment_intent_id'], amount=50)
+        assert fake_stripe.refunds[refund_id]['amount'] == 5000
+
+    @pytest.mark.asyncio
+    async def test_retry_after_outage_is_idempotent(self, db_session, test_user, test_project, fake_stripe, provider):
+        """Тест: повтор после 500 не создает второй платеж"""
+        service = PaymentService(provider=provider)
+        fake_stripe.fail_next = 1
+
+        result = await service.create_donation_intent(db_session, 10, test_project.id, test_user.id)
+
+        creates = [r for r in fake_stripe.requests if r[:2] == ("POST", "/v1/payment_intents")]
+        assert len(creates) == 2
+        assert creates[0][2] == creates[1][2] == f"donation-intent-{result['donation_id']}"
+        assert list(fake_stripe.payment_intents) == [result['payment_intent_id']]
+
+    @pytest.mark.asyncio
+    async def test_client_idempotency_key_is_forwarded(self, db_session, test_user, test_project, fake_stripe, provider):
+        """Тест: Idempotency-Key клиента передается в Stripe"""
+        service = PaymentService(provider=provider)
+        user_id = test_user.id
+
+        await service.create_donation_intent(db_session, 10, test_project.id, user_id, idempotency_key="abc")
+
+        creates = [r for r in fake_stripe.requests if r[:2] == ("POST", "/v1/payment_intents")]
+        assert creates[0][2] == f"donate-{user_id}-abc"
+
+    @pytest.mark.asyncio
+    async def test_client_key_retry_reuses_donation(self, db_session, test_user, test_project, fake_stripe, provider):
+        """Тест: повтор с тем же ключом после сбоя Stripe не плодит донаты и отдает тот же платеж"""
+        service = PaymentService(provider=provider)
+        user_id, project_id = test_user.id, test_project.id
+
+        # Первая попытка исчерпывает все повторы SDK
+        fake_stripe.fail_next = provider.max_network_retries + 1
+        with pytest.raises(HTTPException):
+            await service.create_donation_intent(db_session, 10, project_id, user_id, idempotency_key="k1")
+
+        second = await service.create_donation_intent(db_session, 10, project_id, user_id, idempotency_key="k1")
+        third = await service.create_donation_intent(db_session, 10, project_id, user_id, idempotency_key="k1")
+
+        assert second == third
+        assert list(fake_stripe.payment_intents) == [second['payment_intent_id']]
+        assert fake_stripe.payment_intents[second['payment_intent_id']]['metadata']['donation_id'] == str(
+            second['donation_id']
+        )
+        for model in (Donation, Transaction):
+            assert (await db_session.execute(select(func.count()).select_from(model))).scalar() == 1
+
+        # Тот же ключ с другой суммой - ошибка клиента
+        with pytest.raises(HTTPException) as exc_info:
+            await service.create_donation_intent(db_session, 20, project_id, user_id, idempotency_key="k1")
+        assert exc_info.value.status_code == 422
+
+    def test_max_request_seconds_covers_retries(self):
+        """Тест: худшая длительность вызова учитывает все попытки и паузы"""
+        provider = StripeProvider(api_key="sk_test_fake", timeout=10, max_network_retries=2)
+        assert provider.max_request_seconds == 10 * 3 + stripe.HTTPClient.MAX_DELAY * 2
+
+    @pytest.mark.asyncio
+    async def test_errors_are_mapped_to_http(self, fake_stripe, provider):
+        """Тест: ошибка Stripe превращается в 400"""
+        service = PaymentService(provider=provider)
+
+        with pytest.raises(HTTPException) as exc_info:
+            await service.get_payment_status("pi_missing")
+        assert exc_info.value.status_code == 400
+
+    @pytest.mark.asyncio
+    async def test_exhausted_retry_budget_stops_retries(self, fake_stripe, provider):
+        """Тест: без бюджета повторов ошибка возвращается сразу"""
+        provider.retry_budget = RetryBudget(ratio=0, reserve=0)
+        fake_stripe.fail_next = 1
+
+        with pytest.raises(stripe.APIError):
+            await provider.retrieve_payment_intent("pi_any")
+        assert len(fake_stripe.requests) == 1
+
+    def test_retry_budget_accrues_with_requests(self):
+        """Тест пополнения бюджета повторов"""
+        budget = RetryBudget(ratio=0.5, reserve=0)
+        assert not budget.try_spend()
+
+        budget.record_request()
+        budget.record_request()
+        assert budget.try_spend()
+        assert not budget.try_spend()
+
+    def test_http_client_creates_single_pooled_async_client(self):
+        """Тест: SDK получает один httpx клиент с лимитами пула, лишний не создается"""
+        created = []
+        original = httpx.AsyncClient
+
+        def track(*args, **kwargs):
+            client = original(*args, **kwargs)
+            created.append(client)
+            return client
+
+        with patch("httpx.AsyncClient", side_effect=track):
+            http_client = BudgetedHTTPXClient(retry_budget=RetryBudget(0.2), max_connections=7, timeout=5)
+
+        assert created == [http_client._client_async]
+        assert http_client._client_async._transport._pool._max_connections == 7
@@ -0,0 +1,187 @@
+# tests/tests_payments/test_webhook_inbox.py
+import json
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import select
+
+from src.database.models import Donation, StripeWebhookEvent
+from src.services.payment_service import PaymentService
+
+
+def make_event(event_id: str, created: int, event_type: str = "payment_intent.payment_failed", **intent) -> bytes:
+    payment_intent = {"id": f"pi_{event_id}", "amount": 1000, "metadata": {}, **intent}
+    return json.dumps({
+        "id": event_id,
+        "type": event_type,
+        "created": created,
+        "data": {"object": payment_intent},
+    }).encode()
+
+
+@pytest.fixture
+def service():
+    with patch("src.services.payment_service.stripe.Webhook.construct_event"), \
+            patch("src.tasks.tasks.process_webhook_inbox.delay") as mock_delay:
+        service = PaymentService()
+        service.mock_delay = mock_delay
+        yield service
+
+
+async def get_inbox(db_session):
+    result = await db_session.execute(select(StripeWebhookEvent).order_by(StripeWebhookEvent.id))
+    events = list(result.scalars().all())
+    for event in events:
+        await db_session.refresh(event)
+    return events
+
+
+class TestWebhookInbox:
+    @pytest.mark.asyncio
+    async def test_event_is_stored_once_and_acknowledged(self, db_session, service):
+        """Тест: событие сохраняется один раз, повторная доставка - duplicate"""
+        payload = make_event("evt_1", 1700000000)
+
+        first = await service.handle_webhook(db_session, payload, "sig")
+        second = await service.handle_webhook(db_session, payload, "sig")
+
+        assert first == {"status": "received"}
+        assert second == {"status": "duplicate"}
+        assert service.mock_delay.call_count == 1
+
+        events = await get_inbox(db_session)
+        assert [(e.event_id, e.status, e.payload["id"]) for e in events] == [("evt_1", "pending", "evt_1")]
+
+    @pytest.mark.asyncio
+    async def test_invalid_payload_is_rejected(self, db_session, service):
+        """Тест: тело без id события отклоняется с 400"""
+        with pytest.raises(HTTPException) as exc_info:
+            await service.handle_webhook(db_session, b'{"type": "x"}', "sig")
+        assert exc_info.value.status_code == 400
+
+    @pytest.mark.asyncio
+    async def test_events_are_processed_in_stripe_order(self, db_session, service, monkeypatch):
+        """Тест: события обрабатываются пачками в порядке создания в Stripe"""
+        for event_id, created in [("evt_c", 30), ("evt_a", 10), ("evt_b", 20)]:
+            await service.handle_webhook(db_session, make_event(event_id, 1700000000 + created), "sig")
+
+        seen = []
+
+        async def record(db, event):
+            seen.append(event["id"])
+            return {"status": "failed"}
+
+        monkeypatch.setattr(service, "process_webhook_event", record)
+        stats = await service.process_webhook_inbox(db_session, batch_size=2)
+
+        assert seen == ["evt_a", "evt_b", "evt_c"]
+        assert stats == {"processed": 3, "failed": 0}
+        assert {e.status for e in await get_inbox(db_session)} == {"processed"}
+
+        # Обработанные события повторно не берутся
+        assert await service.process_webhook_inbox(db_session) == {"processed": 0, "failed": 0}
+
+    @pytest.mark.asyncio
+    async def test_failed_event_is_retried_then_replayed(self, db_session, service, monkeypatch):
+        """Тест: ошибка возвращает событие в очередь, после лимита - failed и ручной повтор"""
+        monkeypatch.setattr("src.services.payment_service.settings.WEBHOOK_INBOX_MAX_ATTEMPTS", 2)
+        await service.handle_webhook(db_session, make_event("evt_fail", 1700000000), "sig")
+
+        async def broken(db, event):
+            raise RuntimeError("database is down")
+
+        monkeypatch.setattr(service, "process_webhook_event", broken)
+        assert await service.process_webhook_inbox(db_session, max_batches=1) == {"processed": 0, "failed": 1}
+        assert (await get_inbox(db_session))[0].status == "pending"
+
+        await service.process_webhook_inbox(db_session, max_batches=1)
+        event = (await get_inbox(db_session))[0]
+        assert (event.status, event.attempts, event.last_error) == ("failed", 2, "database is down")
+
+        monkeypatch.undo()
+        assert await service.replay_failed_webhooks(db_session, ["evt_fail"]) == 1
+        assert await service.process_webhook_inbox(db_session) == {"processed": 1, "failed": 0}
+        assert (await get_inbox(db_session))[0].status == "processed"
+
+    @pytest.mark.asyncio
+    async def test_stale_event_out_of_attempts_is_dead_lettered(self, db_session, service, monkeypatch):
+        """Тест: зависшее в processing событие без оставшихся попыток уходит в failed"""
+        monkeypatch.setattr("src.services.payment_service.settings.WEBHOOK_INBOX_MAX_ATTEMPTS", 2)
+        stale = datetime.now() - timedelta(hours=1)
+        db_session.add_all([
+            StripeWebhookEvent(
+                event_id="evt_poison", event_type="payment_intent.payment_failed",
+                payload=json.loads(make_event("evt_poison", 1700000000)),
+                status="processing", attempts=2, claimed_at=stale, received_at=stale
+            ),
+            StripeWebhookEvent(
+                event_id="evt_stuck", event_type="payment_intent.payment_failed",
+                payload=json.loads(make_event("evt_stuck", 1700000001)),
+                status="processing", attempts=1, claimed_at=stale, received_at=stale
+            ),
+        ])
+        await db_session.commit()
+
+        assert await service.process_webhook_inbox(db_session) == {"processed": 1, "failed": 0}
+
+        poison, stuck = await get_inbox(db_session)
+        assert (poison.status, poison.attempts) == ("failed", 2)
+        assert (stuck.status, stuck.attempts) == ("processed", 2)
+
+    @pytest.mark.asyncio
+    async def test_settled_donation_is_not_settled_again(self, db_session, test_user, test_project, service):
+        """Тест: повторное событие об оплате не проводит донат второй раз"""
+        donation = Donation(project_id=test_project.id, donor_id=test_user.id, amount=10, status="completed")
+        db_session.add(donation)
+        await db_session.commit()
+
+        payload = make_event(
+            "evt_paid", 1700000000, "payment_intent.succeeded",
+            metadata={"donation_id": str(donation.id), "transaction_id": "0"}
+        )
+        await service.handle_webhook(db_session, payload, "sig")
+
+        with patch("src.services.payment_service.wallets_repository.credit_earnings") as mock_wallet:
+            stats = await service.process_webhook_inbox(db_session)
+
+        assert stats == {"processed": 1, "failed": 0}
+        mock_wallet.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_settlement_error_does_not_abort_the_batch(self, db_session, test_user, test_project, service):
+        """Тест: ошибка проведения доната откатывает только его, остальные события пачки обрабатываются"""
+        donations = [
+            Donation(project_id=test_project.id, donor_id=test_user.id, amount=10, status="pending")
+            for _ in range(2)
+        ]
+        db_session.add_all(donations)
+        await db_session.commit()
+
+        for index, donation in enumerate(donations):
+            payload = make_event(
+                f"evt_pay_{index}", 1700000000 + index, "payment_intent.succeeded",
+                metadata={"donation_id": str(donation.id)}
+            )
+            await service.handle_webhook(db_session, payload, "sig")
+
+        calls = []
+
+        async def flaky_credit(db, user_id, amount):
+            calls.append(user_id)
+            if len(calls) == 1:
+                raise RuntimeError("wallet row locked")
+            return True
+
+        with patch("src.services.payment_service.wallets_repository.credit_earnings", side_effect=flaky_credit):
+            stats = await service.process_webhook_inbox(db_session)
+
+        assert stats == {"processed": 1, "failed": 1}
+        first, second = await get_inbox(db_session)
+        assert (first.status, first.attempts, first.last_error) == ("pending", 1, "wallet row locked")
+        assert second.status == "processed"
+
+        for donation in donations:
+            await db_session.refresh(donation)
+        assert [d.status for d in donations] == ["pending", "completed"]
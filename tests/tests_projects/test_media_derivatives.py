@@ -0,0 +1,29 @@
+# tests/tests_projects/test_media_derivatives.py
+import pytest
+
+Image = pytest.importorskip("PIL.Image")
+
+from src.utils.image_utils import build_image_variants, THUMBNAIL_SIZE
+
+
+class TestMediaDerivatives:
+    def test_build_image_variants(self, tmp_path):
+        """Тест генерации превью и адаптивных вариантов"""
+        source = tmp_path / "source.png"
+        Image.new("RGBA", (1000, 500), (200, 100, 50, 255)).save(source)
+        output_dir = tmp_path / "derivatives"
+
+        variants = build_image_variants(str(source), str(output_dir))
+
+        # 1280w больше оригинала - не генерируется
+        assert set(variants) == {"thumb", "320w", "640w"}
+        assert variants["640w"] == {"webp": "640w.webp", "jpg": "640w.jpg"}
+
+        with Image.open(output_dir / "thumb.webp") as thumb:
+            assert thumb.size == (THUMBNAIL_SIZE, THUMBNAIL_SIZE)
+        with Image.open(output_dir / "320w.jpg") as small:
+            assert small.size == (320, 160)
+            assert small.mode == "RGB"
+
+        assert not list(output_dir.glob(".*.part"))
+
@@ -0,0 +1,78 @@
+# tests/tests_projects/test_media_serving.py
+import io
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from src.database.models.models_content import ProjectMedia
+from src.endpoints import media as media_endpoints
+from src.services.media_service import media_service
+
+from starlette.datastructures import UploadFile
+
+PNG_HEADER = b'\x89PNG\r\n\x1a\n' + b'\x00' * 32
+
+
+def make_upload(content: bytes, filename: str) -> UploadFile:
+    return UploadFile(file=io.BytesIO(content), filename=filename)
+
+
+class TestMediaServing:
+    @pytest.fixture
+    async def media_client(self, db_session, tmp_path, monkeypatch):
+        monkeypatch.setattr(media_service, "media_root", str(tmp_path))
+        monkeypatch.setattr(media_service, "_access_cache", {})
+        monkeypatch.setattr(
+            media_endpoints, "AsyncSessionFactory",
+            async_sessionmaker(db_session.bind, expire_on_commit=False)
+        )
+
+        app = FastAPI()
+        app.include_router(media_endpoints.media_router)
+        return TestClient(app)
+
+    async def _store(self, db_session, test_project, content: bytes, is_approved: bool = True):
+        blob = await media_service.store_upload(db_session, make_upload(content, "video.png"))
+        db_session.add(ProjectMedia(
+            project_id=test_project.id,
+            file_url=blob.file_url,
+            file_type=blob.file_type,
+            file_name="video.png",
+            is_approved=is_approved
+        ))
+        await db_session.commit()
+        return blob
+
+    @pytest.mark.asyncio
+    async def test_range_request_returns_partial_content(self, db_session, test_project, media_client):
+        """Тест отдачи диапазона байт с кэш-заголовками"""
+        content = PNG_HEADER + bytes(range(256)) * 4
+        blob = await self._store(db_session, test_project, content)
+
+        response = media_client.get(blob.file_url, headers={"Range": "bytes=10-19"})
+
+        assert response.status_code == 206
+        assert response.content == content[10:20]
+        assert response.headers["content-range"] == f"bytes 10-19/{len(content)}"
+        assert response.headers["etag"] == f'"{blob.sha256}"'
+        assert "immutable" in response.headers["cache-control"]
+
+    @pytest.mark.asyncio
+    async def test_if_none_match_returns_not_modified(self, db_session, test_project, media_client):
+        """Тест условного запроса по ETag"""
+        blob = await self._store(db_session, test_project, PNG_HEADER + b'etag')
+
+        response = media_client.get(blob.file_url, headers={"If-None-Match": f'"{blob.sha256}"'})
+
+        assert response.status_code == 304
+        assert response.content == b''
+
+    @pytest.mark.asyncio
+    async def test_unapproved_media_is_hidden(self, db_session, test_project, media_client):
+        """Тест: неодобренное медиа не отдается"""
+        blob = await self._store(db_session, test_project, PNG_HEADER + b'hidden', is_approved=False)
+
+        assert media_client.get(blob.file_url).status_code == 404
+        assert media_client.get("/media/../etc/passwd").status_code == 404
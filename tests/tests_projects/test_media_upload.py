@@ -0,0 +1,200 @@
+# tests/tests_projects/test_media_upload.py
+import hashlib
+import io
+import os
+
+import pytest
+from fastapi import HTTPException
+from starlette.datastructures import UploadFile
+
+from src.database.models.models_content import MediaType
+from src.utils import file_utils
+from src.utils.file_utils import stream_upload_to_disk, sniff_mime_type, validate_and_get_media_type
+
+PNG_HEADER = b'\x89PNG\r\n\x1a\n' + b'\x00' * 32
+
+
+def make_upload(content: bytes, filename: str) -> UploadFile:
+    return UploadFile(file=io.BytesIO(content), filename=filename)
+
+
+class TestMediaUpload:
+    def test_sniff_mime_type(self):
+        """Тест определения типа по сигнатуре"""
+        assert sniff_mime_type(PNG_HEADER) == 'image/png'
+        assert sniff_mime_type(b'\x00\x00\x00\x18ftypmp42') == 'video/mp4'
+        assert sniff_mime_type(b'RIFF\x00\x00\x00\x00WEBPVP8 ') == 'image/webp'
+        assert sniff_mime_type(b'plain text') is None
+
+    def test_unknown_ftyp_brand_is_not_video(self):
+        """Тест: HEIF/AVIF и неизвестные бренды ISO BMFF не принимаются за видео"""
+        assert sniff_mime_type(b'\x00\x00\x00\x1cftypisom') == 'video/mp4'
+        assert sniff_mime_type(b'\x00\x00\x00\x18ftypM4A ') == 'audio/mp4'
+        assert sniff_mime_type(b'\x00\x00\x00\x18ftypheic') == 'image/heic'
+        assert sniff_mime_type(b'\x00\x00\x00\x1cftypavif') == 'image/avif'
+        assert sniff_mime_type(b'\x00\x00\x00\x18ftypzzzz') is None
+
+        for head in (b'\x00\x00\x00\x18ftypheic', b'\x00\x00\x00\x18ftypzzzz'):
+            with pytest.raises(HTTPException) as exc_info:
+                file_utils.resolve_media_type("clip.mp4", head)
+            assert exc_info.value.status_code == 400
+
+    @pytest.mark.asyncio
+    async def test_stream_upload_hashes_and_renames(self, tmp_path):
+        """Тест потокового сохранения: хеш, размер и отсутствие временного файла"""
+        content = PNG_HEADER + os.urandom(3 * 1024)
+        target = tmp_path / "image" / "cover.png"
+
+        result = await stream_upload_to_disk(make_upload(content, "cover.png"), str(target))
+
+        assert result.media_type == MediaType.IMAGE
+        assert result.mime_type == 'image/png'
+        assert result.file_size == len(content)
+        assert result.sha256 == hashlib.sha256(content).hexdigest()
+        assert target.read_bytes() == content
+        assert os.listdir(target.parent) == ["cover.png"]
+
+    @pytest.mark.asyncio
+    async def test_stream_upload_aborts_on_size_limit(self, tmp_path, monkeypatch):
+        """Тест прерывания загрузки при превышении лимита"""
+        monkeypatch.setattr(file_utils, "UPLOAD_CHUNK_SIZE", 16)
+        monkeypatch.setitem(file_utils.MAX_FILE_SIZES, MediaType.IMAGE, 64)
+        target = tmp_path / "big.png"
+
+        with pytest.raises(HTTPException) as exc_info:
+            await stream_upload_to_disk(make_upload(PNG_HEADER + b'\x00' * 100, "big.png"), str(target))
+
+        assert exc_info.value.status_code == 400
+        assert os.listdir(tmp_path) == []
+
+    @pytest.mark.asyncio
+    async def test_stream_upload_checks_declared_size_before_writing(self, tmp_path, monkeypatch):
+        """Тест: известный заранее размер проверяется по типу из того же первого чанка, до записи"""
+        monkeypatch.setitem(file_utils.MAX_FILE_SIZES, MediaType.IMAGE, 64)
+        upload = UploadFile(file=io.BytesIO(PNG_HEADER), filename="big.png", size=1024)
+
+        with pytest.raises(HTTPException):
+            await stream_upload_to_disk(upload, str(tmp_path / "big.png"))
+        assert os.listdir(tmp_path) == []
+
+    @pytest.mark.asyncio
+    async def test_validate_rejects_mismatched_content(self):
+        """Тест отклонения файла, содержимое которого не совпадает с расширением"""
+        with pytest.raises(HTTPException):
+            await validate_and_get_media_type(make_upload(b'not really a video', "clip.mp4"))
+
+
+class TestMediaBlobStorage:
+    @pytest.fixture
+    def media_root(self, tmp_path, monkeypatch):
+        from src.services.media_service import media_service
+        monkeypatch.setattr(media_service, "media_root", str(tmp_path))
+        return tmp_path
+
+    @pytest.mark.asyncio
+    async def test_duplicate_upload_is_deduplicated(self, db_session, media_root):
+        """Тест: одинаковое содержимое хранится один раз, счетчик ссылок растет"""
+        from src.services.media_service import media_service
+
+        content = PNG_HEADER + b'cover'
+        first = await media_service.store_upload(db_session, make_upload(content, "a.png"))
+        second = await media_service.store_upload(db_session, make_upload(content, "b.PNG"))
+
+        assert first.id == second.id
+        assert second.ref_count == 2
+        assert first.storage_key == f"blobs/{first.sha256[:2]}/{first.sha256[2:4]}/{first.sha256}.png"
+        assert (media_root / first.storage_key).read_bytes() == content
+        assert os.listdir(media_root / "blobs" / "tmp") == []
+
+    @pytest.mark.asyncio
+    async def test_upload_restores_missing_blob_file(self, db_session, media_root):
+        """Тест: если файл блоба пропал (сбой сборщика мусора), повторная загрузка его восстанавливает"""
+        from src.services.media_service import media_service
+
+        content = PNG_HEADER + b'restored'
+        blob = await media_service.store_upload(db_session, make_upload(content, "a.png"))
+        (media_root / blob.storage_key).unlink()
+
+        again = await media_service.store_upload(db_session, make_upload(content, "a.png"))
+
+        assert again.id == blob.id
+        assert (media_root / blob.storage_key).read_bytes() == content
+        assert os.listdir(media_root / "blobs" / "tmp") == []
+
+    @pytest.mark.asyncio
+    async def test_reuse_blob_by_hash(self, db_session, test_user, test_project, media_root):
+        """Тест повторного использования блоба по хешу без передачи файла"""
+        from src.services.media_service import media_service
+        from src.services.project_service import ProjectService
+
+        content = PNG_HEADER + b'shared'
+        blob = await media_service.store_upload(db_session, make_upload(content, "a.png"))
+
+        # Пока пользователь не ссылается на блоб, хеш ничего не дает
+        assert await media_service.reuse_blob(db_session, blob.sha256, test_user.id) is None
+
+        await ProjectService.add_project_media(db_session, test_project.id, blob, "a.png", None)
+        reused = await media_service.reuse_blob(db_session, blob.sha256.upper(), test_user.id)
+        foreign = await media_service.reuse_blob(db_session, blob.sha256, test_user.id + 1)
+        missing = await media_service.reuse_blob(db_session, "0" * 64, test_user.id)
+
+        assert reused.id == blob.id
+        assert reused.ref_count == 2
+        assert foreign is None
+        assert missing is None
+
+    @pytest.mark.asyncio
+    async def test_project_delete_releases_blobs(self, db_session, test_user, test_project, media_root):
+        """Тест: удаление проекта уменьшает счетчики ссылок его блобов"""
+        from src.services.media_service import media_service
+        from src.services.project_service import ProjectService
+
+        blob = await media_service.store_upload(db_session, make_upload(PNG_HEADER + b'deleted', "a.png"))
+        await ProjectService.add_project_media(db_session, test_project.id, blob, "a.png", None)
+        again = await media_service.reuse_blob(db_session, blob.sha256, test_user.id)
+        await ProjectService.add_project_media(db_session, test_project.id, again, "b.png", None)
+        assert again.ref_count == 2
+
+        await ProjectService.delete_project(db_session, test_project.id, test_user.id)
+
+        await db_session.refresh(blob)
+        assert blob.ref_count == 0
+
+    @pytest.mark.asyncio
+    async def test_post_media_gets_derivatives_and_preview(self, db_session, test_user, test_project, media_root,
+                                                           monkeypatch):
+        """Тест: медиа поста из хранилища учитывается в блобе, ставится на генерацию превью и отдается с превью"""
+        from src.schemas.project import PostCreate
+        from src.services.media_service import media_service
+        from src.services.project_service import ProjectService
+        from src.tasks import tasks
+
+        enqueued = []
+        monkeypatch.setattr(tasks.generate_media_derivatives, "delay",
+                            lambda media_id, kind: enqueued.append((media_id, kind)))
+
+        blob = await media_service.store_upload(db_session, make_upload(PNG_HEADER + b'post', "a.png"))
+        project_media = await ProjectService.add_project_media(db_session, test_project.id, blob, "a.png", None)
+        assert project_media.thumbnail_url == blob.file_url
+        enqueued.clear()
+
+        post = await ProjectService.create_project_post(
+            db_session, test_project.id, PostCreate(content="Новости", media_url=blob.file_url), test_user.id
+        )
+        # Чужой или внешний URL медиа записи не создает
+        await ProjectService.create_project_post(
+            db_session, test_project.id, PostCreate(content="Ссылка", media_url="https://example.com/x.png"),
+            test_user.id
+        )
+
+        await db_session.refresh(blob)
+        assert blob.ref_count == 2
+
+        posts = await ProjectService.get_project_posts(db_session, test_project.id)
+        with_media = next(item for item in posts if item.id == post.id)
+        [media] = with_media.media
+        assert enqueued == [(media.id, "post")]
+        # Пока превью не сгенерировано, показывается оригинал
+        assert media.thumbnail_url == with_media.media_thumbnail == blob.file_url
+        assert next(item for item in posts if item.id != post.id).media == []
+
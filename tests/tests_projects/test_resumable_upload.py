@@ -0,0 +1,126 @@
+# tests/tests_projects/test_resumable_upload.py
+import hashlib
+import os
+
+import pytest
+from fastapi import HTTPException
+
+from src.database.redis_client import redis_manager
+from src.services.media_service import media_service
+from src.services.resumable_upload_service import resumable_upload_service
+
+PNG_HEADER = b'\x89PNG\r\n\x1a\n' + b'\x00' * 32
+
+
+class FakeRedis:
+    """Минимальный асинхронный Redis в памяти для сессий загрузки"""
+
+    def __init__(self):
+        self.data = {}
+
+    async def hset(self, key, field=None, value=None, mapping=None):
+        entry = self.data.setdefault(key, {})
+        for k, v in (mapping or {field: value}).items():
+            entry[k] = str(v)
+
+    async def hgetall(self, key):
+        return dict(self.data.get(key, {}))
+
+    async def expire(self, key, seconds):
+        return key in self.data
+
+    async def set(self, key, value, nx=False, ex=None):
+        if nx and key in self.data:
+            return None
+        self.data[key] = value
+        return True
+
+    async def delete(self, key):
+        return int(self.data.pop(key, None) is not None)
+
+
+async def body_of(*pieces: bytes):
+    for piece in pieces:
+        yield piece
+
+
+class TestResumableUpload:
+    @pytest.fixture(autouse=True)
+    def upload_env(self, tmp_path, monkeypatch):
+        fake_redis = FakeRedis()
+        monkeypatch.setattr(redis_manager, "redis_client", fake_redis)
+        monkeypatch.setattr(media_service, "media_root", str(tmp_path))
+        monkeypatch.setattr(resumable_upload_service, "uploads_dir", str(tmp_path / "uploads"))
+        monkeypatch.setattr(resumable_upload_service, "max_chunk_size", 64)
+        return fake_redis
+
+    @pytest.mark.asyncio
+    async def test_chunked_upload_resume_and_finalize(self, db_session, test_user, test_project):
+        """Тест загрузки чанками с повтором после обрыва и финализацией"""
+        content = PNG_HEADER + os.urandom(100)
+        session = await resumable_upload_service.create_session(
+            test_user.id, test_project.id, "cover.png", len(content), "Обложка"
+        )
+        upload_id = session["upload_id"]
+
+        await resumable_upload_service.write_chunk(upload_id, test_project.id, 0, body_of(content[:64]))
+
+        # Клиент не получил ответ и повторяет уже принятый чанк
+        with pytest.raises(HTTPException) as exc_info:
+            await resumable_upload_service.write_chunk(upload_id, test_project.id, 0, body_of(content[:64]))
+        assert exc_info.value.status_code == 409
+        assert exc_info.value.detail["received"] == 64
+
+        await resumable_upload_service.write_chunk(upload_id, test_project.id, 64, body_of(content[64:100]))
+        status = await resumable_upload_service.write_chunk(
+            upload_id, test_project.id, 100, body_of(content[100:120], content[120:])
+        )
+        assert status["received"] == len(content)
+
+        media = await resumable_upload_service.finalize(db_session, upload_id, test_project.id, test_user.id)
+
+        assert media.file_name == "cover.png"
+        assert media.description == "Обложка"
+        stored_path = media_service.url_to_path(media.file_url)
+        assert hashlib.sha256(open(stored_path, "rb").read()).hexdigest() == hashlib.sha256(content).hexdigest()
+        assert os.listdir(resumable_upload_service.uploads_dir) == []
+
+        with pytest.raises(HTTPException) as exc_info:
+            await resumable_upload_service.get_status(upload_id, test_project.id)
+        assert exc_info.value.status_code == 404
+
+    @pytest.mark.asyncio
+    async def test_oversized_chunk_and_incomplete_finalize(self, db_session, test_user, test_project):
+        """Тест отклонения слишком большого чанка и финализации неполной загрузки"""
+        session = await resumable_upload_service.create_session(test_user.id, test_project.id, "cover.png", 200)
+        upload_id = session["upload_id"]
+
+        with pytest.raises(HTTPException) as exc_info:
+            await resumable_upload_service.write_chunk(upload_id, test_project.id, 0, body_of(PNG_HEADER * 2))
+        assert exc_info.value.status_code == 413
+
+        with pytest.raises(HTTPException) as exc_info:
+            await resumable_upload_service.finalize(db_session, upload_id, test_project.id, test_user.id)
+        assert exc_info.value.status_code == 409
+
+    @pytest.mark.asyncio
+    async def test_first_chunk_content_is_sniffed(self, test_user, test_project):
+        """Тест: несоответствие содержимого расширению видно уже по первому чанку"""
+        session = await resumable_upload_service.create_session(test_user.id, test_project.id, "clip.mp4", 128)
+
+        with pytest.raises(HTTPException) as exc_info:
+            await resumable_upload_service.write_chunk(
+                session["upload_id"], test_project.id, 0, body_of(b'not a video at all')
+            )
+        assert exc_info.value.status_code == 400
+
+    @pytest.mark.asyncio
+    async def test_abort_removes_temp_file(self, test_user, test_project):
+        """Тест отмены загрузки"""
+        session = await resumable_upload_service.create_session(test_user.id, test_project.id, "cover.png", 100)
+
+        await resumable_upload_service.abort(session["upload_id"], test_project.id, test_user.id)
+
+        assert os.listdir(resumable_upload_service.uploads_dir) == []
+        with pytest.raises(HTTPException):
+            await resumable_upload_service.get_status(session["upload_id"], test_project.id)
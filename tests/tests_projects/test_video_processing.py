@@ -0,0 +1,43 @@
+# tests/tests_projects/test_video_processing.py
+import json
+
+
+class TestVideoProcessing:
+    def test_parse_probe_output(self):
+        """Тест разбора вывода ffprobe"""
+        from src.utils.video_utils import parse_probe_output
+
+        raw = json.dumps({
+            "streams": [
+                {"codec_type": "video", "codec_name": "h264", "width": 1920, "height": 1080},
+                {"codec_type": "audio", "codec_name": "aac"},
+            ],
+            "format": {"duration": "125.48"},
+        })
+
+        probe = parse_probe_output(raw)
+        assert probe == {
+            "duration": 125,
+            "video_codec": "h264",
+            "audio_codec": "aac",
+            "width": 1920,
+            "height": 1080,
+        }
+
+    def test_select_renditions_not_above_source(self):
+        """Тест выбора профилей HLS по высоте исходника"""
+        from src.utils.video_utils import select_renditions
+
+        assert [r[0] for r in select_renditions(1080)] == ["360p", "720p"]
+        assert [r[0] for r in select_renditions(480)] == ["360p"]
+        assert [r[0] for r in select_renditions(240)] == ["360p"]
+
+    def test_build_master_playlist(self):
+        """Тест мастер-плейлиста HLS"""
+        from src.utils.video_utils import build_master_playlist, select_renditions
+
+        playlist = build_master_playlist(select_renditions(1080), {"width": 1920, "height": 1080})
+
+        assert playlist.startswith("#EXTM3U")
+        assert "BANDWIDTH=896000,RESOLUTION=640x360" in playlist
+        assert "720p/index.m3u8" in playlist